@@ -0,0 +1,169 @@
+/**
+ * Stage-1 ANN Recall Report
+ *
+ * Builds LSH and HNSW indexes over a synthetic multi-asset pool of stage-1
+ * windows and reports recall@K against the brute-force scan, windows
+ * scored per query, query speedup, build time and save/load round-trip,
+ * with and without an asOf cut. Queries are held-out windows (the tail
+ * of every series is never indexed), as in live matching. The baseline
+ * line is stage1SelectByReturns, which re-vectorizes every candidate.
+ *
+ * Run: npx tsx scripts/ann_recall_report.ts [--assets 20] [--len 5000] [--window 60]
+ *        [--k 150] [--queries 50] [--out report.json]
+ */
+
+import fs from 'fs';
+import os from 'os';
+import path from 'path';
+import {
+  AnnRecallReport,
+  Stage1AnnIndex,
+  Stage1IndexOptions,
+  AnnKind,
+  annRecallReport,
+  createStage1Index,
+  loadStage1Index,
+  stage1Vector,
+} from '../src/modules/fractal/engine/retrieval.ann.js';
+import { Stage1Candidate, stage1SelectByReturns } from '../src/modules/fractal/engine/retrieval.stage1.js';
+import { rng } from '../src/common/__tests__/fixtures/random-walk.js';
+
+// ═══════════════════════════════════════════════════════════════
+// CONFIG
+// ═══════════════════════════════════════════════════════════════
+
+function arg(name: string, fallback: string): string {
+  const i = process.argv.indexOf(`--${name}`);
+  return i >= 0 && process.argv[i + 1] ? process.argv[i + 1] : fallback;
+}
+
+const ASSETS = Number(arg('assets', '20'));
+const LEN = Number(arg('len', '5000'));
+const WINDOW = Number(arg('window', '60'));
+const K = Number(arg('k', '150'));
+const QUERIES = Number(arg('queries', '50'));
+const OUT = arg('out', '');
+const HOLD_OUT = 200;
+const DAY = 86400000;
+
+const CONFIGS: Array<{ kind: AnnKind; label: string; opts: Stage1IndexOptions; probes?: number; ef?: number }> = [
+  { kind: 'lsh', label: 'lsh 16x8 p4', opts: { tables: 16, bits: 8 }, probes: 4 },
+  { kind: 'lsh', label: 'lsh 32x8 p4', opts: { tables: 32, bits: 8 }, probes: 4 },
+  { kind: 'hnsw', label: 'hnsw m16 ef200', opts: { m: 16 }, ef: 200 },
+  { kind: 'hnsw', label: 'hnsw m16 ef400', opts: { m: 16 }, ef: 400 },
+  { kind: 'hnsw', label: 'hnsw m16 ef800', opts: { m: 16 }, ef: 800 },
+];
+
+/**
+ * Log-normal closes with a slow per-asset cycle and volatility regimes
+ */
+function syntheticCloses(asset: number, n: number): number[] {
+  const rand = rng(1000 + asset);
+  const closes = [100];
+  let vol = 0.02;
+  for (let i = 1; i < n; i++) {
+    if (rand() < 0.01) vol = 0.01 + rand() * 0.04;
+    const drift = 0.002 * Math.sin(i / (30 + asset) + asset);
+    closes.push(closes[i - 1] * Math.exp(drift + (rand() - 0.5) * 2 * vol));
+  }
+  return closes;
+}
+
+// ═══════════════════════════════════════════════════════════════
+// MAIN
+// ═══════════════════════════════════════════════════════════════
+
+function main() {
+  const pool: Stage1Candidate[] = [];
+  const held: number[][] = [];
+  for (let a = 0; a < ASSETS; a++) {
+    const closes = syntheticCloses(a, LEN + HOLD_OUT);
+    for (let end = WINDOW; end < LEN; end++) {
+      pool.push({
+        endIdx: end,
+        endTs: new Date(end * DAY),
+        startTs: new Date((end - WINDOW) * DAY),
+        closes: closes.slice(end - WINDOW, end + 1),
+      });
+    }
+    for (let end = LEN; end < LEN + HOLD_OUT; end += 7) held.push(closes.slice(end - WINDOW, end + 1));
+  }
+  const pick = rng(7);
+  const queryCloses = Array.from({ length: QUERIES }, () => held[Math.floor(pick() * held.length)]);
+  const queries = queryCloses.map(stage1Vector);
+  const vectors = pool.map(c => stage1Vector(c.closes));
+  const asOf = (LEN / 2) * DAY;
+
+  console.log('═══════════════════════════════════════════════════════════');
+  console.log('     STAGE-1 ANN RECALL REPORT');
+  console.log('═══════════════════════════════════════════════════════════');
+  console.log(`${pool.length} windows (${ASSETS} assets x ${LEN - WINDOW}), dim=${WINDOW} k=${K} queries=${QUERIES}\n`);
+  console.log(
+    'index'.padEnd(16),
+    'filter'.padEnd(6),
+    'recall'.padStart(7),
+    'min'.padStart(6),
+    'scored'.padStart(8),
+    'ann ms'.padStart(8),
+    'exact ms'.padStart(9),
+    'speedup'.padStart(8),
+    'build s'.padStart(8),
+    'load ms'.padStart(8)
+  );
+
+  const scanRuns = Math.min(5, QUERIES);
+  const t = Date.now();
+  for (let q = 0; q < scanRuns; q++) {
+    stage1SelectByReturns(queryCloses[q], pool, {
+      enabled: true,
+      stage1Mode: 'ret_fast',
+      stage1TopK: K,
+      stage1MinSim: -1,
+      stage2TopN: K,
+    });
+  }
+  const scanMs = (Date.now() - t) / scanRuns;
+  console.log('scan (ret_fast)'.padEnd(16), 'all'.padEnd(6), '1.000'.padStart(7), '1.00'.padStart(6),
+    String(pool.length).padStart(8), scanMs.toFixed(2).padStart(8));
+
+  const rows: Array<AnnRecallReport & { label: string; filter: string; buildS: number; loadMs: number; fileMb: number }> = [];
+  const dir = fs.mkdtempSync(path.join(os.tmpdir(), 'ann-report-'));
+  for (const cfg of CONFIGS) {
+    const t0 = Date.now();
+    let index: Stage1AnnIndex = createStage1Index(cfg.kind, WINDOW, cfg.opts, 'report');
+    pool.forEach((c, i) => index.insertVector(c.endIdx, c.endTs.getTime(), vectors[i]));
+    const buildS = (Date.now() - t0) / 1000;
+
+    const file = path.join(dir, `${cfg.kind}.ann`);
+    index.save(file);
+    const t1 = Date.now();
+    index = loadStage1Index(file);
+    const loadMs = Date.now() - t1;
+    const fileMb = fs.statSync(file).size / 1e6;
+
+    for (const [filter, maxEndTs] of [['all', undefined], ['asOf', asOf]] as const) {
+      const r = annRecallReport(index, queries, K, { probes: cfg.probes, ef: cfg.ef, maxEndTs });
+      rows.push({ ...r, label: cfg.label, filter, buildS, loadMs, fileMb });
+      console.log(
+        cfg.label.padEnd(16),
+        filter.padEnd(6),
+        r.recall.toFixed(3).padStart(7),
+        r.minRecall.toFixed(2).padStart(6),
+        r.avgCandidates.toFixed(0).padStart(8),
+        r.annMs.toFixed(2).padStart(8),
+        r.exactMs.toFixed(2).padStart(9),
+        `${r.speedup.toFixed(1)}x`.padStart(8),
+        buildS.toFixed(1).padStart(8),
+        String(loadMs).padStart(8)
+      );
+    }
+  }
+  fs.rmSync(dir, { recursive: true, force: true });
+
+  if (OUT) {
+    fs.writeFileSync(OUT, JSON.stringify({ pool: pool.length, dim: WINDOW, k: K, scanMs, rows }, null, 2));
+    console.log(`\nWritten: ${OUT}`);
+  }
+}
+
+main();
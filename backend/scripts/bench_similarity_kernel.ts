@@ -0,0 +1,157 @@
+/**
+ * Similarity Kernel Micro-Benchmark
+ *
+ * Legacy matcher shape (number[] per candidate, norms recomputed per pair,
+ * object per candidate, full sort, slice) vs the shared kernel (packed
+ * Float64Array, cosineRows, heap top-K), at 10k / 100k / 1M candidates.
+ * Both paths must pick the same top-K; the script exits 1 if they differ.
+ *
+ * Run: npx tsx scripts/bench_similarity_kernel.ts [--dim 30] [--k 25] [--reps 5] [--sizes 10000,100000,1000000]
+ */
+
+import { packRows, rowNorms, cosineRows, pearsonRows, topK } from '../src/common/similarity.kernel.js';
+import { rng } from '../src/common/__tests__/fixtures/random-walk.js';
+
+// ═══════════════════════════════════════════════════════════════
+// CONFIG
+// ═══════════════════════════════════════════════════════════════
+
+function arg(name: string, fallback: string): string {
+  const i = process.argv.indexOf(`--${name}`);
+  return i >= 0 && process.argv[i + 1] ? process.argv[i + 1] : fallback;
+}
+
+const DIM = Number(arg('dim', '30'));
+const K = Number(arg('k', '25'));
+const REPS = Number(arg('reps', '5'));
+const SIZES = arg('sizes', '10000,100000,1000000').split(',').map(Number);
+
+function bestOf(reps: number, fn: () => void): number {
+  let best = Infinity;
+  for (let r = 0; r < reps; r++) {
+    const t0 = process.hrtime.bigint();
+    fn();
+    best = Math.min(best, Number(process.hrtime.bigint() - t0) / 1e6);
+  }
+  return best;
+}
+
+// ═══════════════════════════════════════════════════════════════
+// LEGACY SHAPE
+// ═══════════════════════════════════════════════════════════════
+
+function legacyCosineTopK(q: number[], candidates: number[][], k: number) {
+  let qn = 0;
+  for (let i = 0; i < q.length; i++) qn += q[i] * q[i];
+  qn = Math.sqrt(qn) || 1;
+
+  const scored: Array<{ index: number; score: number }> = [];
+  for (let c = 0; c < candidates.length; c++) {
+    const v = candidates[c];
+    let norm = 0;
+    for (let i = 0; i < v.length; i++) norm += v[i] * v[i];
+    norm = Math.sqrt(norm) || 1;
+    let dot = 0;
+    for (let i = 0; i < q.length; i++) dot += q[i] * v[i];
+    scored.push({ index: c, score: dot / (qn * norm) });
+  }
+  scored.sort((a, b) => b.score - a.score);
+  return scored.slice(0, k);
+}
+
+function legacyPearsonTopK(q: number[], candidates: number[][], k: number) {
+  const scored: Array<{ index: number; score: number }> = [];
+  for (let c = 0; c < candidates.length; c++) {
+    const A = q.slice();
+    const B = candidates[c].slice();
+    const n = A.length;
+    const meanA = A.reduce((s, x) => s + x, 0) / n;
+    const meanB = B.reduce((s, x) => s + x, 0) / n;
+    let num = 0;
+    let denA = 0;
+    let denB = 0;
+    for (let i = 0; i < n; i++) {
+      const da = A[i] - meanA;
+      const db = B[i] - meanB;
+      num += da * db;
+      denA += da * da;
+      denB += db * db;
+    }
+    const den = Math.sqrt(denA * denB);
+    scored.push({ index: c, score: den === 0 ? 0 : num / den });
+  }
+  scored.sort((a, b) => b.score - a.score);
+  return scored.slice(0, k);
+}
+
+// ═══════════════════════════════════════════════════════════════
+// MAIN
+// ═══════════════════════════════════════════════════════════════
+
+function main() {
+  console.log('═══════════════════════════════════════════════════════════');
+  console.log('     SIMILARITY KERNEL MICRO-BENCHMARK');
+  console.log('═══════════════════════════════════════════════════════════');
+  console.log(`dim=${DIM} k=${K} reps=${REPS} (best of)\n`);
+  console.log(
+    'candidates'.padStart(10),
+    'metric'.padStart(8),
+    'legacy ms'.padStart(11),
+    'kernel ms'.padStart(11),
+    'kernel+norms ms'.padStart(16),
+    'speedup'.padStart(9)
+  );
+
+  let mismatches = 0;
+  for (const n of SIZES) {
+    const rand = rng(n);
+    const candidates = Array.from({ length: n }, () => Array.from({ length: DIM }, () => rand() * 2 - 1));
+    const q = Array.from({ length: DIM }, () => rand() * 2 - 1);
+
+    // Matrix and norms are built once per dataset version, not per query
+    const m = packRows(candidates, DIM);
+    const norms = rowNorms(m);
+    const scores = new Float64Array(n);
+
+    let legacy = legacyCosineTopK(q, candidates, K);
+    let kernel = topK(scores, K);
+    const tLegacy = bestOf(REPS, () => { legacy = legacyCosineTopK(q, candidates, K); });
+    const tKernel = bestOf(REPS, () => {
+      cosineRows(m, q, scores, { norms });
+      kernel = topK(scores, K);
+    });
+    const tKernelNorms = bestOf(REPS, () => {
+      cosineRows(m, q, scores);
+      kernel = topK(scores, K);
+    });
+    if (legacy.map(x => x.index).join() !== kernel.map(x => x.index).join()) mismatches++;
+    console.log(
+      String(n).padStart(10), 'cosine'.padStart(8),
+      tLegacy.toFixed(1).padStart(11), tKernel.toFixed(1).padStart(11), tKernelNorms.toFixed(1).padStart(16),
+      `${(tLegacy / tKernel).toFixed(1)}x`.padStart(9)
+    );
+
+    let legacyP = legacyPearsonTopK(q, candidates, K);
+    let kernelP = topK(scores, K);
+    const tLegacyP = bestOf(REPS, () => { legacyP = legacyPearsonTopK(q, candidates, K); });
+    const tKernelP = bestOf(REPS, () => {
+      pearsonRows(m, q, scores);
+      kernelP = topK(scores, K);
+    });
+    if (legacyP.map(x => x.index).join() !== kernelP.map(x => x.index).join()) mismatches++;
+    console.log(
+      String(n).padStart(10), 'pearson'.padStart(8),
+      tLegacyP.toFixed(1).padStart(11), tKernelP.toFixed(1).padStart(11), '-'.padStart(16),
+      `${(tLegacyP / tKernelP).toFixed(1)}x`.padStart(9)
+    );
+  }
+
+  console.log('');
+  if (mismatches) {
+    console.error(`❌ ${mismatches} top-K mismatches between legacy and kernel`);
+    process.exit(1);
+  }
+  console.log('✅ Legacy and kernel top-K identical at every size');
+}
+
+main();
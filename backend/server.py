@@ -2,78 +2,1484 @@
 FastAPI wrapper for TypeScript Fractal Backend
 Proxies all /api/* requests to Node.js TypeScript backend running on port 8002
 """
+import asyncio
+import bisect
+import hashlib
+import json
 import os
+import re
+import sqlite3
 import subprocess
 import threading
 import time
+import uuid
+import zlib
+from collections import OrderedDict
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import lru_cache
+from urllib.parse import urlencode
+
 import httpx
 from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from contextlib import asynccontextmanager
 
-TS_BACKEND_URL = "http://127.0.0.1:8002"
-ts_process = None
+# Optional codecs for response compression
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
+TS_BACKEND_PORT = int(os.environ.get("TS_BACKEND_PORT", "8002"))
+TS_BACKEND_URL = f"http://127.0.0.1:{TS_BACKEND_PORT}"
 
-def start_ts_backend():
-    """Start TypeScript backend in background"""
-    global ts_process
+# Node backend worker pool: N processes on consecutive ports. With N > 1 the
+# last worker is dedicated to heavy admin/sim routes.
+TS_WORKERS = max(1, int(os.environ.get("TS_BACKEND_WORKERS", "2")))
+# Compute threads per Node worker (FRACTAL_COMPUTE_WORKERS). The pool's own
+# default, min(4, cpus - 1), would be taken by each of the TS_WORKERS
+# processes; split the cores between them instead, one per event loop aside.
+COMPUTE_WORKERS = int(
+    os.environ.get("FRACTAL_COMPUTE_WORKERS") or max(1, min(4, (os.cpu_count() or 1) // TS_WORKERS - 1))
+)
+# Workers started elsewhere (e.g. scripts/fixture_replay.py stand-ins): not spawned or restarted here
+TS_BACKEND_EXTERNAL = os.environ.get("TS_BACKEND_EXTERNAL", "0") == "1"
+HEAVY_PATH_KEYWORDS = ["admin/"]
+WORKER_HEALTH_INTERVAL_SEC = float(os.environ.get("TS_WORKER_HEALTH_INTERVAL_SEC", "5"))
+WORKER_HEALTH_FAILURES = int(os.environ.get("TS_WORKER_HEALTH_FAILURES", "3"))
+WORKER_BOOT_GRACE_SEC = float(os.environ.get("TS_WORKER_BOOT_GRACE_SEC", "120"))
+WORKER_MAX_BACKOFF_SEC = float(os.environ.get("TS_WORKER_MAX_BACKOFF_SEC", "60"))
+WORKER_DRAIN_TIMEOUT_SEC = float(os.environ.get("TS_WORKER_DRAIN_TIMEOUT_SEC", "30"))
+
+# Readiness gate: each worker is prewarmed (series, window indexes, focus
+# packs) before /ready flips. Until then /api/* traffic is queued
+# (PROXY_READINESS=queue), shed with 503 (=shed) or let through (=off).
+READINESS_MODE = os.environ.get("PROXY_READINESS", "queue")
+READY_QUEUE_TIMEOUT_SEC = float(os.environ.get("PROXY_READY_QUEUE_TIMEOUT_SEC", "60"))
+READY_QUEUE_MAX = int(os.environ.get("PROXY_READY_QUEUE_MAX", "200"))
+READINESS_BYPASS_KEYWORDS = ["health", "ops/prewarm"]
+PREWARM_PATH = "/api/ops/prewarm"
+PREWARM_TIMEOUT_SEC = float(os.environ.get("TS_PREWARM_TIMEOUT_SEC", "600"))
+
+# Admission control: each request is admitted into a lane (interactive reads,
+# admin writes, heavy compute) with its own concurrency limit and bounded
+# FIFO queue. A full lane answers 429 + Retry-After instead of piling onto
+# Node, so one nightly sweep cannot starve terminal/focus reads.
+PROXY_LANES = os.environ.get("PROXY_LANES", "1") == "1"
+HEAVY_LANE_KEYWORDS = ["autopilot/run", "backtest"]
+
+
+def lane_config(name: str, concurrency: int, queue: int, queue_timeout: float) -> dict:
+    prefix = f"PROXY_LANE_{name.upper()}_"
+    return {
+        "concurrency": int(os.environ.get(prefix + "CONCURRENCY", str(concurrency))),
+        "queue": int(os.environ.get(prefix + "QUEUE", str(queue))),
+        "queue_timeout": float(os.environ.get(prefix + "QUEUE_TIMEOUT_SEC", str(queue_timeout))),
+    }
+
+
+LANES = {
+    "interactive": lane_config("interactive", 64, 256, 10.0),
+    "admin": lane_config("admin", 8, 32, 30.0),
+    "heavy": lane_config("heavy", 2, 4, 30.0),
+}
+
+# Upstream connection pools, one long-lived client per route class.
+# Longer timeout for simulation/optimization endpoints.
+LONG_TIMEOUT_KEYWORDS = ["optimize", "sweep", "certify", "cert/run", "sim"]
+ROUTE_CLASSES = {
+    "default": {
+        "timeout": 60.0,
+        "max_connections": int(os.environ.get("PROXY_POOL_MAX_CONNECTIONS", "100")),
+        "max_keepalive": int(os.environ.get("PROXY_POOL_MAX_KEEPALIVE", "20")),
+    },
+    "long": {
+        "timeout": 900.0,
+        "max_connections": int(os.environ.get("PROXY_LONG_POOL_MAX_CONNECTIONS", "8")),
+        "max_keepalive": int(os.environ.get("PROXY_LONG_POOL_MAX_KEEPALIVE", "4")),
+    },
+}
+POOL_KEEPALIVE_EXPIRY = float(os.environ.get("PROXY_POOL_KEEPALIVE_EXPIRY", "30"))
+# HTTP/2 (h2c, prior knowledge) needs the `h2` package and an HTTP/2 upstream
+PROXY_HTTP2 = os.environ.get("PROXY_HTTP2", "0") == "1"
+upstream_clients: dict = {}
+
+# Dataset-versioned response cache for read-only terminal endpoints.
+# Entries are valid while the backend's dataset version token is unchanged.
+PROXY_CACHE_ENABLED = os.environ.get("PROXY_CACHE", "1") == "1"
+CACHE_PATHS = {
+    p.strip().strip("/")
+    for p in os.environ.get(
+        "PROXY_CACHE_PATHS",
+        "fractal/v2.1/terminal,fractal/v2.1/focus-pack,spx/v2.1/focus-pack,"
+        "spx/v2.1/horizons,spx/v2.1/phases",
+    ).split(",")
+    if p.strip()
+}
+CACHE_MAX_BYTES = int(os.environ.get("PROXY_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+CACHE_TTL_SEC = float(os.environ.get("PROXY_CACHE_TTL_SEC", "3600"))
+CACHE_SWR_SEC = float(os.environ.get("PROXY_CACHE_SWR_SEC", "300"))
+CACHE_DIR = os.environ.get("PROXY_CACHE_DIR", "")
+DATASET_VERSION_PATH = "/api/ops/dataset-version"
+DATASET_VERSION_TTL_SEC = float(os.environ.get("PROXY_DATASET_VERSION_TTL_SEC", "30"))
+
+# Single-flight coalescing: identical concurrent GETs share one upstream call
+PROXY_COALESCE_ENABLED = os.environ.get("PROXY_COALESCE", "1") == "1"
+COALESCE_PATHS = {
+    p.strip().strip("/")
+    for p in os.environ.get("PROXY_COALESCE_PATHS", ",".join(sorted(CACHE_PATHS))).split(",")
+    if p.strip()
+}
+# Request headers that can change the upstream answer
+COALESCE_VARY_HEADERS = ("accept", "authorization", "cookie")
+
+# Async job mode for long-running routes: opt in with `Prefer: respond-async`
+# (or `?_async=1`) to get 202 + job id instead of holding the connection.
+JOBS_DB_PATH = os.environ.get(
+    "PROXY_JOBS_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "tmp", "proxy_jobs.sqlite")
+)
+JOBS_CONCURRENCY = int(os.environ.get("PROXY_JOBS_CONCURRENCY", "2"))
+# Finished jobs (and their result BLOBs) are deleted this long after finishing
+JOBS_TTL_SEC = float(os.environ.get("PROXY_JOBS_TTL_SEC", str(24 * 3600)))
+JOBS_PRUNE_INTERVAL_SEC = float(os.environ.get("PROXY_JOBS_PRUNE_INTERVAL_SEC", "600"))
+
+# Streaming passthrough: long-running routes and any response without a
+# known length or larger than the threshold are forwarded chunk by chunk.
+PROXY_STREAMING = os.environ.get("PROXY_STREAMING", "1") == "1"
+STREAM_THRESHOLD_BYTES = int(os.environ.get("PROXY_STREAM_THRESHOLD_BYTES", str(256 * 1024)))
+
+# Response compression and conditional GET. Encodings in server preference
+# order; brotli/zstd only when their packages are installed.
+PROXY_COMPRESSION = os.environ.get("PROXY_COMPRESSION", "1") == "1"
+COMPRESS_MIN_BYTES = int(os.environ.get("PROXY_COMPRESS_MIN_BYTES", "1024"))
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript")
+PROXY_ETAGS = os.environ.get("PROXY_ETAGS", "1") == "1"
+CONDITIONAL_HEADERS = ("if-none-match", "if-modified-since")
+
+# Per-route metrics: latency histograms (seconds) and payload sizes (bytes)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0)
+SIZE_BUCKETS = (1024, 10 * 1024, 100 * 1024, 1024 * 1024, 10 * 1024 * 1024, 100 * 1024 * 1024)
+
+# RFC 7230 hop-by-hop headers, never forwarded in either direction
+HOP_BY_HOP_HEADERS = {
+    "connection",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "te",
+    "trailers",
+    "transfer-encoding",
+    "upgrade",
+}
+
+
+@dataclass
+class BackendWorker:
+    index: int
+    port: int
+    heavy: bool = False
+    process: object = None
+    healthy: bool = False
+    outstanding: int = 0
+    health_failures: int = 0
+    restarts: int = 0
+    started_at: float = 0.0
+    next_restart_at: float = 0.0
+    draining: bool = False
+    warm: bool = False
+    warming: bool = False
+    prewarm_failures: int = 0
+    next_prewarm_at: float = 0.0
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def snapshot(self) -> dict:
+        return {
+            "index": self.index,
+            "port": self.port,
+            "heavy": self.heavy,
+            "pid": self.process.pid if self.process else None,
+            "alive": self.alive(),
+            "healthy": self.healthy,
+            "warm": self.warm,
+            "outstanding": self.outstanding,
+            "restarts": self.restarts,
+            "draining": self.draining,
+        }
+
+
+backend_workers = [
+    BackendWorker(index=i, port=TS_BACKEND_PORT + i, heavy=TS_WORKERS > 1 and i == TS_WORKERS - 1)
+    for i in range(TS_WORKERS)
+]
+
+
+def is_heavy_path(path: str) -> bool:
+    return route_class(path) == "long" or any(kw in path for kw in HEAVY_PATH_KEYWORDS)
+
+
+def pick_worker(path: str) -> BackendWorker:
+    """Heavy paths go to the dedicated worker, the rest least-outstanding-first"""
+    candidates = [w for w in backend_workers if w.healthy and not w.draining]
+    if is_heavy_path(path):
+        heavy = [w for w in candidates if w.heavy]
+        if heavy:
+            return heavy[0]
+    interactive = [w for w in candidates if not w.heavy] or candidates
+    if not interactive:
+        # Nothing healthy yet: let the connect error surface as 503
+        return backend_workers[0]
+    return min(interactive, key=lambda w: w.outstanding)
+
+
+def acquire_worker(path: str) -> BackendWorker:
+    worker = pick_worker(path)
+    worker.outstanding += 1
+    return worker
+
+
+def release_worker(worker: BackendWorker):
+    worker.outstanding -= 1
+
+
+def route_class(path: str) -> str:
+    """Classify an /api/* path into a connection pool"""
+    return "long" if any(kw in path for kw in LONG_TIMEOUT_KEYWORDS) else "default"
+
+
+def create_upstream_clients() -> dict:
+    """Build one pooled keep-alive client per route class"""
+    http2 = PROXY_HTTP2
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            print("[Proxy] Warning: PROXY_HTTP2=1 but `h2` is not installed, using HTTP/1.1")
+            http2 = False
+
+    clients = {}
+    for name, cfg in ROUTE_CLASSES.items():
+        clients[name] = httpx.AsyncClient(
+            base_url=TS_BACKEND_URL,
+            timeout=cfg["timeout"],
+            limits=httpx.Limits(
+                max_connections=cfg["max_connections"],
+                max_keepalive_connections=cfg["max_keepalive"],
+                keepalive_expiry=POOL_KEEPALIVE_EXPIRY,
+            ),
+            http1=not http2,
+            http2=http2,
+        )
+    pools = ", ".join(f"{name}={cfg['max_connections']}" for name, cfg in ROUTE_CLASSES.items())
+    print(f"[Proxy] Upstream pools: {pools} (http2={http2})")
+    return clients
+
+
+def filter_headers(headers, drop=()) -> dict:
+    """Strip hop-by-hop headers (plus any listed in the Connection header)"""
+    connection_tokens = {
+        t.strip().lower() for t in headers.get("connection", "").split(",") if t.strip()
+    }
+    excluded = HOP_BY_HOP_HEADERS | connection_tokens | set(drop)
+    return {k: v for k, v in headers.items() if k.lower() not in excluded}
+
+
+def should_stream(path: str, resp: httpx.Response) -> bool:
+    """Decide whether to pass the upstream body through without buffering"""
+    if not PROXY_STREAMING:
+        return False
+    if route_class(path) == "long":
+        return True
+    length = resp.headers.get("content-length")
+    if length is None or not length.isdigit():
+        return True
+    return int(length) > STREAM_THRESHOLD_BYTES
+
+
+class Histogram:
+    """Fixed-bucket histogram; the last slot counts values above every bound"""
+
+    __slots__ = ("bounds", "counts", "total", "count")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th value.
+
+        Values above every bound report the last bound (read it as "at
+        least"), since JSON cannot carry infinity.
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.bounds, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return self.bounds[-1]
+
+    def summary(self, scale: float = 1.0) -> dict:
+        return {
+            "mean": round(self.total / self.count * scale, 3) if self.count else 0.0,
+            "p50": self.quantile(0.50) * scale,
+            "p95": self.quantile(0.95) * scale,
+            "p99": self.quantile(0.99) * scale,
+        }
+
+    def prometheus(self, name: str, labels: str) -> list:
+        lines = []
+        cumulative = 0
+        for bound, n in zip(self.bounds, self.counts):
+            cumulative += n
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum{{{labels}}} {self.total}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+
+@dataclass
+class RouteMetrics:
+    total: Histogram = field(default_factory=lambda: Histogram(LATENCY_BUCKETS))
+    upstream: Histogram = field(default_factory=lambda: Histogram(LATENCY_BUCKETS))
+    overhead: Histogram = field(default_factory=lambda: Histogram(LATENCY_BUCKETS))
+    size: Histogram = field(default_factory=lambda: Histogram(SIZE_BUCKETS))
+    in_flight: int = 0
+    requests: int = 0
+    upstream_errors: int = 0
+    timeouts: int = 0
+    status: dict = field(default_factory=dict)
+
+
+class ProxyMetrics:
+    """Per-route-template latency, size and error accounting"""
+
+    def __init__(self):
+        self.routes: dict = {}
+
+    def route(self, template: str) -> RouteMetrics:
+        metrics = self.routes.get(template)
+        if metrics is None:
+            metrics = self.routes[template] = RouteMetrics()
+        return metrics
+
+    def started(self, template: str):
+        self.route(template).in_flight += 1
+
+    def finished(self, template: str, elapsed: float, upstream: float, status: int, size, outcome: str):
+        m = self.route(template)
+        m.in_flight -= 1
+        m.requests += 1
+        m.total.observe(elapsed)
+        m.upstream.observe(upstream)
+        m.overhead.observe(max(0.0, elapsed - upstream))
+        if size is not None:
+            m.size.observe(size)
+        status_class = f"{status // 100}xx"
+        m.status[status_class] = m.status.get(status_class, 0) + 1
+        if outcome == "timeout":
+            m.timeouts += 1
+        elif outcome == "upstream_error" or status >= 500:
+            m.upstream_errors += 1
+
+    def observe_size(self, template: str, size: int):
+        self.route(template).size.observe(size)
+
+
+proxy_metrics = ProxyMetrics()
+# Seconds spent waiting on the backend during the current request
+upstream_timer: ContextVar = ContextVar("upstream_timer", default=None)
+
+ID_SEGMENT = re.compile(r"^(\d+|[0-9a-fA-F]{16,}|[0-9a-fA-F-]{36}|\d{4}-\d{2}-\d{2})$")
+
+
+@lru_cache(maxsize=4096)
+def route_template(path: str) -> str:
+    """Collapse ids, numbers and dates so metrics group by route"""
+    parts = [":id" if ID_SEGMENT.match(p) else p for p in path.strip("/").split("/")]
+    return "/api/" + "/".join(parts)
+
+
+def add_upstream_time(seconds: float):
+    timer = upstream_timer.get()
+    if timer is not None:
+        timer[0] += seconds
+
+
+def supported_encodings() -> list:
+    encodings = []
+    if zstandard is not None:
+        encodings.append("zstd")
+    if brotli is not None:
+        encodings.append("br")
+    encodings.append("gzip")
+    return encodings
+
+
+def choose_encoding(accept_encoding: str):
+    """Best supported encoding the client accepts (q > 0), or None"""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    for encoding in supported_encodings():
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+class BrotliStream:
+    """brotli.Compressor with the zlib-style compress/flush interface"""
+
+    def __init__(self):
+        self.compressor = brotli.Compressor(quality=4)
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self.compressor.finish()
+
+
+def make_compressor(encoding: str):
+    """Incremental compressor exposing compress(chunk) / flush()"""
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=3).compressobj()
+    if encoding == "br":
+        return BrotliStream()
+    return zlib.compressobj(5, zlib.DEFLATED, 31)
+
+
+def compress_body(encoding: str, data: bytes) -> bytes:
+    compressor = make_compressor(encoding)
+    return compressor.compress(data) + compressor.flush()
+
+
+def is_compressible(headers) -> bool:
+    content_type = headers.get("content-type", "")
+    return "content-encoding" not in headers and any(t in content_type for t in COMPRESSIBLE_TYPES)
+
+
+def etag_for(version: str, key: str) -> str:
+    """Strong validator for a cached route: same dataset version + URL, same body"""
+    return '"' + hashlib.sha256(f"{version}|{key}".encode()).hexdigest()[:32] + '"'
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """Strong ETags must differ per content-coding ("abc" becomes "abc-gzip")"""
+    return f'{etag[:-1]}-{encoding}"' if etag.endswith('"') else etag
+
+
+def base_etag(etag: str) -> str:
+    etag = etag.strip().removeprefix("W/")
+    for encoding in ("gzip", "br", "zstd"):
+        suffix = f'-{encoding}"'
+        if etag.endswith(suffix):
+            return etag[: -len(suffix)] + '"'
+    return etag
+
+
+def etag_matches(if_none_match, etag):
+    """The If-None-Match token matching `etag` (any content-coding), else None"""
+    if not if_none_match or not etag:
+        return None
+    if if_none_match.strip() == "*":
+        return etag
+    # If-None-Match uses weak comparison
+    target = base_etag(etag)
+    for token in if_none_match.split(","):
+        if token.strip() and base_etag(token) == target:
+            return token.strip()
+    return None
+
+
+def add_vary(vary, name: str = "Accept-Encoding") -> str:
+    """`vary` with `name` added, keeping upstream entries (e.g. Origin from CORS)"""
+    tokens = [t.strip() for t in (vary or "").split(",") if t.strip()]
+    if any(t == "*" or t.lower() == name.lower() for t in tokens):
+        return ", ".join(tokens)
+    return ", ".join(tokens + [name])
+
+
+def not_modified(etag: str, headers=None) -> Response:
+    out = {"etag": etag}
+    for name in ("cache-control", "vary", "x-proxy-cache"):
+        if headers and name in headers:
+            out[name] = headers[name]
+    return Response(status_code=304, headers=out)
+
+
+def finalize_response(request: Request, response: Response) -> Response:
+    """Answer If-None-Match with 304 and negotiate compression.
+
+    Cached routes arrive already encoded (cached_response) and pass through.
+    """
+    accept_encoding = request.headers.get("accept-encoding", "")
+    encoding = choose_encoding(accept_encoding) if PROXY_COMPRESSION and accept_encoding else None
+
+    if isinstance(response, StreamingResponse):
+        if encoding is None or not is_compressible(response.headers):
+            return response
+        upstream_iterator = response.body_iterator
+
+        async def compressed():
+            compressor = make_compressor(encoding)
+            async for chunk in upstream_iterator:
+                out = compressor.compress(chunk)
+                if out:
+                    yield out
+            yield compressor.flush()
+
+        response.body_iterator = compressed()
+        response.headers["content-encoding"] = encoding
+        response.headers["vary"] = add_vary(response.headers.get("vary"))
+        return response
+
+    body = response.body
+    headers = {k: v for k, v in response.headers.items() if k != "content-length"}
+    compress = encoding is not None and len(body) >= COMPRESS_MIN_BYTES and is_compressible(headers)
+    changed = False
+
+    if request.method == "GET" and response.status_code == 200 and PROXY_ETAGS:
+        if "etag" not in headers:
+            headers["etag"] = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        if compress:
+            headers["etag"] = encoded_etag(headers["etag"], encoding)
+        changed = headers["etag"] != response.headers.get("etag")
+        if etag_matches(request.headers.get("if-none-match"), headers["etag"]):
+            return not_modified(headers["etag"], headers)
+
+    if compress:
+        body = compress_body(encoding, body)
+        headers["content-encoding"] = encoding
+        headers["vary"] = add_vary(headers.get("vary"))
+        changed = True
+
+    if not changed:
+        return response
+    return Response(content=body, status_code=response.status_code, headers=headers)
+
+
+@dataclass
+class CachedResponse:
+    status_code: int
+    headers: dict
+    content: bytes
+    version: str = ""
+    stored_at: float = 0.0
+    # content-coding -> compressed content, filled on first request for it
+    encoded: dict = field(default_factory=dict)
+
+    @property
+    def size(self) -> int:
+        return (
+            len(self.content)
+            + sum(len(v) for v in self.encoded.values())
+            + sum(len(k) + len(v) for k, v in self.headers.items())
+        )
+
+    def to_response(self, cache_status: str = "", etag: str = "", encoding: str = "") -> Response:
+        headers = dict(self.headers)
+        content = self.content
+        if cache_status:
+            headers["x-proxy-cache"] = cache_status
+        if etag and self.status_code == 200:
+            headers["etag"] = encoded_etag(etag, encoding) if encoding else etag
+        if encoding:
+            content = self.encoded[encoding]
+            headers["content-encoding"] = encoding
+            headers["vary"] = add_vary(headers.get("vary"))
+        return Response(
+            content=content,
+            status_code=self.status_code,
+            headers=headers,
+            media_type=self.headers.get("content-type"),
+        )
+
+
+class ResponseCache:
+    """In-memory LRU bounded by total bytes, with an optional on-disk tier"""
+
+    def __init__(self, max_bytes: int, disk_dir: str = ""):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self.bytes = 0
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "stale": 0,
+            "bypass": 0,
+            "not_modified": 0,
+            "evictions": 0,
+            "disk_hits": 0,
+        }
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def get(self, key: str):
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            return entry
+        entry = self._disk_get(key)
+        if entry is not None:
+            self.stats["disk_hits"] += 1
+            self._memory_set(key, entry)
+        return entry
+
+    def set(self, key: str, entry: CachedResponse):
+        self._memory_set(key, entry)
+        self._disk_set(key, entry)
+
+    def add_encoded(self, key: str, entry: CachedResponse, encoding: str, body: bytes):
+        """Keep a compressed variant next to the entry (and count its bytes)"""
+        if encoding in entry.encoded:
+            return
+        entry.encoded[encoding] = body
+        if self.entries.get(key) is entry:
+            self.bytes += len(body)
+            self._evict()
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+
+    def snapshot(self) -> dict:
+        return {**self.stats, "entries": len(self.entries), "bytes": self.bytes, "maxBytes": self.max_bytes}
+
+    def _memory_set(self, key: str, entry: CachedResponse):
+        if entry.size > self.max_bytes:
+            return
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.bytes -= old.size
+        self.entries[key] = entry
+        self.bytes += entry.size
+        self._evict()
+
+    def _evict(self):
+        while self.bytes > self.max_bytes and self.entries:
+            _, evicted = self.entries.popitem(last=False)
+            self.bytes -= evicted.size
+            self.stats["evictions"] += 1
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, hashlib.sha256(key.encode()).hexdigest() + ".bin")
+
+    def _disk_get(self, key: str):
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._disk_path(key), "rb") as f:
+                meta = json.loads(f.readline())
+                content = f.read()
+        except (OSError, ValueError):
+            return None
+        return CachedResponse(content=content, **meta)
+
+    def _disk_set(self, key: str, entry: CachedResponse):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        meta = {
+            "status_code": entry.status_code,
+            "headers": entry.headers,
+            "version": entry.version,
+            "stored_at": entry.stored_at,
+        }
+        try:
+            with open(path + ".tmp", "wb") as f:
+                f.write(json.dumps(meta).encode() + b"\n")
+                f.write(entry.content)
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            print(f"[Proxy] Cache disk write failed: {e}")
+
+
+class SingleFlight:
+    """Share one in-flight call per key between concurrent callers"""
+
+    def __init__(self):
+        self.inflight: dict = {}
+        self.stats = {"upstream_calls": 0, "coalesced": 0}
+
+    async def do(self, key: str, fn):
+        task = self.inflight.get(key)
+        if task is None:
+            # Own task, so a disconnecting first caller does not cancel the rest
+            task = asyncio.create_task(fn())
+            self.inflight[key] = task
+            self.stats["upstream_calls"] += 1
+            task.add_done_callback(lambda t: self._done(key, t))
+        else:
+            self.stats["coalesced"] += 1
+        # Errors fan out to every waiter
+        return await asyncio.shield(task)
+
+    def snapshot(self) -> dict:
+        return {**self.stats, "inflight": len(self.inflight)}
+
+    def _done(self, key: str, task: asyncio.Task):
+        if self.inflight.get(key) is task:
+            del self.inflight[key]
+        if not task.cancelled():
+            # Mark the exception retrieved in case every waiter went away
+            task.exception()
+
+
+class LaneFull(Exception):
+    def __init__(self, lane: str, retry_after: int):
+        super().__init__(f"{lane} lane is full")
+        self.lane = lane
+        self.retry_after = retry_after
+
+
+class Lane:
+    """Concurrency limit plus bounded FIFO queue for one class of routes"""
+
+    def __init__(self, name: str, concurrency: int, queue: int, queue_timeout: float):
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.queue_max = max(0, queue)
+        self.queue_timeout = queue_timeout
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.queue_wait = Histogram(LATENCY_BUCKETS)
+        self.service = Histogram(LATENCY_BUCKETS)
+
+    def retry_after(self) -> int:
+        """Rough seconds until a slot frees up, from the mean service time"""
+        mean = self.service.total / self.service.count if self.service.count else 1.0
+        return int(min(300, max(1, mean * (self.waiting + 1) / self.concurrency)))
+
+    async def acquire(self, bounded: bool = True) -> float:
+        """Take a slot, waiting in the queue if needed; returns the admit time"""
+        t0 = time.monotonic()
+        if self.semaphore.locked() or self.waiting:
+            if bounded and self.waiting >= self.queue_max:
+                self.rejected += 1
+                raise LaneFull(self.name, self.retry_after())
+            self.waiting += 1
+            try:
+                if bounded:
+                    await asyncio.wait_for(self.semaphore.acquire(), self.queue_timeout)
+                else:
+                    await self.semaphore.acquire()
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                raise LaneFull(self.name, self.retry_after()) from None
+            finally:
+                self.waiting -= 1
+        else:
+            await self.semaphore.acquire()
+        admitted_at = time.monotonic()
+        self.queue_wait.observe(admitted_at - t0)
+        self.active += 1
+        self.admitted += 1
+        return admitted_at
+
+    def release(self, admitted_at: float):
+        self.active -= 1
+        self.service.observe(time.monotonic() - admitted_at)
+        self.semaphore.release()
+
+    def snapshot(self) -> dict:
+        return {
+            "concurrency": self.concurrency,
+            "queueMax": self.queue_max,
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "queueWaitMs": self.queue_wait.summary(1000.0),
+            "serviceMs": self.service.summary(1000.0),
+        }
+
+
+def lane_for(method: str, path: str) -> str:
+    """Heavy compute, admin writes, or interactive reads"""
+    if route_class(path) == "long" or any(kw in path for kw in HEAVY_LANE_KEYWORDS):
+        return "heavy"
+    if method not in ("GET", "HEAD") or any(kw in path for kw in HEAVY_PATH_KEYWORDS):
+        return "admin"
+    return "interactive"
+
+
+response_cache = ResponseCache(CACHE_MAX_BYTES, CACHE_DIR)
+single_flight = SingleFlight()
+lanes = {name: Lane(name, **cfg) for name, cfg in LANES.items()}
+dataset_version = {"value": None, "fetched_at": 0.0}
+dataset_version_lock = asyncio.Lock()
+revalidating: set = set()
+background_tasks: set = set()
+readiness = {"ready": False, "phase": "starting", "started": time.monotonic(), "phases": {}, "workers": {}}
+ready_event = asyncio.Event()
+ready_waiters = 0
+main_loop = None
+
+
+def is_cacheable(method: str, path: str) -> bool:
+    return PROXY_CACHE_ENABLED and method == "GET" and path.strip("/") in CACHE_PATHS
+
+
+def is_coalescable(method: str, path: str) -> bool:
+    return PROXY_COALESCE_ENABLED and method == "GET" and path.strip("/") in COALESCE_PATHS
+
+
+def flight_key(method: str, url: str, headers: dict) -> str:
+    """method + normalized path/query + headers that can change the answer"""
+    parsed = httpx.URL(url)
+    query = urlencode(sorted(parsed.params.multi_items()))
+    lowered = {k.lower(): v for k, v in headers.items()}
+    vary = "&".join(f"{h}={lowered.get(h, '')}" for h in COALESCE_VARY_HEADERS)
+    return f"{method} {parsed.path}?{query} {vary}"
+
+
+def cache_key(path: str, query_params) -> str:
+    """Normalized path plus sorted query string"""
+    query = urlencode(sorted(query_params.multi_items()))
+    return f"/api/{path.strip('/')}?{query}"
+
+
+async def get_dataset_version():
+    """Current dataset version token from the backend (cached for a few seconds)"""
+    if time.monotonic() - dataset_version["fetched_at"] < DATASET_VERSION_TTL_SEC:
+        return dataset_version["value"]
+    async with dataset_version_lock:
+        if time.monotonic() - dataset_version["fetched_at"] < DATASET_VERSION_TTL_SEC:
+            return dataset_version["value"]
+        try:
+            worker = pick_worker(DATASET_VERSION_PATH)
+            resp = await upstream_clients["default"].get(worker.url + DATASET_VERSION_PATH, timeout=5.0)
+            data = resp.json().get("data") if resp.status_code == 200 else None
+            value = data.get("version") if isinstance(data, dict) else None
+        except (httpx.HTTPError, ValueError, AttributeError):
+            value = None
+        if value != dataset_version["value"]:
+            print(f"[Proxy] Dataset version: {dataset_version['value']} -> {value}")
+        dataset_version["value"] = value
+        dataset_version["fetched_at"] = time.monotonic()
+        return value
+
+
+async def fetch_buffered(client: httpx.AsyncClient, method: str, url: str, headers: dict, body=None) -> CachedResponse:
+    """Fetch an upstream response fully into memory (coalesced for GETs)"""
+    t0 = time.perf_counter()
+    try:
+        if PROXY_COALESCE_ENABLED and method == "GET":
+            return await single_flight.do(
+                flight_key(method, url, headers),
+                lambda: fetch_upstream(client, method, url, headers, body),
+            )
+        return await fetch_upstream(client, method, url, headers, body)
+    finally:
+        add_upstream_time(time.perf_counter() - t0)
+
+
+async def fetch_upstream(client: httpx.AsyncClient, method: str, url: str, headers: dict, body=None) -> CachedResponse:
+    worker = acquire_worker(httpx.URL(url).path)
+    try:
+        resp = await client.request(method=method, url=worker.url + url, content=body, headers=headers)
+    finally:
+        release_worker(worker)
+    # resp.content is decoded, so the upstream encoding no longer applies
+    return CachedResponse(
+        status_code=resp.status_code,
+        headers=filter_headers(resp.headers, drop=("content-length", "content-encoding")),
+        content=resp.content,
+    )
+
+
+async def fetch_and_store(client: httpx.AsyncClient, key: str, url: str, headers: dict, version: str) -> CachedResponse:
+    fetched = await fetch_buffered(client, "GET", url, headers)
+    if fetched.status_code == 200:
+        fetched.version = version
+        fetched.stored_at = time.time()
+        response_cache.set(key, fetched)
+    return fetched
+
+
+def schedule_revalidate(client: httpx.AsyncClient, key: str, url: str, headers: dict, version: str):
+    """Refresh a stale entry in the background, at most once per key"""
+    if key in revalidating:
+        return
+
+    async def revalidate():
+        try:
+            await fetch_and_store(client, key, url, headers, version)
+        except httpx.HTTPError as e:
+            print(f"[Proxy] Cache revalidate failed for {key}: {e}")
+        finally:
+            revalidating.discard(key)
+
+    revalidating.add(key)
+    task = asyncio.create_task(revalidate())
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
+
+async def cached_response(key: str, entry: CachedResponse, cache_status: str, etag: str, accept_encoding: str) -> Response:
+    """Response for a cache entry, compressed once per (key, encoding) and reused"""
+    encoding = choose_encoding(accept_encoding) if PROXY_COMPRESSION and accept_encoding else None
+    if (
+        encoding is None
+        or entry.status_code != 200
+        or len(entry.content) < COMPRESS_MIN_BYTES
+        or not is_compressible(entry.headers)
+    ):
+        return entry.to_response(cache_status, etag)
+    if encoding not in entry.encoded:
+        body = await asyncio.to_thread(compress_body, encoding, entry.content)
+        response_cache.add_encoded(key, entry, encoding, body)
+    return entry.to_response(cache_status, etag, encoding)
+
+
+async def serve_cached(client: httpx.AsyncClient, key: str, url: str, headers: dict) -> Response:
+    # Conditional headers are answered here, never forwarded for a cache fill
+    lowered = {k.lower(): k for k in headers}
+    if_none_match = headers.get(lowered.get("if-none-match", ""), "")
+    accept_encoding = headers.get(lowered.get("accept-encoding", ""), "")
+    headers = {k: v for k, v in headers.items() if k.lower() not in CONDITIONAL_HEADERS}
+
+    version = await get_dataset_version()
+    if version is None:
+        # No version token: never serve something we cannot invalidate
+        response_cache.stats["bypass"] += 1
+        return (await fetch_buffered(client, "GET", url, headers)).to_response("BYPASS")
+
+    held = etag_matches(if_none_match, etag_for(version, key)) if PROXY_ETAGS else None
+    if held:
+        # Client already holds this dataset version: no cache or backend work
+        response_cache.stats["not_modified"] += 1
+        return not_modified(held)
+
+    entry = response_cache.get(key)
+    if entry is not None:
+        age = time.time() - entry.stored_at
+        if entry.version == version and age < CACHE_TTL_SEC:
+            response_cache.stats["hits"] += 1
+            return await cached_response(key, entry, "HIT", etag_for(entry.version, key), accept_encoding)
+        # Outdated version or expired TTL: serve stale within the SWR window
+        if age < CACHE_TTL_SEC + CACHE_SWR_SEC:
+            response_cache.stats["stale"] += 1
+            schedule_revalidate(client, key, url, headers, version)
+            return await cached_response(key, entry, "STALE", etag_for(entry.version, key), accept_encoding)
+
+    response_cache.stats["misses"] += 1
+    fetched = await fetch_and_store(client, key, url, headers, version)
+    return await cached_response(key, fetched, "MISS", etag_for(version, key), accept_encoding)
+
+
+class JobStore:
+    """SQLite-backed status and result store for async proxy jobs.
+
+    Every call takes the lock and may block on a large result BLOB write,
+    so callers on the event loop go through asyncio.to_thread.
+    """
+
+    def __init__(self, db_path: str):
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(db_path, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        with self.lock, self.db:
+            self.db.execute(
+                """CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    method TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    status_code INTEGER,
+                    content_type TEXT,
+                    error TEXT,
+                    result BLOB
+                )"""
+            )
+            # Jobs cannot survive a proxy restart
+            self.db.execute(
+                "UPDATE jobs SET status = 'failed', error = 'interrupted by proxy restart' "
+                "WHERE status IN ('queued', 'running')"
+            )
+            self.db.execute("CREATE INDEX IF NOT EXISTS jobs_finished_at ON jobs (finished_at)")
+
+    def create(self, method: str, url: str) -> str:
+        job_id = uuid.uuid4().hex
+        with self.lock, self.db:
+            self.db.execute(
+                "INSERT INTO jobs (id, method, url, status, created_at) VALUES (?, ?, ?, 'queued', ?)",
+                (job_id, method, url, time.time()),
+            )
+        return job_id
+
+    def update(self, job_id: str, **fields):
+        columns = ", ".join(f"{k} = ?" for k in fields)
+        with self.lock, self.db:
+            self.db.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+    def get(self, job_id: str, with_result: bool = False):
+        columns = "*" if with_result else "id, method, url, status, created_at, started_at, finished_at, status_code, content_type, error"
+        with self.lock:
+            row = self.db.execute(f"SELECT {columns} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def list(self, limit: int = 50) -> list:
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT id, method, url, status, created_at, started_at, finished_at, status_code, error "
+                "FROM jobs ORDER BY created_at DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def prune(self, ttl_sec: float) -> int:
+        """Delete finished jobs older than ttl_sec; returns how many went"""
+        with self.lock, self.db:
+            cursor = self.db.execute(
+                "DELETE FROM jobs WHERE status IN ('succeeded', 'failed') AND finished_at < ?",
+                (time.time() - ttl_sec,),
+            )
+        return cursor.rowcount
+
+
+job_store = None
+job_semaphore = asyncio.Semaphore(JOBS_CONCURRENCY)
+
+
+def wants_async_job(request: Request, path: str) -> bool:
+    prefer = request.headers.get("prefer", "").lower()
+    opted_in = "respond-async" in prefer or request.query_params.get("_async") == "1"
+    return opted_in and route_class(path) == "long"
+
+
+async def run_job(job_id: str, method: str, url: str, headers: dict, body):
+    async with job_semaphore:
+        path = httpx.URL(url).path
+        lane = lanes[lane_for(method, path)]
+        # Queued jobs already have a durable record, so no 429 here
+        admitted_at = await lane.acquire(bounded=False)
+        worker = None
+        try:
+            await asyncio.to_thread(job_store.update, job_id, status="running", started_at=time.time())
+            worker = acquire_worker(path)
+            resp = await upstream_clients["long"].request(
+                method=method, url=worker.url + url, content=body, headers=headers
+            )
+            await asyncio.to_thread(
+                job_store.update,
+                job_id,
+                status="succeeded" if resp.status_code < 400 else "failed",
+                finished_at=time.time(),
+                status_code=resp.status_code,
+                content_type=resp.headers.get("content-type"),
+                result=resp.content,
+            )
+        except Exception as e:
+            try:
+                await asyncio.to_thread(
+                    job_store.update, job_id, status="failed", finished_at=time.time(), error=str(e) or type(e).__name__
+                )
+            except Exception as store_error:
+                print(f"[Proxy] Job {job_id} failed ({e}) and could not be recorded: {store_error}")
+        finally:
+            if worker is not None:
+                release_worker(worker)
+            lane.release(admitted_at)
+
+
+async def submit_job(request: Request, path: str, headers: dict, body) -> Response:
+    params = [(k, v) for k, v in request.query_params.multi_items() if k != "_async"]
+    url = f"/api/{path}" + (f"?{urlencode(params)}" if params else "")
+    headers = {k: v for k, v in headers.items() if k.lower() != "prefer"}
+
+    job_id = await asyncio.to_thread(job_store.create, request.method, url)
+    task = asyncio.create_task(run_job(job_id, request.method, url, headers, body))
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
+    status_url = f"/api/_proxy/jobs/{job_id}"
+    return Response(
+        content=json.dumps({
+            "ok": True,
+            "jobId": job_id,
+            "status": "queued",
+            "statusUrl": status_url,
+            "resultUrl": f"{status_url}/result",
+        }),
+        status_code=202,
+        headers={"location": status_url},
+        media_type="application/json",
+    )
+
+
+def spawn_worker(worker: BackendWorker):
+    """Launch one TypeScript backend process"""
     env = os.environ.copy()
-    env["PORT"] = "8002"
+    env["PORT"] = str(worker.port)
     env["FRACTAL_ONLY"] = "1"
     env["MINIMAL_BOOT"] = "1"
     env["FRACTAL_ENABLED"] = "true"
     env["WS_ENABLED"] = "false"
-    
+    env["FRACTAL_COMPUTE_WORKERS"] = str(COMPUTE_WORKERS)
+    if worker.index > 0:
+        # In-process schedulers run on worker 0 only
+        env["WEEKLY_DIGEST_CRON"] = "false"
+
     # Use MONGODB_URI from env (Emergent provides complete URI)
     mongo_url = os.environ.get("MONGO_URL", "mongodb://localhost:27017")
     db_name = os.environ.get("DB_NAME", "fractal_dev")
     env["MONGODB_URI"] = f"{mongo_url}/{db_name}"
-    
-    print(f"[Proxy] Starting TypeScript backend on port 8002...")
-    print(f"[Proxy] MONGODB_URI={env.get('MONGODB_URI')}")
-    
-    ts_process = subprocess.Popen(
+
+    role = "heavy" if worker.heavy else "interactive"
+    print(f"[Proxy] Starting TypeScript worker {worker.index} ({role}) on port {worker.port}, "
+          f"{COMPUTE_WORKERS} compute threads...")
+
+    process = subprocess.Popen(
         ["npx", "tsx", "src/app.fractal.ts"],
         cwd="/app/backend",
         env=env,
         stdout=subprocess.PIPE,
         stderr=subprocess.STDOUT,
     )
-    
+    worker.process = process
+    worker.healthy = False
+    worker.warm = False
+    worker.warming = False
+    worker.prewarm_failures = 0
+    worker.next_prewarm_at = 0.0
+    worker.health_failures = 0
+    worker.started_at = time.monotonic()
+
     # Stream logs in background thread
     def stream_logs():
-        if ts_process and ts_process.stdout:
-            for line in ts_process.stdout:
-                print(f"[TS] {line.decode().strip()}")
-    
-    log_thread = threading.Thread(target=stream_logs, daemon=True)
-    log_thread.start()
-    
-    # Wait for backend to be ready
+        if process.stdout:
+            for line in process.stdout:
+                print(f"[TS{worker.index}] {line.decode().strip()}")
+
+    threading.Thread(target=stream_logs, daemon=True).start()
+
+
+def record_prewarm(worker: BackendWorker, resp) -> dict:
+    """Store a worker's prewarm phase timings for /ready.
+
+    Only a successful prewarm puts the worker into routing; after a failure
+    it stays out and the supervisor retries with backoff.
+    """
+    elapsed_ms = round(resp.elapsed.total_seconds() * 1000) if resp is not None else None
+    info = {"ms": elapsed_ms, "ok": False, "phases": {}}
+    if resp is not None and resp.status_code == 200:
+        try:
+            data = resp.json().get("data") or {}
+        except (ValueError, AttributeError):
+            data = {}
+        info["ok"] = bool(data.get("ok"))
+        info["phases"] = {p.get("name"): p.get("ms") for p in data.get("phases", [])}
+        if not info["ok"]:
+            info["error"] = "; ".join(p["error"] for p in data.get("phases", []) if p.get("error")) or "prewarm not ok"
+    elif resp is not None:
+        info["error"] = f"HTTP {resp.status_code}"
+    else:
+        info["error"] = "no response"
+    readiness["workers"][worker.index] = info
+    worker.warming = False
+    if info["ok"]:
+        worker.warm = True
+        worker.healthy = True
+        worker.prewarm_failures = 0
+        print(f"[Proxy] TypeScript worker {worker.index} prewarmed in {elapsed_ms}ms {info['phases']}")
+    else:
+        worker.warm = False
+        worker.healthy = False
+        worker.prewarm_failures += 1
+        delay = min(WORKER_MAX_BACKOFF_SEC, 2.0 ** worker.prewarm_failures)
+        worker.next_prewarm_at = time.monotonic() + delay
+        print(f"[Proxy] Warning: prewarm of worker {worker.index} failed ({info['error']}), retrying in {delay:.0f}s")
+    return info
+
+
+def prewarm_worker_sync(worker: BackendWorker):
+    try:
+        resp = httpx.post(f"{worker.url}{PREWARM_PATH}", timeout=PREWARM_TIMEOUT_SEC)
+    except httpx.HTTPError as e:
+        print(f"[Proxy] Warning: prewarm failed for worker {worker.index}: {e}")
+        resp = None
+    record_prewarm(worker, resp)
+
+
+async def prewarm_worker(client: httpx.AsyncClient, worker: BackendWorker):
+    """Prewarm a restarted worker before it rejoins routing"""
+    try:
+        resp = await client.post(f"{worker.url}{PREWARM_PATH}", timeout=PREWARM_TIMEOUT_SEC)
+    except httpx.HTTPError as e:
+        print(f"[Proxy] Warning: prewarm failed for worker {worker.index}: {e}")
+        resp = None
+    record_prewarm(worker, resp)
+
+
+def mark_phase(phase: str, t0: float):
+    readiness["phases"][phase] = round((time.monotonic() - t0) * 1000)
+    print(f"[Proxy] Startup phase {phase}: {readiness['phases'][phase]}ms")
+
+
+def set_ready(degraded: bool = False):
+    readiness["ready"] = True
+    readiness["phase"] = "degraded" if degraded else "ready"
+    readiness["totalMs"] = round((time.monotonic() - readiness["started"]) * 1000)
+    if main_loop is not None:
+        main_loop.call_soon_threadsafe(ready_event.set)
+    print(f"[Proxy] Ready ({readiness['phase']}) after {readiness['totalMs']}ms")
+
+
+def start_ts_backend():
+    """Start all TypeScript backend workers, prewarm them, then flip /ready"""
+    print(f"[Proxy] MONGODB_URI={os.environ.get('MONGO_URL', 'mongodb://localhost:27017')}/{os.environ.get('DB_NAME', 'fractal_dev')}")
+    readiness["phase"] = "spawn"
+    t0 = time.monotonic()
+    for worker in backend_workers:
+        if not TS_BACKEND_EXTERNAL:
+            spawn_worker(worker)
+        # Startup prewarms below; keep the supervisor from doing it twice
+        worker.warming = True
+    mark_phase("spawn", t0)
+
+    # Wait for workers to be ready
+    readiness["phase"] = "health"
+    t0 = time.monotonic()
+    pending = list(backend_workers)
     for i in range(30):
+        for worker in list(pending):
+            try:
+                resp = httpx.get(f"{worker.url}/api/health", timeout=2.0)
+                if resp.status_code == 200:
+                    pending.remove(worker)
+                    print(f"[Proxy] TypeScript worker {worker.index} ready!")
+            except httpx.HTTPError:
+                pass
+        if not pending:
+            break
+        time.sleep(1)
+    mark_phase("health", t0)
+
+    readiness["phase"] = "prewarm"
+    t0 = time.monotonic()
+    up = [w for w in backend_workers if w not in pending]
+    threads = [threading.Thread(target=prewarm_worker_sync, args=(w,), daemon=True) for w in up]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    mark_phase("prewarm", t0)
+
+    for worker in pending:
+        # Let the supervisor prewarm it once it comes up
+        worker.warming = False
+    if pending:
+        print(f"[Proxy] Warning: TypeScript workers {[w.index for w in pending]} may not be ready")
+    cold = [w for w in up if not w.warm]
+    set_ready(degraded=bool(pending or cold))
+    return not (pending or cold)
+
+
+async def readiness_gate(path: str):
+    """None when the request may proceed, else a 503 to send back"""
+    global ready_waiters
+    if readiness["ready"] or READINESS_MODE == "off" or any(kw in path for kw in READINESS_BYPASS_KEYWORDS):
+        return None
+    if READINESS_MODE == "queue" and ready_waiters < READY_QUEUE_MAX:
+        ready_waiters += 1
         try:
-            resp = httpx.get(f"{TS_BACKEND_URL}/api/health", timeout=2.0)
-            if resp.status_code == 200:
-                print(f"[Proxy] TypeScript backend ready!")
-                return True
-        except:
+            await asyncio.wait_for(ready_event.wait(), READY_QUEUE_TIMEOUT_SEC)
+            return None
+        except asyncio.TimeoutError:
             pass
-        time.sleep(1)
-    
-    print("[Proxy] Warning: TypeScript backend may not be ready")
-    return False
+        finally:
+            ready_waiters -= 1
+    return Response(
+        content=json.dumps({"ok": False, "error": "TypeScript backend warming up", "phase": readiness["phase"]}),
+        status_code=503,
+        headers={"retry-after": "5"},
+        media_type="application/json",
+    )
+
+
+async def admit(request: Request, path: str):
+    """(lane, admitted_at) for the request's lane; raises LaneFull when it is full"""
+    if not PROXY_LANES or wants_async_job(request, path):
+        # Job submission only writes a row; the job is admitted when it runs
+        return None, 0.0
+    lane = lanes[lane_for(request.method, path)]
+    return lane, await lane.acquire()
+
+
+def release_lane(lane: Lane, admitted_at: float, response):
+    """Free the slot now, or when a streamed body has been fully relayed"""
+    if not isinstance(response, StreamingResponse):
+        lane.release(admitted_at)
+        return
+    body = response.body_iterator
+
+    async def guarded():
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            lane.release(admitted_at)
+
+    response.body_iterator = guarded()
+
+
+async def check_worker(client: httpx.AsyncClient, worker: BackendWorker):
+    """One supervision step: restart crashed workers with backoff, track health
+
+    External workers (TS_BACKEND_EXTERNAL) are started and restarted by
+    someone else; they still get health checks and prewarm, never restarts.
+    """
+    now = time.monotonic()
+    if not TS_BACKEND_EXTERNAL and not worker.alive():
+        worker.healthy = False
+        if worker.next_restart_at == 0.0:
+            delay = min(WORKER_MAX_BACKOFF_SEC, 2.0 ** worker.restarts)
+            worker.next_restart_at = now + delay
+            print(f"[Proxy] TypeScript worker {worker.index} exited, restarting in {delay:.0f}s")
+        elif now >= worker.next_restart_at:
+            worker.restarts += 1
+            worker.next_restart_at = 0.0
+            await asyncio.to_thread(spawn_worker, worker)
+        return
+
+    try:
+        ok = (await client.get(f"{worker.url}/api/health")).status_code == 200
+    except httpx.HTTPError:
+        ok = False
+
+    if ok:
+        if not worker.warm:
+            # Not routable until its caches are warm
+            if not worker.warming and now >= worker.next_prewarm_at:
+                worker.warming = True
+                task = asyncio.create_task(prewarm_worker(client, worker))
+                background_tasks.add(task)
+                task.add_done_callback(background_tasks.discard)
+            return
+        if not worker.healthy:
+            print(f"[Proxy] TypeScript worker {worker.index} healthy")
+        worker.healthy = True
+        worker.health_failures = 0
+        if worker.restarts and now - worker.started_at > WORKER_MAX_BACKOFF_SEC:
+            worker.restarts = 0
+        return
+
+    worker.health_failures += 1
+    if worker.health_failures >= WORKER_HEALTH_FAILURES:
+        if worker.healthy:
+            print(f"[Proxy] TypeScript worker {worker.index} unhealthy, removed from routing")
+        worker.healthy = False
+        if TS_BACKEND_EXTERNAL:
+            # Whatever comes back on this port starts cold: prewarm it again
+            worker.warm = False
+        elif now - worker.started_at > WORKER_BOOT_GRACE_SEC:
+            # Alive but unresponsive: kill it so the restart path takes over
+            worker.process.kill()
+
+
+async def supervise_workers():
+    async with httpx.AsyncClient(timeout=2.0) as client:
+        while True:
+            await asyncio.sleep(WORKER_HEALTH_INTERVAL_SEC)
+            for worker in backend_workers:
+                # Managed workers are skipped until start_ts_backend spawns them
+                if worker.draining or (worker.process is None and not TS_BACKEND_EXTERNAL):
+                    continue
+                await check_worker(client, worker)
+
+
+async def prune_jobs():
+    """Delete finished jobs past PROXY_JOBS_TTL_SEC so results do not pile up"""
+    while True:
+        try:
+            removed = await asyncio.to_thread(job_store.prune, JOBS_TTL_SEC)
+            if removed:
+                print(f"[Proxy] Pruned {removed} finished jobs")
+        except sqlite3.Error as e:
+            print(f"[Proxy] Job prune failed: {e}")
+        await asyncio.sleep(JOBS_PRUNE_INTERVAL_SEC)
+
+
+async def drain_workers():
+    """Stop routing, wait for in-flight requests, then terminate workers"""
+    for worker in backend_workers:
+        worker.draining = True
+    deadline = time.monotonic() + WORKER_DRAIN_TIMEOUT_SEC
+    while any(w.outstanding for w in backend_workers) and time.monotonic() < deadline:
+        await asyncio.sleep(0.1)
+
+    for worker in backend_workers:
+        if worker.alive():
+            worker.process.terminate()
+    for worker in backend_workers:
+        if worker.process is None:
+            continue
+        try:
+            await asyncio.to_thread(worker.process.wait, 10)
+        except subprocess.TimeoutExpired:
+            worker.process.kill()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    global job_store, main_loop
+    main_loop = asyncio.get_running_loop()
+    readiness["started"] = time.monotonic()
+    upstream_clients.update(create_upstream_clients())
+    job_store = await asyncio.to_thread(JobStore, JOBS_DB_PATH)
     threading.Thread(target=start_ts_backend, daemon=True).start()
+    supervisor = asyncio.create_task(supervise_workers())
+    pruner = asyncio.create_task(prune_jobs())
     yield
     # Shutdown
-    global ts_process
-    if ts_process:
-        ts_process.terminate()
+    supervisor.cancel()
+    pruner.cancel()
+    await drain_workers()
+    for client in upstream_clients.values():
+        await client.aclose()
+    upstream_clients.clear()
 
 
 app = FastAPI(title="Fractal Backend Proxy", lifespan=lifespan)
@@ -90,54 +1496,312 @@ app.add_middleware(
 
 @app.get("/")
 async def root():
-    return {"ok": True, "message": "Fractal Backend Proxy", "ts_backend": TS_BACKEND_URL}
+    return {"ok": True, "message": "Fractal Backend Proxy", "ts_backend": TS_BACKEND_URL, "workers": TS_WORKERS}
+
+
+def proxy_stats() -> dict:
+    routes = {}
+    for template, m in sorted(proxy_metrics.routes.items()):
+        routes[template] = {
+            "requests": m.requests,
+            "inFlight": m.in_flight,
+            "status": dict(m.status),
+            "upstreamErrors": m.upstream_errors,
+            "timeouts": m.timeouts,
+            "errorRate": round(m.upstream_errors / m.requests, 4) if m.requests else 0.0,
+            "timeoutRate": round(m.timeouts / m.requests, 4) if m.requests else 0.0,
+            "totalMs": m.total.summary(1000.0),
+            "upstreamMs": m.upstream.summary(1000.0),
+            "overheadMs": m.overhead.summary(1000.0),
+            "bytes": {"total": int(m.size.total), "mean": int(m.size.total / m.size.count) if m.size.count else 0},
+        }
+    return {
+        "routes": routes,
+        "cache": response_cache.snapshot(),
+        "coalesce": single_flight.snapshot(),
+        "lanes": {name: lane.snapshot() for name, lane in lanes.items()},
+        "workers": [w.snapshot() for w in backend_workers],
+        "readiness": {k: v for k, v in readiness.items() if k != "started"},
+        "datasetVersion": dataset_version["value"],
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition"""
+    lines = []
+    for template, m in sorted(proxy_metrics.routes.items()):
+        labels = f'route="{template}"'
+        lines += m.total.prometheus("proxy_request_duration_seconds", labels)
+        lines += m.upstream.prometheus("proxy_upstream_duration_seconds", labels)
+        lines += m.overhead.prometheus("proxy_overhead_duration_seconds", labels)
+        lines += m.size.prometheus("proxy_response_bytes", labels)
+        lines.append(f"proxy_in_flight{{{labels}}} {m.in_flight}")
+        lines.append(f"proxy_upstream_errors_total{{{labels}}} {m.upstream_errors}")
+        lines.append(f"proxy_upstream_timeouts_total{{{labels}}} {m.timeouts}")
+        for status_class, n in sorted(m.status.items()):
+            lines.append(f'proxy_requests_total{{{labels},status="{status_class}"}} {n}')
+    cache = response_cache.snapshot()
+    coalesce = single_flight.snapshot()
+    for name, kind, help_text, value in (
+        ("proxy_cache_hits_total", "counter", "Fresh cache hits", cache["hits"]),
+        ("proxy_cache_misses_total", "counter", "Cache misses", cache["misses"]),
+        ("proxy_cache_stale_total", "counter", "Stale entries served while revalidating", cache["stale"]),
+        ("proxy_cache_bypass_total", "counter", "Requests that skipped the cache", cache["bypass"]),
+        ("proxy_cache_not_modified_total", "counter", "304 answers to conditional requests", cache["not_modified"]),
+        ("proxy_cache_evictions_total", "counter", "Entries evicted to stay under the byte limit", cache["evictions"]),
+        ("proxy_cache_disk_hits_total", "counter", "Hits served from the disk tier", cache["disk_hits"]),
+        ("proxy_cache_entries", "gauge", "Entries held in memory", cache["entries"]),
+        ("proxy_cache_bytes", "gauge", "Bytes held in memory, compressed variants included", cache["bytes"]),
+        ("proxy_cache_max_bytes", "gauge", "In-memory byte limit", cache["maxBytes"]),
+        ("proxy_coalesce_upstream_calls_total", "counter", "Upstream calls made by coalesced reads", coalesce["upstream_calls"]),
+        ("proxy_coalesce_coalesced_total", "counter", "Reads that joined an in-flight call", coalesce["coalesced"]),
+        ("proxy_coalesce_inflight", "gauge", "Coalesced upstream calls in flight", coalesce["inflight"]),
+    ):
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {value}"]
+    for name, lane in lanes.items():
+        labels = f'lane="{name}"'
+        lines += lane.queue_wait.prometheus("proxy_lane_queue_wait_seconds", labels)
+        lines.append(f"proxy_lane_active{{{labels}}} {lane.active}")
+        lines.append(f"proxy_lane_waiting{{{labels}}} {lane.waiting}")
+        lines.append(f"proxy_lane_admitted_total{{{labels}}} {lane.admitted}")
+        lines.append(f"proxy_lane_rejected_total{{{labels}}} {lane.rejected}")
+    for w in backend_workers:
+        labels = f'worker="{w.index}"'
+        lines.append(f"proxy_worker_healthy{{{labels}}} {int(w.healthy)}")
+        lines.append(f"proxy_worker_outstanding{{{labels}}} {w.outstanding}")
+        lines.append(f"proxy_worker_restarts{{{labels}}} {w.restarts}")
+    return "\n".join(lines) + "\n"
+
+
+@app.get("/api/_proxy/stats")
+async def proxy_stats_json():
+    """Per-route latency, payload and error stats plus cache/coalescing counters"""
+    return {"ok": True, "data": proxy_stats()}
+
+
+@app.get("/ready")
+async def ready():
+    """200 once every worker is prewarmed, 503 with the current phase before that"""
+    body = {
+        "ok": readiness["ready"],
+        "phase": readiness["phase"],
+        "phasesMs": readiness["phases"],
+        "totalMs": readiness.get("totalMs"),
+        "workers": readiness["workers"],
+    }
+    if not readiness["ready"]:
+        return Response(content=json.dumps(body), status_code=503, media_type="application/json")
+    return body
+
+
+@app.get("/api/_proxy/workers")
+async def proxy_workers():
+    """TypeScript backend worker pool status"""
+    return {"ok": True, "data": [w.snapshot() for w in backend_workers]}
+
+
+@app.get("/api/_proxy/lanes")
+async def proxy_lanes():
+    """Admission lanes: limits, occupancy, queue wait and rejections"""
+    return {"ok": True, "data": {name: lane.snapshot() for name, lane in lanes.items()}}
+
+
+@app.get("/api/_proxy/cache")
+async def proxy_cache_stats():
+    """Response cache counters"""
+    return {"ok": True, "data": {**response_cache.snapshot(), "datasetVersion": dataset_version["value"]}}
+
+
+@app.post("/api/_proxy/cache/invalidate")
+async def proxy_cache_invalidate():
+    """Drop in-memory entries and force a dataset version refresh"""
+    response_cache.clear()
+    dataset_version["fetched_at"] = 0.0
+    return {"ok": True}
+
+
+@app.get("/api/_proxy/coalesce")
+async def proxy_coalesce_stats():
+    """Single-flight counters (`coalesced` = upstream calls saved)"""
+    return {"ok": True, "data": single_flight.snapshot()}
+
+
+@app.get("/api/_proxy/jobs")
+async def proxy_jobs_list(limit: int = 50):
+    """Recent async jobs, newest first"""
+    return {"ok": True, "data": await asyncio.to_thread(job_store.list, limit)}
+
+
+@app.get("/api/_proxy/jobs/{job_id}")
+async def proxy_job_status(job_id: str):
+    """Poll an async job"""
+    job = await asyncio.to_thread(job_store.get, job_id)
+    if job is None:
+        return Response(content='{"ok": false, "error": "job not found"}', status_code=404, media_type="application/json")
+    return {"ok": True, "data": job}
+
+
+@app.get("/api/_proxy/jobs/{job_id}/result")
+async def proxy_job_result(job_id: str):
+    """Download the upstream response of a finished job"""
+    job = await asyncio.to_thread(job_store.get, job_id, True)
+    if job is None:
+        return Response(content='{"ok": false, "error": "job not found"}', status_code=404, media_type="application/json")
+    if job["status"] in ("queued", "running"):
+        return Response(
+            content=json.dumps({"ok": False, "error": "job not finished", "status": job["status"]}),
+            status_code=409,
+            headers={"retry-after": "5"},
+            media_type="application/json",
+        )
+    if job["result"] is None:
+        return Response(
+            content=json.dumps({"ok": False, "error": job["error"] or "job failed"}),
+            status_code=502,
+            media_type="application/json",
+        )
+    return Response(
+        content=job["result"],
+        status_code=job["status_code"],
+        media_type=job["content_type"],
+        headers={"content-disposition": f'attachment; filename="job-{job_id}.json"'},
+    )
 
 
 @app.api_route("/api/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"])
 async def proxy_api(request: Request, path: str):
     """Proxy all /api/* requests to TypeScript backend"""
-    # Longer timeout for simulation/optimization endpoints
-    long_timeout_keywords = ["optimize", "sweep", "certify", "sim"]
-    timeout = 900.0 if any(kw in path for kw in long_timeout_keywords) else 60.0
-    
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        url = f"{TS_BACKEND_URL}/api/{path}"
-        
-        # Forward query params
-        if request.query_params:
-            url += f"?{request.query_params}"
-        
-        # Forward body for POST/PUT/PATCH
-        body = None
-        if request.method in ["POST", "PUT", "PATCH"]:
-            body = await request.body()
-        
-        try:
-            resp = await client.request(
-                method=request.method,
-                url=url,
-                content=body,
-                headers={
-                    k: v for k, v in request.headers.items()
-                    if k.lower() not in ["host", "content-length"]
-                },
-            )
-            
-            return Response(
-                content=resp.content,
-                status_code=resp.status_code,
-                headers=dict(resp.headers),
-                media_type=resp.headers.get("content-type"),
-            )
-        except httpx.ConnectError:
-            return Response(
-                content='{"ok": false, "error": "TypeScript backend not ready"}',
-                status_code=503,
-                media_type="application/json",
-            )
-        except Exception as e:
-            return Response(
-                content=f'{{"ok": false, "error": "{str(e)}"}}',
-                status_code=500,
-                media_type="application/json",
-            )
+    template = route_template(path)
+    timer = [0.0]
+    token = upstream_timer.set(timer)
+    proxy_metrics.started(template)
+    t0 = time.perf_counter()
+    response = None
+    outcome = "ok"
+    lane, admitted_at = None, 0.0
+    try:
+        response = await readiness_gate(path)
+        if response is None:
+            lane, admitted_at = await admit(request, path)
+            response = finalize_response(request, await forward(request, path, template))
+    except LaneFull as e:
+        outcome = "rejected"
+        response = Response(
+            content=json.dumps({"ok": False, "error": str(e), "lane": e.lane, "retryAfter": e.retry_after}),
+            status_code=429,
+            headers={"retry-after": str(e.retry_after)},
+            media_type="application/json",
+        )
+    except httpx.TimeoutException:
+        outcome = "timeout"
+        response = Response(
+            content='{"ok": false, "error": "TypeScript backend timed out"}',
+            status_code=504,
+            media_type="application/json",
+        )
+    except httpx.ConnectError:
+        outcome = "upstream_error"
+        response = Response(
+            content='{"ok": false, "error": "TypeScript backend not ready"}',
+            status_code=503,
+            media_type="application/json",
+        )
+    except Exception as e:
+        outcome = "error"
+        response = Response(
+            content=f'{{"ok": false, "error": "{str(e)}"}}',
+            status_code=500,
+            media_type="application/json",
+        )
+    finally:
+        upstream_timer.reset(token)
+        if lane is not None:
+            release_lane(lane, admitted_at, response)
+        # Streamed bodies report their size when the stream ends
+        size = None if response is None or isinstance(response, StreamingResponse) else len(response.body)
+        proxy_metrics.finished(
+            template,
+            time.perf_counter() - t0,
+            timer[0],
+            response.status_code if response is not None else 499,
+            size,
+            outcome if response is not None else "cancelled",
+        )
+    return response
+
+
+async def forward(request: Request, path: str, template: str) -> Response:
+    client = upstream_clients[route_class(path)]
+    url = f"/api/{path}"
+
+    # Forward query params
+    if request.query_params:
+        url += f"?{request.query_params}"
+
+    # Forward body for POST/PUT/PATCH
+    body = None
+    if request.method in ["POST", "PUT", "PATCH"]:
+        body = await request.body()
+
+    headers = filter_headers(request.headers, drop=("host", "content-length"))
+
+    if wants_async_job(request, path):
+        return await submit_job(request, path, headers, body)
+    if is_cacheable(request.method, path):
+        return await serve_cached(client, cache_key(path, request.query_params), url, headers)
+    if is_coalescable(request.method, path):
+        return (await fetch_buffered(client, "GET", url, headers)).to_response()
+
+    worker = acquire_worker(path)
+    t0 = time.perf_counter()
+    try:
+        upstream_request = client.build_request(
+            method=request.method,
+            url=worker.url + url,
+            content=body,
+            headers=headers,
+        )
+        resp = await client.send(upstream_request, stream=True)
+    except BaseException:
+        release_worker(worker)
+        raise
+    finally:
+        # Time to upstream response headers
+        add_upstream_time(time.perf_counter() - t0)
+
+    if should_stream(path, resp):
+        async def relay():
+            # finally also runs when the client disconnects mid-stream
+            sent = 0
+            try:
+                async for chunk in resp.aiter_raw():
+                    sent += len(chunk)
+                    yield chunk
+            finally:
+                await resp.aclose()
+                release_worker(worker)
+                proxy_metrics.observe_size(template, sent)
+
+        # Raw bytes keep the upstream content-encoding valid
+        return StreamingResponse(
+            relay(),
+            status_code=resp.status_code,
+            headers=filter_headers(resp.headers, drop=("content-length",)),
+            media_type=resp.headers.get("content-type"),
+        )
+
+    t0 = time.perf_counter()
+    try:
+        # aread() decodes the body, so the upstream encoding no longer applies
+        content = await resp.aread()
+    finally:
+        await resp.aclose()
+        release_worker(worker)
+        add_upstream_time(time.perf_counter() - t0)
+    return Response(
+        content=content,
+        status_code=resp.status_code,
+        headers=filter_headers(resp.headers, drop=("content-length", "content-encoding")),
+        media_type=resp.headers.get("content-type"),
+    )
@@ -28,6 +28,9 @@ import { registerSpxCrisisRoutes, registerSpxCrisisDebugRoutes } from './modules
 import { registerSpxRegimeRoutes } from './modules/spx-regime/regime.routes.js';
 import { registerLifecycleRoutes } from './modules/lifecycle/lifecycle.routes.js';
 import { registerDailyRunRoutes } from './modules/ops/daily-run/index.js';
+import { registerPrewarmRoutes } from './modules/ops/prewarm/index.js';
+import { ComputePool } from './workers/compute.pool.js';
+import { setComputeRunner } from './common/compute.offload.js';
 
 async function main() {
   console.log('═══════════════════════════════════════════════════════════════');
@@ -48,6 +51,18 @@ async function main() {
     },
   });
   
+  // Compute pool: match / retrieval kernels run on worker threads so one
+  // heavy request does not stall the event loop (FRACTAL_COMPUTE_WORKERS=0 keeps them inline)
+  const workers = process.env.FRACTAL_COMPUTE_WORKERS;
+  const compute = workers === '0' ? null : new ComputePool({
+    ...(workers ? { size: parseInt(workers) } : {}),
+    ...(process.env.FRACTAL_COMPUTE_DEADLINE_MS ? { deadlineMs: parseInt(process.env.FRACTAL_COMPUTE_DEADLINE_MS) } : {}),
+  });
+  if (compute) {
+    setComputeRunner(compute.runner);
+    console.log(`[Fractal] Compute pool: ${compute.stats().size} workers`);
+  }
+  
   // CORS
   await app.register(cors, {
     origin: true,
@@ -58,6 +73,7 @@ async function main() {
   app.get('/api/health', async () => ({
     ok: true,
     mode: 'FRACTAL_ONLY',
+    compute: compute?.stats() ?? null,
     timestamp: new Date().toISOString()
   }));
   
@@ -137,6 +153,11 @@ async function main() {
   await registerDailyRunRoutes(app);
   console.log('[Fractal] ✅ Daily Run L4.1 registered at /api/ops/daily-run/*');
   
+  // BLOCK L4.3: Register Engine Prewarm (proxy readiness gate)
+  console.log('[Fractal] Registering Engine Prewarm...');
+  await registerPrewarmRoutes(app);
+  console.log('[Fractal] ✅ Prewarm L4.3 registered at /api/ops/prewarm');
+  
   // NOTE: SPX Phase routes already registered via spx-core module
   
   // BLOCK C: Register Combined Terminal (Building)
@@ -153,6 +174,10 @@ async function main() {
   const shutdown = async (signal: string) => {
     console.log(`[Fractal] Received ${signal}, shutting down...`);
     await app.close();
+    if (compute) {
+      setComputeRunner(null);
+      await compute.close();
+    }
     await disconnectMongo();
     console.log('[Fractal] Shutdown complete');
     process.exit(0);
@@ -0,0 +1,75 @@
+/**
+ * Binary Candle Store Tests
+ *
+ * fixtures/spx_sample.candles is written by scripts/candle_store.py from
+ * fixtures/spx_sample.csv, so these tests pin the Python writer and the
+ * TypeScript reader to the same layout. Regenerate with:
+ *   python scripts/candle_store.py build \
+ *     backend/src/common/__tests__/fixtures/spx_sample.csv \
+ *     backend/src/common/__tests__/fixtures/spx_sample.candles --symbol SPX
+ */
+
+import { describe, it, expect, afterAll } from 'vitest';
+import fs from 'fs';
+import os from 'os';
+import path from 'path';
+import { fileURLToPath } from 'url';
+import { readCandleStore } from '../candle.binary.js';
+
+const FIXTURES = fileURLToPath(new URL('./fixtures/', import.meta.url));
+const STORE = path.join(FIXTURES, 'spx_sample.candles');
+const tmpDir = fs.mkdtempSync(path.join(os.tmpdir(), 'candle-binary-'));
+
+function csvRows() {
+  const [, ...lines] = fs.readFileSync(path.join(FIXTURES, 'spx_sample.csv'), 'utf-8').trim().split('\n');
+  return lines.map(line => {
+    const [date, open, high, low, close, , volume] = line.split(',');
+    return { date, open: +open, high: +high, low: +low, close: +close, volume: +volume };
+  });
+}
+
+afterAll(() => {
+  fs.rmSync(tmpDir, { recursive: true, force: true });
+});
+
+describe('readCandleStore', () => {
+  it('reads the header written by candle_store.py', () => {
+    const series = readCandleStore(STORE);
+    expect(series.symbol).toBe('SPX');
+    expect(series.timeframe).toBe('1d');
+    expect(series.rows).toBe(5);
+    expect(series.version).toMatch(/^[0-9a-f]{64}$/);
+    expect(series.createdAt).toBeGreaterThan(0);
+  });
+
+  it('matches the source CSV row for row', () => {
+    const series = readCandleStore(STORE, { verify: true });
+    const rows = csvRows();
+    expect(series.rows).toBe(rows.length);
+    rows.forEach((row, i) => {
+      expect(new Date(Number(series.ts[i])).toISOString().slice(0, 10)).toBe(row.date);
+      expect(series.open[i]).toBe(row.open);
+      expect(series.high[i]).toBe(row.high);
+      expect(series.low[i]).toBe(row.low);
+      expect(series.close[i]).toBe(row.close);
+      expect(series.volume[i]).toBe(row.volume);
+    });
+  });
+
+  it('rejects a corrupted column block when verifying', () => {
+    const file = fs.readFileSync(STORE);
+    file.writeDoubleLE(1.5, file.length - 8);
+    const corrupted = path.join(tmpDir, 'corrupted.candles');
+    fs.writeFileSync(corrupted, file);
+
+    expect(readCandleStore(corrupted).volume[4]).toBe(1.5);
+    expect(() => readCandleStore(corrupted, { verify: true })).toThrow('checksum mismatch');
+  });
+
+  it('rejects files that are not candle stores', () => {
+    const truncated = path.join(tmpDir, 'truncated.candles');
+    fs.writeFileSync(truncated, fs.readFileSync(STORE).subarray(0, 200));
+    expect(() => readCandleStore(truncated)).toThrow('size mismatch');
+    expect(() => readCandleStore(path.join(FIXTURES, 'spx_sample.csv'))).toThrow('not a candle store');
+  });
+});
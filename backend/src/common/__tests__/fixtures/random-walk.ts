@@ -0,0 +1,27 @@
+/**
+ * Seeded random data for tests and benchmarks
+ *
+ * A 32-bit LCG (Numerical Recipes constants), so fixtures are identical on
+ * every run and platform without a dependency.
+ */
+
+/**
+ * Uniform [0, 1) generator for `seed`
+ */
+export function rng(seed: number): () => number {
+  let s = seed >>> 0;
+  return () => {
+    s = (s * 1664525 + 1013904223) >>> 0;
+    return s / 4294967296;
+  };
+}
+
+/**
+ * Log-normal closes from 100 with uniform log returns in ±step/2
+ */
+export function randomWalk(n: number, seed: number, step = 0.05): number[] {
+  const rand = rng(seed);
+  const closes = [100];
+  for (let i = 1; i < n; i++) closes.push(closes[i - 1] * Math.exp((rand() - 0.5) * step));
+  return closes;
+}
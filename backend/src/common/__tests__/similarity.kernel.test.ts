@@ -0,0 +1,129 @@
+/**
+ * Similarity Kernel Tests
+ *
+ * Batched scores must be bit-identical to the per-pair helpers the matchers
+ * used before, and heap top-K must equal "stable sort desc, slice(k)".
+ */
+
+import { describe, it, expect } from 'vitest';
+import {
+  packRows,
+  rowNorms,
+  cosineRows,
+  pearsonRows,
+  rmseRows,
+  excludeWithin,
+  topK,
+  TopK,
+} from '../similarity.kernel.js';
+import { computeCorrelation, computeRMSE, computeSimilarity, combineSimilarity } from '../../modules/spx-core/spx-match.service.js';
+import { cosineSimilarity, findMostSimilar } from '../../modules/exchange/screener/similarity.js';
+import { rng } from './fixtures/random-walk.js';
+
+function vectors(n: number, dim: number, seed: number): number[][] {
+  const rand = rng(seed);
+  return Array.from({ length: n }, () => Array.from({ length: dim }, () => rand() * 2 - 1));
+}
+
+function sortReference(scores: ArrayLike<number>, k: number) {
+  return Array.from(scores, (score, index) => ({ index, score }))
+    .sort((a, b) => b.score - a.score)
+    .slice(0, k);
+}
+
+describe('Similarity Kernel', () => {
+  const dim = 30;
+  const rows = vectors(2000, dim, 11);
+  const q = vectors(1, dim, 12)[0];
+  const m = packRows(rows, dim);
+
+  describe('batched scores', () => {
+
+    it('cosine equals the screener cosineSimilarity', () => {
+      const out = new Float64Array(m.rows);
+      cosineRows(m, q, out, { minDenom: 1e-9 });
+      rows.forEach((v, r) => expect(out[r]).toBe(cosineSimilarity(q, v)));
+    });
+
+    it('cosine honours precomputed norms, count and eps', () => {
+      const norms = rowNorms(m);
+      const out = new Float64Array(m.rows);
+      const count = cosineRows(m, q, out, { norms, count: 500, eps: 1e-12 });
+
+      expect(count).toBe(500);
+      let qNorm = 0;
+      for (const x of q) qNorm += x * x;
+      qNorm = Math.sqrt(qNorm);
+      let dot = 0;
+      for (let i = 0; i < dim; i++) dot += q[i] * rows[7][i];
+      expect(out[7]).toBe(dot / (qNorm * norms[7] + 1e-12));
+      expect(out[500]).toBe(0);
+    });
+
+    it('pearson and rmse equal the SPX helpers', () => {
+      const corr = new Float64Array(m.rows);
+      const rmse = new Float64Array(m.rows);
+      pearsonRows(m, q, corr);
+      rmseRows(m, q, rmse);
+
+      rows.forEach((v, r) => {
+        expect(corr[r]).toBe(computeCorrelation(q, v));
+        expect(rmse[r]).toBe(computeRMSE(q, v));
+        expect(combineSimilarity(rmse[r], corr[r])).toBe(computeSimilarity(q, v));
+      });
+    });
+
+    it('pearson is 0 for flat rows and short vectors', () => {
+      const flat = packRows([new Array(dim).fill(3)], dim);
+      const out = new Float64Array(1);
+      pearsonRows(flat, q, out);
+      expect(out[0]).toBe(0);
+
+      pearsonRows(packRows([[1, 2]], 2), [2, 1], out);
+      expect(out[0]).toBe(0);
+    });
+  });
+
+  describe('top-K', () => {
+
+    it('heap equals a stable sort, including ties', () => {
+      const rand = rng(5);
+      // Coarse scores so ties are frequent
+      const scores = Float64Array.from({ length: 5000 }, () => Math.round(rand() * 200) / 200);
+      for (const k of [1, 10, 100, 5000, 6000]) {
+        expect(topK(scores, k)).toEqual(sortReference(scores, k));
+      }
+    });
+
+    it('respects count, minScore and the exclusion mask', () => {
+      const scores = Float64Array.from({ length: 100 }, (_, i) => i / 100);
+      const mask = excludeWithin(new Uint8Array(100), 80, 5);
+
+      expect(Array.from(mask.slice(74, 87))).toEqual([0, 0, 1, 1, 1, 1, 1, 1, 1, 1, 1, 0, 0]);
+      expect(topK(scores, 3, { exclude: mask }).map(s => s.index)).toEqual([99, 98, 97]);
+      expect(topK(scores, 3, { count: 90, exclude: mask }).map(s => s.index)).toEqual([89, 88, 87]);
+      expect(topK(scores, 10, { minScore: 0.95 }).map(s => s.index)).toEqual([99, 98, 97, 96, 95]);
+    });
+
+    it('skips NaN and handles k <= 0', () => {
+      const heap = new TopK(2);
+      heap.push(0, NaN);
+      heap.push(1, 0.5);
+      expect(heap.sorted()).toEqual([{ index: 1, score: 0.5 }]);
+      expect(topK([1, 2, 3], 0)).toEqual([]);
+    });
+  });
+
+  it('findMostSimilar keeps its previous results', () => {
+    const refs = rows.slice(0, 300).map((vector, i) => ({ id: `r${i}`, vector }));
+    refs.push({ id: 'short', vector: [1, 2, 3] });
+    refs.push({ id: 'zero', vector: new Array(dim).fill(0) });
+
+    const legacy = refs
+      .map(ref => ({ id: ref.id, similarity: cosineSimilarity(q, ref.vector) }))
+      .sort((a, b) => b.similarity - a.similarity);
+
+    expect(findMostSimilar(q, refs, 7)).toEqual(legacy.slice(0, 7));
+    expect(findMostSimilar(q, refs, 1000)).toEqual(legacy);
+  });
+});
@@ -0,0 +1,82 @@
+/**
+ * Binary Candle Store (reader)
+ *
+ * Columnar OHLCV file written by scripts/candle_store.py. A 128-byte header
+ * (symbol, timeframe, row count, sha256 version) is followed by contiguous
+ * int64 ts and float64 open/high/low/close/volume columns, so loading is a
+ * single read plus typed-array views, no parsing.
+ *
+ * Shared by the SPX ingest and any module that loads history from disk, so
+ * it depends on nothing but fs and crypto.
+ */
+
+import fs from 'fs';
+import crypto from 'crypto';
+
+const MAGIC = 'FRCANDLE';
+const FORMAT_VERSION = 1;
+const HEADER_SIZE = 128;
+const COLUMN_COUNT = 6;
+
+export interface CandleSeries {
+  symbol: string;
+  timeframe: string;
+  rows: number;
+  version: string;
+  createdAt: number;
+  ts: BigInt64Array;
+  open: Float64Array;
+  high: Float64Array;
+  low: Float64Array;
+  close: Float64Array;
+  volume: Float64Array;
+}
+
+function readString(buf: Buffer, start: number, len: number): string {
+  return buf.subarray(start, start + len).toString('ascii').replace(/\0+$/, '');
+}
+
+/**
+ * Load a candle store. Columns are views over one buffer (no per-row copies).
+ */
+export function readCandleStore(filePath: string, opts: { verify?: boolean } = {}): CandleSeries {
+  const file = fs.readFileSync(filePath);
+  if (file.length < HEADER_SIZE || readString(file, 0, 8) !== MAGIC) {
+    throw new Error(`${filePath}: not a candle store`);
+  }
+  const fmt = file.readUInt32LE(8);
+  const columns = file.readUInt32LE(12);
+  if (fmt !== FORMAT_VERSION || columns !== COLUMN_COUNT) {
+    throw new Error(`${filePath}: unsupported format ${fmt} with ${columns} columns`);
+  }
+  const rows = Number(file.readBigUInt64LE(16));
+  if (file.length !== HEADER_SIZE + rows * 8 * COLUMN_COUNT) {
+    throw new Error(`${filePath}: size mismatch`);
+  }
+  const version = file.subarray(48, 80).toString('hex');
+
+  // Typed-array views need an 8-byte aligned offset; small files can land
+  // in Node's shared pool at an arbitrary offset, so copy those once.
+  const body = file.byteOffset % 8 === 0 ? file : Buffer.from(file);
+  const base = body.byteOffset + HEADER_SIZE;
+  const col = (i: number) => base + i * rows * 8;
+
+  if (opts.verify) {
+    const digest = crypto.createHash('sha256').update(body.subarray(HEADER_SIZE)).digest('hex');
+    if (digest !== version) throw new Error(`${filePath}: checksum mismatch`);
+  }
+
+  return {
+    symbol: readString(file, 24, 16),
+    timeframe: readString(file, 40, 8),
+    rows,
+    version,
+    createdAt: Number(file.readBigInt64LE(80)),
+    ts: new BigInt64Array(body.buffer, col(0), rows),
+    open: new Float64Array(body.buffer, col(1), rows),
+    high: new Float64Array(body.buffer, col(2), rows),
+    low: new Float64Array(body.buffer, col(3), rows),
+    close: new Float64Array(body.buffer, col(4), rows),
+    volume: new Float64Array(body.buffer, col(5), rows),
+  };
+}
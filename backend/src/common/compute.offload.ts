@@ -0,0 +1,79 @@
+/**
+ * Compute Offload
+ *
+ * Seam between the matchers and a host-owned worker pool. Matchers call
+ * offload(job, input, inline): with no runner installed the kernel runs
+ * inline, exactly as before; once the host installs a runner (the
+ * worker_threads ComputePool in app.fractal.ts) the same kernel runs on a
+ * worker by name and the event loop only awaits the result.
+ *
+ * Kernels must be pure functions of structured-cloneable input. Large
+ * arrays should be allocated with sharedFloat64() so they reach workers
+ * without a copy; kernels must treat shared input as read-only.
+ */
+
+import { AppError } from './errors.js';
+
+export interface ComputeJobOptions {
+  signal?: AbortSignal;   // cancel while queued or running
+  deadlineMs?: number;    // fail if not finished within this many ms of dispatch
+}
+
+export type ComputeRunner = (job: string, input: unknown, opts?: ComputeJobOptions) => Promise<unknown>;
+
+export class ComputeAbortedError extends AppError {
+  constructor(job: string) {
+    super(`Compute job ${job} was cancelled`, 499, 'COMPUTE_ABORTED');
+    this.name = 'ComputeAbortedError';
+  }
+}
+
+export class ComputeDeadlineError extends AppError {
+  constructor(job: string, deadlineMs: number) {
+    super(`Compute job ${job} exceeded its ${deadlineMs}ms deadline`, 504, 'COMPUTE_DEADLINE');
+    this.name = 'ComputeDeadlineError';
+  }
+}
+
+let runner: ComputeRunner | null = null;
+
+/**
+ * Install (or with null, remove) the runner offload() dispatches to
+ */
+export function setComputeRunner(next: ComputeRunner | null): void {
+  runner = next;
+}
+
+export function hasComputeRunner(): boolean {
+  return runner !== null;
+}
+
+/**
+ * Run `job` on the installed runner, or `inline(input)` when there is none
+ */
+export async function offload<I, O>(
+  job: string,
+  input: I,
+  inline: (input: I) => O,
+  opts: ComputeJobOptions = {}
+): Promise<O> {
+  if (opts.signal?.aborted) throw new ComputeAbortedError(job);
+  if (!runner) return inline(input);
+  try {
+    return (await runner(job, input, opts)) as O;
+  } catch (err) {
+    // Pool closed or out of workers: degrade to inline rather than fail the match
+    if (err instanceof AppError && err.code === 'COMPUTE_UNAVAILABLE') return inline(input);
+    throw err;
+  }
+}
+
+/**
+ * Float64Array over a SharedArrayBuffer when the runtime allows it,
+ * so workers read it in place instead of receiving a copy
+ */
+export function sharedFloat64(length: number): Float64Array {
+  return typeof SharedArrayBuffer === 'function'
+    ? new Float64Array(new SharedArrayBuffer(length * Float64Array.BYTES_PER_ELEMENT))
+    : new Float64Array(length);
+}
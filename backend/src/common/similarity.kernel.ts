@@ -0,0 +1,273 @@
+/**
+ * Similarity Kernel
+ *
+ * Scores one query vector against every row of a row-major Float64Array
+ * (dot, cosine, Pearson, RMSE) and keeps the best K in a bounded min-heap
+ * instead of sorting the full candidate list. Pure functions, no imports,
+ * no module state: shared by the fractal, SPX and screener matchers without
+ * coupling them.
+ *
+ * Scores are computed in the same operation order as the per-pair helpers
+ * they replace, so results are bit-identical. Top-K order is score
+ * descending with ties broken by lower row index, matching a stable sort.
+ */
+
+export interface RowMatrix {
+  rows: number;
+  dim: number;
+  data: Float64Array;     // rows x dim, row-major
+}
+
+export interface Scored {
+  index: number;          // row index
+  score: number;
+}
+
+export interface CosineOptions {
+  norms?: Float64Array;   // precomputed row norms (default: computed here)
+  count?: number;         // score only rows [0, count)
+  eps?: number;           // added to the denominator
+  minDenom?: number;      // score 0 when qNorm * rowNorm falls below this
+}
+
+export interface TopKOptions {
+  count?: number;         // consider only scores [0, count)
+  minScore?: number;      // keep only score >= minScore
+  exclude?: Uint8Array;   // 1 = skip row (e.g. MIN_GAP_DAYS around the query)
+}
+
+// ═══════════════════════════════════════════════════════════════
+// MATRIX
+// ═══════════════════════════════════════════════════════════════
+
+/**
+ * Copy vectors into one row-major matrix. Longer vectors are truncated to
+ * `dim`, shorter ones zero-padded.
+ */
+export function packRows(vectors: ArrayLike<number>[], dim: number): RowMatrix {
+  const rows = vectors.length;
+  const data = new Float64Array(rows * dim);
+  for (let r = 0; r < rows; r++) {
+    const v = vectors[r];
+    const n = Math.min(dim, v.length);
+    for (let i = 0, o = r * dim; i < n; i++, o++) data[o] = v[i];
+  }
+  return { rows, dim, data };
+}
+
+/**
+ * L2 norm of the first n values (0 -> 1, so it can always divide)
+ */
+export function l2Norm(v: ArrayLike<number>, n = v.length, offset = 0): number {
+  let s = 0;
+  for (let i = offset, end = offset + n; i < end; i++) s += v[i] * v[i];
+  return Math.sqrt(s) || 1;
+}
+
+export function rowNorms(m: RowMatrix, out = new Float64Array(m.rows)): Float64Array {
+  for (let r = 0; r < m.rows; r++) out[r] = l2Norm(m.data, m.dim, r * m.dim);
+  return out;
+}
+
+/**
+ * Mark rows whose index lies within `radius` of `center` (|i - center| < radius)
+ */
+export function excludeWithin(mask: Uint8Array, center: number, radius: number): Uint8Array {
+  const from = Math.max(0, center - radius + 1);
+  const to = Math.min(mask.length, center + radius);
+  for (let i = from; i < to; i++) mask[i] = 1;
+  return mask;
+}
+
+// ═══════════════════════════════════════════════════════════════
+// BATCHED SCORES
+// ═══════════════════════════════════════════════════════════════
+
+export function dotRows(m: RowMatrix, q: ArrayLike<number>, out: Float64Array, count = m.rows): number {
+  const { dim, data } = m;
+  for (let r = 0, base = 0; r < count; r++, base += dim) {
+    let dot = 0;
+    for (let i = 0; i < dim; i++) dot += q[i] * data[base + i];
+    out[r] = dot;
+  }
+  return count;
+}
+
+/**
+ * Cosine: dot / (qNorm * rowNorm + eps), norms via l2Norm. Returns rows scored.
+ */
+export function cosineRows(
+  m: RowMatrix,
+  q: ArrayLike<number>,
+  out: Float64Array,
+  opts: CosineOptions = {}
+): number {
+  const count = Math.max(0, Math.min(m.rows, opts.count ?? m.rows));
+  const norms = opts.norms ?? rowNorms(m);
+  const eps = opts.eps ?? 0;
+  const minDenom = opts.minDenom ?? 0;
+  const qNorm = l2Norm(q, m.dim);
+
+  dotRows(m, q, out, count);
+  for (let r = 0; r < count; r++) {
+    const denom = qNorm * norms[r];
+    out[r] = denom < minDenom ? 0 : out[r] / (denom + eps);
+  }
+  return count;
+}
+
+/**
+ * Pearson correlation per row (0 when either side is flat or dim < 3)
+ */
+export function pearsonRows(m: RowMatrix, q: ArrayLike<number>, out: Float64Array, count = m.rows): number {
+  const { dim, data } = m;
+  if (dim < 3) {
+    out.fill(0, 0, count);
+    return count;
+  }
+
+  let qSum = 0;
+  for (let i = 0; i < dim; i++) qSum += q[i];
+  const qMean = qSum / dim;
+  const qDiff = new Float64Array(dim);
+  let denQ = 0;
+  for (let i = 0; i < dim; i++) {
+    qDiff[i] = q[i] - qMean;
+    denQ += qDiff[i] * qDiff[i];
+  }
+
+  for (let r = 0, base = 0; r < count; r++, base += dim) {
+    let sum = 0;
+    for (let i = 0; i < dim; i++) sum += data[base + i];
+    const mean = sum / dim;
+
+    let num = 0;
+    let denR = 0;
+    for (let i = 0; i < dim; i++) {
+      const d = data[base + i] - mean;
+      num += qDiff[i] * d;
+      denR += d * d;
+    }
+    const den = Math.sqrt(denQ * denR);
+    out[r] = den === 0 ? 0 : num / den;
+  }
+  return count;
+}
+
+/**
+ * Root mean square error per row (Infinity when dim = 0)
+ */
+export function rmseRows(m: RowMatrix, q: ArrayLike<number>, out: Float64Array, count = m.rows): number {
+  const { dim, data } = m;
+  for (let r = 0, base = 0; r < count; r++, base += dim) {
+    if (dim === 0) {
+      out[r] = Infinity;
+      continue;
+    }
+    let sum = 0;
+    for (let i = 0; i < dim; i++) {
+      const d = q[i] - data[base + i];
+      sum += d * d;
+    }
+    out[r] = Math.sqrt(sum / dim);
+  }
+  return count;
+}
+
+// ═══════════════════════════════════════════════════════════════
+// TOP-K
+// ═══════════════════════════════════════════════════════════════
+
+/**
+ * Bounded min-heap of the best `k` (index, score) pairs seen so far.
+ * The root is the worst kept entry: lowest score, then highest index.
+ */
+export class TopK {
+  private idx: Int32Array;
+  private sc: Float64Array;
+  private size = 0;
+
+  constructor(readonly k: number) {
+    const cap = Math.max(0, k);
+    this.idx = new Int32Array(cap);
+    this.sc = new Float64Array(cap);
+  }
+
+  get length(): number {
+    return this.size;
+  }
+
+  /**
+   * Score of the worst kept entry (-Infinity while empty)
+   */
+  get floor(): number {
+    return this.size ? this.sc[0] : -Infinity;
+  }
+
+  push(index: number, score: number): void {
+    if (this.k <= 0 || Number.isNaN(score)) return;
+
+    if (this.size < this.k) {
+      let i = this.size++;
+      while (i > 0) {
+        const p = (i - 1) >> 1;
+        if (!this.worse(score, index, this.sc[p], this.idx[p])) break;
+        this.sc[i] = this.sc[p];
+        this.idx[i] = this.idx[p];
+        i = p;
+      }
+      this.sc[i] = score;
+      this.idx[i] = index;
+      return;
+    }
+
+    if (!this.worse(this.sc[0], this.idx[0], score, index)) return;
+    this.siftDown(score, index);
+  }
+
+  /**
+   * Kept entries, best first
+   */
+  sorted(): Scored[] {
+    const out: Scored[] = [];
+    for (let i = 0; i < this.size; i++) out.push({ index: this.idx[i], score: this.sc[i] });
+    return out.sort((a, b) => b.score - a.score || a.index - b.index);
+  }
+
+  private worse(sa: number, ia: number, sb: number, ib: number): boolean {
+    return sa < sb || (sa === sb && ia > ib);
+  }
+
+  private siftDown(score: number, index: number): void {
+    let i = 0;
+    const n = this.size;
+    for (;;) {
+      const l = 2 * i + 1;
+      if (l >= n) break;
+      const r = l + 1;
+      const c = r < n && this.worse(this.sc[r], this.idx[r], this.sc[l], this.idx[l]) ? r : l;
+      if (!this.worse(this.sc[c], this.idx[c], score, index)) break;
+      this.sc[i] = this.sc[c];
+      this.idx[i] = this.idx[c];
+      i = c;
+    }
+    this.sc[i] = score;
+    this.idx[i] = index;
+  }
+}
+
+/**
+ * Best `k` of scores[0..count), best first
+ */
+export function topK(scores: ArrayLike<number>, k: number, opts: TopKOptions = {}): Scored[] {
+  const count = Math.min(scores.length, opts.count ?? scores.length);
+  const minScore = opts.minScore ?? -Infinity;
+  const exclude = opts.exclude;
+  const heap = new TopK(k);
+  for (let r = 0; r < count; r++) {
+    if (exclude && exclude[r]) continue;
+    const s = scores[r];
+    if (s >= minScore) heap.push(r, s);
+  }
+  return heap.sorted();
+}
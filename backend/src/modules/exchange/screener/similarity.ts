@@ -4,6 +4,8 @@
  * Cosine similarity for pattern matching (no ML).
  */
 
+import { cosineRows, packRows, topK } from '../../../common/similarity.kernel.js';
+
 /**
  * Cosine similarity between two vectors
  * Returns value in [-1, 1] where 1 = identical direction
@@ -48,14 +50,18 @@ export function findMostSimilar(
   references: Array<{ id: string; vector: number[] }>,
   topN = 5
 ): Array<{ id: string; similarity: number }> {
-  const similarities = references.map(ref => ({
-    id: ref.id,
-    similarity: cosineSimilarity(target, ref.vector),
-  }));
+  // One packed pass; references of another length score 0, as in cosineSimilarity
+  const m = packRows(references.map(ref => ref.vector), target.length);
+  const scores = new Float64Array(m.rows);
+  if (target.length > 0) cosineRows(m, target, scores, { minDenom: 1e-9 });
+  references.forEach((ref, r) => {
+    if (ref.vector.length !== target.length) scores[r] = 0;
+  });
 
-  return similarities
-    .sort((a, b) => b.similarity - a.similarity)
-    .slice(0, topN);
+  return topK(scores, topN).map(s => ({
+    id: references[s.index].id,
+    similarity: s.score,
+  }));
 }
 
 console.log('[Screener] Similarity Engine loaded');
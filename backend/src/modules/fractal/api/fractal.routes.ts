@@ -3,7 +3,7 @@
  * V1 + V2 endpoints
  */
 
-import { FastifyInstance, FastifyRequest } from 'fastify';
+import { FastifyInstance, FastifyReply, FastifyRequest } from 'fastify';
 import { FractalEngine } from '../engine/fractal.engine.js';
 import { FractalBootstrapService } from '../bootstrap/fractal.bootstrap.service.js';
 import { StateStore } from '../data/state.store.js';
@@ -11,7 +11,8 @@ import { CanonicalStore } from '../data/canonical.store.js';
 import { KrakenCsvProvider } from '../data/providers/kraken-csv.provider.js';
 import { LegacyProvider } from '../data/providers/legacy.provider.js';
 import { FractalMatchRequest, FractalHealthResponse } from '../contracts/fractal.contracts.js';
-import { FRACTAL_SYMBOL, FRACTAL_TIMEFRAME, SOURCE_PRIORITY, ONE_DAY_MS } from '../domain/constants.js';
+import { FRACTAL_SYMBOL, FRACTAL_TIMEFRAME, SOURCE_PRIORITY, ONE_DAY_MS, MIN_GAP_DAYS, FORWARD_HORIZON_DAYS } from '../domain/constants.js';
+import { RETRIEVAL_STAGE1_MODES, TwoStageRetrievalConfig } from '../contracts/retrieval.contracts.js';
 
 // V2 Imports
 import { FractalEngineV2, FractalMatchRequestV2 } from '../engine/fractal.engine.v2.js';
@@ -28,6 +29,19 @@ const bootstrap = new FractalBootstrapService();
 const modernProvider = new KrakenCsvProvider();
 const legacyProvider = new LegacyProvider();
 
+/**
+ * Aborts when the client disconnects before the reply is sent, so the
+ * match job is dropped from the compute queue (or stopped) instead of
+ * finishing for nobody
+ */
+function clientAbort(reply: FastifyReply): AbortSignal {
+  const ctrl = new AbortController();
+  reply.raw.once('close', () => {
+    if (!reply.raw.writableFinished) ctrl.abort();
+  });
+  return ctrl.signal;
+}
+
 function getYesterdayUTC(): Date {
   const now = new Date();
   const utcMidnight = Date.UTC(now.getUTCFullYear(), now.getUTCMonth(), now.getUTCDate());
@@ -93,13 +107,14 @@ export async function fractalRoutes(fastify: FastifyInstance): Promise<void> {
    * POST /api/fractal/v2/match
    */
   fastify.post('/api/fractal/v2/match', async (
-    request: FastifyRequest<{ Body: FractalMatchRequestV2 }>
+    request: FastifyRequest<{ Body: FractalMatchRequestV2 }>,
+    reply: FastifyReply
   ) => {
     try {
       const result = await engineV2.matchV2({
         ...request.body,
         version: 2,
-      });
+      }, { signal: clientAbort(reply) });
       return result;
     } catch (error) {
       const message = error instanceof Error ? error.message : 'Unknown error';
@@ -123,7 +138,8 @@ export async function fractalRoutes(fastify: FastifyInstance): Promise<void> {
         ageDecayLambda?: string;
         regimeConditioned?: string;
       }
-    }>
+    }>,
+    reply: FastifyReply
   ) => {
     try {
       const { 
@@ -141,7 +157,7 @@ export async function fractalRoutes(fastify: FastifyInstance): Promise<void> {
         ageDecayEnabled: ageDecay === 'true',
         ageDecayLambda: ageDecayLambda ? parseFloat(ageDecayLambda) : undefined,
         regimeConditioned: regimeConditioned === 'true',
-      });
+      }, { signal: clientAbort(reply) });
       return result;
     } catch (error) {
       const message = error instanceof Error ? error.message : 'Unknown error';
@@ -195,6 +211,7 @@ export async function fractalRoutes(fastify: FastifyInstance): Promise<void> {
    * BLOCK 37.1: Multi-Representation Match
    * GET /api/fractal/v2.1/match?multiRep=true
    * Returns matches scored with ensemble representations (ret + vol + dd)
+   * stage1Mode=ret_hash|ret_hnsw runs stage 1 through the ANN index (BLOCK 37.2)
    */
   fastify.get('/api/fractal/v2.1/match', async (request) => {
     try {
@@ -205,6 +222,7 @@ export async function fractalRoutes(fastify: FastifyInstance): Promise<void> {
         await import('../engine/similarity.engine.v2.js');
       const { stage1SelectByReturns } = await import('../engine/retrieval.stage1.js');
       const { twoStageRetrieve, analyzeStageCorrelation } = await import('../engine/retrieval.two_stage.js');
+      const { annKindForMode, getStage1Index, stage1SelectByIndex } = await import('../engine/retrieval.ann.js');
       const { enforcePhaseDiversity, analyzePhaseDistribution } = await import('../engine/match-filters.phase.js');
       const { classifyPhaseDetailed } = await import('../engine/phase.classifier.js');
       const { V2_INSTITUTIONAL_CORE_CONFIG } = await import('../config/fractal.presets.js');
@@ -218,12 +236,21 @@ export async function fractalRoutes(fastify: FastifyInstance): Promise<void> {
       const useMultiRep = query.multiRep !== 'false';
       const useTwoStage = query.twoStage !== 'false';
       const usePhaseDiversity = query.phaseDiversity !== 'false';
+
+      // Stage 1: plain scan of the engine's candidates, or an ANN index over every window
+      const twoStageCfg: TwoStageRetrievalConfig = {
+        ...V2_INSTITUTIONAL_CORE_CONFIG.twoStage,
+        stage1Mode: RETRIEVAL_STAGE1_MODES.includes(query.stage1Mode)
+          ? query.stage1Mode
+          : V2_INSTITUTIONAL_CORE_CONFIG.twoStage.stage1Mode,
+      };
+      const annKind = useTwoStage ? annKindForMode(twoStageCfg.stage1Mode) : undefined;
       
       // Get base match data using existing engine
       const baseResult = await engineV2.matchV2({
         symbol,
         windowLen: windowLen as 30 | 60 | 90,
-        topK: useTwoStage ? 600 : topK, // get more candidates for two-stage
+        topK: useTwoStage && !annKind ? 600 : topK, // get more candidates for two-stage
         asOf,
         version: 2,
         ageDecayEnabled: true,
@@ -277,20 +304,50 @@ export async function fractalRoutes(fastify: FastifyInstance): Promise<void> {
       let phaseDistribution = null;
       
       // Two-stage retrieval
-      if (useTwoStage && candidates.length > 0) {
-        const stage1 = stage1SelectByReturns(curCloses, candidates, {
-          enabled: true,
-          stage1Mode: 'ret_fast',
-          stage1TopK: 600,
-          stage1MinSim: 0.10,
-          stage2TopN: 120,
-          stage2MinSim: 0.35,
-        });
+      if (annKind) {
+        // Every window of the full history, indexed once and grown per new
+        // bar; asOf and the engine's gap/horizon exclusions cap the query.
+        // The data is always FRACTAL_SYMBOL's, so that keys the index.
+        const allTs = asOf ? data.map(d => d.ts) : timestamps;
+        const allCloses = asOf ? data.map(d => d.ohlcv.c) : closes;
+        const lastIdx = closes.length - 1;
+        const maxEndIdx = asOf
+          ? Math.min(lastIdx - MIN_GAP_DAYS, lastIdx - FORWARD_HORIZON_DAYS)
+          : lastIdx - MIN_GAP_DAYS;
+        const index = getStage1Index(annKind, `${FRACTAL_SYMBOL}|${windowLen}`, windowLen);
+        const stage1 = stage1SelectByIndex(
+          curCloses,
+          allTs,
+          allCloses,
+          index,
+          twoStageCfg,
+          timestamps[Math.max(0, maxEndIdx)]
+        );
+        const { ranked, stats } = twoStageRetrieve(
+          curCloses,
+          stage1,
+          twoStageCfg,
+          V2_INSTITUTIONAL_CORE_CONFIG.multiRep
+        );
+
+        twoStageStats = stats;
+        stageCorrelation = analyzeStageCorrelation(ranked);
+
+        finalMatches = ranked.map(r => ({
+          ...r.cand,
+          originalRank: 0,
+          originalScore: r.s1,
+          sim: r.sim,
+          byRep: r.byRep,
+          s1: r.s1,
+        }));
+      } else if (useTwoStage && candidates.length > 0) {
+        const stage1 = stage1SelectByReturns(curCloses, candidates, twoStageCfg);
         
         const { ranked, stats } = twoStageRetrieve(
           curCloses,
           stage1,
-          V2_INSTITUTIONAL_CORE_CONFIG.twoStage,
+          twoStageCfg,
           V2_INSTITUTIONAL_CORE_CONFIG.multiRep
         );
         
@@ -351,7 +408,7 @@ export async function fractalRoutes(fastify: FastifyInstance): Promise<void> {
           phaseDistribution,
           config: {
             multiRep: V2_INSTITUTIONAL_CORE_CONFIG.multiRep,
-            twoStage: V2_INSTITUTIONAL_CORE_CONFIG.twoStage,
+            twoStage: twoStageCfg,
             phaseDiversity: V2_INSTITUTIONAL_CORE_CONFIG.phaseDiversity,
           },
         },
@@ -1561,10 +1618,11 @@ export async function fractalRoutes(fastify: FastifyInstance): Promise<void> {
    * POST /api/fractal/match
    */
   fastify.post('/api/fractal/match', async (
-    request: FastifyRequest<{ Body: FractalMatchRequest }>
+    request: FastifyRequest<{ Body: FractalMatchRequest }>,
+    reply: FastifyReply
   ) => {
     try {
-      const result = await engine.match(request.body || {});
+      const result = await engine.match(request.body || {}, { signal: clientAbort(reply) });
       return result;
     } catch (error) {
       const message = error instanceof Error ? error.message : 'Unknown error';
@@ -1587,7 +1645,8 @@ export async function fractalRoutes(fastify: FastifyInstance): Promise<void> {
         asOf?: string;
         similarityMode?: string;
       }
-    }>
+    }>,
+    reply: FastifyReply
   ) => {
     try {
       const { symbol, windowLen, topK, forwardHorizon, asOf, similarityMode } = request.query;
@@ -1598,7 +1657,7 @@ export async function fractalRoutes(fastify: FastifyInstance): Promise<void> {
         forwardHorizon: forwardHorizon ? parseInt(forwardHorizon) : undefined,
         asOf: asOf ? new Date(asOf) : undefined,
         similarityMode: (similarityMode === 'zscore') ? 'zscore' : 'raw_returns'
-      });
+      }, { signal: clientAbort(reply) });
       return result;
     } catch (error) {
       const message = error instanceof Error ? error.message : 'Unknown error';
@@ -0,0 +1,14 @@
+/**
+ * Fractal Storage Configuration
+ *
+ * Paths of offline artifacts the engine can load (env-configured; empty = off)
+ */
+
+// Built by scripts/match_table.py; asOf queries read neighbours from it when it matches the cache
+export const MATCH_TABLE_PATH = process.env.FRACTAL_MATCH_TABLE_PATH || '';
+
+// Stage-1 ANN indexes (retrieval.ann.ts) are saved here and reloaded on restart
+export const ANN_INDEX_DIR = process.env.FRACTAL_ANN_INDEX_DIR || '';
+
+// How often indexes that grew are written there (also flushed at shutdown)
+export const ANN_FLUSH_INTERVAL_MS = Number(process.env.FRACTAL_ANN_FLUSH_SEC || 300) * 1000;
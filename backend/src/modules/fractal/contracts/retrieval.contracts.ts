@@ -7,7 +7,10 @@
 
 export type RetrievalStage1Mode =
   | "ret_fast"      // fast cosine on raw_returns only
-  | "ret_hash";     // optional later (LSH-like)
+  | "ret_hash"      // LSH index over the same vectors (retrieval.ann.ts)
+  | "ret_hnsw";     // HNSW graph over the same vectors (retrieval.ann.ts)
+
+export const RETRIEVAL_STAGE1_MODES: RetrievalStage1Mode[] = ["ret_fast", "ret_hash", "ret_hnsw"];
 
 export interface TwoStageRetrievalConfig {
   enabled: boolean;
@@ -0,0 +1,134 @@
+/**
+ * Match Table Tests
+ *
+ * fixtures/walk_200.matches is written by scripts/match_table.py from
+ * fixtures/walk_200.csv (windows 30/60, top 4). The reader must agree with
+ * the Python layout, recognise the series it was built from, and serve the
+ * same neighbours and float64 scores as the window-matrix scan. Regenerate with:
+ *   python scripts/match_table.py \
+ *     backend/src/modules/fractal/data/__tests__/fixtures/walk_200.csv \
+ *     backend/src/modules/fractal/data/__tests__/fixtures/walk_200.matches \
+ *     --symbol BTC --windows 30,60 --top-k 4
+ */
+
+import { describe, it, expect, afterAll } from 'vitest';
+import fs from 'fs';
+import os from 'os';
+import path from 'path';
+import { fileURLToPath } from 'url';
+import { readMatchTable, tableMatchesSeries, tableMatches } from '../match.table.js';
+import { buildWindowMatrix, matrixTopRows } from '../../engine/window.matrix.js';
+import { buildWindowVector } from '../../engine/similarity.engine.js';
+
+const FIXTURES = fileURLToPath(new URL('./fixtures/', import.meta.url));
+const TABLE = path.join(FIXTURES, 'walk_200.matches');
+const MIN_GAP = 60;
+const HORIZON = 30;
+const tmpDir = fs.mkdtempSync(path.join(os.tmpdir(), 'match-table-'));
+
+function readSeries() {
+  const [, ...lines] = fs.readFileSync(path.join(FIXTURES, 'walk_200.csv'), 'utf-8').trim().split('\n');
+  const ts: Date[] = [];
+  const closes: number[] = [];
+  for (const line of lines) {
+    const cols = line.split(',');
+    ts.push(new Date(`${cols[0]}T00:00:00Z`));
+    closes.push(parseFloat(cols[4]));
+  }
+  return { ts, closes };
+}
+
+// What FractalEngine.match scans when the table is absent
+function scan(closes: number[], windowLen: number, asOfIdx: number, k: number) {
+  const sliced = closes.slice(0, asOfIdx + 1);
+  return matrixTopRows({
+    matrix: buildWindowMatrix(sliced, windowLen, 'raw_returns', 0),
+    query: buildWindowVector(sliced.slice(-windowLen - 1), 'raw_returns'),
+    maxEndIdx: asOfIdx - Math.max(MIN_GAP, HORIZON),
+    k,
+  });
+}
+
+afterAll(() => {
+  fs.rmSync(tmpDir, { recursive: true, force: true });
+});
+
+describe('readMatchTable', () => {
+  it('reads the header written by match_table.py', () => {
+    const table = readMatchTable(TABLE);
+    expect(table.symbol).toBe('BTC');
+    expect(table.rows).toBe(200);
+    expect(table.topK).toBe(4);
+    expect(table.minGap).toBe(MIN_GAP);
+    expect(table.horizon).toBe(HORIZON);
+    expect(table.windows).toEqual([30, 60]);
+    expect(table.score.get(30)).toBeInstanceOf(Float64Array);
+    expect(table.endIdx.get(60)!.length).toBe(200 * 4);
+  });
+
+  it('rejects truncated files and other formats', () => {
+    const truncated = path.join(tmpDir, 'truncated.matches');
+    fs.writeFileSync(truncated, fs.readFileSync(TABLE).subarray(0, 4096));
+    expect(() => readMatchTable(truncated)).toThrow('size mismatch');
+
+    const v1 = path.join(tmpDir, 'v1.matches');
+    const file = fs.readFileSync(TABLE);
+    file.writeUInt32LE(1, 8);
+    fs.writeFileSync(v1, file);
+    expect(() => readMatchTable(v1)).toThrow('unsupported format 1');
+
+    expect(() => readMatchTable(path.join(FIXTURES, 'walk_200.csv'))).toThrow('not a match table');
+  });
+});
+
+describe('tableMatchesSeries', () => {
+  const table = readMatchTable(TABLE);
+
+  it('accepts the series the table was built from', () => {
+    const { ts, closes } = readSeries();
+    expect(tableMatchesSeries(table, ts, closes)).toBe(true);
+  });
+
+  it('rejects a revised close, an appended candle or a shifted date', () => {
+    const { ts, closes } = readSeries();
+    const revised = [...closes];
+    revised[50] *= 1.0001;
+    expect(tableMatchesSeries(table, ts, revised)).toBe(false);
+
+    const nextDay = new Date(ts[ts.length - 1].getTime() + 86_400_000);
+    expect(tableMatchesSeries(table, [...ts, nextDay], [...closes, closes[closes.length - 1]])).toBe(false);
+
+    const shifted = ts.map(t => new Date(t.getTime() + 3_600_000));
+    expect(tableMatchesSeries(table, shifted, closes)).toBe(false);
+  });
+});
+
+describe('tableMatches', () => {
+  const table = readMatchTable(TABLE);
+  const { closes } = readSeries();
+
+  for (const windowLen of [30, 60]) {
+    it(`w${windowLen}: neighbours and scores equal the window-matrix scan`, () => {
+      const first = windowLen + Math.max(MIN_GAP, HORIZON);
+      let checked = 0;
+      for (let asOf = first; asOf < closes.length; asOf++) {
+        const got = tableMatches(table, windowLen, asOf, 4);
+        const want = scan(closes, windowLen, asOf, 4);
+        expect(got!.map(m => m.endIdx)).toEqual(want.map(m => m.endIdx));
+        got!.forEach((m, i) => expect(Math.abs(m.score - want[i].score)).toBeLessThan(1e-12));
+        checked++;
+      }
+      expect(checked).toBeGreaterThan(50);
+    });
+  }
+
+  it('returns null for windows it does not cover or a larger K', () => {
+    expect(tableMatches(table, 90, 150, 4)).toBeNull();
+    expect(tableMatches(table, 30, 150, 5)).toBeNull();
+    expect(tableMatches(table, 30, 200, 4)).toBeNull();
+  });
+
+  it('returns no neighbours before the first as-of row', () => {
+    expect(tableMatches(table, 30, 40, 4)).toEqual([]);
+  });
+});
@@ -0,0 +1,126 @@
+/**
+ * Materialized Match Table (reader)
+ *
+ * Top-K historical analogues per as-of candle and window length, written
+ * offline by scripts/match_table.py under the FractalEngine.match rule
+ * (raw_returns cosine, MIN_GAP_DAYS, horizon). Per window the file holds
+ * a float64 score matrix and an int32 end-index matrix, rows x K, so a
+ * lookup is two subarray views. Scores are float64 like the scan's, and
+ * all score blocks precede the index blocks to keep them 8-byte aligned.
+ */
+
+import fs from 'fs';
+import crypto from 'crypto';
+
+const MAGIC = 'FRMATCHT';
+const FORMAT_VERSION = 2;
+const HEADER_SIZE = 128;
+const MAX_WINDOWS = 8;
+
+export interface MatchTable {
+  symbol: string;
+  rows: number;
+  topK: number;
+  minGap: number;
+  horizon: number;
+  version: string;
+  createdAt: number;
+  windows: number[];
+  ts: BigInt64Array;
+  endIdx: Map<number, Int32Array>;
+  score: Map<number, Float64Array>;
+}
+
+export interface TableMatch {
+  endIdx: number;
+  score: number;
+}
+
+function readString(buf: Buffer, start: number, len: number): string {
+  return buf.subarray(start, start + len).toString('ascii').replace(/\0+$/, '');
+}
+
+export function readMatchTable(filePath: string): MatchTable {
+  const file = fs.readFileSync(filePath);
+  if (file.length < HEADER_SIZE || readString(file, 0, 8) !== MAGIC) {
+    throw new Error(`${filePath}: not a match table`);
+  }
+  const fmt = file.readUInt32LE(8);
+  if (fmt !== FORMAT_VERSION) throw new Error(`${filePath}: unsupported format ${fmt}`);
+  const count = Math.min(file.readUInt32LE(12), MAX_WINDOWS);
+  const rows = Number(file.readBigUInt64LE(16));
+  const topK = file.readUInt32LE(24);
+  const windows: number[] = [];
+  for (let i = 0; i < count; i++) windows.push(file.readUInt32LE(96 + i * 4));
+  if (file.length !== HEADER_SIZE + rows * 8 + count * rows * topK * 12) {
+    throw new Error(`${filePath}: size mismatch`);
+  }
+
+  // Same alignment rule as common/candle.binary.ts
+  const body = file.byteOffset % 8 === 0 ? file : Buffer.from(file);
+  let offset = body.byteOffset + HEADER_SIZE;
+  const ts = new BigInt64Array(body.buffer, offset, rows);
+  offset += rows * 8;
+
+  const score = new Map<number, Float64Array>();
+  for (const w of windows) {
+    score.set(w, new Float64Array(body.buffer, offset, rows * topK));
+    offset += rows * topK * 8;
+  }
+  const endIdx = new Map<number, Int32Array>();
+  for (const w of windows) {
+    endIdx.set(w, new Int32Array(body.buffer, offset, rows * topK));
+    offset += rows * topK * 4;
+  }
+
+  return {
+    symbol: readString(file, 40, 16),
+    rows,
+    topK,
+    minGap: file.readUInt32LE(28),
+    horizon: file.readUInt32LE(32),
+    version: file.subarray(56, 88).toString('hex'),
+    createdAt: Number(file.readBigInt64LE(88)),
+    windows,
+    ts,
+    endIdx,
+    score,
+  };
+}
+
+/**
+ * True when the table was built from exactly this series
+ */
+export function tableMatchesSeries(table: MatchTable, ts: Date[], closes: number[]): boolean {
+  if (table.rows !== closes.length || ts.length !== closes.length) return false;
+  const tsCol = new BigInt64Array(ts.length);
+  for (let i = 0; i < ts.length; i++) tsCol[i] = BigInt(ts[i].getTime());
+  const digest = crypto.createHash('sha256')
+    .update(Buffer.from(tsCol.buffer))
+    .update(Buffer.from(Float64Array.from(closes).buffer))
+    .digest('hex');
+  return digest === table.version;
+}
+
+/**
+ * Precomputed neighbours as of candle `asOfIdx`, best first; null when the
+ * table does not cover this window length
+ */
+export function tableMatches(
+  table: MatchTable,
+  windowLen: number,
+  asOfIdx: number,
+  topK: number
+): TableMatch[] | null {
+  const ends = table.endIdx.get(windowLen);
+  const scores = table.score.get(windowLen);
+  if (!ends || !scores || topK > table.topK || asOfIdx < 0 || asOfIdx >= table.rows) return null;
+  const out: TableMatch[] = [];
+  const base = asOfIdx * table.topK;
+  for (let k = 0; k < topK; k++) {
+    const endIdx = ends[base + k];
+    if (endIdx < 0) break;
+    out.push({ endIdx, score: scores[base + k] });
+  }
+  return out;
+}
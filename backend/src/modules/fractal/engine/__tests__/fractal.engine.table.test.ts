@@ -0,0 +1,86 @@
+/**
+ * FractalEngine Match Table Path Tests
+ *
+ * With FRACTAL_MATCH_TABLE_PATH pointing at a table built from the cached
+ * series, asOf matches come from the table instead of the window-matrix
+ * scan, and must be the same matches with the same scores. A table built
+ * from other data is ignored.
+ */
+
+import { describe, it, expect, beforeAll } from 'vitest';
+import fs from 'fs';
+import path from 'path';
+import { fileURLToPath } from 'url';
+import type { FractalEngine as FractalEngineType } from '../fractal.engine.js';
+
+const FIXTURES = fileURLToPath(new URL('../../data/__tests__/fixtures/', import.meta.url));
+
+function readSeries() {
+  const [, ...lines] = fs.readFileSync(path.join(FIXTURES, 'walk_200.csv'), 'utf-8').trim().split('\n');
+  return lines.map(line => {
+    const cols = line.split(',');
+    return { ts: new Date(`${cols[0]}T00:00:00Z`), close: parseFloat(cols[4]), quality: 1 };
+  });
+}
+
+let FractalEngine: typeof FractalEngineType;
+
+// Engine over an in-memory series: no Mongo reads, no feature writes
+function engineFor(series: Array<{ ts: Date; close: number; quality: number }>, useTable = true) {
+  const engine = new FractalEngine() as any;
+  engine.canonicalStore = { getSeriesWithQuality: async () => series };
+  engine.windowStore = { upsertWindow: async () => undefined };
+  if (!useTable) engine.loadMatchTable = () => null;
+  return engine as FractalEngineType & { matchTable: unknown; scoreBuf: Float64Array };
+}
+
+beforeAll(async () => {
+  // MATCH_TABLE_PATH is read when storage.config loads
+  process.env.FRACTAL_MATCH_TABLE_PATH = path.join(FIXTURES, 'walk_200.matches');
+  ({ FractalEngine } = await import('../fractal.engine.js'));
+});
+
+describe('FractalEngine match table path', () => {
+  const series = readSeries();
+  const request = (asOfIdx: number) => ({
+    symbol: 'BTC',
+    windowLen: 30 as const,
+    topK: 4,
+    asOf: series[asOfIdx].ts,
+  });
+
+  it('serves asOf matches from the table, equal to the scan', async () => {
+    const tabled = engineFor(series);
+    const scanned = engineFor(series, false);
+
+    for (const asOfIdx of [95, 120, 160, 199]) {
+      const got = await tabled.match(request(asOfIdx));
+      const want = await scanned.match(request(asOfIdx));
+      expect(got.matches.map(m => m.endTs)).toEqual(want.matches.map(m => m.endTs));
+      got.matches.forEach((m, i) => expect(Math.abs(m.score - want.matches[i].score)).toBeLessThan(1e-12));
+      expect(got.forwardStats).toEqual(want.forwardStats);
+    }
+
+    expect(tabled.matchTable).not.toBeNull();
+    // The table path never scores a window matrix
+    expect(tabled.scoreBuf.length).toBe(0);
+    expect(scanned.scoreBuf.length).toBeGreaterThan(0);
+  });
+
+  it('ignores a table built from different data', async () => {
+    const revised = series.map((c, i) => (i === 10 ? { ...c, close: c.close * 1.01 } : c));
+    const engine = engineFor(revised);
+    const result = await engine.match(request(160));
+
+    expect(engine.matchTable).toBeNull();
+    expect(result.matches.length).toBe(4);
+    expect(engine.scoreBuf.length).toBeGreaterThan(0);
+  });
+
+  it('scans latest-candle requests even with a table loaded', async () => {
+    const engine = engineFor(series);
+    await engine.match({ symbol: 'BTC', windowLen: 30, topK: 4 });
+    expect(engine.matchTable).not.toBeNull();
+    expect(engine.scoreBuf.length).toBeGreaterThan(0);
+  });
+});
@@ -0,0 +1,189 @@
+/**
+ * BLOCK 37.2 — Stage 1 ANN Tests
+ *
+ * Exact paths must reproduce stage1SelectByReturns; approximate queries may
+ * miss windows but never change a score. Incremental inserts, asOf caps and
+ * save/load round-trips must not change what a query returns; revised bars
+ * must rebuild the index, also after a reload.
+ */
+
+import fs from 'fs';
+import os from 'os';
+import path from 'path';
+import { describe, it, expect } from 'vitest';
+import {
+  AnnKind,
+  createStage1Index,
+  loadStage1Index,
+  stage1SelectByIndex,
+  stage1Vector,
+  syncStage1Index,
+} from '../retrieval.ann.js';
+import { stage1SelectByReturns, Stage1Candidate } from '../retrieval.stage1.js';
+import { TwoStageRetrievalConfig } from '../../contracts/retrieval.contracts.js';
+import { rng, randomWalk } from '../../../../common/__tests__/fixtures/random-walk.js';
+
+const DAY = 86400000;
+const KINDS: AnnKind[] = ['lsh', 'hnsw'];
+
+function days(n: number): Date[] {
+  return Array.from({ length: n }, (_, i) => new Date(i * DAY));
+}
+
+function windows(closes: number[], windowLen: number): Stage1Candidate[] {
+  const out: Stage1Candidate[] = [];
+  for (let end = windowLen; end < closes.length; end++) {
+    out.push({
+      endIdx: end,
+      endTs: new Date(end * DAY),
+      startTs: new Date((end - windowLen) * DAY),
+      closes: closes.slice(end - windowLen, end + 1),
+    });
+  }
+  return out;
+}
+
+describe('BLOCK 37.2 — Stage 1 ANN index', () => {
+  const windowLen = 30;
+  const closes = randomWalk(1600, 21);
+  const ts = days(closes.length);
+  const pool = windows(closes, windowLen);
+  const cur = randomWalk(windowLen + 1, 99);
+  const q = stage1Vector(cur);
+  const cfg: TwoStageRetrievalConfig = {
+    enabled: true,
+    stage1Mode: 'ret_hash',
+    stage1TopK: 50,
+    stage1MinSim: 0.1,
+    stage2TopN: 50,
+  };
+
+  for (const kind of KINDS) {
+    describe(kind, () => {
+
+      it('exact stage 1 equals the candidate scan', () => {
+        const index = createStage1Index(kind, windowLen, { tables: 4, bits: 6 });
+        const ref = stage1SelectByReturns(cur, pool, cfg);
+        expect(stage1SelectByIndex(cur, ts, closes, index, cfg)).toEqual(ref);
+        expect(index.lastStats.exact).toBe(true);
+
+        const asOf = new Date(800 * DAY);
+        const refAsOf = stage1SelectByReturns(cur, pool.filter(c => c.endTs <= asOf), cfg);
+        expect(stage1SelectByIndex(cur, ts, closes, index, cfg, asOf)).toEqual(refAsOf);
+      });
+
+      it('approximate results keep exact scores and find near copies', () => {
+        const index = createStage1Index(kind, windowLen, { tables: 8, bits: 6 });
+        syncStage1Index(index, ts, closes);
+
+        const exact = new Map(index.exact(q, pool.length).map(x => [x.index, x.score]));
+        const ann = index.query(q, 20, { exactBelow: 0, ef: 64 });
+        expect(index.lastStats.exact).toBe(false);
+        expect(index.lastStats.candidates).toBeLessThan(pool.length);
+        for (let i = 0; i < ann.length; i++) {
+          expect(ann[i].score).toBe(exact.get(ann[i].index));
+          if (i > 0) expect(ann[i].score).toBeLessThanOrEqual(ann[i - 1].score);
+        }
+
+        const rand = rng(3);
+        for (const id of [17, 404, 1200]) {
+          const noisy = stage1Vector(pool[id].closes).map(v => v + (rand() - 0.5) * 0.01);
+          expect(index.query(noisy, 5, { exactBelow: 0 })[0].index).toBe(id);
+        }
+      });
+
+      it('asOf queries never return later windows', () => {
+        const index = createStage1Index(kind, windowLen, { tables: 8, bits: 6 });
+        syncStage1Index(index, ts, closes);
+        const maxEndTs = 900 * DAY;
+        const ann = index.query(q, 30, { exactBelow: 0, maxEndTs });
+        expect(ann.length).toBe(30);
+        expect(ann.every(x => index.endTsOf(x.index) <= maxEndTs)).toBe(true);
+      });
+
+      it('incremental inserts equal a one-shot build', () => {
+        const oneShot = createStage1Index(kind, windowLen, { tables: 8, bits: 6 });
+        syncStage1Index(oneShot, ts, closes);
+
+        const grown = createStage1Index(kind, windowLen, { tables: 8, bits: 6 });
+        const n = windowLen + 1000;
+        expect(syncStage1Index(grown, ts.slice(0, n), closes.slice(0, n))).toBe(1000);
+        expect(syncStage1Index(grown, ts.slice(0, n), closes.slice(0, n))).toBe(0);
+        expect(syncStage1Index(grown, ts, closes)).toBe(pool.length - 1000);
+
+        expect(grown.query(q, 25, { exactBelow: 0 })).toEqual(oneShot.query(q, 25, { exactBelow: 0 }));
+      });
+
+      it('starts at the given bar', () => {
+        const index = createStage1Index(kind, windowLen, { tables: 4, bits: 6 });
+        expect(syncStage1Index(index, ts, closes, 100)).toBe(closes.length - 100);
+        expect(index.endIdxOf(0)).toBe(100);
+        expect(syncStage1Index(index, ts, closes, 100)).toBe(0);
+        expect(syncStage1Index(index, ts, closes)).toBe(pool.length);
+        expect(index.endIdxOf(0)).toBe(windowLen);
+      });
+
+      it('rebuilds when a close is revised under the same timestamps', () => {
+        const index = createStage1Index(kind, windowLen, { tables: 8, bits: 6 });
+        syncStage1Index(index, ts, closes);
+        const revised = closes.slice();
+        revised[700] *= 1.05;
+        expect(syncStage1Index(index, ts, revised)).toBe(pool.length);
+
+        const fresh = createStage1Index(kind, windowLen, { tables: 8, bits: 6 });
+        syncStage1Index(fresh, ts, revised);
+        expect(index.source).toBe(fresh.source);
+        expect(index.exact(q, 25)).toEqual(fresh.exact(q, 25));
+      });
+
+      it('rebuilds when the series is shorter or shifted', () => {
+        const index = createStage1Index(kind, windowLen, { tables: 8, bits: 6 });
+        syncStage1Index(index, ts, closes);
+        expect(syncStage1Index(index, ts.slice(0, 800), closes.slice(0, 800))).toBe(800 - windowLen);
+
+        const other = randomWalk(700, 5);
+        const shifted = days(other.length).map(d => new Date(d.getTime() + 3600000));
+        expect(syncStage1Index(index, shifted, other)).toBe(other.length - windowLen);
+        expect(index.endIdxOf(0)).toBe(windowLen);
+        expect(index.endTsOf(0)).toBe(shifted[windowLen].getTime());
+      });
+
+      it('round-trips through disk and keeps growing identically', () => {
+        const dir = fs.mkdtempSync(path.join(os.tmpdir(), 'ann-test-'));
+        try {
+          const file = path.join(dir, `${kind}.ann`);
+          const base = createStage1Index(kind, windowLen, { tables: 8, bits: 6 }, 'BTC|30');
+          const n = windowLen + 1200;
+          syncStage1Index(base, ts.slice(0, n), closes.slice(0, n));
+          base.save(file);
+
+          const loaded = loadStage1Index(file);
+          expect(loaded.kind).toBe(kind);
+          expect(loaded.key).toBe('BTC|30');
+          expect(loaded.source).toBe(base.source);
+          expect(loaded.length).toBe(1200);
+          expect(loaded.query(q, 25, { exactBelow: 0 })).toEqual(base.query(q, 25, { exactBelow: 0 }));
+
+          expect(syncStage1Index(base, ts, closes)).toBe(pool.length - 1200);
+          expect(syncStage1Index(loaded, ts, closes)).toBe(pool.length - 1200);
+          expect(loaded.query(q, 25, { exactBelow: 0 })).toEqual(base.query(q, 25, { exactBelow: 0 }));
+
+          // Stale vectors on disk: a close revised since the save
+          const revised = closes.slice();
+          revised[500] *= 0.97;
+          expect(syncStage1Index(loadStage1Index(file), ts, revised)).toBe(pool.length);
+
+          fs.writeFileSync(path.join(dir, 'bad.ann'), Buffer.alloc(256));
+          expect(() => loadStage1Index(path.join(dir, 'bad.ann'))).toThrow('not an ANN index');
+        } finally {
+          fs.rmSync(dir, { recursive: true, force: true });
+        }
+      });
+    });
+  }
+
+  it('rejects vectors of the wrong dimension', () => {
+    const index = createStage1Index('hnsw', windowLen);
+    expect(() => index.insertVector(0, 0, [1, 2, 3])).toThrow('index dim');
+  });
+});
@@ -0,0 +1,76 @@
+/**
+ * BLOCK 37.2 — Stage 1 Tests
+ *
+ * Packed-kernel stage 1 must select the same candidates, in the same order
+ * and with the same scores, as the per-candidate cosine + full sort it replaced.
+ */
+
+import { describe, it, expect } from 'vitest';
+import { stage1SelectByReturns, stage1SelectBatch, Stage1Candidate } from '../retrieval.stage1.js';
+import { buildRawReturns } from '../similarity.engine.v2.js';
+import { TwoStageRetrievalConfig } from '../../contracts/retrieval.contracts.js';
+import { randomWalk } from '../../../../common/__tests__/fixtures/random-walk.js';
+
+function l2norm(a: number[]): number {
+  return Math.sqrt(a.reduce((s, x) => s + x * x, 0)) || 1;
+}
+
+function l2normalize(x: number[]): number[] {
+  const n = l2norm(x);
+  return x.map(v => v / n);
+}
+
+// Stage 1 as it was: cosine per candidate, filter, stable sort, slice
+function legacyStage1(curCloses: number[], candidates: Stage1Candidate[], topK: number, minSim: number) {
+  const curVec = l2normalize(buildRawReturns(curCloses));
+  const scored: Array<{ cand: Stage1Candidate; s1: number }> = [];
+  for (const cand of candidates) {
+    const v = l2normalize(buildRawReturns(cand.closes));
+    let dot = 0;
+    for (let i = 0; i < Math.min(curVec.length, v.length); i++) dot += curVec[i] * v[i];
+    const s1 = dot / (l2norm(curVec) * l2norm(v));
+    if (s1 >= minSim) scored.push({ cand, s1 });
+  }
+  scored.sort((a, b) => b.s1 - a.s1);
+  return scored.slice(0, topK);
+}
+
+describe('BLOCK 37.2 — Stage 1 selection', () => {
+  const closes = randomWalk(3000, 99);
+
+  const windowLen = 30;
+  const candidates: Stage1Candidate[] = [];
+  for (let end = windowLen; end < closes.length - 90; end++) {
+    candidates.push({
+      endIdx: end,
+      endTs: new Date(end * 86400000),
+      startTs: new Date((end - windowLen) * 86400000),
+      closes: closes.slice(end - windowLen, end + 1),
+    });
+  }
+  const cur = closes.slice(-windowLen - 1);
+  const cfg: TwoStageRetrievalConfig = {
+    enabled: true,
+    stage1Mode: 'ret_fast',
+    stage1TopK: 150,
+    stage1MinSim: 0.1,
+    stage2TopN: 120,
+  };
+
+  it('matches the per-candidate scan', () => {
+    const ref = legacyStage1(cur, candidates, 150, 0.1);
+    expect(stage1SelectByReturns(cur, candidates, cfg)).toEqual(ref);
+  });
+
+  it('batched selection equals the single pass', () => {
+    const ref = legacyStage1(cur, candidates, 150, 0.1);
+    expect(stage1SelectBatch(cur, candidates, cfg, 257)).toEqual(ref);
+  });
+
+  it('applies stage1MinSim before top-K', () => {
+    const strict: TwoStageRetrievalConfig = { ...cfg, stage1TopK: 5000, stage1MinSim: 0.5 };
+    const out = stage1SelectByReturns(cur, candidates, strict);
+    expect(out).toEqual(legacyStage1(cur, candidates, 5000, 0.5));
+    expect(out.every(x => x.s1 >= 0.5)).toBe(true);
+  });
+});
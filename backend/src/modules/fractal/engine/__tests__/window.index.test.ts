@@ -0,0 +1,91 @@
+/**
+ * Window Index Tests
+ *
+ * update() on a series that only grew must yield exactly the windows a
+ * from-scratch build would, and any history revision must force a build.
+ * A horizon change over the same history reindexes under the same revision.
+ */
+
+import { describe, it, expect } from 'vitest';
+import { WindowIndex, WindowLen } from '../window.index.js';
+import { randomWalk } from '../../../../common/__tests__/fixtures/random-walk.js';
+
+const LENS: WindowLen[] = [30, 60, 90];
+const HORIZON = 30;
+
+function series(n: number, seed: number): { ts: Date[]; closes: number[] } {
+  const ts = Array.from({ length: n }, (_, i) => new Date(Date.UTC(2015, 0, 1) + i * 86400000));
+  return { ts, closes: randomWalk(n, seed, 0.06) };
+}
+
+function fresh(ts: Date[], closes: number[]): WindowIndex {
+  const index = new WindowIndex();
+  index.buildAll(ts, closes, LENS, HORIZON);
+  return index;
+}
+
+describe('Window Index', () => {
+  const full = series(800, 7);
+
+  it('appends only the newly eligible windows when the series grows', () => {
+    const index = new WindowIndex();
+    const first = index.update(full.ts.slice(0, 700), full.closes.slice(0, 700), LENS, HORIZON);
+    expect(first.mode).toBe('build');
+
+    const grown = index.update(full.ts.slice(0, 701), full.closes.slice(0, 701), LENS, HORIZON);
+    expect(grown.mode).toBe('append');
+    expect(grown.added).toBe(LENS.length);
+    expect(grown.revision).toBe(first.revision);
+
+    const more = index.update(full.ts, full.closes, LENS, HORIZON);
+    expect(more.added).toBe(99 * LENS.length);
+
+    const ref = fresh(full.ts, full.closes);
+    for (const len of LENS) expect(index.get(len)).toEqual(ref.get(len));
+  });
+
+  it('reports unchanged when nothing new arrived', () => {
+    const index = new WindowIndex();
+    index.update(full.ts, full.closes, LENS, HORIZON);
+    const again = index.update([...full.ts], [...full.closes], LENS, HORIZON);
+
+    expect(again.mode).toBe('unchanged');
+    expect(again.added).toBe(0);
+  });
+
+  it('rebuilds on a history revision', () => {
+    const index = new WindowIndex();
+    const first = index.update(full.ts.slice(0, 700), full.closes.slice(0, 700), LENS, HORIZON);
+
+    const revised = [...full.closes];
+    revised[350] *= 1.01;
+    const next = index.update(full.ts, revised, LENS, HORIZON);
+
+    expect(next.mode).toBe('build');
+    expect(next.revision).toBe(first.revision + 1);
+    for (const len of LENS) expect(index.get(len)).toEqual(fresh(full.ts, revised).get(len));
+  });
+
+  it('reindexes a horizon change without bumping the revision', () => {
+    const index = new WindowIndex();
+    const first = index.update(full.ts.slice(0, 700), full.closes.slice(0, 700), LENS, HORIZON);
+
+    const same = index.update(full.ts.slice(0, 700), full.closes.slice(0, 700), LENS, 14);
+    expect(same.mode).toBe('reindex');
+    expect(same.revision).toBe(first.revision);
+
+    const grown = index.update(full.ts, full.closes, LENS, HORIZON);
+    expect(grown.mode).toBe('reindex');
+    expect(grown.revision).toBe(first.revision);
+    for (const len of LENS) expect(index.get(len)).toEqual(fresh(full.ts, full.closes).get(len));
+  });
+
+  it('rebuilds when the series shrinks', () => {
+    const index = new WindowIndex();
+    const first = index.update(full.ts, full.closes, LENS, HORIZON);
+
+    const shrunk = index.update(full.ts.slice(0, 600), full.closes.slice(0, 600), LENS, 14);
+    expect(shrunk.mode).toBe('build');
+    expect(shrunk.revision).toBe(first.revision + 1);
+  });
+});
@@ -0,0 +1,109 @@
+/**
+ * Window Matrix Tests
+ *
+ * Scores and top-K from the precomputed matrix must equal the per-candidate
+ * scan FractalEngine.match ran before (same vectors, same cosine, same
+ * stable descending order), with and without an asOf cut.
+ */
+
+import { describe, it, expect } from 'vitest';
+import { buildWindowVector, SimilarityMode } from '../similarity.engine.js';
+import { buildWindowMatrix, extendWindowMatrix, scoreRows, topRows } from '../window.matrix.js';
+import { randomWalk } from '../../../../common/__tests__/fixtures/random-walk.js';
+
+const EPS = 1e-12;
+
+// The scan match() used to run over a (possibly asOf-sliced) series
+function scanReference(closes: number[], windowLen: number, mode: SimilarityMode, maxEndIdx: number) {
+  const cur = buildWindowVector(closes.slice(-windowLen - 1), mode);
+  let curNorm = 0;
+  for (let i = 0; i < cur.length; i++) curNorm += cur[i] * cur[i];
+  curNorm = Math.sqrt(curNorm) || 1;
+
+  const out: Array<{ endIdx: number; score: number }> = [];
+  for (let endIdx = windowLen; endIdx <= maxEndIdx; endIdx++) {
+    const hist = buildWindowVector(closes.slice(endIdx - windowLen, endIdx + 1), mode);
+    let histNorm = 0;
+    for (let i = 0; i < hist.length; i++) histNorm += hist[i] * hist[i];
+    histNorm = Math.sqrt(histNorm) || 1;
+    let dot = 0;
+    for (let i = 0; i < cur.length && i < hist.length; i++) dot += cur[i] * hist[i];
+    out.push({ endIdx, score: dot / (curNorm * histNorm + EPS) });
+  }
+  return out;
+}
+
+describe('Window Matrix', () => {
+  const closes = randomWalk(1500, 42, 0.06);
+  const modes: SimilarityMode[] = ['raw_returns', 'zscore'];
+
+  for (const mode of modes) {
+    for (const windowLen of [30, 60, 90]) {
+
+      it(`${mode} w${windowLen}: scores equal the per-candidate scan`, () => {
+        const m = buildWindowMatrix(closes, windowLen, mode, 1);
+        const maxEndIdx = closes.length - 1 - 60;
+        const ref = scanReference(closes, windowLen, mode, maxEndIdx);
+        const query = buildWindowVector(closes.slice(-windowLen - 1), mode);
+        const scores = new Float64Array(m.rows);
+        const count = scoreRows(m, query, maxEndIdx, scores);
+
+        expect(count).toBe(ref.length);
+        for (let r = 0; r < count; r++) expect(scores[r]).toBe(ref[r].score);
+      });
+
+      it(`${mode} w${windowLen}: top-K order equals a stable sort of the scan`, () => {
+        const m = buildWindowMatrix(closes, windowLen, mode, 1);
+        const maxEndIdx = closes.length - 1 - 60;
+        const ref = scanReference(closes, windowLen, mode, maxEndIdx)
+          .sort((a, b) => b.score - a.score)
+          .slice(0, 25);
+        const query = buildWindowVector(closes.slice(-windowLen - 1), mode);
+        const scores = new Float64Array(m.rows);
+        const count = scoreRows(m, query, maxEndIdx, scores);
+
+        expect(topRows(m, scores, count, 25)).toEqual(ref);
+      });
+    }
+
+    it(`${mode}: asOf is a row bound on the full-series matrix`, () => {
+      const windowLen = 60;
+      const horizon = 30;
+      const m = buildWindowMatrix(closes, windowLen, mode, 1);
+      const scores = new Float64Array(m.rows);
+
+      for (const asOfEndIdx of [300, 777, 1200]) {
+        const sliced = closes.slice(0, asOfEndIdx + 1);
+        const maxEndIdx = Math.min(sliced.length - 1 - 60, asOfEndIdx - horizon);
+        const ref = scanReference(sliced, windowLen, mode, maxEndIdx)
+          .sort((a, b) => b.score - a.score)
+          .slice(0, 10);
+        const query = buildWindowVector(sliced.slice(-windowLen - 1), mode);
+        const count = scoreRows(m, query, maxEndIdx, scores);
+
+        expect(count).toBe(maxEndIdx - windowLen + 1);
+        expect(topRows(m, scores, count, 10)).toEqual(ref);
+      }
+    });
+  }
+
+  it('extending with new candles equals a fresh build', () => {
+    for (const mode of modes) {
+      const grown = extendWindowMatrix(buildWindowMatrix(closes.slice(0, 1200), 60, mode, 3), closes);
+      const ref = buildWindowMatrix(closes, 60, mode, 3);
+
+      expect(grown.rows).toBe(ref.rows);
+      expect(Array.from(grown.data)).toEqual(Array.from(ref.data));
+      expect(Array.from(grown.norms)).toEqual(Array.from(ref.norms));
+    }
+  });
+
+  it('ties keep the lower end index first', () => {
+    const flat = new Array(200).fill(100);
+    const m = buildWindowMatrix(flat, 30, 'raw_returns', 1);
+    const scores = new Float64Array(m.rows);
+    const count = scoreRows(m, new Array(30).fill(0), 150, scores);
+
+    expect(topRows(m, scores, count, 3).map(r => r.endIdx)).toEqual([30, 31, 32]);
+  });
+});
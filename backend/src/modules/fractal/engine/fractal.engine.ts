@@ -4,12 +4,16 @@
  * BLOCK 18: ML Feature persistence on match
  */
 
+import fs from 'fs';
 import { CanonicalStore } from '../data/canonical.store.js';
 import { SimilarityEngine, buildWindowVector, SimilarityMode } from './similarity.engine.js';
 import { ForwardStatsCalculator, Outcome } from './forward.stats.js';
 import { WindowIndex, WindowLen, WindowVec } from './window.index.js';
 import { ExplainabilityEngine, ExplainabilityResult } from './explainability.engine.js';
 import { WindowStore } from '../data/window.store.js';
+import { buildWindowMatrix, extendWindowMatrix, matrixTopRows, MATRIX_TOP_JOB, WindowMatrix } from './window.matrix.js';
+import { ComputeJobOptions, offload } from '../../../common/compute.offload.js';
+import { readMatchTable, tableMatchesSeries, tableMatches, MatchTable } from '../data/match.table.js';
 import { FeatureExtractor, VolReg, TrendReg } from './feature.extractor.js';
 import {
   FractalMatchRequest,
@@ -23,8 +27,7 @@ import {
   WINDOW_SIZES,
   MIN_GAP_DAYS
 } from '../domain/constants.js';
-
-const EPS = 1e-12;
+import { MATCH_TABLE_PATH } from '../config/storage.config.js';
 
 export class FractalEngine {
   private canonicalStore = new CanonicalStore();
@@ -40,11 +43,20 @@ export class FractalEngine {
   // Cache
   private cache: {
     loadedAt: number;
+    version: string;        // history revision : candles : last candle time
+    revision: number;       // bumped whenever history (not just the tail) changed
     ts: Date[];
     closes: number[];
     quality: number[];
   } | null = null;
 
+  // Precomputed top-K neighbours for the cached series (null = scan)
+  private matchTable: MatchTable | null = null;
+
+  // Window matrices per symbol|windowLen|mode, built lazily from the cached series
+  private matrices = new Map<string, WindowMatrix>();
+  private scoreBuf = new Float64Array(0);
+
   private CACHE_TTL_MS = 60 * 60 * 1000; // 1 hour
   private INDEX_TTL_MS = 60 * 60 * 1000; // 1 hour
 
@@ -52,7 +64,7 @@ export class FractalEngine {
    * Main match endpoint
    * BLOCK 34.10: Added similarityMode for asOf-safe simulations
    */
-  async match(request: FractalMatchRequest): Promise<FractalMatchResponse> {
+  async match(request: FractalMatchRequest, jobOpts: ComputeJobOptions = {}): Promise<FractalMatchResponse> {
     const symbol = request.symbol || FRACTAL_SYMBOL;
     const timeframe = request.timeframe || FRACTAL_TIMEFRAME;
     const windowLen = request.windowLen || 30;
@@ -107,21 +119,26 @@ export class FractalEngine {
     const currentCloses = closes.slice(-windowLen - 1);
     const currentVec = buildWindowVector(currentCloses, similarityMode);
 
-    // Calculate current window norm for cosine
-    let curNorm = 0;
-    for (let i = 0; i < currentVec.length; i++) curNorm += currentVec[i] * currentVec[i];
-    curNorm = Math.sqrt(curNorm) || 1;
-
-    // Get current window timestamps
-    const currentEndIdx = closes.length - 1;
-    const currentStartIdx = Math.max(0, currentEndIdx - windowLen);
-
-    // BLOCK 34.10: Build historical vectors using same mode (NOT from pre-built index)
+    // BLOCK 34.10: Historical vectors use the same mode (window matrix, NOT the pre-built index)
     // This ensures hist and cur use identical vector construction
     const candidates: Array<{ endIdx: number; score: number; startTs: Date; endTs: Date }> = [];
+
+    // Materialized table holds the same raw_returns top-K per as-of candle
+    const precomputed = asOf && similarityMode === 'raw_returns' && this.matchTable
+      && this.matchTable.horizon === horizonDays && this.matchTable.minGap === minGapDays
+      ? tableMatches(this.matchTable, windowLen, asOfEndIdx, topK)
+      : null;
+    if (precomputed) {
+      for (const m of precomputed) {
+        candidates.push({
+          endIdx: m.endIdx,
+          score: m.score,
+          startTs: ts[m.endIdx - windowLen],
+          endTs: ts[m.endIdx]
+        });
+      }
+    }
     
-    // Iterate over all possible historical windows
-    const minHistIdx = windowLen; // Need at least windowLen+1 prices
     const maxHistIdx = closes.length - 1 - minGapDays; // Respect min gap from current
     
     // For asOf mode, also respect forward horizon
@@ -129,33 +146,24 @@ export class FractalEngine {
       ? Math.min(maxHistIdx, asOfEndIdx - horizonDays)
       : maxHistIdx;
 
-    for (let endIdx = minHistIdx; endIdx <= effectiveMaxIdx; endIdx++) {
-      // Skip if too close to current window
-      const distanceDays = Math.abs(currentEndIdx - endIdx);
-      if (distanceDays < minGapDays) continue;
-
-      // BLOCK 34.10: Build historical vector with SAME mode as current
-      const histCloses = closes.slice(endIdx - windowLen, endIdx + 1);
-      const histVec = buildWindowVector(histCloses, similarityMode);
-
-      // Calculate hist norm
-      let histNorm = 0;
-      for (let i = 0; i < histVec.length; i++) histNorm += histVec[i] * histVec[i];
-      histNorm = Math.sqrt(histNorm) || 1;
-
-      // Cosine similarity
-      let dot = 0;
-      for (let i = 0; i < currentVec.length && i < histVec.length; i++) {
-        dot += currentVec[i] * histVec[i];
+    // One pass over the precomputed rows; asOf only bounds the row range
+    if (!precomputed) {
+      const matrix = this.getWindowMatrix(symbol, windowLen, similarityMode);
+      if (this.scoreBuf.length < matrix.rows) this.scoreBuf = new Float64Array(matrix.rows);
+      const rows = await offload(
+        MATRIX_TOP_JOB,
+        { matrix, query: currentVec, maxEndIdx: effectiveMaxIdx, k: topK },
+        input => matrixTopRows(input, this.scoreBuf),
+        jobOpts
+      );
+      for (const r of rows) {
+        candidates.push({
+          endIdx: r.endIdx,
+          score: r.score,
+          startTs: ts[r.endIdx - windowLen],
+          endTs: ts[r.endIdx]
+        });
       }
-      const score = dot / (curNorm * histNorm + EPS);
-
-      candidates.push({
-        endIdx,
-        score,
-        startTs: ts[endIdx - windowLen],
-        endTs: ts[endIdx]
-      });
     }
 
     // Sort by score descending and take top-K
@@ -298,6 +306,8 @@ export class FractalEngine {
    */
   invalidateCache(): void {
     this.cache = null;
+    this.matchTable = null;
+    this.matrices.clear();
     this.index.clear();
     console.log('[FractalEngine] Cache invalidated');
   }
@@ -545,16 +555,60 @@ export class FractalEngine {
 
     this.cache = {
       loadedAt: now,
+      version: '',
+      revision: 0,
       ts: series.map(x => x.ts),
       closes: series.map(x => x.close),
       quality: series.map(x => x.quality)
     };
 
-    // Build index for all supported window sizes
-    this.index.clear();
-    this.index.buildAll(this.cache.ts, this.cache.closes, [30, 60, 90], horizonDays);
+    // Index for all supported window sizes: append-only unless history was revised
+    const refresh = this.index.update(this.cache.ts, this.cache.closes, [30, 60, 90], horizonDays);
+    // Matrices depend on the closes only: a horizon reindex keeps them
+    if (refresh.mode === 'build') this.matrices.clear();
+    this.cache.revision = refresh.revision;
+    this.cache.version = this.datasetVersion(refresh.revision, this.cache.ts);
 
-    console.log(`[FractalEngine] Cache refreshed: ${this.cache.closes.length} candles`);
+    this.matchTable = this.loadMatchTable(symbol);
+
+    console.log(
+      `[FractalEngine] Cache refreshed: ${this.cache.closes.length} candles, version ${this.cache.version}, ` +
+      `index ${refresh.mode} +${refresh.added} windows in ${refresh.ms}ms (total ${Date.now() - now}ms)`
+    );
+  }
+
+  private getWindowMatrix(symbol: string, windowLen: number, mode: SimilarityMode): WindowMatrix {
+    const key = `${symbol}|${windowLen}|${mode}`;
+    let matrix = this.matrices.get(key);
+    if (!matrix || matrix.version !== this.cache!.revision) {
+      matrix = buildWindowMatrix(this.cache!.closes, windowLen, mode, this.cache!.revision);
+      this.matrices.set(key, matrix);
+    } else if (matrix.rows < this.cache!.closes.length - windowLen) {
+      matrix = extendWindowMatrix(matrix, this.cache!.closes);
+      this.matrices.set(key, matrix);
+    }
+    return matrix;
+  }
+
+  private datasetVersion(revision: number, ts: Date[]): string {
+    const last = ts.length ? ts[ts.length - 1].toISOString().slice(0, 10) : 'empty';
+    return `r${revision}:${ts.length}:${last}`;
+  }
+
+  private loadMatchTable(symbol: string): MatchTable | null {
+    if (!MATCH_TABLE_PATH || !fs.existsSync(MATCH_TABLE_PATH)) return null;
+    try {
+      const table = readMatchTable(MATCH_TABLE_PATH);
+      if (table.symbol !== symbol || !tableMatchesSeries(table, this.cache!.ts, this.cache!.closes)) {
+        console.log(`[FractalEngine] Match table ${MATCH_TABLE_PATH} is stale, scanning`);
+        return null;
+      }
+      console.log(`[FractalEngine] Match table loaded: windows ${table.windows.join('/')}, topK ${table.topK}`);
+      return table;
+    } catch (err) {
+      console.error('[FractalEngine] Failed to load match table:', err);
+      return null;
+    }
   }
 
   private emptyResponse(windowLen: number, timeframe: string, asOf?: Date): FractalMatchResponse {
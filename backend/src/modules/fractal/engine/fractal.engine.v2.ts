@@ -52,8 +52,8 @@ import {
   DispersionStats,
 } from './match-filters.js';
 import { V1_FINAL_CONFIG, V2_EXPERIMENTAL_CONFIG } from '../config/fractal.presets.js';
-
-const EPS = 1e-12;
+import { REGIME_KEYS, V2_SCAN_JOB, scanV2Windows } from './match.v2.scan.js';
+import { ComputeJobOptions, offload, sharedFloat64 } from '../../../common/compute.offload.js';
 
 /**
  * Extended match request for V2 features
@@ -138,17 +138,20 @@ export class FractalEngineV2 {
     loadedAt: number;
     ts: Date[];
     closes: number[];
+    closesShared: Float64Array;   // same values, handed to compute workers
     quality: number[];
     // V2: Regime labels per window
     regimeLabels?: Map<number, RegimeKey>;
   } | null = null;
 
+  private cacheLoading: Promise<void> | null = null;
+
   private CACHE_TTL_MS = 60 * 60 * 1000;
 
   /**
    * V2 Match endpoint with age decay and regime conditioning
    */
-  async matchV2(request: FractalMatchRequestV2): Promise<FractalMatchResponseV2> {
+  async matchV2(request: FractalMatchRequestV2, jobOpts: ComputeJobOptions = {}): Promise<FractalMatchResponseV2> {
     const symbol = request.symbol || FRACTAL_SYMBOL;
     const timeframe = request.timeframe || FRACTAL_TIMEFRAME;
     const windowLen = request.windowLen || 60;
@@ -206,10 +209,6 @@ export class FractalEngineV2 {
     const currentCloses = closes.slice(-windowLen - 1);
     const currentVec = buildWindowVector(currentCloses, similarityMode);
 
-    let curNorm = 0;
-    for (let i = 0; i < currentVec.length; i++) curNorm += currentVec[i] * currentVec[i];
-    curNorm = Math.sqrt(curNorm) || 1;
-
     const currentEndIdx = closes.length - 1;
 
     // V2: Compute current regime
@@ -225,34 +224,28 @@ export class FractalEngineV2 {
       ? Math.min(maxHistIdx, asOfEndIdx - horizonDays)
       : maxHistIdx;
 
-    for (let endIdx = minHistIdx; endIdx <= effectiveMaxIdx; endIdx++) {
-      const distanceDays = Math.abs(currentEndIdx - endIdx);
-      if (distanceDays < minGapDays) continue;
-
-      const histCloses = closes.slice(endIdx - windowLen, endIdx + 1);
-      const histVec = buildWindowVector(histCloses, similarityMode);
-
-      let histNorm = 0;
-      for (let i = 0; i < histVec.length; i++) histNorm += histVec[i] * histVec[i];
-      histNorm = Math.sqrt(histNorm) || 1;
-
-      let dot = 0;
-      for (let i = 0; i < currentVec.length && i < histVec.length; i++) {
-        dot += currentVec[i] * histVec[i];
-      }
-      const score = dot / (curNorm * histNorm + EPS);
-
-      // V2: Compute regime for historical window
-      const histRegimeFeatures = computeRegimeFeatures(histCloses);
-      const histRegime = classifyRegime(histRegimeFeatures);
-
+    // Per-window scores and regimes: the heavy part, on a compute worker when available
+    const scan = await offload(V2_SCAN_JOB, {
+      closes: this.cache!.closesShared,
+      windowLen,
+      mode: similarityMode,
+      fromIdx: minHistIdx,
+      toIdx: effectiveMaxIdx,
+      currentEndIdx,
+      minGapDays,
+      currentVec,
+    }, scanV2Windows, jobOpts);
+
+    for (let i = 0; i < scan.endIdx.length; i++) {
+      const endIdx = scan.endIdx[i];
+      const score = scan.score[i];
       candidates.push({
         endIdx,
         score,
         similarity: score,  // alias for filter functions
         startTs: ts[endIdx - windowLen],
         endTs: ts[endIdx],
-        regimeKey: histRegime,
+        regimeKey: REGIME_KEYS[scan.regime[i]],
       });
     }
 
@@ -391,13 +384,13 @@ export class FractalEngineV2 {
   /**
    * Backward compatible V1 match (calls engine without V2 features)
    */
-  async match(request: FractalMatchRequest): Promise<FractalMatchResponse> {
+  async match(request: FractalMatchRequest, jobOpts: ComputeJobOptions = {}): Promise<FractalMatchResponse> {
     return this.matchV2({
       ...request,
       version: 1,
       ageDecayEnabled: false,
       regimeConditioned: false,
-    });
+    }, jobOpts);
   }
 
   // === Helper methods ===
@@ -413,15 +406,30 @@ export class FractalEngineV2 {
       return;
     }
 
+    // Parallel matches (multi-horizon) share one load
+    if (!this.cacheLoading) {
+      this.cacheLoading = this.loadCache(symbol, timeframe, now).finally(() => {
+        this.cacheLoading = null;
+      });
+    }
+    await this.cacheLoading;
+  }
+
+  private async loadCache(symbol: string, timeframe: string, now: number): Promise<void> {
     const data = await this.canonicalStore.getAll(symbol, timeframe);
     if (!data.length) {
       throw new Error(`No data found for ${symbol}/${timeframe}`);
     }
 
+    const closes = data.map(d => d.ohlcv?.c ?? 0);
+    const closesShared = sharedFloat64(closes.length);
+    closesShared.set(closes);
+
     this.cache = {
       loadedAt: now,
       ts: data.map(d => d.ts),
-      closes: data.map(d => d.ohlcv?.c ?? 0),
+      closes,
+      closesShared,
       quality: data.map(d => (d as any).quality?.qualityScore ?? 1),
     };
   }
@@ -0,0 +1,74 @@
+/**
+ * BLOCK 36.2 — V2 Window Scan (compute job)
+ *
+ * The per-window loop of FractalEngineV2.matchV2: cosine of every
+ * historical window against the current vector plus its regime label.
+ * It is the heaviest part of a V2 match (a vector and regime features per
+ * window), so it is a pure function of a shared closes array and runs on
+ * a compute worker when the host has one (see common/compute.offload).
+ *
+ * Same operation order as the inline loop it replaced: bit-identical scores.
+ */
+
+import { buildWindowVector, SimilarityMode } from './similarity.engine.js';
+import { classifyRegime, computeRegimeFeatures, RegimeKey } from './regime-conditioned.js';
+
+const EPS = 1e-12;
+
+export const V2_SCAN_JOB = 'fractal.v2.scan';
+
+// Regime label <-> code in V2ScanOutput.regime
+export const REGIME_KEYS: RegimeKey[] = ['BULL', 'BEAR', 'SIDE', 'CRASH', 'BUBBLE'];
+
+export interface V2ScanInput {
+  closes: Float64Array;     // full series (shared, read-only)
+  windowLen: number;
+  mode: SimilarityMode;
+  fromIdx: number;          // first window end index
+  toIdx: number;            // last window end index (inclusive)
+  currentEndIdx: number;
+  minGapDays: number;
+  currentVec: number[];
+}
+
+export interface V2ScanOutput {
+  endIdx: Int32Array;       // window end indices, ascending
+  score: Float64Array;      // cosine vs currentVec
+  regime: Uint8Array;       // index into REGIME_KEYS
+}
+
+export function scanV2Windows(input: V2ScanInput): V2ScanOutput {
+  const { closes, windowLen, mode, fromIdx, toIdx, currentEndIdx, minGapDays, currentVec } = input;
+  const cap = Math.max(0, toIdx - fromIdx + 1);
+  const endIdx = new Int32Array(cap);
+  const score = new Float64Array(cap);
+  const regime = new Uint8Array(cap);
+
+  let curNorm = 0;
+  for (let i = 0; i < currentVec.length; i++) curNorm += currentVec[i] * currentVec[i];
+  curNorm = Math.sqrt(curNorm) || 1;
+
+  let n = 0;
+  for (let end = fromIdx; end <= toIdx; end++) {
+    if (Math.abs(currentEndIdx - end) < minGapDays) continue;
+
+    const histCloses = Array.from(closes.subarray(end - windowLen, end + 1));
+    const histVec = buildWindowVector(histCloses, mode);
+
+    let histNorm = 0;
+    for (let i = 0; i < histVec.length; i++) histNorm += histVec[i] * histVec[i];
+    histNorm = Math.sqrt(histNorm) || 1;
+
+    let dot = 0;
+    for (let i = 0; i < currentVec.length && i < histVec.length; i++) {
+      dot += currentVec[i] * histVec[i];
+    }
+
+    endIdx[n] = end;
+    score[n] = dot / (curNorm * histNorm + EPS);
+    regime[n] = REGIME_KEYS.indexOf(classifyRegime(computeRegimeFeatures(histCloses)));
+    n++;
+  }
+
+  return { endIdx: endIdx.slice(0, n), score: score.slice(0, n), regime: regime.slice(0, n) };
+}
@@ -103,10 +103,8 @@ export class MultiHorizonEngine {
     
     console.log(`[MULTI-HORIZON 36.5] Running for ${cfg.horizons.length} horizons at ${asOfDate.toISOString().slice(0, 10)}`);
 
-    // Run parallel matching for all horizons
-    const signals: HorizonSignal[] = [];
-    
-    for (const horizon of cfg.horizons) {
+    // Run parallel matching for all horizons (concurrent on compute workers when the host has them)
+    const signals: HorizonSignal[] = await Promise.all(cfg.horizons.map(async (horizon): Promise<HorizonSignal> => {
       try {
         const result = await this.engineV2.matchV2({
           asOf: asOfDate,
@@ -121,7 +119,7 @@ export class MultiHorizonEngine {
         });
 
         if (!result.ok || result.matches.length < cfg.minMatchesPerHorizon) {
-          signals.push({
+          return {
             horizon,
             direction: 'NEUTRAL',
             confidence: 0,
@@ -130,8 +128,7 @@ export class MultiHorizonEngine {
             p90: 0,
             matchCount: result.matches?.length ?? 0,
             maxDD: 0,
-          });
-          continue;
+          };
         }
 
         const mu = result.forwardStats?.return?.mean ?? 0;
@@ -145,7 +142,7 @@ export class MultiHorizonEngine {
         if (mu > 0.01 && p10 > -0.05) direction = 'LONG';
         else if (mu < -0.01 && p90 < 0.05) direction = 'SHORT';
 
-        signals.push({
+        return {
           horizon,
           direction,
           confidence,
@@ -154,11 +151,11 @@ export class MultiHorizonEngine {
           p90: Math.round(p90 * 10000) / 10000,
           matchCount: result.matches.length,
           maxDD: Math.round(maxDD * 10000) / 10000,
-        });
+        };
 
       } catch (err) {
         console.error(`[MULTI-HORIZON] Horizon ${horizon} failed:`, err);
-        signals.push({
+        return {
           horizon,
           direction: 'NEUTRAL',
           confidence: 0,
@@ -167,9 +164,9 @@ export class MultiHorizonEngine {
           p90: 0,
           matchCount: 0,
           maxDD: 0,
-        });
+        };
       }
-    }
+    }));
 
     // Determine current regime from the 14-day match
     const baseSignal = signals.find(s => s.horizon === 14) ?? signals[0];
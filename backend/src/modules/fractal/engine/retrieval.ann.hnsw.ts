@@ -0,0 +1,418 @@
+/**
+ * BLOCK 37.2 — Stage 1 ANN: HNSW Graph (stage1Mode "ret_hnsw")
+ *
+ * Hierarchical navigable small-world graph over the stage-1 vectors,
+ * scored with the exact stage-1 cosine. Each window links to up to `m`
+ * neighbours per level (2m on level 0); a query descends greedily from
+ * the top level and beam-searches level 0 with width `ef`. asOf-excluded
+ * windows are still walked through but never returned.
+ *
+ * Links live in one Int32Array pool (slot 0 of each level block is the
+ * link count) with their similarities alongside, so pruning a full
+ * neighbour list costs no extra scoring and the pool persists as-is.
+ */
+
+import { Scored, TopK, l2Norm } from '../../../common/similarity.kernel.js';
+import {
+  AnnFileReader,
+  AnnQueryOptions,
+  AnnQueryStats,
+  EXACT_BELOW,
+  Stage1AnnIndex,
+  WindowStore,
+  grow,
+  stage1Vector,
+  toMs,
+  writeAnnFile,
+} from './retrieval.ann.store.js';
+
+export const HNSW_MAGIC = 'FRANNHNW';
+
+export interface HnswIndexOptions {
+  m?: number;             // links per level, default 16 (2m on level 0)
+  efConstruction?: number; // beam width while inserting, default 100
+  ef?: number;            // default query beam width (>= k), default 400
+  seed?: number;          // level sampling seed
+}
+
+/**
+ * Growable max-heap of (score, id): the search frontier
+ */
+class Frontier {
+  private sc: Float64Array = new Float64Array(64);
+  private ids: Int32Array = new Int32Array(64);
+  size = 0;
+  topScore = 0;
+
+  reset(): void {
+    this.size = 0;
+  }
+
+  push(score: number, id: number): void {
+    if (this.size === this.sc.length) {
+      this.sc = grow(this.sc, this.size * 2, len => new Float64Array(len));
+      this.ids = grow(this.ids, this.size * 2, len => new Int32Array(len));
+    }
+    let i = this.size++;
+    while (i > 0) {
+      const p = (i - 1) >> 1;
+      if (this.sc[p] >= score) break;
+      this.sc[i] = this.sc[p];
+      this.ids[i] = this.ids[p];
+      i = p;
+    }
+    this.sc[i] = score;
+    this.ids[i] = id;
+  }
+
+  /**
+   * Remove the best entry; its score is left in topScore
+   */
+  pop(): number {
+    const id = this.ids[0];
+    this.topScore = this.sc[0];
+    const score = this.sc[--this.size];
+    const last = this.ids[this.size];
+    let i = 0;
+    for (;;) {
+      const l = 2 * i + 1;
+      if (l >= this.size) break;
+      const r = l + 1;
+      const c = r < this.size && this.sc[r] > this.sc[l] ? r : l;
+      if (this.sc[c] <= score) break;
+      this.sc[i] = this.sc[c];
+      this.ids[i] = this.ids[c];
+      i = c;
+    }
+    this.sc[i] = score;
+    this.ids[i] = last;
+    return id;
+  }
+}
+
+export class ReturnsHnswIndex implements Stage1AnnIndex {
+  readonly kind = 'hnsw' as const;
+  readonly dim: number;
+  readonly m: number;
+  readonly m0: number;
+  readonly efConstruction: number;
+  readonly ef: number;
+  readonly seed: number;
+  key: string;
+  source = '';
+  lastStats: AnnQueryStats = { items: 0, candidates: 0, exact: false };
+
+  private store: WindowStore;
+  private levels: Int32Array = new Int32Array(0);
+  private offsets: Int32Array = new Int32Array(0);    // start of each window's link block
+  private links: Int32Array = new Int32Array(0);
+  private linkSims: Float64Array = new Float64Array(0);
+  private used = 0;
+  private entry = -1;
+  private maxLevel = -1;
+  private rng: number;
+  private frontier = new Frontier();
+  private evals = 0;
+
+  constructor(dim: number, opts: HnswIndexOptions = {}, key = '') {
+    this.dim = dim;
+    this.m = Math.max(2, opts.m ?? 16);
+    this.m0 = 2 * this.m;
+    this.efConstruction = Math.max(this.m, opts.efConstruction ?? 100);
+    this.ef = opts.ef ?? 400;
+    this.seed = opts.seed ?? 37;
+    this.rng = this.seed >>> 0 || 1;
+    this.key = key;
+    this.store = new WindowStore(dim);
+  }
+
+  get length(): number {
+    return this.store.size;
+  }
+
+  endIdxOf(id: number): number {
+    return this.store.ends[id];
+  }
+
+  endTsOf(id: number): number {
+    return this.store.endTs[id];
+  }
+
+  clear(): void {
+    this.store.clear();
+    this.source = '';
+    this.used = 0;
+    this.entry = -1;
+    this.maxLevel = -1;
+    this.rng = this.seed >>> 0 || 1;
+  }
+
+  insert(endIdx: number, endTs: Date | number, closes: number[]): number {
+    return this.insertVector(endIdx, toMs(endTs), stage1Vector(closes));
+  }
+
+  insertVector(endIdx: number, endTsMs: number, vec: ArrayLike<number>): number {
+    const id = this.store.add(endIdx, endTsMs, vec);
+    const level = this.sampleLevel();
+    this.allocate(id, level);
+    if (this.entry < 0) {
+      this.entry = id;
+      this.maxLevel = level;
+      return id;
+    }
+
+    const q = this.vectorOf(id);
+    const qNorm = this.store.norms[id];
+    let cur = this.entry;
+    for (let l = this.maxLevel; l > level; l--) cur = this.greedy(q, qNorm, cur, l);
+
+    for (let l = Math.min(level, this.maxLevel); l >= 0; l--) {
+      const found = this.searchLevel(q, qNorm, cur, this.efConstruction, l, Infinity);
+      const chosen = this.selectNeighbours(found, this.m);
+      const own = this.blockOf(id, l);
+      this.links[own] = chosen.length;
+      chosen.forEach((c, j) => {
+        this.links[own + 1 + j] = c.index;
+        this.linkSims[own + 1 + j] = c.score;
+      });
+      for (const c of chosen) this.linkBack(c.index, id, c.score, l);
+      cur = found[0].index;
+    }
+
+    if (level > this.maxLevel) {
+      this.maxLevel = level;
+      this.entry = id;
+    }
+    return id;
+  }
+
+  /**
+   * Approximate top-k by stage-1 cosine; Scored.index is the window id
+   */
+  query(q: ArrayLike<number>, k: number, opts: AnnQueryOptions = {}): Scored[] {
+    const store = this.store;
+    if (store.size < (opts.exactBelow ?? EXACT_BELOW) || this.entry < 0) return this.exact(q, k, opts);
+
+    const qNorm = l2Norm(q, this.dim);
+    const minSim = opts.minSim ?? -Infinity;
+    this.evals = 0;
+    let cur = this.entry;
+    for (let l = this.maxLevel; l > 0; l--) cur = this.greedy(q, qNorm, cur, l);
+    const found = this.searchLevel(q, qNorm, cur, Math.max(k, opts.ef ?? this.ef), 0, opts.maxEndTs ?? Infinity);
+
+    // asOf left too few reachable windows: answer exactly rather than short
+    if (found.length < k && found.length < store.size) return this.exact(q, k, opts);
+
+    this.lastStats = { items: store.size, candidates: this.evals, exact: false };
+    const out: Scored[] = [];
+    for (const x of found) {
+      if (out.length === k || x.score < minSim) break;
+      out.push(x);
+    }
+    return out;
+  }
+
+  exact(q: ArrayLike<number>, k: number, opts: AnnQueryOptions = {}): Scored[] {
+    this.lastStats = { items: 0, candidates: 0, exact: true };
+    return this.store.exact(q, k, opts, this.lastStats);
+  }
+
+  // ═══════════════════════════════════════════════════════════════
+  // Persistence
+  // ═══════════════════════════════════════════════════════════════
+
+  save(filePath: string): void {
+    const size = this.store.size;
+    writeAnnFile(
+      filePath,
+      {
+        magic: HNSW_MAGIC,
+        dim: this.dim,
+        size,
+        key: this.key,
+        source: this.source,
+        params: [this.m, this.efConstruction, this.ef, this.seed, this.rng, this.entry + 1, this.maxLevel + 1],
+      },
+      [
+        ...this.store.parts(),
+        Buffer.from(this.levels.buffer, 0, size * 4),
+        Buffer.from(this.links.buffer, 0, this.used * 4),
+        Buffer.from(this.linkSims.buffer, 0, this.used * 8),
+      ]
+    );
+  }
+
+  static read(reader: AnnFileReader): ReturnsHnswIndex {
+    const { dim, size, key, source, params } = reader.header;
+    const [m, efConstruction, ef, seed, rng, entry, maxLevel] = params;
+    const index = new ReturnsHnswIndex(dim, { m, efConstruction, ef, seed }, key);
+    index.store.read(reader, size);
+    index.source = source;
+
+    const levels = reader.i32(size);
+    index.offsets = new Int32Array(Math.max(size, 1024));
+    index.levels = grow(levels, Math.max(size, 1024), len => new Int32Array(len));
+    for (let id = 0; id < size; id++) {
+      index.offsets[id] = index.used;
+      index.used += index.blockLength(levels[id]);
+    }
+    reader.expectRemaining(index.used * 12);
+    index.links = reader.i32(index.used);
+    index.linkSims = reader.f64(index.used);
+    index.rng = rng;
+    index.entry = entry - 1;
+    index.maxLevel = maxLevel - 1;
+    return index;
+  }
+
+  // ═══════════════════════════════════════════════════════════════
+  // Graph
+  // ═══════════════════════════════════════════════════════════════
+
+  private sampleLevel(): number {
+    this.rng = (this.rng * 1664525 + 1013904223) >>> 0;
+    const u = (this.rng + 1) / 4294967297;
+    return Math.min(16, Math.floor(-Math.log(u) / Math.log(this.m)));
+  }
+
+  private blockLength(level: number): number {
+    return this.m0 + 1 + level * (this.m + 1);
+  }
+
+  private blockOf(id: number, level: number): number {
+    return this.offsets[id] + (level === 0 ? 0 : this.m0 + 1 + (level - 1) * (this.m + 1));
+  }
+
+  private allocate(id: number, level: number): void {
+    if (this.levels.length <= id) {
+      const cap = Math.max(id + 1, this.levels.length * 2, 1024);
+      this.levels = grow(this.levels, cap, len => new Int32Array(len));
+      this.offsets = grow(this.offsets, cap, len => new Int32Array(len));
+    }
+    const len = this.blockLength(level);
+    if (this.links.length < this.used + len) {
+      const cap = Math.max(this.used + len, this.links.length * 2, 1024 * (this.m0 + 1));
+      this.links = grow(this.links, cap, n => new Int32Array(n));
+      this.linkSims = grow(this.linkSims, cap, n => new Float64Array(n));
+    }
+    this.levels[id] = level;
+    this.offsets[id] = this.used;
+    this.links.fill(0, this.used, this.used + len);
+    this.used += len;
+  }
+
+  private vectorOf(id: number): Float64Array {
+    return this.store.vectors.subarray(id * this.dim, (id + 1) * this.dim);
+  }
+
+  private sim(q: ArrayLike<number>, qNorm: number, id: number): number {
+    this.evals++;
+    return this.store.score(q, qNorm, id);
+  }
+
+  /**
+   * Hill-climb to the best-scoring window reachable on `level`
+   */
+  private greedy(q: ArrayLike<number>, qNorm: number, from: number, level: number): number {
+    let cur = from;
+    let best = this.sim(q, qNorm, cur);
+    for (let moved = true; moved;) {
+      moved = false;
+      const block = this.blockOf(cur, level);
+      for (let j = 1, n = this.links[block]; j <= n; j++) {
+        const next = this.links[block + j];
+        const s = this.sim(q, qNorm, next);
+        if (s > best) {
+          best = s;
+          cur = next;
+          moved = true;
+        }
+      }
+    }
+    return cur;
+  }
+
+  /**
+   * Beam search of `level` from `from`; returns the best `ef` windows
+   * ending at or before maxEndTs, best first
+   */
+  private searchLevel(
+    q: ArrayLike<number>,
+    qNorm: number,
+    from: number,
+    ef: number,
+    level: number,
+    maxEndTs: number
+  ): Scored[] {
+    const store = this.store;
+    const epoch = store.nextEpoch();
+    const frontier = this.frontier;
+    const best = new TopK(ef);
+    frontier.reset();
+
+    store.visit(from, epoch);
+    const s0 = this.sim(q, qNorm, from);
+    frontier.push(s0, from);
+    if (store.endTs[from] <= maxEndTs) best.push(from, s0);
+
+    while (frontier.size > 0) {
+      const id = frontier.pop();
+      if (best.length >= ef && frontier.topScore < best.floor) break;
+      const block = this.blockOf(id, level);
+      for (let j = 1, n = this.links[block]; j <= n; j++) {
+        const next = this.links[block + j];
+        if (!store.visit(next, epoch)) continue;
+        const s = this.sim(q, qNorm, next);
+        if (best.length < ef || s > best.floor) {
+          frontier.push(s, next);
+          if (store.endTs[next] <= maxEndTs) best.push(next, s);
+        }
+      }
+    }
+    return best.sorted();
+  }
+
+  /**
+   * Keep candidates closer to the new window than to any neighbour already
+   * kept (spreads links across directions), then top up with the closest
+   */
+  private selectNeighbours(found: Scored[], max: number): Scored[] {
+    const chosen: Scored[] = [];
+    const skipped: Scored[] = [];
+    for (const c of found) {
+      if (chosen.length >= max) break;
+      const v = this.vectorOf(c.index);
+      const norm = this.store.norms[c.index];
+      if (chosen.every(o => this.sim(v, norm, o.index) <= c.score)) chosen.push(c);
+      else skipped.push(c);
+    }
+    for (const c of skipped) {
+      if (chosen.length >= max) break;
+      chosen.push(c);
+    }
+    return chosen;
+  }
+
+  /**
+   * Link `from` -> `to`; a full list drops its weakest link if `to` beats it
+   */
+  private linkBack(from: number, to: number, score: number, level: number): void {
+    const block = this.blockOf(from, level);
+    const max = level === 0 ? this.m0 : this.m;
+    const n = this.links[block];
+    if (n < max) {
+      this.links[block] = n + 1;
+      this.links[block + n + 1] = to;
+      this.linkSims[block + n + 1] = score;
+      return;
+    }
+    let weakest = 1;
+    for (let j = 2; j <= n; j++) {
+      if (this.linkSims[block + j] < this.linkSims[block + weakest]) weakest = j;
+    }
+    if (score > this.linkSims[block + weakest]) {
+      this.links[block + weakest] = to;
+      this.linkSims[block + weakest] = score;
+    }
+  }
+}
@@ -0,0 +1,207 @@
+/**
+ * BLOCK 37.2 — Stage 1 ANN: Random-Projection LSH (stage1Mode "ret_hash")
+ *
+ * Each of `tables` hash tables signs `bits` Gaussian projections of the
+ * stage-1 vector. A query visits its own bucket plus the `probes` buckets
+ * reached by flipping its least certain bits, then rescores only those
+ * windows with the exact stage-1 cosine. Cheap to build and to insert
+ * into; recall on near-orthogonal return windows needs wide buckets
+ * (few bits), so HNSW is usually the better trade at high recall.
+ */
+
+import { Scored, TopK, l2Norm } from '../../../common/similarity.kernel.js';
+import {
+  AnnFileReader,
+  AnnQueryOptions,
+  AnnQueryStats,
+  EXACT_BELOW,
+  Stage1AnnIndex,
+  WindowStore,
+  grow,
+  stage1Vector,
+  toMs,
+  writeAnnFile,
+} from './retrieval.ann.store.js';
+
+export const LSH_MAGIC = 'FRANNLSH';
+
+export interface LshIndexOptions {
+  tables?: number;        // default 16
+  bits?: number;          // default 8 (256 buckets per table)
+  seed?: number;          // projection seed
+}
+
+function gaussianPlanes(count: number, seed: number): Float64Array {
+  let s = seed >>> 0 || 1;
+  const rand = () => {
+    s = (s * 1664525 + 1013904223) >>> 0;
+    return (s + 1) / 4294967297;
+  };
+  const out = new Float64Array(count);
+  for (let i = 0; i < count; i += 2) {
+    const r = Math.sqrt(-2 * Math.log(rand()));
+    const a = 2 * Math.PI * rand();
+    out[i] = r * Math.cos(a);
+    if (i + 1 < count) out[i + 1] = r * Math.sin(a);
+  }
+  return out;
+}
+
+export class ReturnsLshIndex implements Stage1AnnIndex {
+  readonly kind = 'lsh' as const;
+  readonly dim: number;
+  readonly tables: number;
+  readonly bits: number;
+  readonly seed: number;
+  key: string;
+  source = '';
+  lastStats: AnnQueryStats = { items: 0, candidates: 0, exact: false };
+
+  private store: WindowStore;
+  private planes: Float64Array;                 // (tables * bits) x dim
+  private buckets: Array<Map<number, number[]>>;
+  private hashes: Uint32Array = new Uint32Array(0);  // size x tables
+
+  constructor(dim: number, opts: LshIndexOptions = {}, key = '') {
+    this.dim = dim;
+    this.tables = opts.tables ?? 16;
+    this.bits = Math.min(30, opts.bits ?? 8);
+    this.seed = opts.seed ?? 37;
+    this.key = key;
+    this.store = new WindowStore(dim);
+    this.planes = gaussianPlanes(this.tables * this.bits * dim, this.seed);
+    this.buckets = Array.from({ length: this.tables }, () => new Map<number, number[]>());
+  }
+
+  get length(): number {
+    return this.store.size;
+  }
+
+  endIdxOf(id: number): number {
+    return this.store.ends[id];
+  }
+
+  endTsOf(id: number): number {
+    return this.store.endTs[id];
+  }
+
+  clear(): void {
+    this.store.clear();
+    this.source = '';
+    for (const b of this.buckets) b.clear();
+  }
+
+  insert(endIdx: number, endTs: Date | number, closes: number[]): number {
+    return this.insertVector(endIdx, toMs(endTs), stage1Vector(closes));
+  }
+
+  insertVector(endIdx: number, endTsMs: number, vec: ArrayLike<number>): number {
+    const id = this.store.add(endIdx, endTsMs, vec);
+    if (this.hashes.length < (id + 1) * this.tables) {
+      this.hashes = grow(this.hashes, Math.max(id + 1, id * 2, 1024) * this.tables, len => new Uint32Array(len));
+    }
+    const proj = new Float64Array(this.bits);
+    for (let t = 0; t < this.tables; t++) {
+      const h = this.hash(vec, t, proj);
+      this.hashes[id * this.tables + t] = h;
+      this.addToBucket(t, h, id);
+    }
+    return id;
+  }
+
+  /**
+   * Approximate top-k by stage-1 cosine; Scored.index is the window id
+   */
+  query(q: ArrayLike<number>, k: number, opts: AnnQueryOptions = {}): Scored[] {
+    const store = this.store;
+    if (store.size < (opts.exactBelow ?? EXACT_BELOW)) return this.exact(q, k, opts);
+
+    const probes = Math.min(this.bits, opts.probes ?? 4);
+    const maxEndTs = opts.maxEndTs ?? Infinity;
+    const minSim = opts.minSim ?? -Infinity;
+    const qNorm = l2Norm(q, this.dim);
+    const heap = new TopK(k);
+    const epoch = store.nextEpoch();
+    const proj = new Float64Array(this.bits);
+    const order = Array.from({ length: this.bits }, (_, j) => j);
+    let candidates = 0;
+
+    for (let t = 0; t < this.tables; t++) {
+      const h = this.hash(q, t, proj);
+      // Least certain bits first: flipping them reaches the nearest buckets
+      order.sort((a, b) => Math.abs(proj[a]) - Math.abs(proj[b]));
+      for (let p = 0; p <= probes; p++) {
+        const ids = this.buckets[t].get(p === 0 ? h : (h ^ (1 << order[p - 1])) >>> 0);
+        if (!ids) continue;
+        for (const id of ids) {
+          if (!store.visit(id, epoch) || store.endTs[id] > maxEndTs) continue;
+          candidates++;
+          const s = store.score(q, qNorm, id);
+          if (s >= minSim) heap.push(id, s);
+        }
+      }
+    }
+
+    // Too few neighbours hashed close by: answer exactly rather than short
+    if (candidates < k) return this.exact(q, k, opts);
+
+    this.lastStats = { items: store.size, candidates, exact: false };
+    return heap.sorted();
+  }
+
+  exact(q: ArrayLike<number>, k: number, opts: AnnQueryOptions = {}): Scored[] {
+    this.lastStats = { items: 0, candidates: 0, exact: true };
+    return this.store.exact(q, k, opts, this.lastStats);
+  }
+
+  // ═══════════════════════════════════════════════════════════════
+  // Persistence
+  // ═══════════════════════════════════════════════════════════════
+
+  save(filePath: string): void {
+    const size = this.store.size;
+    writeAnnFile(
+      filePath,
+      { magic: LSH_MAGIC, dim: this.dim, size, key: this.key, source: this.source, params: [this.tables, this.bits, this.seed] },
+      [...this.store.parts(), Buffer.from(this.hashes.buffer, 0, size * this.tables * 4)]
+    );
+  }
+
+  static read(reader: AnnFileReader): ReturnsLshIndex {
+    const { dim, size, key, source, params } = reader.header;
+    const [tables, bits, seed] = params;
+    reader.expectRemaining(WindowStore.byteLength(dim, size) + size * tables * 4);
+
+    const index = new ReturnsLshIndex(dim, { tables, bits, seed }, key);
+    index.store.read(reader, size);
+    index.source = source;
+    index.hashes = reader.u32(size * tables);
+    for (let id = 0; id < size; id++) {
+      for (let t = 0; t < tables; t++) index.addToBucket(t, index.hashes[id * tables + t], id);
+    }
+    return index;
+  }
+
+  // ═══════════════════════════════════════════════════════════════
+  // Internals
+  // ═══════════════════════════════════════════════════════════════
+
+  private hash(v: ArrayLike<number>, t: number, proj: Float64Array): number {
+    const dim = this.dim;
+    let h = 0;
+    for (let j = 0; j < this.bits; j++) {
+      const base = (t * this.bits + j) * dim;
+      let p = 0;
+      for (let i = 0; i < dim; i++) p += this.planes[base + i] * v[i];
+      proj[j] = p;
+      if (p >= 0) h |= 1 << j;
+    }
+    return h >>> 0;
+  }
+
+  private addToBucket(t: number, h: number, id: number): void {
+    const bucket = this.buckets[t].get(h);
+    if (bucket) bucket.push(id);
+    else this.buckets[t].set(h, [id]);
+  }
+}
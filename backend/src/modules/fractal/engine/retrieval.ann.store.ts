@@ -0,0 +1,336 @@
+/**
+ * BLOCK 37.2 — Stage 1 ANN: Window Store
+ *
+ * What every stage-1 ANN index shares: the stage-1 vectors themselves
+ * (l2-normalized raw log returns, exactly what stage1SelectByReturns
+ * scores), their norms, end index and end time, the exact scan used as
+ * fallback and recall reference, and the on-disk framing.
+ *
+ * File layout (little-endian): 128-byte header, then the store
+ * (vectors f64, norms f64, endTs f64, endIdx i32), then the index's own
+ * sections. Header: magic[8], format u32 @8, dim u32 @12, size u64 @24,
+ * key[32] @32, savedAt i64 @64, index params u32[8] @80, source[16] @112
+ * (digest of the series the windows were cut from, see seriesDigest).
+ */
+
+import fs from 'fs';
+import path from 'path';
+import crypto from 'crypto';
+import { buildRawReturns } from './similarity.engine.v2.js';
+import { l2Norm, Scored, TopK } from '../../../common/similarity.kernel.js';
+
+export const ANN_FORMAT_VERSION = 2;
+export const ANN_HEADER_SIZE = 128;
+const PARAMS_OFFSET = 80;
+const MAX_PARAMS = 8;
+const SOURCE_OFFSET = 112;
+const SOURCE_SIZE = 16;
+
+// Pools smaller than this are scanned exactly (an index buys nothing there)
+export const EXACT_BELOW = 5000;
+
+// ═══════════════════════════════════════════════════════════════
+// Types
+// ═══════════════════════════════════════════════════════════════
+
+export type AnnKind = 'lsh' | 'hnsw';
+
+export interface AnnQueryOptions {
+  maxEndTs?: number;      // asOf: only windows ending at or before (ms)
+  minSim?: number;        // keep score >= minSim
+  exactBelow?: number;    // scan exactly when the index is smaller
+  probes?: number;        // LSH: extra buckets per table
+  ef?: number;            // HNSW: search beam width
+}
+
+export interface AnnQueryStats {
+  items: number;
+  candidates: number;     // windows scored
+  exact: boolean;         // answered by a full scan
+}
+
+/**
+ * Stage-1 ANN index. Ids are dense and in insert order, so id i is the
+ * i-th candidate of the pool the index was synced with.
+ */
+export interface Stage1AnnIndex {
+  readonly kind: AnnKind;
+  readonly dim: number;
+  readonly length: number;
+  key: string;
+  source: string;         // seriesDigest of the bars indexed ('' when unknown)
+  lastStats: AnnQueryStats;
+
+  endIdxOf(id: number): number;
+  endTsOf(id: number): number;
+  clear(): void;
+  insert(endIdx: number, endTs: Date | number, closes: number[]): number;
+  insertVector(endIdx: number, endTsMs: number, vec: ArrayLike<number>): number;
+  query(q: ArrayLike<number>, k: number, opts?: AnnQueryOptions): Scored[];
+  exact(q: ArrayLike<number>, k: number, opts?: AnnQueryOptions): Scored[];
+  save(filePath: string): void;
+}
+
+/**
+ * Stage-1 vector for a window's closes (same as stage1SelectByReturns)
+ */
+export function stage1Vector(closes: number[]): number[] {
+  const r = buildRawReturns(closes);
+  const n = l2Norm(r);
+  return r.map(v => v / n);
+}
+
+export function toMs(ts: Date | number): number {
+  return typeof ts === 'number' ? ts : ts.getTime();
+}
+
+/**
+ * sha256 over bars [0, end] (ts as i64 ms, then closes as f64, the
+ * match.table hash over a prefix), cut to the 16 bytes the header holds
+ */
+export function seriesDigest(ts: ArrayLike<Date | number>, closes: ArrayLike<number>, end: number): string {
+  const n = end + 1;
+  const tsCol = new BigInt64Array(n);
+  const closeCol = new Float64Array(n);
+  for (let i = 0; i < n; i++) {
+    tsCol[i] = BigInt(toMs(ts[i]));
+    closeCol[i] = closes[i];
+  }
+  return crypto.createHash('sha256')
+    .update(Buffer.from(tsCol.buffer))
+    .update(Buffer.from(closeCol.buffer))
+    .digest('hex')
+    .slice(0, SOURCE_SIZE * 2);
+}
+
+/**
+ * Copy of `old` with room for `len` elements
+ */
+export function grow<T extends Float64Array | Int32Array | Uint32Array>(old: T, len: number, make: (len: number) => T): T {
+  const out = make(len);
+  out.set(old.subarray(0, Math.min(old.length, len)));
+  return out;
+}
+
+// ═══════════════════════════════════════════════════════════════
+// Store
+// ═══════════════════════════════════════════════════════════════
+
+export class WindowStore {
+  readonly dim: number;
+  vectors: Float64Array = new Float64Array(0);  // size x dim
+  norms: Float64Array = new Float64Array(0);
+  ends: Int32Array = new Int32Array(0);
+  endTs: Float64Array = new Float64Array(0);
+  size = 0;
+
+  private seen: Uint32Array = new Uint32Array(0);
+  private epoch = 0;
+
+  constructor(dim: number) {
+    this.dim = dim;
+  }
+
+  clear(): void {
+    this.size = 0;
+  }
+
+  add(endIdx: number, endTsMs: number, vec: ArrayLike<number>): number {
+    if (vec.length !== this.dim) {
+      throw new Error(`[ANN] vector length ${vec.length} != index dim ${this.dim}`);
+    }
+    this.reserve(this.size + 1);
+    const id = this.size++;
+    this.vectors.set(vec, id * this.dim);
+    this.norms[id] = l2Norm(vec);
+    this.ends[id] = endIdx;
+    this.endTs[id] = endTsMs;
+    return id;
+  }
+
+  /**
+   * Stage-1 cosine of query and window `id`
+   */
+  score(q: ArrayLike<number>, qNorm: number, id: number): number {
+    const dim = this.dim;
+    const v = this.vectors;
+    const base = id * dim;
+    let dot = 0;
+    for (let i = 0; i < dim; i++) dot += q[i] * v[base + i];
+    return dot / (qNorm * this.norms[id]);
+  }
+
+  /**
+   * Brute-force top-k over every (asOf-eligible) window
+   */
+  exact(q: ArrayLike<number>, k: number, opts: AnnQueryOptions, stats: AnnQueryStats): Scored[] {
+    const maxEndTs = opts.maxEndTs ?? Infinity;
+    const minSim = opts.minSim ?? -Infinity;
+    const qNorm = l2Norm(q, this.dim);
+    const heap = new TopK(k);
+    let candidates = 0;
+    for (let id = 0; id < this.size; id++) {
+      if (this.endTs[id] > maxEndTs) continue;
+      candidates++;
+      const s = this.score(q, qNorm, id);
+      if (s >= minSim) heap.push(id, s);
+    }
+    stats.items = this.size;
+    stats.candidates = candidates;
+    stats.exact = true;
+    return heap.sorted();
+  }
+
+  /**
+   * Start a visited set for one query
+   */
+  nextEpoch(): number {
+    if (this.seen.length < this.size) {
+      this.seen = new Uint32Array(this.norms.length);
+      this.epoch = 0;
+    }
+    if (++this.epoch === 0xffffffff) {
+      this.seen.fill(0);
+      this.epoch = 1;
+    }
+    return this.epoch;
+  }
+
+  /**
+   * Mark `id` visited in `epoch`; false when it already was
+   */
+  visit(id: number, epoch: number): boolean {
+    if (this.seen[id] === epoch) return false;
+    this.seen[id] = epoch;
+    return true;
+  }
+
+  // ═══════════════════════════════════════════════════════════════
+  // Persistence
+  // ═══════════════════════════════════════════════════════════════
+
+  parts(): Buffer[] {
+    const { size, dim } = this;
+    return [
+      Buffer.from(this.vectors.buffer, 0, size * dim * 8),
+      Buffer.from(this.norms.buffer, 0, size * 8),
+      Buffer.from(this.endTs.buffer, 0, size * 8),
+      Buffer.from(this.ends.buffer, 0, size * 4),
+    ];
+  }
+
+  static byteLength(dim: number, size: number): number {
+    return size * (dim * 8 + 8 + 8 + 4);
+  }
+
+  read(reader: AnnFileReader, size: number): void {
+    this.reserve(size);
+    this.vectors.set(reader.f64(size * this.dim));
+    this.norms.set(reader.f64(size));
+    this.endTs.set(reader.f64(size));
+    this.ends.set(reader.i32(size));
+    this.size = size;
+  }
+
+  private reserve(n: number): void {
+    const cap = this.norms.length;
+    if (n <= cap) return;
+    const next = Math.max(n, cap * 2, 1024);
+    this.vectors = grow(this.vectors, next * this.dim, len => new Float64Array(len));
+    this.norms = grow(this.norms, next, len => new Float64Array(len));
+    this.endTs = grow(this.endTs, next, len => new Float64Array(len));
+    this.ends = grow(this.ends, next, len => new Int32Array(len));
+  }
+}
+
+// ═══════════════════════════════════════════════════════════════
+// File framing
+// ═══════════════════════════════════════════════════════════════
+
+export interface AnnFileHeader {
+  magic: string;
+  dim: number;
+  size: number;
+  key: string;
+  source: string;
+  params: number[];
+}
+
+/**
+ * Write header + sections atomically (tmp file, then rename)
+ */
+export function writeAnnFile(filePath: string, header: AnnFileHeader, parts: Buffer[]): void {
+  if (header.params.length > MAX_PARAMS) throw new Error(`[ANN] too many header params`);
+  const head = Buffer.alloc(ANN_HEADER_SIZE);
+  head.write(header.magic, 0, 'ascii');
+  head.writeUInt32LE(ANN_FORMAT_VERSION, 8);
+  head.writeUInt32LE(header.dim, 12);
+  head.writeBigUInt64LE(BigInt(header.size), 24);
+  head.write(header.key.slice(0, 32), 32, 'ascii');
+  head.writeBigInt64LE(BigInt(Date.now()), 64);
+  header.params.forEach((p, i) => head.writeUInt32LE(p >>> 0, PARAMS_OFFSET + i * 4));
+  if (header.source) head.write(header.source, SOURCE_OFFSET, SOURCE_SIZE, 'hex');
+
+  fs.mkdirSync(path.dirname(filePath), { recursive: true });
+  const tmp = `${filePath}.${process.pid}.tmp`;
+  fs.writeFileSync(tmp, Buffer.concat([head, ...parts]));
+  fs.renameSync(tmp, filePath);
+}
+
+/**
+ * Sequential reader over an index file. Sections are copied out of the
+ * file buffer, which need not be 8-byte aligned.
+ */
+export class AnnFileReader {
+  readonly header: AnnFileHeader;
+  private offset = ANN_HEADER_SIZE;
+
+  constructor(private readonly file: Buffer, private readonly filePath: string) {
+    if (file.length < ANN_HEADER_SIZE || !file.subarray(0, 5).toString('ascii').startsWith('FRANN')) {
+      throw new Error(`${filePath}: not an ANN index`);
+    }
+    const fmt = file.readUInt32LE(8);
+    if (fmt !== ANN_FORMAT_VERSION) throw new Error(`${filePath}: unsupported format ${fmt}`);
+    const params: number[] = [];
+    for (let i = 0; i < MAX_PARAMS; i++) params.push(file.readUInt32LE(PARAMS_OFFSET + i * 4));
+    const source = file.subarray(SOURCE_OFFSET, SOURCE_OFFSET + SOURCE_SIZE);
+    this.header = {
+      magic: file.subarray(0, 8).toString('ascii'),
+      dim: file.readUInt32LE(12),
+      size: Number(file.readBigUInt64LE(24)),
+      key: file.subarray(32, 64).toString('ascii').replace(/\0+$/, ''),
+      source: source.some(b => b !== 0) ? source.toString('hex') : '',
+      params,
+    };
+  }
+
+  static open(filePath: string): AnnFileReader {
+    return new AnnFileReader(fs.readFileSync(filePath), filePath);
+  }
+
+  /**
+   * Throw unless exactly `bytes` remain
+   */
+  expectRemaining(bytes: number): void {
+    if (this.file.length - this.offset !== bytes) throw new Error(`${this.filePath}: size mismatch`);
+  }
+
+  f64(n: number): Float64Array {
+    return new Float64Array(this.take(n * 8));
+  }
+
+  i32(n: number): Int32Array {
+    return new Int32Array(this.take(n * 4));
+  }
+
+  u32(n: number): Uint32Array {
+    return new Uint32Array(this.take(n * 4));
+  }
+
+  private take(bytes: number): ArrayBuffer {
+    const slice = new Uint8Array(bytes);
+    this.file.copy(slice, 0, this.offset, this.offset + bytes);
+    this.offset += bytes;
+    return slice.buffer;
+  }
+}
@@ -0,0 +1,265 @@
+/**
+ * BLOCK 37.2 — Stage 1 ANN Index
+ *
+ * Sub-linear stage 1 for large candidate pools (intraday bars, cross-asset):
+ * instead of re-vectorizing and scanning every candidate per call, keep an
+ * index over the stage-1 vectors that grows by one insert per new window,
+ * persists under FRACTAL_ANN_INDEX_DIR and answers asOf-filtered top-K.
+ * Requests only mark an index dirty; flushStage1Indexes() writes it
+ * (ops/ann.flush.ts runs it on a cadence and at shutdown).
+ *
+ * Two interchangeable indexes (Stage1AnnIndex):
+ *   ret_hash → ReturnsLshIndex   random-projection LSH, cheap to build
+ *   ret_hnsw → ReturnsHnswIndex  HNSW graph, higher recall per window scored
+ *
+ * Both score the windows they find with the exact stage-1 cosine, so they
+ * can only lose recall, never distort scores; annRecallReport() measures
+ * recall@K against brute force.
+ */
+
+import fs from 'fs';
+import path from 'path';
+import { RetrievalStage1Mode, TwoStageRetrievalConfig } from '../contracts/retrieval.contracts.js';
+import { Stage1Result } from './retrieval.stage1.js';
+import { AnnFileReader, AnnKind, AnnQueryOptions, Stage1AnnIndex, seriesDigest, stage1Vector } from './retrieval.ann.store.js';
+import { LSH_MAGIC, LshIndexOptions, ReturnsLshIndex } from './retrieval.ann.lsh.js';
+import { HNSW_MAGIC, HnswIndexOptions, ReturnsHnswIndex } from './retrieval.ann.hnsw.js';
+import { ANN_INDEX_DIR } from '../config/storage.config.js';
+
+export type { Stage1AnnIndex, AnnKind, AnnQueryOptions, AnnQueryStats } from './retrieval.ann.store.js';
+export type { LshIndexOptions } from './retrieval.ann.lsh.js';
+export type { HnswIndexOptions } from './retrieval.ann.hnsw.js';
+export { seriesDigest, stage1Vector, ReturnsLshIndex, ReturnsHnswIndex };
+
+export type Stage1IndexOptions = LshIndexOptions & HnswIndexOptions;
+
+export interface AnnRecallReport {
+  kind: AnnKind;
+  queries: number;
+  k: number;
+  items: number;
+  recall: number;         // mean |ann ∩ exact| / |exact|
+  minRecall: number;
+  avgCandidates: number;  // windows scored per query
+  annMs: number;          // mean per query
+  exactMs: number;
+  speedup: number;
+}
+
+const KIND_BY_MODE: Partial<Record<RetrievalStage1Mode, AnnKind>> = {
+  ret_hash: 'lsh',
+  ret_hnsw: 'hnsw',
+};
+
+/**
+ * Index kind behind a stage-1 mode (undefined for the plain scan)
+ */
+export function annKindForMode(mode: RetrievalStage1Mode): AnnKind | undefined {
+  return KIND_BY_MODE[mode];
+}
+
+export function createStage1Index(
+  kind: AnnKind,
+  dim: number,
+  opts: Stage1IndexOptions = {},
+  key = ''
+): Stage1AnnIndex {
+  return kind === 'hnsw' ? new ReturnsHnswIndex(dim, opts, key) : new ReturnsLshIndex(dim, opts, key);
+}
+
+export function loadStage1Index(filePath: string): Stage1AnnIndex {
+  const reader = AnnFileReader.open(filePath);
+  switch (reader.header.magic) {
+    case LSH_MAGIC:
+      return ReturnsLshIndex.read(reader);
+    case HNSW_MAGIC:
+      return ReturnsHnswIndex.read(reader);
+    default:
+      throw new Error(`${filePath}: unknown ANN index ${reader.header.magic}`);
+  }
+}
+
+/**
+ * Recall@k of query() against exact() for the given query vectors
+ */
+export function annRecallReport(
+  index: Stage1AnnIndex,
+  queries: ArrayLike<number>[],
+  k: number,
+  opts: AnnQueryOptions = {}
+): AnnRecallReport {
+  let recallSum = 0;
+  let minRecall = 1;
+  let candidates = 0;
+  let annMs = 0;
+  let exactMs = 0;
+
+  for (const q of queries) {
+    let t0 = performance.now();
+    const ann = index.query(q, k, { ...opts, exactBelow: 0 });
+    annMs += performance.now() - t0;
+    candidates += index.lastStats.candidates;
+
+    t0 = performance.now();
+    const exact = index.exact(q, k, opts);
+    exactMs += performance.now() - t0;
+
+    const found = new Set(ann.map(x => x.index));
+    const recall = exact.length ? exact.filter(x => found.has(x.index)).length / exact.length : 1;
+    recallSum += recall;
+    minRecall = Math.min(minRecall, recall);
+  }
+
+  const n = Math.max(1, queries.length);
+  return {
+    kind: index.kind,
+    queries: queries.length,
+    k,
+    items: index.length,
+    recall: recallSum / n,
+    minRecall,
+    avgCandidates: candidates / n,
+    annMs: annMs / n,
+    exactMs: exactMs / n,
+    speedup: annMs > 0 ? exactMs / annMs : 0,
+  };
+}
+
+// ═══════════════════════════════════════════════════════════════
+// Stage 1 via index
+// ═══════════════════════════════════════════════════════════════
+
+const registry = new Map<string, Stage1AnnIndex>();
+// Indexes with inserts not yet on disk
+const dirty = new Set<Stage1AnnIndex>();
+
+function indexFile(kind: AnnKind, key: string): string {
+  return path.join(ANN_INDEX_DIR, `${key.replace(/[^A-Za-z0-9_-]+/g, '_')}.${kind}.ann`);
+}
+
+/**
+ * Index for a series and window length (e.g. "BTC|60"), loaded from
+ * FRACTAL_ANN_INDEX_DIR on first use when persisted there
+ */
+export function getStage1Index(
+  kind: AnnKind,
+  key: string,
+  dim: number,
+  opts: Stage1IndexOptions = {}
+): Stage1AnnIndex {
+  const regKey = `${kind}|${key}`;
+  let index = registry.get(regKey);
+  if (index && index.dim === dim) return index;
+
+  const file = indexFile(kind, key);
+  if (ANN_INDEX_DIR && fs.existsSync(file)) {
+    try {
+      const loaded = loadStage1Index(file);
+      if (loaded.kind === kind && loaded.dim === dim) index = loaded;
+    } catch (err) {
+      console.error(`[ANN] Failed to load ${file}:`, err);
+    }
+  }
+  index = index && index.dim === dim ? index : createStage1Index(kind, dim, opts, key);
+  index.key = key;
+  registry.set(regKey, index);
+  return index;
+}
+
+/**
+ * Make the index hold one window per bar of the series: id i is the window
+ * ending at bar `start + i` (closes[end - dim .. end]). New bars are
+ * appended. The index is rebuilt when the bars it was cut from changed:
+ * a revised close or timestamp, or a shorter or shifted series. Its source
+ * digest catches that even when the last window's end is unchanged.
+ * Returns the number of windows inserted.
+ */
+export function syncStage1Index(
+  index: Stage1AnnIndex,
+  ts: Date[],
+  closes: number[],
+  start = index.dim
+): number {
+  const dim = index.dim;
+  const first = Math.max(start, dim);
+  let rebuilt = false;
+  if (index.length > 0) {
+    const end = first + index.length - 1;
+    const aligned = index.endIdxOf(0) === first && end < closes.length &&
+      index.source === seriesDigest(ts, closes, end);
+    if (!aligned) {
+      index.clear();
+      rebuilt = true;
+    }
+  }
+
+  const from = first + index.length;
+  for (let end = from; end < closes.length; end++) {
+    index.insert(end, ts[end], closes.slice(end - dim, end + 1));
+  }
+  const inserted = Math.max(0, closes.length - from);
+  if (inserted > 0) index.source = seriesDigest(ts, closes, closes.length - 1);
+  if ((inserted > 0 || rebuilt) && index.key) dirty.add(index);
+  return inserted;
+}
+
+/**
+ * Save every index that grew since its last save. Kept off the request
+ * path; returns the number of files written.
+ */
+export function flushStage1Indexes(): number {
+  let saved = 0;
+  for (const index of [...dirty]) {
+    dirty.delete(index);
+    if (!ANN_INDEX_DIR || !index.key) continue;
+    const file = indexFile(index.kind, index.key);
+    try {
+      index.save(file);
+      saved++;
+    } catch (err) {
+      dirty.add(index);  // retried on the next flush
+      console.error(`[ANN] Failed to save ${file}:`, err);
+    }
+  }
+  return saved;
+}
+
+/**
+ * Stage 1 through an ANN index over every window of the series: same
+ * scores as stage1SelectByReturns for every window found, sub-linear in
+ * the number of windows. Only the windows returned become candidates.
+ */
+export function stage1SelectByIndex(
+  curCloses: number[],
+  ts: Date[],
+  closes: number[],
+  index: Stage1AnnIndex,
+  cfg: TwoStageRetrievalConfig,
+  asOf?: Date,
+  start = index.dim
+): Stage1Result[] {
+  const t0 = Date.now();
+  const inserted = syncStage1Index(index, ts, closes, start);
+
+  const top = index.query(stage1Vector(curCloses), cfg.stage1TopK, {
+    minSim: cfg.stage1MinSim ?? 0.10,
+    maxEndTs: asOf?.getTime(),
+  });
+
+  const elapsed = Date.now() - t0;
+  if (elapsed > 100) {
+    const s = index.lastStats;
+    console.log(
+      `[Stage1/ANN] ${index.kind} ${s.items} windows (+${inserted}), scored ${s.candidates}${s.exact ? ' (exact)' : ''} in ${elapsed}ms`
+    );
+  }
+
+  const dim = index.dim;
+  return top.map(x => {
+    const end = index.endIdxOf(x.index);
+    return {
+      cand: { endIdx: end, endTs: ts[end], startTs: ts[end - dim], closes: closes.slice(end - dim, end + 1) },
+      s1: x.score,
+    };
+  });
+}
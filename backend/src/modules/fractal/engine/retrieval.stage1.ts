@@ -7,6 +7,7 @@
 
 import { TwoStageRetrievalConfig } from '../contracts/retrieval.contracts.js';
 import { buildRawReturns } from './similarity.engine.v2.js';
+import { cosineRows, TopK, RowMatrix } from '../../../common/similarity.kernel.js';
 
 // ═══════════════════════════════════════════════════════════════
 // Types
@@ -38,14 +39,33 @@ function l2normalize(x: number[]): number[] {
   return x.map(v => v / n);
 }
 
-function cosineSim(a: number[], b: number[]): number {
-  let dot = 0;
-  const n = Math.min(a.length, b.length);
-  for (let i = 0; i < n; i++) {
-    dot += a[i] * b[i];
+/**
+ * Score candidates [from, to) against curVec in one packed batch and feed
+ * the ones passing minSim into the heap
+ */
+function scoreBatch(
+  curVec: number[],
+  candidates: Stage1Candidate[],
+  from: number,
+  to: number,
+  minSim: number,
+  heap: TopK
+): void {
+  const dim = curVec.length;
+  const m: RowMatrix = { rows: to - from, dim, data: new Float64Array((to - from) * dim) };
+  const norms = new Float64Array(m.rows);
+
+  for (let r = 0; r < m.rows; r++) {
+    const v = l2normalize(buildRawReturns(candidates[from + r].closes));
+    norms[r] = l2norm(v);
+    m.data.set(v.length > dim ? v.slice(0, dim) : v, r * dim);
+  }
+
+  const scores = new Float64Array(m.rows);
+  cosineRows(m, curVec, scores, { norms });
+  for (let r = 0; r < m.rows; r++) {
+    if (scores[r] >= minSim) heap.push(from + r, scores[r]);
   }
-  const denom = l2norm(a) * l2norm(b);
-  return denom > 0 ? dot / denom : 0;
 }
 
 // ═══════════════════════════════════════════════════════════════
@@ -73,24 +93,10 @@ export function stage1SelectByReturns(
 
   const minSim = cfg.stage1MinSim ?? 0.10;
 
-  // Score all candidates
-  const scored: Stage1Result[] = [];
-  
-  for (const cand of candidates) {
-    const r = buildRawReturns(cand.closes);
-    const v = l2normalize(r);
-    const s1 = cosineSim(curVec, v);
-    
-    if (s1 >= minSim) {
-      scored.push({ cand, s1 });
-    }
-  }
-
-  // Sort descending by similarity
-  scored.sort((a, b) => b.s1 - a.s1);
-
-  // Take top-K
-  const result = scored.slice(0, cfg.stage1TopK);
+  // Score all candidates, keep top-K
+  const heap = new TopK(cfg.stage1TopK);
+  scoreBatch(curVec, candidates, 0, candidates.length, minSim, heap);
+  const result = heap.sorted().map(x => ({ cand: candidates[x.index], s1: x.score }));
   
   const elapsed = Date.now() - t0;
   if (elapsed > 100) {
@@ -102,7 +108,7 @@ export function stage1SelectByReturns(
 
 /**
  * Stage 1 with batch processing for very large candidate sets
- * (optimization for >10k candidates)
+ * (optimization for >10k candidates: packed matrix stays batchSize rows)
  */
 export function stage1SelectBatch(
   curCloses: number[],
@@ -114,24 +120,12 @@ export function stage1SelectBatch(
   const curVec = l2normalize(curRet);
   const minSim = cfg.stage1MinSim ?? 0.10;
 
-  const allScored: Stage1Result[] = [];
+  const heap = new TopK(cfg.stage1TopK);
 
-  // Process in batches to avoid blocking
+  // Process in batches to bound the packed matrix size
   for (let i = 0; i < candidates.length; i += batchSize) {
-    const batch = candidates.slice(i, i + batchSize);
-    
-    for (const cand of batch) {
-      const r = buildRawReturns(cand.closes);
-      const v = l2normalize(r);
-      const s1 = cosineSim(curVec, v);
-      
-      if (s1 >= minSim) {
-        allScored.push({ cand, s1 });
-      }
-    }
+    scoreBatch(curVec, candidates, i, Math.min(i + batchSize, candidates.length), minSim, heap);
   }
 
-  // Sort and take top-K
-  allScored.sort((a, b) => b.s1 - a.s1);
-  return allScored.slice(0, cfg.stage1TopK);
+  return heap.sorted().map(x => ({ cand: candidates[x.index], s1: x.score }));
 }
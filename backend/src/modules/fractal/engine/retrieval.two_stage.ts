@@ -12,7 +12,7 @@ import {
 } from '../contracts/retrieval.contracts.js';
 import { MultiRepConfig, DEFAULT_MULTI_REP_CONFIG } from '../contracts/similarity.contracts.js';
 import { buildMultiRepVectors, multiRepSimilarity } from './similarity.engine.v2.js';
-import { Stage1Result } from './retrieval.stage1.js';
+import { Stage1Result, stage1SelectByReturns } from './retrieval.stage1.js';
 
 // ═══════════════════════════════════════════════════════════════
 // Types
@@ -97,6 +97,9 @@ export function twoStageRetrieve(
 /**
  * Full two-stage pipeline with stage-1 included
  * (convenience function for single-call usage)
+ *
+ * Stage 1 scans allCandidates; the ANN stage1Modes go through
+ * stage1SelectByIndex over the series instead.
  */
 export function twoStageRetrieveFull(
   curCloses: number[],
@@ -110,9 +113,6 @@ export function twoStageRetrieveFull(
   cfg: TwoStageRetrievalConfig = DEFAULT_TWO_STAGE_CONFIG,
   multiCfg: MultiRepConfig = DEFAULT_MULTI_REP_CONFIG
 ): TwoStageOutput {
-  // Import stage1 dynamically to avoid circular deps
-  const { stage1SelectByReturns } = require('./retrieval.stage1.js');
-  
   const stage1 = stage1SelectByReturns(curCloses, allCandidates, cfg);
   return twoStageRetrieve(curCloses, stage1, cfg, multiCfg);
 }
@@ -16,53 +16,89 @@ export interface WindowVec {
   norm: number;        // L2 norm of vec
 }
 
+export interface IndexRefresh {
+  // build: history revised; reindex: same history, new lens/horizon
+  mode: 'build' | 'reindex' | 'append' | 'unchanged';
+  added: number;          // window rows added across all lens
+  revision: number;       // bumped only when history (the series prefix) changed
+  ms: number;
+}
+
 export class WindowIndex {
   private sim = new SimilarityEngine();
   private indexByLen: Map<WindowLen, WindowVec[]> = new Map();
   private builtAt: number | null = null;
+  private revision = 0;
+
+  // Series and params the index currently covers (for append detection)
+  private ts: Date[] = [];
+  private closes: number[] = [];
+  private lens: WindowLen[] = [];
+  private horizonDays = 0;
 
   getBuiltAt(): number | null {
     return this.builtAt;
   }
 
+  getRevision(): number {
+    return this.revision;
+  }
+
   buildAll(ts: Date[], closes: number[], lens: WindowLen[], horizonDays: number): void {
+    // The lens/horizon only shape the windows; the revision tracks the series
+    const revised = !this.extendsSeries(ts, closes);
+
     // Returns length = closes.length - 1
     const returns = this.sim.buildLogReturns(closes);
 
     for (const len of lens) {
       const windows: WindowVec[] = [];
-
-      // For each window ending at returns index `end`,
-      // closes end index = end, closes start index = end - len
-      for (let end = len; end < returns.length - horizonDays; end++) {
-        const slice = returns.slice(end - len, end);
-        const z = this.sim.zScoreNormalize(slice);
-
-        // Calculate L2 norm
-        let norm = 0;
-        for (let i = 0; i < z.length; i++) norm += z[i] * z[i];
-        norm = Math.sqrt(norm) || 1;
-
-        const endIdx = end;            // closes index
-        const startIdx = end - len;    // closes index
-
-        windows.push({
-          endIdx,
-          startIdx,
-          startTs: ts[startIdx],
-          endTs: ts[endIdx],
-          vec: z,
-          norm
-        });
-      }
-
+      this.pushWindows(windows, ts, returns, 0, len, len, returns.length - horizonDays);
       this.indexByLen.set(len, windows);
     }
 
-    this.builtAt = Date.now();
+    this.remember(ts, closes, lens, horizonDays);
+    if (revised) this.revision++;
     console.log(`[WindowIndex] Built indices for lens: ${lens.join(', ')}`);
   }
 
+  /**
+   * Bring the index up to date with a (re)loaded series.
+   * If the series only grew (same prefix, same lens/horizon), just the
+   * windows that became eligible are appended; any history revision
+   * falls back to a full build. A lens/horizon change over the same
+   * history rebuilds the windows but keeps the revision.
+   */
+  update(ts: Date[], closes: number[], lens: WindowLen[], horizonDays: number): IndexRefresh {
+    const t0 = Date.now();
+
+    if (!this.canAppend(ts, closes, lens, horizonDays)) {
+      const revision = this.revision;
+      this.indexByLen.clear();
+      this.buildAll(ts, closes, lens, horizonDays);
+      let added = 0;
+      for (const len of lens) added += this.get(len).length;
+      const mode = this.revision !== revision ? 'build' : 'reindex';
+      return { mode, added, revision: this.revision, ms: Date.now() - t0 };
+    }
+
+    // Only returns from the first new window onward are needed
+    const limit = closes.length - 1 - horizonDays;
+    let from = limit;
+    for (const len of lens) from = Math.min(from, this.nextEnd(len) - len);
+    from = Math.max(0, from);
+    const returns = this.sim.buildLogReturns(closes.slice(from));
+
+    let added = 0;
+    for (const len of lens) {
+      const windows = this.indexByLen.get(len)!;
+      added += this.pushWindows(windows, ts, returns, from, len, this.nextEnd(len), limit);
+    }
+
+    this.remember(ts, closes, lens, horizonDays);
+    return { mode: added ? 'append' : 'unchanged', added, revision: this.revision, ms: Date.now() - t0 };
+  }
+
   get(len: WindowLen): WindowVec[] {
     return this.indexByLen.get(len) || [];
   }
@@ -70,5 +106,77 @@ export class WindowIndex {
   clear(): void {
     this.indexByLen.clear();
     this.builtAt = null;
+    this.ts = [];
+    this.closes = [];
+  }
+
+  private nextEnd(len: WindowLen): number {
+    const windows = this.indexByLen.get(len)!;
+    return windows.length ? windows[windows.length - 1].endIdx + 1 : len;
+  }
+
+  private canAppend(ts: Date[], closes: number[], lens: WindowLen[], horizonDays: number): boolean {
+    if (horizonDays !== this.horizonDays) return false;
+    if (lens.length !== this.lens.length || lens.some((l, i) => l !== this.lens[i])) return false;
+    return this.extendsSeries(ts, closes);
+  }
+
+  // The series is the indexed one, possibly with new candles appended
+  private extendsSeries(ts: Date[], closes: number[]): boolean {
+    if (this.builtAt === null || closes.length < this.closes.length) return false;
+    for (let i = 0; i < this.closes.length; i++) {
+      if (closes[i] !== this.closes[i] || ts[i].getTime() !== this.ts[i].getTime()) return false;
+    }
+    return true;
+  }
+
+  /**
+   * Append windows ending at returns index [fromEnd, toEnd).
+   * `returns` starts at returns index `offset` of the full series.
+   */
+  private pushWindows(
+    windows: WindowVec[],
+    ts: Date[],
+    returns: number[],
+    offset: number,
+    len: WindowLen,
+    fromEnd: number,
+    toEnd: number
+  ): number {
+    let added = 0;
+
+    // For each window ending at returns index `end`,
+    // closes end index = end, closes start index = end - len
+    for (let end = fromEnd; end < toEnd; end++) {
+      const slice = returns.slice(end - len - offset, end - offset);
+      const z = this.sim.zScoreNormalize(slice);
+
+      // Calculate L2 norm
+      let norm = 0;
+      for (let i = 0; i < z.length; i++) norm += z[i] * z[i];
+      norm = Math.sqrt(norm) || 1;
+
+      const endIdx = end;            // closes index
+      const startIdx = end - len;    // closes index
+
+      windows.push({
+        endIdx,
+        startIdx,
+        startTs: ts[startIdx],
+        endTs: ts[endIdx],
+        vec: z,
+        norm
+      });
+      added++;
+    }
+    return added;
+  }
+
+  private remember(ts: Date[], closes: number[], lens: WindowLen[], horizonDays: number): void {
+    this.ts = ts;
+    this.closes = closes;
+    this.lens = [...lens];
+    this.horizonDays = horizonDays;
+    this.builtAt = Date.now();
   }
 }
@@ -0,0 +1,115 @@
+/**
+ * Window Matrix
+ *
+ * All historical window vectors for one (symbol, windowLen, similarityMode)
+ * in a single row-major Float64Array, with the norms match() divides by.
+ * Row r is the window ending at closes index windowLen + r, built with
+ * buildWindowVector exactly as the per-request scan did, so scores are
+ * bit-identical. A row only reads closes up to its end index, so an asOf
+ * cut is just an upper bound on the row range, and new candles only add
+ * rows at the end.
+ *
+ * Data and norms live in SharedArrayBuffers and rows are never written
+ * after they are built, so a matrix can be handed to a compute worker
+ * (matrixTopRows) without copying.
+ */
+
+import { buildWindowVector, SimilarityMode } from './similarity.engine.js';
+import { cosineRows, l2Norm, topK, RowMatrix } from '../../../common/similarity.kernel.js';
+import { sharedFloat64 } from '../../../common/compute.offload.js';
+
+const EPS = 1e-12;
+
+export interface WindowMatrix extends RowMatrix {
+  windowLen: number;      // = dim
+  mode: SimilarityMode;
+  version: number;        // history revision of the series it was built from
+  norms: Float64Array;    // L2 norm of each (already normalized) row, 0 -> 1
+}
+
+export interface RowScore {
+  endIdx: number;
+  score: number;
+}
+
+export function buildWindowMatrix(
+  closes: number[],
+  windowLen: number,
+  mode: SimilarityMode,
+  version: number
+): WindowMatrix {
+  const empty: WindowMatrix = {
+    windowLen, dim: windowLen, mode, version, rows: 0, data: new Float64Array(0), norms: new Float64Array(0)
+  };
+  return extendWindowMatrix(empty, closes);
+}
+
+/**
+ * Rows for candles appended since `m` was built; existing rows are copied,
+ * not recomputed. Only valid while the series' history is unchanged.
+ */
+export function extendWindowMatrix(m: WindowMatrix, closes: number[]): WindowMatrix {
+  const windowLen = m.windowLen;
+  const rows = Math.max(m.rows, closes.length - windowLen);
+  if (rows === m.rows) return m;
+
+  const data = sharedFloat64(rows * windowLen);
+  const norms = sharedFloat64(rows);
+  data.set(m.data);
+  norms.set(m.norms);
+
+  for (let r = m.rows; r < rows; r++) {
+    const endIdx = windowLen + r;
+    const vec = buildWindowVector(closes.slice(endIdx - windowLen, endIdx + 1), m.mode);
+    norms[r] = l2Norm(vec);
+    data.set(vec, r * windowLen);
+  }
+
+  return { windowLen, dim: windowLen, mode: m.mode, version: m.version, rows, data, norms };
+}
+
+/**
+ * Cosine scores of `query` against every row ending at or before maxEndIdx,
+ * written into `out` (row order). Returns the number of rows scored.
+ */
+export function scoreRows(
+  m: WindowMatrix,
+  query: ArrayLike<number>,
+  maxEndIdx: number,
+  out: Float64Array
+): number {
+  const count = Math.max(0, Math.min(m.rows, maxEndIdx - m.windowLen + 1));
+  return cosineRows(m, query, out, { norms: m.norms, count, eps: EPS });
+}
+
+/**
+ * Best `k` of the first `count` scores: descending, ties by lower end index
+ * (same order as a stable sort over ascending candidates)
+ */
+export function topRows(m: WindowMatrix, scores: Float64Array, count: number, k: number): RowScore[] {
+  return topK(scores, k, { count }).map(s => ({ endIdx: m.windowLen + s.index, score: s.score }));
+}
+
+// ═══════════════════════════════════════════════════════════════
+// COMPUTE JOB
+// ═══════════════════════════════════════════════════════════════
+
+export const MATRIX_TOP_JOB = 'fractal.matrix.top';
+
+export interface MatrixTopInput {
+  matrix: WindowMatrix;
+  query: number[];
+  maxEndIdx: number;
+  k: number;
+}
+
+/**
+ * scoreRows + topRows as one job; `out` is a reusable score buffer
+ * (allocated here when missing or too short)
+ */
+export function matrixTopRows(input: MatrixTopInput, out?: Float64Array): RowScore[] {
+  const { matrix, query, maxEndIdx, k } = input;
+  const scores = out && out.length >= matrix.rows ? out : new Float64Array(matrix.rows);
+  const count = scoreRows(matrix, query, maxEndIdx, scores);
+  return topRows(matrix, scores, count, k);
+}
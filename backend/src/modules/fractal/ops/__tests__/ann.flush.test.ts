@@ -0,0 +1,66 @@
+/**
+ * BLOCK 37.2 — Stage-1 ANN Index Flush Tests
+ *
+ * Syncing an index on the request path must not touch the disk; grown
+ * indexes are written by flushStage1Indexes(), on the cadence and on close.
+ */
+
+import { describe, it, expect, beforeAll, afterAll } from 'vitest';
+import fs from 'fs';
+import os from 'os';
+import path from 'path';
+
+const DAY = 86400000;
+const windowLen = 30;
+const dir = fs.mkdtempSync(path.join(os.tmpdir(), 'ann-flush-'));
+
+let ann: typeof import('../../engine/retrieval.ann.js');
+let startAnnIndexFlush: typeof import('../ann.flush.js').startAnnIndexFlush;
+
+function series(n: number) {
+  const closes = [100];
+  for (let i = 1; i < n; i++) closes.push(closes[i - 1] * (1 + Math.sin(i * 0.7) * 0.02));
+  const ts = closes.map((_, i) => new Date(i * DAY));
+  return { ts, closes };
+}
+
+beforeAll(async () => {
+  // ANN_INDEX_DIR is read when storage.config loads
+  process.env.FRACTAL_ANN_INDEX_DIR = dir;
+  ann = await import('../../engine/retrieval.ann.js');
+  ({ startAnnIndexFlush } = await import('../ann.flush.js'));
+});
+
+afterAll(() => {
+  fs.rmSync(dir, { recursive: true, force: true });
+});
+
+describe('Stage-1 ANN index flush', () => {
+  const file = path.join(dir, 'BTC_30.lsh.ann');
+
+  it('writes grown indexes on flush, not on sync', () => {
+    const index = ann.getStage1Index('lsh', 'BTC|30', windowLen);
+    const { ts, closes } = series(400);
+    expect(ann.syncStage1Index(index, ts, closes)).toBe(370);
+    expect(fs.existsSync(file)).toBe(false);
+
+    expect(ann.flushStage1Indexes()).toBe(1);
+    expect(ann.loadStage1Index(file).length).toBe(370);
+    expect(ann.flushStage1Indexes()).toBe(0);
+  });
+
+  it('flushes once more when the app closes', async () => {
+    const hooks: Array<() => Promise<void>> = [];
+    const app = { addHook: (name: string, fn: () => Promise<void>) => name === 'onClose' && hooks.push(fn) };
+    startAnnIndexFlush(app as any, 3_600_000);
+
+    const index = ann.getStage1Index('lsh', 'BTC|30', windowLen);
+    const { ts, closes } = series(450);
+    expect(ann.syncStage1Index(index, ts, closes)).toBe(50);
+    expect(ann.loadStage1Index(file).length).toBe(370);
+
+    expect(hooks.length).toBe(1);
+    await hooks[0]();
+    expect(ann.loadStage1Index(file).length).toBe(420);
+  });
+});
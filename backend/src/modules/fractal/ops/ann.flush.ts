@@ -0,0 +1,34 @@
+/**
+ * Stage-1 ANN Index Flush
+ *
+ * Requests only mark grown indexes dirty (engine/retrieval.ann.ts); they
+ * are written here every FRACTAL_ANN_FLUSH_SEC and once more on shutdown.
+ */
+
+import type { FastifyInstance } from 'fastify';
+import { flushStage1Indexes } from '../engine/retrieval.ann.js';
+import { ANN_FLUSH_INTERVAL_MS, ANN_INDEX_DIR } from '../config/storage.config.js';
+
+function flush(): void {
+  const saved = flushStage1Indexes();
+  if (saved > 0) console.log(`[ANN] Saved ${saved} stage-1 index(es) to ${ANN_INDEX_DIR}`);
+}
+
+export function startAnnIndexFlush(fastify: FastifyInstance, intervalMs = ANN_FLUSH_INTERVAL_MS): void {
+  if (!ANN_INDEX_DIR) return;
+
+  let timer: NodeJS.Timeout | null = null;
+  const tick = () => {
+    flush();
+    timer = setTimeout(tick, intervalMs);
+    timer.unref();
+  };
+  timer = setTimeout(tick, intervalMs);
+  timer.unref();
+
+  fastify.addHook('onClose', async () => {
+    if (timer) clearTimeout(timer);
+    timer = null;
+    flush();
+  });
+}
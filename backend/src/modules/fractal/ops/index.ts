@@ -53,3 +53,6 @@ export {
 } from './telegram.alerts.extended.js';
 
 export { registerHardenedOpsRoutes } from './ops.hardened.routes.js';
+
+// BLOCK 37.2 — Stage-1 ANN index persistence
+export { startAnnIndexFlush } from './ann.flush.js';
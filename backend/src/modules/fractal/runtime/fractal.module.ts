@@ -28,6 +28,7 @@ import { fractalJobRoutes } from '../jobs/fractal.job.routes.js';
 import { shadowDivergenceRoutes } from '../admin/shadow_divergence.routes.js';
 import { registerOpsRoutes } from '../ops/ops.routes.js';
 import { registerHardenedOpsRoutes } from '../ops/ops.hardened.routes.js';
+import { startAnnIndexFlush } from '../ops/ann.flush.js';
 import { registerFreezeRoutes } from '../freeze/fractal.freeze.routes.js';
 import { FractalBootstrapService } from '../bootstrap/fractal.bootstrap.service.js';
 import { guardRoutes, playbookRoutes, governanceLockRoutes } from '../governance/index.js';
@@ -106,6 +107,9 @@ export async function registerFractalModule(fastify: FastifyInstance, deps?: Par
   // Register main routes
   await fastify.register(fractalRoutes);
 
+  // BLOCK 37.2 — Persist stage-1 ANN indexes off the request path
+  startAnnIndexFlush(fastify);
+
   // Register V2.1 FINAL signal endpoint (FROZEN CONTRACT)
   await fastify.register(fractalSignalRoutes);
 
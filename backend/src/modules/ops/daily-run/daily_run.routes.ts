@@ -97,6 +97,59 @@ export async function registerDailyRunRoutes(app: FastifyInstance): Promise<void
     }
   });
   
+  /**
+   * GET /api/ops/dataset-version
+   *
+   * Cheap version token for downstream caches (proxy).
+   * Changes when a new daily candle lands or a daily run completes.
+   */
+  app.get('/api/ops/dataset-version', async (req, reply) => {
+    try {
+      const lastRunTs = async (asset: string) => {
+        const events = await db.collection('model_lifecycle_events')
+          .find({ modelId: asset, type: 'DAILY_RUN_COMPLETED' })
+          .sort({ ts: -1 })
+          .limit(1)
+          .project({ ts: 1 })
+          .toArray();
+        return events[0]?.ts ? new Date(events[0].ts).toISOString() : null;
+      };
+
+      const [btcCandle, spxCandle, btcRun, spxRun] = await Promise.all([
+        db.collection('fractal_canonical_ohlcv')
+          .find({ 'meta.symbol': 'BTC', 'meta.timeframe': '1d' })
+          .sort({ ts: -1 })
+          .limit(1)
+          .project({ ts: 1 })
+          .toArray(),
+        db.collection('spx_candles')
+          .find({})
+          .sort({ ts: -1 })
+          .limit(1)
+          .project({ date: 1 })
+          .toArray(),
+        lastRunTs('BTC'),
+        lastRunTs('SPX'),
+      ]);
+
+      const btc = {
+        lastCandle: btcCandle[0]?.ts ? new Date(btcCandle[0].ts).toISOString().slice(0, 10) : null,
+        lastDailyRun: btcRun,
+      };
+      const spx = {
+        lastCandle: spxCandle[0]?.date ?? null,
+        lastDailyRun: spxRun,
+      };
+      const version = [btc.lastCandle, btc.lastDailyRun, spx.lastCandle, spx.lastDailyRun]
+        .map(v => v ?? '-')
+        .join('|');
+
+      return { ok: true, data: { version, btc, spx } };
+    } catch (err: any) {
+      return reply.code(500).send({ ok: false, error: err.message });
+    }
+  });
+
   console.log('[DailyRun] Routes registered at /api/ops/daily-run/*');
 }
 
@@ -0,0 +1,6 @@
+/**
+ * L4.3 — Engine Prewarm Module
+ */
+
+export * from './prewarm.service.js';
+export { default as registerPrewarmRoutes } from './prewarm.routes.js';
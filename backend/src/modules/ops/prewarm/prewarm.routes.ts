@@ -0,0 +1,36 @@
+/**
+ * L4.3 — Engine Prewarm Routes
+ *
+ * Called by the proxy readiness gate before traffic is served
+ */
+
+import { FastifyInstance } from 'fastify';
+import { prewarm, getPrewarmStatus } from './prewarm.service.js';
+
+export async function registerPrewarmRoutes(app: FastifyInstance): Promise<void> {
+  /**
+   * POST /api/ops/prewarm
+   *
+   * Load series, build window indexes, compute focus packs.
+   * Returns per-phase timings.
+   */
+  app.post('/api/ops/prewarm', async (req, reply) => {
+    try {
+      const result = await prewarm(app);
+      return { ok: result.ok, data: result };
+    } catch (err: any) {
+      return reply.code(500).send({ ok: false, error: err.message });
+    }
+  });
+
+  /**
+   * GET /api/ops/prewarm/status
+   */
+  app.get('/api/ops/prewarm/status', async () => {
+    return { ok: true, data: getPrewarmStatus() };
+  });
+
+  console.log('[Prewarm] Routes registered at /api/ops/prewarm');
+}
+
+export default registerPrewarmRoutes;
@@ -0,0 +1,151 @@
+/**
+ * L4.3 — Engine Prewarm Service
+ *
+ * Pays the cold-start cost before the proxy sends traffic:
+ * loads canonical BTC/SPX series, builds the 30/60/90 WindowIndex
+ * and computes focus packs for every horizon.
+ *
+ * Runs through app.inject so every route-level engine cache gets warmed
+ * exactly as a real request would warm it.
+ */
+
+import type { FastifyInstance } from 'fastify';
+import { CanonicalStore } from '../../fractal/data/canonical.store.js';
+import { spxCandlesService } from '../../spx-core/spx-candles.service.js';
+import { FRACTAL_HORIZONS } from '../../fractal/config/horizon.config.js';
+
+export interface PrewarmPhaseResult {
+  name: 'SERIES_LOAD' | 'WINDOW_INDEX' | 'FOCUS_PACKS';
+  ok: boolean;
+  ms: number;
+  details?: Record<string, any>;
+  error?: string;
+}
+
+export interface PrewarmResult {
+  ok: boolean;
+  startedAt: string;
+  finishedAt: string;
+  totalMs: number;
+  phases: PrewarmPhaseResult[];
+}
+
+const canonicalStore = new CanonicalStore();
+
+let running: Promise<PrewarmResult> | null = null;
+let lastResult: PrewarmResult | null = null;
+
+async function runPhase(
+  name: PrewarmPhaseResult['name'],
+  fn: () => Promise<Record<string, any>>
+): Promise<PrewarmPhaseResult> {
+  const t0 = Date.now();
+  try {
+    const details = await fn();
+    return { name, ok: true, ms: Date.now() - t0, details };
+  } catch (err: any) {
+    return { name, ok: false, ms: Date.now() - t0, error: err?.message || String(err) };
+  }
+}
+
+/**
+ * Inject a request and fail on an error status or an `{ ok: false }` body
+ * (several admin routes report failure as 200). With requireOk the body
+ * must carry `ok: true`.
+ */
+async function injectOk(
+  app: FastifyInstance,
+  method: 'GET' | 'POST',
+  url: string,
+  requireOk = false
+): Promise<number> {
+  const t0 = Date.now();
+  const res = await app.inject({ method, url });
+  if (res.statusCode >= 400) {
+    throw new Error(`${method} ${url} -> ${res.statusCode}`);
+  }
+  let body: any = null;
+  try {
+    body = res.json();
+  } catch {
+    // Not JSON: the status code is all there is to check
+  }
+  const hasOk = body !== null && typeof body === 'object' && 'ok' in body;
+  if ((requireOk || hasOk) && body?.ok !== true) {
+    throw new Error(`${method} ${url} -> ${res.statusCode} ${body?.error || body?.message || 'ok !== true'}`);
+  }
+  return Date.now() - t0;
+}
+
+async function runPrewarm(app: FastifyInstance): Promise<PrewarmResult> {
+  const started = Date.now();
+  const phases: PrewarmPhaseResult[] = [];
+
+  phases.push(await runPhase('SERIES_LOAD', async () => {
+    const [btc, spx] = await Promise.all([
+      canonicalStore.count('BTC', '1d'),
+      spxCandlesService.getAllCandles(),
+    ]);
+    return { btcCandles: btc, spxCandles: spx.length };
+  }));
+
+  // FractalEngine.ensureCache builds the 30/60/90 window indexes
+  phases.push(await runPhase('WINDOW_INDEX', async () => ({
+    rebuildMs: await injectOk(app, 'POST', '/api/fractal/admin/rebuild-index', true),
+  })));
+
+  phases.push(await runPhase('FOCUS_PACKS', async () => {
+    const timings: Record<string, number> = {};
+    const failures: string[] = [];
+    const urls = [
+      '/api/fractal/v2.1/terminal?symbol=BTC',
+      ...FRACTAL_HORIZONS.map(h => `/api/fractal/v2.1/focus-pack?symbol=BTC&focus=${h}`),
+      ...FRACTAL_HORIZONS.map(h => `/api/spx/v2.1/focus-pack?focus=${h}`),
+    ];
+    // Sequential: these are CPU-bound on the same event loop anyway
+    for (const url of urls) {
+      try {
+        timings[url] = await injectOk(app, 'GET', url);
+      } catch (err: any) {
+        failures.push(err.message);
+      }
+    }
+    if (failures.length === urls.length) {
+      throw new Error(failures.join('; '));
+    }
+    return { timings, failures };
+  }));
+
+  const finished = Date.now();
+  const result: PrewarmResult = {
+    ok: phases.every(p => p.ok),
+    startedAt: new Date(started).toISOString(),
+    finishedAt: new Date(finished).toISOString(),
+    totalMs: finished - started,
+    phases,
+  };
+
+  console.log(`[Prewarm] Done in ${result.totalMs}ms: ${phases.map(p => `${p.name}=${p.ms}ms${p.ok ? '' : ' (failed)'}`).join(', ')}`);
+  return result;
+}
+
+/**
+ * Run prewarm once; concurrent callers share the same run
+ */
+export function prewarm(app: FastifyInstance): Promise<PrewarmResult> {
+  if (!running) {
+    running = runPrewarm(app)
+      .then(result => {
+        lastResult = result;
+        return result;
+      })
+      .finally(() => {
+        running = null;
+      });
+  }
+  return running;
+}
+
+export function getPrewarmStatus(): { running: boolean; lastResult: PrewarmResult | null } {
+  return { running: running !== null, lastResult };
+}
@@ -57,9 +57,14 @@ export function computeCorrelation(a: number[], b: number[]): number {
  * Uses combination of RMSE and correlation
  */
 export function computeSimilarity(a: number[], b: number[]): number {
-  const rmse = computeRMSE(a, b);
-  const corr = computeCorrelation(a, b);
-  
+  return combineSimilarity(computeRMSE(a, b), computeCorrelation(a, b));
+}
+
+/**
+ * Similarity score from precomputed RMSE and correlation
+ * (shared with the batched scan in spx-scan.service)
+ */
+export function combineSimilarity(rmse: number, corr: number): number {
   // RMSE component: convert to 0-100 (lower RMSE = higher score)
   // Typical normalized RMSE range is 0-0.3
   const rmseScore = Math.max(0, 100 - rmse * 300);
@@ -0,0 +1,50 @@
+/**
+ * SPX CORE — Scan Kernel
+ *
+ * BLOCK B5.2.1 — Batched scoring of every historical window (compute job)
+ *
+ * Pure function of a shared closes array, so scanWindows can run it on a
+ * compute worker when the host has one (see common/compute.offload).
+ * ISOLATION: Does NOT import from /modules/btc/ or /modules/fractal/
+ */
+
+import { combineSimilarity } from './spx-match.service.js';
+import { pearsonRows, rmseRows, RowMatrix } from '../../common/similarity.kernel.js';
+
+export const SPX_SCAN_JOB = 'spx.scan.score';
+
+export interface SpxScanKernelInput {
+  closes: Float64Array;        // all candle closes (shared, read-only)
+  windowLen: number;
+  rows: number;                // windows to score
+  current: number[];           // normalized current window
+}
+
+export interface SpxScanKernelOutput {
+  similarity: Float64Array;    // 0-100 per row
+  correlation: Float64Array;   // Pearson per row
+}
+
+/**
+ * Row r = normalizeSeries(window ending before i = windowLen + r), first dim points
+ */
+export function scoreSpxWindows(input: SpxScanKernelInput): SpxScanKernelOutput {
+  const { closes, windowLen, rows, current } = input;
+  const dim = Math.min(current.length, windowLen);
+
+  const m: RowMatrix = { rows, dim, data: new Float64Array(rows * dim) };
+  for (let r = 0; r < rows; r++) {
+    const base = closes[r];
+    if (windowLen < 2 || base === 0) continue;
+    for (let j = 0, o = r * dim; j < dim; j++, o++) m.data[o] = (closes[r + j] - base) / base;
+  }
+
+  const rmse = new Float64Array(rows);
+  const correlation = new Float64Array(rows);
+  rmseRows(m, current, rmse);
+  pearsonRows(m, current, correlation);
+  const similarity = new Float64Array(rows);
+  for (let r = 0; r < rows; r++) similarity[r] = combineSimilarity(rmse[r], correlation[r]);
+
+  return { similarity, correlation };
+}
@@ -9,7 +9,9 @@
 
 import { spxCandlesService, type SpxCandle } from './spx-candles.service.js';
 import { normalizeSeries } from './spx-normalize.js';
-import { computeSimilarity, computeCorrelation } from './spx-match.service.js';
+import { scoreSpxWindows, SPX_SCAN_JOB } from './spx-scan.kernel.js';
+import { topK } from '../../common/similarity.kernel.js';
+import { ComputeJobOptions, offload, sharedFloat64 } from '../../common/compute.offload.js';
 
 // ═══════════════════════════════════════════════════════════════
 // TYPES
@@ -67,7 +69,8 @@ const DEFAULT_SCAN_CONFIG: SpxScanConfig = {
  * Scan SPX history for matches similar to current window
  */
 export async function scanSpxMatches(
-  config: Partial<SpxScanConfig> = {}
+  config: Partial<SpxScanConfig> = {},
+  jobOpts: ComputeJobOptions = {}
 ): Promise<SpxScanResult> {
   const t0 = Date.now();
   const cfg: SpxScanConfig = { ...DEFAULT_SCAN_CONFIG, ...config };
@@ -105,62 +108,7 @@ export async function scanSpxMatches(
   const currentNormalized = normalizeSeries(currentCloses);
   
   // Scan historical windows
-  const matches: SpxRawMatch[] = [];
-  let scannedWindows = 0;
-  
-  // Search from windowLen to searchEndIdx - windowLen - aftermathDays
-  // This ensures we have both window and aftermath data
-  const scanEnd = searchEndIdx - cfg.windowLen - cfg.aftermathDays;
-  
-  for (let i = cfg.windowLen; i < scanEnd; i++) {
-    // Extract historical window
-    const windowCandles = allCandles.slice(i - cfg.windowLen, i);
-    const windowCloses = windowCandles.map(c => c.c);
-    const windowNormalized = normalizeSeries(windowCloses);
-    
-    // Compute similarity
-    const similarity = computeSimilarity(currentNormalized, windowNormalized);
-    
-    if (similarity >= cfg.minSimilarity) {
-      // Extract aftermath
-      const aftermathCandles = allCandles.slice(i, i + cfg.aftermathDays);
-      const aftermathCloses = aftermathCandles.map(c => c.c);
-      
-      // Normalize aftermath relative to window end
-      const windowEndPrice = windowCloses[windowCloses.length - 1];
-      const aftermathNormalized = aftermathCloses.map(p => 
-        (p - windowEndPrice) / windowEndPrice
-      );
-      
-      // Calculate metrics
-      const terminalReturn = aftermathNormalized[aftermathNormalized.length - 1] || 0;
-      const maxDrawdown = calculateMaxDrawdown(aftermathCloses, windowEndPrice);
-      const maxExcursion = calculateMaxExcursion(aftermathCloses, windowEndPrice);
-      const correlation = computeCorrelation(currentNormalized, windowNormalized);
-      
-      const matchDate = windowCandles[windowCandles.length - 1].date;
-      
-      matches.push({
-        id: matchDate,
-        startTs: windowCandles[0].t,
-        endTs: windowCandles[windowCandles.length - 1].t,
-        similarity,
-        correlation,
-        windowNormalized,
-        aftermathNormalized,
-        cohort: windowCandles[windowCandles.length - 1].cohort,
-        return: terminalReturn * 100, // Convert to %
-        maxDrawdown: maxDrawdown * 100,
-        maxExcursion: maxExcursion * 100,
-      });
-    }
-    
-    scannedWindows++;
-  }
-  
-  // Sort by similarity (descending) and limit
-  matches.sort((a, b) => b.similarity - a.similarity);
-  const topMatches = matches.slice(0, cfg.maxMatches);
+  const { matches: topMatches, scannedWindows } = await scanWindows(allCandles, currentNormalized, searchEndIdx, cfg, jobOpts);
   
   return {
     ok: true,
@@ -176,7 +124,8 @@ export async function scanSpxMatches(
  */
 export async function scanSpxMatchesForWindow(
   currentWindow: number[],
-  config: Partial<SpxScanConfig> = {}
+  config: Partial<SpxScanConfig> = {},
+  jobOpts: ComputeJobOptions = {}
 ): Promise<SpxScanResult> {
   const t0 = Date.now();
   const cfg: SpxScanConfig = { 
@@ -202,55 +151,8 @@ export async function scanSpxMatchesForWindow(
   const currentNormalized = normalizeSeries(currentWindow);
   
   // Scan historical windows
-  const matches: SpxRawMatch[] = [];
-  let scannedWindows = 0;
-  
   const searchEndIdx = allCandles.length - cfg.excludeRecentDays;
-  const scanEnd = searchEndIdx - cfg.windowLen - cfg.aftermathDays;
-  
-  for (let i = cfg.windowLen; i < scanEnd; i++) {
-    const windowCandles = allCandles.slice(i - cfg.windowLen, i);
-    const windowCloses = windowCandles.map(c => c.c);
-    const windowNormalized = normalizeSeries(windowCloses);
-    
-    const similarity = computeSimilarity(currentNormalized, windowNormalized);
-    
-    if (similarity >= cfg.minSimilarity) {
-      const aftermathCandles = allCandles.slice(i, i + cfg.aftermathDays);
-      const aftermathCloses = aftermathCandles.map(c => c.c);
-      
-      const windowEndPrice = windowCloses[windowCloses.length - 1];
-      const aftermathNormalized = aftermathCloses.map(p => 
-        (p - windowEndPrice) / windowEndPrice
-      );
-      
-      const terminalReturn = aftermathNormalized[aftermathNormalized.length - 1] || 0;
-      const maxDrawdown = calculateMaxDrawdown(aftermathCloses, windowEndPrice);
-      const maxExcursion = calculateMaxExcursion(aftermathCloses, windowEndPrice);
-      const correlation = computeCorrelation(currentNormalized, windowNormalized);
-      
-      const matchDate = windowCandles[windowCandles.length - 1].date;
-      
-      matches.push({
-        id: matchDate,
-        startTs: windowCandles[0].t,
-        endTs: windowCandles[windowCandles.length - 1].t,
-        similarity,
-        correlation,
-        windowNormalized,
-        aftermathNormalized,
-        cohort: windowCandles[windowCandles.length - 1].cohort,
-        return: terminalReturn * 100,
-        maxDrawdown: maxDrawdown * 100,
-        maxExcursion: maxExcursion * 100,
-      });
-    }
-    
-    scannedWindows++;
-  }
-  
-  matches.sort((a, b) => b.similarity - a.similarity);
-  const topMatches = matches.slice(0, cfg.maxMatches);
+  const { matches: topMatches, scannedWindows } = await scanWindows(allCandles, currentNormalized, searchEndIdx, cfg, jobOpts);
   
   return {
     ok: true,
@@ -265,6 +167,74 @@ export async function scanSpxMatchesForWindow(
 // HELPERS
 // ═══════════════════════════════════════════════════════════════
 
+/**
+ * Score every historical window against the current one in a single
+ * batched pass (scoreSpxWindows, on a compute worker when available),
+ * then build full match records for the top maxMatches only.
+ *
+ * Windows end (exclusive) at i in [windowLen, searchEndIdx - windowLen - aftermathDays),
+ * so each has both window and aftermath data.
+ */
+async function scanWindows(
+  allCandles: SpxCandle[],
+  currentNormalized: number[],
+  searchEndIdx: number,
+  cfg: SpxScanConfig,
+  jobOpts: ComputeJobOptions
+): Promise<{ matches: SpxRawMatch[]; scannedWindows: number }> {
+  const scanEnd = searchEndIdx - cfg.windowLen - cfg.aftermathDays;
+  const rows = Math.max(0, scanEnd - cfg.windowLen);
+
+  const closes = sharedFloat64(allCandles.length);
+  for (let i = 0; i < allCandles.length; i++) closes[i] = allCandles[i].c;
+
+  const { similarity, correlation: corr } = await offload(
+    SPX_SCAN_JOB,
+    { closes, windowLen: cfg.windowLen, rows, current: currentNormalized },
+    scoreSpxWindows,
+    jobOpts
+  );
+
+  const matches: SpxRawMatch[] = [];
+  for (const top of topK(similarity, cfg.maxMatches, { minScore: cfg.minSimilarity })) {
+    const i = cfg.windowLen + top.index;
+    const windowCandles = allCandles.slice(i - cfg.windowLen, i);
+    const windowCloses = windowCandles.map(c => c.c);
+    const windowNormalized = normalizeSeries(windowCloses);
+    
+    // Extract aftermath, normalized relative to window end
+    const aftermathCandles = allCandles.slice(i, i + cfg.aftermathDays);
+    const aftermathCloses = aftermathCandles.map(c => c.c);
+    const windowEndPrice = windowCloses[windowCloses.length - 1];
+    const aftermathNormalized = aftermathCloses.map(p => 
+      (p - windowEndPrice) / windowEndPrice
+    );
+    
+    // Calculate metrics
+    const terminalReturn = aftermathNormalized[aftermathNormalized.length - 1] || 0;
+    const maxDrawdown = calculateMaxDrawdown(aftermathCloses, windowEndPrice);
+    const maxExcursion = calculateMaxExcursion(aftermathCloses, windowEndPrice);
+    
+    const matchDate = windowCandles[windowCandles.length - 1].date;
+    
+    matches.push({
+      id: matchDate,
+      startTs: windowCandles[0].t,
+      endTs: windowCandles[windowCandles.length - 1].t,
+      similarity: top.score,
+      correlation: corr[top.index],
+      windowNormalized,
+      aftermathNormalized,
+      cohort: windowCandles[windowCandles.length - 1].cohort,
+      return: terminalReturn * 100, // Convert to %
+      maxDrawdown: maxDrawdown * 100,
+      maxExcursion: maxExcursion * 100,
+    });
+  }
+  
+  return { matches, scannedWindows: rows };
+}
+
 function calculateMaxDrawdown(prices: number[], basePrice: number): number {
   if (prices.length === 0) return 0;
   
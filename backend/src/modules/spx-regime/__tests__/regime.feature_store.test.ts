@@ -0,0 +1,87 @@
+/**
+ * SPX Regime Feature Store Tests
+ *
+ * fixtures/walk_200.features is written by scripts/regime_features.py from
+ * fixtures/walk_200.csv. The reader must agree with the Python layout,
+ * recognise the candles it was built from, and serve the same features as
+ * calculateRegimeFeatures at every index. Regenerate with:
+ *   python scripts/regime_features.py \
+ *     backend/src/modules/spx-regime/__tests__/fixtures/walk_200.csv \
+ *     backend/src/modules/spx-regime/__tests__/fixtures/walk_200.features
+ */
+
+import { describe, it, expect } from 'vitest';
+import fs from 'fs';
+import path from 'path';
+import { fileURLToPath } from 'url';
+import { readRegimeFeatureStore, storeMatchesCandles, featuresAt } from '../regime.feature_store.js';
+import { calculateRegimeFeatures, RegimeFeatures } from '../regime.features.js';
+import { REGIME_CONFIG } from '../regime.config.js';
+
+const FIXTURES = fileURLToPath(new URL('./fixtures/', import.meta.url));
+const STORE = path.join(FIXTURES, 'walk_200.features');
+
+function readCandles(): { date: string; close: number }[] {
+  const [, ...lines] = fs.readFileSync(path.join(FIXTURES, 'walk_200.csv'), 'utf-8').trim().split('\n');
+  return lines.map(line => {
+    const cols = line.split(',');
+    return { date: cols[0], close: parseFloat(cols[4]) };
+  });
+}
+
+describe('readRegimeFeatureStore', () => {
+  it('reads the header written by regime_features.py', () => {
+    const store = readRegimeFeatureStore(STORE);
+    expect(store.name).toBe('spx_regime');
+    expect(store.featureVersion).toBe('1.2.0');
+    expect(store.rows).toBe(200);
+    expect(store.version).toMatch(/^[0-9a-f]{64}$/);
+    // ts plus one column per RegimeFeatures field
+    expect(Object.keys(store.columns).length).toBe(25);
+    const candles = readCandles();
+    expect(store.columns.ts[0]).toBe(Date.parse(candles[0].date));
+    expect(store.columns.ts[199]).toBe(Date.parse(candles[199].date));
+  });
+});
+
+describe('storeMatchesCandles', () => {
+  it('recognises the candles the store was built from', () => {
+    expect(storeMatchesCandles(readRegimeFeatureStore(STORE), readCandles())).toBe(true);
+  });
+
+  it('rejects revised or truncated candles', () => {
+    const store = readRegimeFeatureStore(STORE);
+    const revised = readCandles();
+    revised[150] = { ...revised[150], close: revised[150].close + 0.01 };
+    expect(storeMatchesCandles(store, revised)).toBe(false);
+    expect(storeMatchesCandles(store, readCandles().slice(0, 199))).toBe(false);
+  });
+});
+
+describe('featuresAt', () => {
+  const store = readRegimeFeatureStore(STORE);
+  const candles = readCandles();
+  const closes = candles.map(c => c.close);
+
+  it('has no features before the first full window', () => {
+    expect(featuresAt(store, REGIME_CONFIG.VOL_WINDOW_LONG - 1)).toBeNull();
+    expect(featuresAt(store, REGIME_CONFIG.VOL_WINDOW_LONG)).not.toBeNull();
+    expect(featuresAt(store, store.rows)).toBeNull();
+  });
+
+  it('matches calculateRegimeFeatures at every index', () => {
+    // Same slice SpxRegimeService.computeRegimeForIdx hands the calculator
+    for (let idx = REGIME_CONFIG.VOL_WINDOW_LONG; idx < candles.length; idx++) {
+      const stored = featuresAt(store, idx)!;
+      const expected = calculateRegimeFeatures(closes.slice(0, idx + 1));
+      for (const key of Object.keys(expected) as (keyof RegimeFeatures)[]) {
+        const want = expected[key];
+        if (typeof want === 'number') {
+          expect(Math.abs((stored[key] as number) - want)).toBeLessThan(1e-9);
+        } else {
+          expect(stored[key]).toBe(want);
+        }
+      }
+    }
+  });
+});
@@ -6,6 +6,7 @@
 
 export * from './regime.config.js';
 export * from './regime.features.js';
+export * from './regime.feature_store.js';
 export * from './regime.tagger.js';
 export * from './regime.service.js';
 export * from './regime.routes.js';
@@ -0,0 +1,130 @@
+/**
+ * SPX REGIME ENGINE — Feature Store (reader)
+ *
+ * BLOCK B6.11 — Precomputed RegimeFeatures written by
+ * scripts/regime_features.py: a 128-byte header, a directory of column
+ * names, then one float64 column per feature (enums as codes, booleans
+ * as 0/1, NaN before the first full window). The header carries a sha256
+ * over the input ts/close columns, so a store only applies to the exact
+ * candle series it was built from.
+ */
+
+import fs from 'fs';
+import crypto from 'crypto';
+import { RegimeFeatures } from './regime.features.js';
+import { VolBucket, TrendDir } from './regime.config.js';
+
+const MAGIC = 'FRFEATUR';
+const FORMAT_VERSION = 1;
+const HEADER_SIZE = 128;
+const NAME_SIZE = 32;
+
+const VOL_BUCKETS = [VolBucket.LOW, VolBucket.MEDIUM, VolBucket.HIGH];
+const TREND_DIRS = [TrendDir.UP, TrendDir.DOWN, TrendDir.FLAT];
+const CRASH_SPEED = ['NONE', 'SLOW', 'FAST'] as const;
+const REBOUND_TYPE = ['NONE', 'NONV', 'VSHAPE'] as const;
+
+export interface RegimeFeatureStore {
+  name: string;
+  featureVersion: string;
+  rows: number;
+  version: string;
+  createdAt: number;
+  columns: Record<string, Float64Array>;
+}
+
+function readString(buf: Buffer, start: number, len: number): string {
+  return buf.subarray(start, start + len).toString('ascii').replace(/\0+$/, '');
+}
+
+/**
+ * Load a feature store. Columns are views over one buffer.
+ */
+export function readRegimeFeatureStore(filePath: string): RegimeFeatureStore {
+  const file = fs.readFileSync(filePath);
+  if (file.length < HEADER_SIZE || readString(file, 0, 8) !== MAGIC) {
+    throw new Error(`${filePath}: not a feature store`);
+  }
+  const fmt = file.readUInt32LE(8);
+  if (fmt !== FORMAT_VERSION) throw new Error(`${filePath}: unsupported format ${fmt}`);
+  const count = file.readUInt32LE(12);
+  const rows = Number(file.readBigUInt64LE(16));
+  const base = HEADER_SIZE + count * NAME_SIZE;
+  if (file.length !== base + count * rows * 8) {
+    throw new Error(`${filePath}: size mismatch`);
+  }
+
+  // Same alignment rule as common/candle.binary.ts
+  const body = file.byteOffset % 8 === 0 ? file : Buffer.from(file);
+  const columns: Record<string, Float64Array> = {};
+  for (let i = 0; i < count; i++) {
+    const name = readString(file, HEADER_SIZE + i * NAME_SIZE, NAME_SIZE);
+    columns[name] = new Float64Array(body.buffer, body.byteOffset + base + i * rows * 8, rows);
+  }
+
+  return {
+    name: readString(file, 24, 16),
+    featureVersion: readString(file, 40, 8),
+    rows,
+    version: file.subarray(48, 80).toString('hex'),
+    createdAt: Number(file.readBigInt64LE(80)),
+    columns,
+  };
+}
+
+/**
+ * True when the store was built from exactly these candles (dates and closes)
+ */
+export function storeMatchesCandles(
+  store: RegimeFeatureStore,
+  candles: { date: string; close: number }[]
+): boolean {
+  if (store.rows !== candles.length) return false;
+  const ts = new BigInt64Array(candles.length);
+  const close = new Float64Array(candles.length);
+  for (let i = 0; i < candles.length; i++) {
+    ts[i] = BigInt(Date.parse(candles[i].date.substring(0, 10)));
+    close[i] = candles[i].close;
+  }
+  const digest = crypto.createHash('sha256')
+    .update(store.featureVersion)
+    .update(Buffer.from(ts.buffer))
+    .update(Buffer.from(close.buffer))
+    .digest('hex');
+  return digest === store.version;
+}
+
+/**
+ * Features for one candle index, or null before the first full window
+ */
+export function featuresAt(store: RegimeFeatureStore, idx: number): RegimeFeatures | null {
+  const c = store.columns;
+  if (idx < 0 || idx >= store.rows || Number.isNaN(c.vol60[idx])) return null;
+  const flag = (name: string) => c[name][idx] === 1;
+  return {
+    vol20: c.vol20[idx],
+    vol60: c.vol60[idx],
+    volBucket: VOL_BUCKETS[c.volBucket[idx]],
+    volBucket5dAgo: VOL_BUCKETS[c.volBucket5dAgo[idx]],
+    volExpanding: flag('volExpanding'),
+    volContracting: flag('volContracting'),
+    maxDD60: c.maxDD60[idx],
+    ddSpeed: c.ddSpeed[idx],
+    daysToTrough: c.daysToTrough[idx],
+    sma50: c.sma50[idx],
+    sma50Slope: c.sma50Slope[idx],
+    sma50Slope5dAgo: c.sma50Slope5dAgo[idx],
+    trendDir: TREND_DIRS[c.trendDir[idx]],
+    trendPersistence30: c.trendPersistence30[idx],
+    trendFlipping: flag('trendFlipping'),
+    wasRange: flag('wasRange'),
+    isRange: flag('isRange'),
+    rangeBreaking: flag('rangeBreaking'),
+    shock5: c.shock5[idx],
+    rebound10: c.rebound10[idx],
+    isShock: flag('isShock'),
+    isVShape: flag('isVShape'),
+    crashSpeedBucket: CRASH_SPEED[c.crashSpeedBucket[idx]],
+    reboundType: REBOUND_TYPE[c.reboundType[idx]],
+  };
+}
@@ -22,6 +22,7 @@ export async function registerSpxRegimeRoutes(app: FastifyInstance): Promise<voi
         toIdx?: number;
         chunkSize?: number;
         preset?: string;
+        useFeatureStore?: boolean;
       } || {};
       
       // Ensure indexes first
@@ -32,6 +33,7 @@ export async function registerSpxRegimeRoutes(app: FastifyInstance): Promise<voi
         toIdx: body.toIdx,
         chunkSize: body.chunkSize ?? 1000,
         preset: body.preset ?? 'BALANCED',
+        ...(body.useFeatureStore === false ? { featureStore: null } : {}),
       });
       
       return reply.send({
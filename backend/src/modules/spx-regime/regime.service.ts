@@ -7,8 +7,12 @@
  * Resume-safe with cursor tracking.
  */
 
+import fs from 'fs';
+import path from 'path';
 import mongoose from 'mongoose';
 import { calculateRegimeFeatures, RegimeFeatures } from './regime.features.js';
+import { readRegimeFeatureStore, storeMatchesCandles, featuresAt, RegimeFeatureStore } from './regime.feature_store.js';
+import { SPX_DATA_DIR } from '../spx/spx.constants.js';
 import { classifyRegime, getRegimeDescription, getRegimeRiskLevel, isModelUsefulRegime } from './regime.tagger.js';
 import { RegimeTag, VolBucket, REGIME_CONFIG } from './regime.config.js';
 import {
@@ -42,6 +46,10 @@ import {
 
 const ENGINE_VERSION = '1.2.0'; // Updated for B6.15
 
+// Built by scripts/regime_features.py; used by recompute when it matches the candles
+const FEATURE_STORE_PATH =
+  process.env.SPX_REGIME_FEATURES_PATH || path.join(SPX_DATA_DIR, 'spx_regime.features');
+
 export interface RegimeDaily {
   date: string;
   idx: number;
@@ -119,13 +127,13 @@ class SpxRegimeService {
     candles: { date: string; close: number }[],
     idx: number,
     cohort: string,
-    preset: string = 'BALANCED'
+    preset: string = 'BALANCED',
+    precomputed?: RegimeFeatures | null
   ): Promise<RegimeDaily | null> {
     // Need at least 60 candles for features
     if (idx < REGIME_CONFIG.VOL_WINDOW_LONG) return null;
     
-    const closes = candles.slice(0, idx + 1).map(c => c.close);
-    const features = calculateRegimeFeatures(closes);
+    const features = precomputed ?? calculateRegimeFeatures(candles.slice(0, idx + 1).map(c => c.close));
     const regimeTag = classifyRegime(features);
     
     return {
@@ -142,15 +150,40 @@ class SpxRegimeService {
     };
   }
 
+  /**
+   * Load the precomputed feature store if it was built from these candles
+   */
+  private loadFeatureStore(
+    filePath: string,
+    candles: { date: string; close: number }[]
+  ): RegimeFeatureStore | null {
+    if (!fs.existsSync(filePath)) return null;
+    try {
+      const store = readRegimeFeatureStore(filePath);
+      if (store.featureVersion !== ENGINE_VERSION || !storeMatchesCandles(store, candles)) {
+        console.log(`[SPX Regime] Feature store ${filePath} is stale, computing per index`);
+        return null;
+      }
+      return store;
+    } catch (err: any) {
+      console.warn(`[SPX Regime] Feature store unreadable: ${err.message}`);
+      return null;
+    }
+  }
+
   /**
    * Recompute regimes for a range
+   *
+   * featureStore: path of a precomputed feature store (default
+   * SPX_REGIME_FEATURES_PATH), or null to always compute per index.
    */
   async recomputeRegimes(options: {
     fromIdx?: number;
     toIdx?: number;
     chunkSize?: number;
     preset?: string;
-  } = {}): Promise<{ processed: number; written: number }> {
+    featureStore?: string | null;
+  } = {}): Promise<{ processed: number; written: number; featureSource: 'store' | 'computed' }> {
     const db = this.getDb();
     if (!db) throw new Error('Database not connected');
     
@@ -164,6 +197,10 @@ class SpxRegimeService {
     
     const toIdx = options.toIdx ?? candles.length - 1;
     const col = await this.getRegimeCollection();
+    const storePath = options.featureStore === undefined ? FEATURE_STORE_PATH : options.featureStore;
+    const store = storePath
+      ? this.loadFeatureStore(storePath, candles as unknown as { date: string; close: number }[])
+      : null;
     
     let processed = 0;
     let written = 0;
@@ -183,7 +220,8 @@ class SpxRegimeService {
           candles as { date: string; close: number }[],
           idx,
           cohort,
-          preset
+          preset,
+          store ? featuresAt(store, idx) : null
         );
         
         if (regime) {
@@ -209,7 +247,7 @@ class SpxRegimeService {
       console.log(`[SPX Regime] Processed ${processed}/${toIdx - fromIdx + 1}, written ${written}`);
     }
     
-    return { processed, written };
+    return { processed, written, featureSource: store ? 'store' : 'computed' };
   }
 
   /**
@@ -8,6 +8,7 @@
 import { SpxCandleModel } from './spx.mongo.js';
 import { pickSpxCohort } from './spx.cohorts.js';
 import type { SpxCandle } from './spx.types.js';
+import { readCandleStore } from '../../common/candle.binary.js';
 import * as fs from 'fs';
 import * as path from 'path';
 
@@ -111,6 +112,26 @@ export function parseYahooCsv(csvText: string): YahooCsvRow[] {
   return rows;
 }
 
+/**
+ * Read rows from a binary candle store (scripts/candle_store.py)
+ */
+export function readCandleStoreRows(filePath: string): YahooCsvRow[] {
+  const series = readCandleStore(filePath);
+  const rows: YahooCsvRow[] = new Array(series.rows);
+  for (let i = 0; i < series.rows; i++) {
+    rows[i] = {
+      date: new Date(Number(series.ts[i])).toISOString().slice(0, 10),
+      open: series.open[i],
+      high: series.high[i],
+      low: series.low[i],
+      close: series.close[i],
+      adjClose: series.close[i],
+      volume: series.volume[i],
+    };
+  }
+  return rows;
+}
+
 /**
  * Convert Yahoo CSV rows to SpxCandle documents
  * Adds idx (sequential index) and c (close alias) for calibration compatibility
@@ -138,7 +159,7 @@ function toSpxCandles(rows: YahooCsvRow[]): (SpxCandle & { idx: number; c: numbe
 }
 
 /**
- * Ingest SPX data from Yahoo CSV file
+ * Ingest SPX data from Yahoo CSV file (or a .candles binary store)
  */
 export async function ingestFromYahooCsv(csvPath: string = DEFAULT_CSV_PATH) {
   console.log(`[SPX Ingest] Reading CSV from: ${csvPath}`);
@@ -148,12 +169,19 @@ export async function ingestFromYahooCsv(csvPath: string = DEFAULT_CSV_PATH) {
     throw new Error(`CSV file not found: ${csvPath}`);
   }
   
-  const csvText = fs.readFileSync(csvPath, 'utf-8');
-  console.log(`[SPX Ingest] CSV size: ${(csvText.length / 1024).toFixed(1)} KB`);
-  
-  // Parse CSV
-  const rows = parseYahooCsv(csvText);
-  console.log(`[SPX Ingest] Parsed ${rows.length} valid rows`);
+  let rows: YahooCsvRow[];
+  if (path.extname(csvPath) === '.candles') {
+    // Binary candle store: already validated and sorted, no parsing needed
+    rows = readCandleStoreRows(csvPath);
+    console.log(`[SPX Ingest] Loaded ${rows.length} rows from candle store`);
+  } else {
+    const csvText = fs.readFileSync(csvPath, 'utf-8');
+    console.log(`[SPX Ingest] CSV size: ${(csvText.length / 1024).toFixed(1)} KB`);
+
+    // Parse CSV
+    rows = parseYahooCsv(csvText);
+    console.log(`[SPX Ingest] Parsed ${rows.length} valid rows`);
+  }
   
   if (rows.length === 0) {
     throw new Error('No valid rows found in CSV');
@@ -0,0 +1,166 @@
+/**
+ * Compute Pool Tests
+ *
+ * Kernels must return the same results on a worker as inline (shared
+ * inputs read in place), and the pool must honour deadlines (from
+ * dispatch) and cancellation without losing a worker or stalling later jobs.
+ */
+
+import { afterAll, describe, it, expect } from 'vitest';
+import { ComputePool } from '../compute.pool.js';
+import {
+  ComputeAbortedError,
+  ComputeDeadlineError,
+  offload,
+  setComputeRunner,
+  sharedFloat64,
+} from '../../common/compute.offload.js';
+import { REGIME_KEYS, V2_SCAN_JOB, V2ScanInput, scanV2Windows } from '../../modules/fractal/engine/match.v2.scan.js';
+import { buildWindowMatrix, matrixTopRows, MATRIX_TOP_JOB } from '../../modules/fractal/engine/window.matrix.js';
+import { buildWindowVector } from '../../modules/fractal/engine/similarity.engine.js';
+import { classifyRegime, computeRegimeFeatures } from '../../modules/fractal/engine/regime-conditioned.js';
+import { scoreSpxWindows, SPX_SCAN_JOB } from '../../modules/spx-core/spx-scan.kernel.js';
+import { randomWalk } from '../../common/__tests__/fixtures/random-walk.js';
+
+// Vitest does not hand its TS transform to worker threads; tsx loads the sources
+const EXEC_ARGV = ['--import', 'tsx'];
+
+function shared(values: number[]): Float64Array {
+  const out = sharedFloat64(values.length);
+  out.set(values);
+  return out;
+}
+
+function v2Input(closes: number[], windowLen = 60): V2ScanInput {
+  const cur = closes.slice(-windowLen - 1);
+  return {
+    closes: shared(closes),
+    windowLen,
+    mode: 'raw_returns',
+    fromIdx: windowLen,
+    toIdx: closes.length - 1 - 30,
+    currentEndIdx: closes.length - 1,
+    minGapDays: 30,
+    currentVec: buildWindowVector(cur, 'raw_returns'),
+  };
+}
+
+describe('Compute pool', () => {
+  const pool = new ComputePool({ size: 2, deadlineMs: 0, execArgv: EXEC_ARGV });
+  const closes = randomWalk(3000, 11);
+
+  afterAll(async () => {
+    setComputeRunner(null);
+    await pool.close();
+  });
+
+  it('V2 scan kernel equals the per-window loop', () => {
+    const input = v2Input(closes);
+    const out = scanV2Windows(input);
+    let n = 0;
+    for (let end = input.fromIdx; end <= input.toIdx; end++) {
+      const hist = closes.slice(end - 60, end + 1);
+      const vec = buildWindowVector(hist, 'raw_returns');
+      let dot = 0, hn = 0, cn = 0;
+      for (let i = 0; i < vec.length; i++) {
+        dot += input.currentVec[i] * vec[i];
+        hn += vec[i] * vec[i];
+        cn += input.currentVec[i] * input.currentVec[i];
+      }
+      expect(out.endIdx[n]).toBe(end);
+      expect(out.score[n]).toBe(dot / ((Math.sqrt(cn) || 1) * (Math.sqrt(hn) || 1) + 1e-12));
+      expect(REGIME_KEYS[out.regime[n]]).toBe(classifyRegime(computeRegimeFeatures(hist)));
+      n++;
+    }
+    expect(out.endIdx.length).toBe(n);
+  });
+
+  it('runs every job on a worker with the inline result', async () => {
+    const v2 = v2Input(closes);
+    expect(await pool.run(V2_SCAN_JOB, v2)).toEqual(scanV2Windows(v2));
+
+    const matrix = buildWindowMatrix(closes, 30, 'raw_returns', 1);
+    const top = { matrix, query: buildWindowVector(closes.slice(-31), 'raw_returns'), maxEndIdx: 2500, k: 25 };
+    expect(matrix.data.buffer).toBeInstanceOf(SharedArrayBuffer);
+    expect(await pool.run(MATRIX_TOP_JOB, top)).toEqual(matrixTopRows(top));
+
+    const spx = { closes: shared(closes), windowLen: 30, rows: 2000, current: closes.slice(-30).map(c => c / closes[2970] - 1) };
+    expect(await pool.run(SPX_SCAN_JOB, spx)).toEqual(scoreSpxWindows(spx));
+  });
+
+  it('offload() dispatches to the installed runner and runs inline without one', async () => {
+    const input = v2Input(closes);
+    const before = pool.stats().jobs[V2_SCAN_JOB]?.jobs ?? 0;
+
+    setComputeRunner(pool.runner);
+    expect(await offload(V2_SCAN_JOB, input, scanV2Windows)).toEqual(scanV2Windows(input));
+    expect(pool.stats().jobs[V2_SCAN_JOB].jobs).toBe(before + 1);
+
+    setComputeRunner(null);
+    await offload(V2_SCAN_JOB, input, scanV2Windows);
+    expect(pool.stats().jobs[V2_SCAN_JOB].jobs).toBe(before + 1);
+  });
+
+  it('reports queue depth and per-job CPU time', async () => {
+    const input = v2Input(closes);
+    const runs = Array.from({ length: 6 }, () => pool.run(V2_SCAN_JOB, input));
+    const busy = pool.stats();
+    expect(busy.busy).toBe(2);
+    expect(busy.queued).toBe(4);
+    await Promise.all(runs);
+
+    const s = pool.stats();
+    expect(s.queued).toBe(0);
+    expect(s.maxQueued).toBeGreaterThanOrEqual(4);
+    expect(s.jobs[V2_SCAN_JOB].cpuMs).toBeGreaterThan(0);
+    expect(s.jobs[V2_SCAN_JOB].maxCpuMs).toBeGreaterThanOrEqual(s.jobs[V2_SCAN_JOB].lastCpuMs);
+  });
+
+  it('fails a job past its deadline and replaces the busy worker', async () => {
+    const slow = v2Input(randomWalk(60000, 3), 90);
+    const restarts = pool.stats().restarts;
+    await expect(pool.run(V2_SCAN_JOB, slow, { deadlineMs: 5 })).rejects.toBeInstanceOf(ComputeDeadlineError);
+    expect(pool.stats().restarts).toBe(restarts + 1);
+    expect(pool.stats().timedOut).toBeGreaterThan(0);
+
+    const input = v2Input(closes);
+    expect(await pool.run(V2_SCAN_JOB, input)).toEqual(scanV2Windows(input));
+  });
+
+  it('starts the deadline at dispatch, not while the job waits for a worker', async () => {
+    const slow = v2Input(randomWalk(40000, 4), 90);
+    const input = v2Input(closes);
+    const t0 = Date.now();
+    const running = [pool.run(V2_SCAN_JOB, slow), pool.run(V2_SCAN_JOB, slow)];
+    const queued = pool.run(V2_SCAN_JOB, input, { deadlineMs: 100 });
+    expect(pool.stats().queued).toBe(1);
+
+    await Promise.all(running);
+    expect(Date.now() - t0).toBeGreaterThan(100);
+    expect(await queued).toEqual(scanV2Windows(input));
+  });
+
+  it('cancels queued and running jobs', async () => {
+    const slow = v2Input(randomWalk(40000, 4), 90);
+    const ctrl = new AbortController();
+    const running = [pool.run(V2_SCAN_JOB, slow), pool.run(V2_SCAN_JOB, slow, { signal: ctrl.signal })];
+    const queued = new AbortController();
+    const waiting = pool.run(V2_SCAN_JOB, slow, { signal: queued.signal });
+    expect(pool.stats().queued).toBe(1);
+
+    queued.abort();
+    await expect(waiting).rejects.toBeInstanceOf(ComputeAbortedError);
+    expect(pool.stats().queued).toBe(0);
+
+    ctrl.abort();
+    await expect(running[1]).rejects.toBeInstanceOf(ComputeAbortedError);
+    await running[0];
+    await expect(offload(V2_SCAN_JOB, slow, scanV2Windows, { signal: ctrl.signal })).rejects.toBeInstanceOf(ComputeAbortedError);
+  });
+
+  it('rejects unknown jobs without losing the worker', async () => {
+    const restarts = pool.stats().restarts;
+    await expect(pool.run('nope', {})).rejects.toThrow('Unknown compute job: nope');
+    expect(pool.stats().restarts).toBe(restarts);
+  });
+});
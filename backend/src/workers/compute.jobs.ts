@@ -0,0 +1,13 @@
+// Compute Jobs: kernels a ComputePool worker can run, by name
+// Each is a pure function of structured-cloneable input, also run inline
+// by its caller when no pool is installed (common/compute.offload).
+
+import { V2_SCAN_JOB, scanV2Windows } from '../modules/fractal/engine/match.v2.scan.js';
+import { MATRIX_TOP_JOB, MatrixTopInput, matrixTopRows } from '../modules/fractal/engine/window.matrix.js';
+import { SPX_SCAN_JOB, scoreSpxWindows } from '../modules/spx-core/spx-scan.kernel.js';
+
+export const COMPUTE_JOBS: Record<string, (input: any) => unknown> = {
+  [V2_SCAN_JOB]: scanV2Windows,
+  [MATRIX_TOP_JOB]: (input: MatrixTopInput) => matrixTopRows(input),
+  [SPX_SCAN_JOB]: scoreSpxWindows,
+};
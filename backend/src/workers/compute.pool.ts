@@ -0,0 +1,312 @@
+// Compute Pool: worker_threads for match / retrieval kernels
+// Keeps CPU-heavy scans (FractalEngine.match, FractalEngineV2.matchV2,
+// SPX scans, multi-horizon runs) off the Fastify event loop.
+//
+// Jobs are named kernels from compute.jobs.ts. Inputs are structured-cloned,
+// so arrays allocated with sharedFloat64() (candle closes, window matrices)
+// are shared with the worker, not copied; typed-array results are transferred.
+// Install with setComputeRunner(pool.runner) (common/compute.offload).
+
+import os from 'os';
+import { Worker } from 'worker_threads';
+import { AppError } from '../common/errors.js';
+import {
+  ComputeAbortedError,
+  ComputeDeadlineError,
+  ComputeJobOptions,
+  ComputeRunner,
+} from '../common/compute.offload.js';
+
+export interface ComputePoolConfig {
+  // Worker threads (0 = none; every job would be rejected)
+  size: number;
+  // Default deadline per job, from dispatch (0 = none)
+  deadlineMs: number;
+  // Jobs allowed to wait for a worker before run() rejects
+  maxQueue: number;
+  // Node flags for workers (default: inherit, i.e. tsx in dev, none for dist)
+  execArgv?: string[];
+}
+
+export interface ComputeJobStats {
+  jobs: number;
+  failed: number;
+  cpuMs: number;          // total worker-thread CPU time
+  maxCpuMs: number;
+  lastCpuMs: number;
+  queueMs: number;        // total time spent waiting for a worker
+}
+
+export interface ComputePoolStats {
+  size: number;
+  busy: number;
+  queued: number;
+  maxQueued: number;
+  completed: number;
+  failed: number;
+  cancelled: number;
+  timedOut: number;
+  restarts: number;
+  jobs: Record<string, ComputeJobStats>;
+}
+
+// Messages between pool and worker
+export interface ComputeRequest {
+  id: number;
+  job: string;
+  input: unknown;
+}
+
+export type ComputeReply =
+  | { id: number; ok: true; result: unknown; cpuMs: number }
+  | { id: number; ok: false; error: string; cpuMs: number };
+
+// Per process: under the proxy (server.py) several Node workers share the
+// host, and it passes each its share as FRACTAL_COMPUTE_WORKERS
+const DEFAULT_CONFIG: ComputePoolConfig = {
+  size: Math.max(1, Math.min(4, os.cpus().length - 1)),
+  deadlineMs: 30_000,
+  maxQueue: 256,
+};
+
+// tsx runs the .ts sources, the build runs dist/*.js
+const WORKER_URL = new URL(
+  `./compute.worker${import.meta.url.endsWith('.ts') ? '.ts' : '.js'}`,
+  import.meta.url
+);
+
+interface Task {
+  id: number;
+  job: string;
+  input: unknown;
+  resolve: (value: unknown) => void;
+  reject: (err: Error) => void;
+  enqueuedAt: number;
+  startedAt: number;
+  deadlineMs: number;
+  timer: NodeJS.Timeout | null;
+  signal?: AbortSignal;
+  onAbort: (() => void) | null;
+  slot: Slot | null;
+  done: boolean;
+}
+
+interface Slot {
+  worker: Worker;
+  task: Task | null;
+}
+
+export class ComputePool {
+  private config: ComputePoolConfig;
+  private slots: Slot[] = [];
+  private queue: Task[] = [];
+  private nextId = 1;
+  private closed = false;
+  private counters = { maxQueued: 0, completed: 0, failed: 0, cancelled: 0, timedOut: 0, restarts: 0 };
+  private byJob: Record<string, ComputeJobStats> = {};
+
+  constructor(config: Partial<ComputePoolConfig> = {}) {
+    this.config = { ...DEFAULT_CONFIG, ...config };
+    for (let i = 0; i < this.config.size; i++) this.slots.push(this.spawn());
+  }
+
+  /**
+   * Bound run(), for setComputeRunner()
+   */
+  get runner(): ComputeRunner {
+    return (job, input, opts) => this.run(job, input, opts);
+  }
+
+  /**
+   * Run a named kernel on the next free worker
+   */
+  run(job: string, input: unknown, opts: ComputeJobOptions = {}): Promise<unknown> {
+    if (this.closed || this.slots.length === 0) {
+      return Promise.reject(new AppError('Compute pool is not running', 503, 'COMPUTE_UNAVAILABLE'));
+    }
+    if (opts.signal?.aborted) return Promise.reject(new ComputeAbortedError(job));
+    if (this.queue.length >= this.config.maxQueue && !this.slots.some(s => !s.task)) {
+      return Promise.reject(new AppError(`Compute queue full (${this.queue.length} waiting)`, 503, 'COMPUTE_QUEUE_FULL'));
+    }
+
+    return new Promise((resolve, reject) => {
+      const task: Task = {
+        id: this.nextId++,
+        job,
+        input,
+        resolve,
+        reject,
+        enqueuedAt: Date.now(),
+        startedAt: 0,
+        deadlineMs: opts.deadlineMs ?? this.config.deadlineMs,
+        timer: null,
+        signal: opts.signal,
+        onAbort: null,
+        slot: null,
+        done: false,
+      };
+
+      if (task.signal) {
+        task.onAbort = () => {
+          this.counters.cancelled++;
+          this.settle(task, new ComputeAbortedError(job));
+        };
+        task.signal.addEventListener('abort', task.onAbort, { once: true });
+      }
+
+      this.queue.push(task);
+      this.counters.maxQueued = Math.max(this.counters.maxQueued, this.queue.length);
+      this.pump();
+    });
+  }
+
+  stats(): ComputePoolStats {
+    return {
+      size: this.slots.length,
+      busy: this.slots.filter(s => s.task).length,
+      queued: this.queue.length,
+      ...this.counters,
+      jobs: Object.fromEntries(Object.entries(this.byJob).map(([k, v]) => [k, { ...v }])),
+    };
+  }
+
+  /**
+   * Reject waiting jobs, stop the running ones and terminate every worker
+   */
+  async close(): Promise<void> {
+    if (this.closed) return;
+    this.closed = true;
+    const closedError = () => new AppError('Compute pool closed', 503, 'COMPUTE_UNAVAILABLE');
+    for (const task of [...this.queue]) this.settle(task, closedError());
+    for (const slot of this.slots) {
+      if (slot.task) this.settle(slot.task, closedError());
+    }
+    await Promise.all(this.slots.map(s => s.worker.terminate()));
+    this.slots = [];
+  }
+
+  // ═══════════════════════════════════════════════════════════════
+  // Internals
+  // ═══════════════════════════════════════════════════════════════
+
+  private spawn(): Slot {
+    const worker = new Worker(WORKER_URL, this.config.execArgv ? { execArgv: this.config.execArgv } : {});
+    const slot: Slot = { worker, task: null };
+    slot.worker.on('message', (reply: ComputeReply) => this.onReply(slot, reply));
+    slot.worker.on('error', err => {
+      if (slot.task) this.settle(slot.task, err);
+      else console.error('[ComputePool] Worker error:', err);
+    });
+    slot.worker.on('exit', code => {
+      // settle() replaces a worker that dies mid-job
+      if (slot.task) this.settle(slot.task, new Error(`Compute worker exited (${code}) during ${slot.task.job}`));
+      else this.drop(slot, code);
+    });
+    return slot;
+  }
+
+  /**
+   * An idle worker exited on its own (e.g. failed to load): shrink the pool
+   * rather than respawn in a loop
+   */
+  private drop(slot: Slot, code: number): void {
+    const i = this.slots.indexOf(slot);
+    if (i < 0 || this.closed) return;
+    this.slots.splice(i, 1);
+    console.error(`[ComputePool] Worker exited (${code}) while idle, pool size now ${this.slots.length}`);
+    if (this.slots.length === 0) {
+      for (const task of [...this.queue]) {
+        this.settle(task, new AppError('Compute pool is not running', 503, 'COMPUTE_UNAVAILABLE'));
+      }
+    }
+  }
+
+  /**
+   * Swap a dead or stopped worker for a fresh one (unless closing)
+   */
+  private replace(slot: Slot): void {
+    const i = this.slots.indexOf(slot);
+    if (i < 0 || this.closed) return;
+    this.slots[i] = this.spawn();
+    this.counters.restarts++;
+    this.pump();
+  }
+
+  private pump(): void {
+    for (const slot of this.slots) {
+      if (slot.task) continue;
+      const task = this.queue.shift();
+      if (!task) return;
+      task.slot = slot;
+      task.startedAt = Date.now();
+      slot.task = task;
+      // The deadline covers the run, not the wait for a worker
+      if (task.deadlineMs > 0) {
+        task.timer = setTimeout(() => {
+          this.counters.timedOut++;
+          this.settle(task, new ComputeDeadlineError(task.job, task.deadlineMs));
+        }, task.deadlineMs);
+        task.timer.unref();
+      }
+      const request: ComputeRequest = { id: task.id, job: task.job, input: task.input };
+      slot.worker.postMessage(request);
+    }
+  }
+
+  private onReply(slot: Slot, reply: ComputeReply): void {
+    const task = slot.task;
+    if (!task || task.id !== reply.id) return;
+    slot.task = null;  // finished: the worker stays
+
+    const stats = this.jobStats(task.job);
+    stats.jobs++;
+    stats.cpuMs += reply.cpuMs;
+    stats.maxCpuMs = Math.max(stats.maxCpuMs, reply.cpuMs);
+    stats.lastCpuMs = reply.cpuMs;
+    stats.queueMs += task.startedAt - task.enqueuedAt;
+
+    if (reply.ok) {
+      this.counters.completed++;
+      this.settle(task, null, reply.result);
+    } else {
+      stats.failed++;
+      this.counters.failed++;
+      this.settle(task, new Error(reply.error));
+    }
+  }
+
+  /**
+   * Resolve or reject exactly once. A job that is still running when it
+   * is cancelled or times out cannot be interrupted (kernels are
+   * synchronous), so its worker is terminated and replaced.
+   */
+  private settle(task: Task, err: Error | null, result?: unknown): void {
+    if (task.done) return;
+    task.done = true;
+    if (task.timer) clearTimeout(task.timer);
+    task.timer = null;
+    if (task.onAbort) task.signal?.removeEventListener('abort', task.onAbort);
+    task.onAbort = null;
+
+    const queued = this.queue.indexOf(task);
+    if (queued >= 0) this.queue.splice(queued, 1);
+
+    const slot = task.slot;
+    if (slot && slot.task === task) {
+      slot.task = null;
+      if (err && !this.closed) {
+        slot.worker.removeAllListeners('exit');
+        slot.worker.terminate();
+        this.replace(slot);
+      }
+    }
+
+    if (err) task.reject(err);
+    else task.resolve(result);
+    this.pump();
+  }
+
+  private jobStats(job: string): ComputeJobStats {
+    return this.byJob[job] ??= { jobs: 0, failed: 0, cpuMs: 0, maxCpuMs: 0, lastCpuMs: 0, queueMs: 0 };
+  }
+}
@@ -0,0 +1,48 @@
+// Compute Worker: runs one COMPUTE_JOBS kernel per message (see compute.pool.ts)
+
+import { parentPort } from 'worker_threads';
+import { COMPUTE_JOBS } from './compute.jobs.js';
+import type { ComputeReply, ComputeRequest } from './compute.pool.js';
+
+type ThreadCpu = { threadCpuUsage?: () => NodeJS.CpuUsage };
+
+/**
+ * CPU time of this thread in ms where the runtime reports it; otherwise
+ * wall time, which for a synchronous kernel on its own thread is close
+ */
+function cpuNow(): number {
+  const usage = (process as NodeJS.Process & ThreadCpu).threadCpuUsage?.();
+  return usage ? (usage.user + usage.system) / 1000 : performance.now();
+}
+
+/**
+ * Typed-array results are moved, not copied (shared ones need neither)
+ */
+function transferables(result: unknown): ArrayBuffer[] {
+  const out: ArrayBuffer[] = [];
+  const add = (v: unknown) => {
+    if (ArrayBuffer.isView(v) && v.buffer instanceof ArrayBuffer && !out.includes(v.buffer)) out.push(v.buffer);
+  };
+  if (result && typeof result === 'object') {
+    add(result);
+    for (const v of Object.values(result)) add(v);
+  }
+  return out;
+}
+
+parentPort!.on('message', (msg: ComputeRequest) => {
+  const t0 = cpuNow();
+  let reply: ComputeReply;
+  let transfer: ArrayBuffer[] = [];
+  try {
+    const kernel = COMPUTE_JOBS[msg.job];
+    if (!kernel) throw new Error(`Unknown compute job: ${msg.job}`);
+    const result = kernel(msg.input);
+    transfer = transferables(result);
+    reply = { id: msg.id, ok: true, result, cpuMs: cpuNow() - t0 };
+  } catch (err) {
+    const message = err instanceof Error ? err.message : String(err);
+    reply = { id: msg.id, ok: false, error: message, cpuMs: cpuNow() - t0 };
+  }
+  parentPort!.postMessage(reply, transfer);
+});
@@ -1,2 +1,3 @@
 // Workers Module Index
 export * from './session-health.worker.js';
+export * from './compute.pool.js';
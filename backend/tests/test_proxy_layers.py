@@ -0,0 +1,453 @@
+"""
+Proxy Layer Tests
+Tests for the FastAPI proxy in server.py against a stub TypeScript backend
+Coverage: dataset-versioned cache + SWR, single-flight coalescing,
+conditional GET (304), admission lanes (429)
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import server  # noqa: E402
+
+TERMINAL = "/api/fractal/v2.1/terminal?symbol=BTC"
+
+
+class StubBackend:
+    """Stands in for the Node workers: answers the dataset version and echoes other routes"""
+
+    def __init__(self):
+        self.version = "v1"
+        self.calls = Counter()
+        self.delay = 0.0
+        self.headers = {}
+        self.lock = threading.Lock()
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if path == server.DATASET_VERSION_PATH:
+            data = {"version": self.version} if self.version else {}
+            return httpx.Response(200, json={"ok": True, "data": data})
+        with self.lock:
+            self.calls[path] += 1
+            n = self.calls[path]
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if path.endswith("/stable"):
+            return httpx.Response(200, json={"ok": True, "path": path}, headers=self.headers)
+        return httpx.Response(
+            200, json={"ok": True, "path": path, "version": self.version, "n": n}, headers=self.headers
+        )
+
+
+@pytest.fixture
+def backend(monkeypatch, tmp_path):
+    stub = StubBackend()
+
+    @asynccontextmanager
+    async def lifespan(app):
+        # No Node workers: every upstream pool talks to the stub
+        transport = httpx.MockTransport(stub.handle)
+        for name in server.ROUTE_CLASSES:
+            server.upstream_clients[name] = httpx.AsyncClient(transport=transport)
+        server.job_store = server.JobStore(str(tmp_path / "jobs.sqlite"))
+        yield
+        for client in server.upstream_clients.values():
+            await client.aclose()
+        server.upstream_clients.clear()
+
+    monkeypatch.setattr(server.app.router, "lifespan_context", lifespan)
+    monkeypatch.setattr(server, "response_cache", server.ResponseCache(server.CACHE_MAX_BYTES))
+    monkeypatch.setattr(server, "single_flight", server.SingleFlight())
+    monkeypatch.setattr(server, "proxy_metrics", server.ProxyMetrics())
+    monkeypatch.setattr(server, "lanes", {name: server.Lane(name, **cfg) for name, cfg in server.LANES.items()})
+    monkeypatch.setattr(server, "dataset_version", {"value": None, "fetched_at": 0.0})
+    monkeypatch.setattr(server, "dataset_version_lock", asyncio.Lock())
+    monkeypatch.setattr(server, "revalidating", set())
+    monkeypatch.setattr(server, "DATASET_VERSION_TTL_SEC", 0.0)
+    monkeypatch.setitem(server.readiness, "ready", True)
+    return stub
+
+
+@pytest.fixture
+def client(backend):
+    with TestClient(server.app) as c:
+        yield c
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out waiting for background work"
+        time.sleep(0.01)
+
+
+class TestVersionedCache:
+    """Dataset version token invalidates cached terminal reads"""
+
+    def test_miss_then_hit(self, client, backend):
+        first = client.get(TERMINAL)
+        second = client.get(TERMINAL)
+        assert first.headers["x-proxy-cache"] == "MISS"
+        assert second.headers["x-proxy-cache"] == "HIT"
+        assert second.json() == first.json()
+        assert backend.calls["/api/fractal/v2.1/terminal"] == 1
+
+    def test_version_change_invalidates(self, client, backend):
+        old = client.get(TERMINAL)
+        backend.version = "v2"
+        stale = client.get(TERMINAL)
+        # The outdated entry is served once, with its own validator, while it refreshes
+        assert stale.headers["x-proxy-cache"] == "STALE"
+        assert stale.json()["version"] == "v1"
+        assert stale.headers["etag"] == old.headers["etag"]
+        wait_for(lambda: not server.revalidating)
+
+        fresh = client.get(TERMINAL)
+        assert fresh.headers["x-proxy-cache"] == "HIT"
+        assert fresh.json()["version"] == "v2"
+        assert fresh.headers["etag"] != old.headers["etag"]
+
+    def test_no_version_token_bypasses(self, client, backend):
+        backend.version = None
+        client.get(TERMINAL)
+        response = client.get(TERMINAL)
+        assert response.headers["x-proxy-cache"] == "BYPASS"
+        assert backend.calls["/api/fractal/v2.1/terminal"] == 2
+        assert server.response_cache.snapshot()["entries"] == 0
+
+
+class TestStaleWhileRevalidate:
+    """Expired entries are served stale while one background refresh runs"""
+
+    def test_expired_entry_revalidates_once(self, client, backend, monkeypatch):
+        client.get(TERMINAL)
+        monkeypatch.setattr(server, "CACHE_TTL_SEC", 0.0)
+        backend.delay = 0.2
+
+        stale = [client.get(TERMINAL) for _ in range(3)]
+        assert [r.headers["x-proxy-cache"] for r in stale] == ["STALE"] * 3
+        assert all(r.json()["n"] == 1 for r in stale)
+        wait_for(lambda: not server.revalidating)
+        assert backend.calls["/api/fractal/v2.1/terminal"] == 2
+
+        monkeypatch.setattr(server, "CACHE_TTL_SEC", 3600.0)
+        fresh = client.get(TERMINAL)
+        assert fresh.headers["x-proxy-cache"] == "HIT"
+        assert fresh.json()["n"] == 2
+
+    def test_beyond_swr_window_refetches(self, client, backend, monkeypatch):
+        client.get(TERMINAL)
+        monkeypatch.setattr(server, "CACHE_TTL_SEC", 0.0)
+        monkeypatch.setattr(server, "CACHE_SWR_SEC", 0.0)
+        response = client.get(TERMINAL)
+        assert response.headers["x-proxy-cache"] == "MISS"
+        assert response.json()["n"] == 2
+
+
+class TestCoalescing:
+    """Identical concurrent GETs share one upstream call"""
+
+    def test_concurrent_gets_share_one_call(self, client, backend):
+        backend.delay = 0.3
+        path = "/api/fractal/v2.1/focus-pack?symbol=BTC&focus=30d"
+        with ThreadPoolExecutor(max_workers=5) as pool:
+            responses = list(pool.map(lambda _: client.get(path), range(5)))
+        assert all(r.status_code == 200 for r in responses)
+        assert {r.json()["n"] for r in responses} == {1}
+        assert backend.calls["/api/fractal/v2.1/focus-pack"] == 1
+        assert server.single_flight.snapshot()["coalesced"] == 4
+
+    def test_different_queries_do_not_share(self, client, backend):
+        backend.delay = 0.1
+        paths = [f"/api/fractal/v2.1/focus-pack?symbol=BTC&focus={f}" for f in ("7d", "30d")]
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            list(pool.map(client.get, paths))
+        assert backend.calls["/api/fractal/v2.1/focus-pack"] == 2
+
+
+class TestConditionalGet:
+    """If-None-Match is answered with 304 at the proxy"""
+
+    def test_cached_route_304(self, client, backend):
+        etag = client.get(TERMINAL).headers["etag"]
+        response = client.get(TERMINAL, headers={"if-none-match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert server.response_cache.stats["not_modified"] == 1
+        assert backend.calls["/api/fractal/v2.1/terminal"] == 1
+
+    def test_304_matches_any_content_coding(self, client, backend):
+        gzip_etag = client.get(TERMINAL, headers={"accept-encoding": "gzip"}).headers["etag"]
+        response = client.get(TERMINAL, headers={"if-none-match": gzip_etag, "accept-encoding": "identity"})
+        assert response.status_code == 304
+
+    def test_new_version_is_not_304(self, client, backend):
+        etag = client.get(TERMINAL).headers["etag"]
+        backend.version = "v2"
+        client.get(TERMINAL)
+        wait_for(lambda: not server.revalidating)
+        response = client.get(TERMINAL, headers={"if-none-match": etag})
+        assert response.status_code == 200
+        assert response.json()["version"] == "v2"
+
+    def test_uncached_route_304_from_body_hash(self, client, backend):
+        path = "/api/fractal/v2.1/stable"
+        etag = client.get(path).headers["etag"]
+        response = client.get(path, headers={"if-none-match": etag})
+        # Upstream still answers, but an unchanged body is not resent
+        assert response.status_code == 304
+        assert backend.calls["/api/fractal/v2.1/stable"] == 2
+
+
+class TestAdmissionLanes:
+    """A full lane answers 429 + Retry-After instead of queueing on Node"""
+
+    def test_full_lane_rejects(self, client, backend, monkeypatch):
+        monkeypatch.setitem(server.lanes, "interactive", server.Lane("interactive", 1, 0, 1.0))
+        backend.delay = 0.5
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            slow = pool.submit(client.get, "/api/fractal/v2.1/slow")
+            wait_for(lambda: server.lanes["interactive"].active == 1)
+            rejected = client.get("/api/fractal/v2.1/other")
+            assert slow.result().status_code == 200
+
+        assert rejected.status_code == 429
+        assert int(rejected.headers["retry-after"]) >= 1
+        assert rejected.json()["lane"] == "interactive"
+        assert server.lanes["interactive"].rejected == 1
+        assert backend.calls["/api/fractal/v2.1/other"] == 0
+
+    def test_queue_timeout_rejects(self, client, backend, monkeypatch):
+        monkeypatch.setitem(server.lanes, "interactive", server.Lane("interactive", 1, 4, 0.05))
+        backend.delay = 0.5
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            slow = pool.submit(client.get, "/api/fractal/v2.1/slow")
+            wait_for(lambda: server.lanes["interactive"].active == 1)
+            rejected = client.get("/api/fractal/v2.1/other")
+            slow.result()
+        assert rejected.status_code == 429
+
+    def test_lanes_are_independent(self, client, backend, monkeypatch):
+        monkeypatch.setitem(server.lanes, "admin", server.Lane("admin", 1, 0, 1.0))
+        backend.delay = 0.3
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            pool.submit(client.post, "/api/fractal/admin/rebuild-index")
+            wait_for(lambda: server.lanes["admin"].active == 1)
+            assert client.get("/api/fractal/v2.1/other").status_code == 200
+
+
+class TestAsyncJobs:
+    """Prefer: respond-async jobs and retention of finished jobs"""
+
+    def test_job_runs_to_completion(self, client, backend):
+        response = client.post("/api/fractal/admin/sim/run", headers={"prefer": "respond-async"})
+        assert response.status_code == 202
+        status_url = response.json()["statusUrl"]
+        wait_for(lambda: client.get(status_url).json()["data"]["status"] == "succeeded")
+        result = client.get(f"{status_url}/result")
+        assert result.status_code == 200
+        assert result.json()["path"] == "/api/fractal/admin/sim/run"
+
+    def test_store_error_releases_lane_and_worker(self, client, backend, monkeypatch):
+        store = server.job_store
+        update = store.update
+
+        def locked_once(job_id, **fields):
+            if fields.get("status") == "running":
+                raise sqlite3.OperationalError("database is locked")
+            return update(job_id, **fields)
+
+        monkeypatch.setattr(store, "update", locked_once)
+        response = client.post("/api/fractal/admin/sim/run", headers={"prefer": "respond-async"})
+        status_url = response.json()["statusUrl"]
+        wait_for(lambda: client.get(status_url).json()["data"]["status"] == "failed")
+
+        lane = server.lanes[server.lane_for("POST", "/api/fractal/admin/sim/run")]
+        wait_for(lambda: lane.active == 0)
+        assert all(w.outstanding == 0 for w in server.backend_workers)
+        assert "locked" in client.get(status_url).json()["data"]["error"]
+
+    def test_prune_drops_only_expired_finished_jobs(self, client, backend):
+        store = server.job_store
+        old, recent, running = (store.create("POST", f"/api/fractal/admin/sim/{i}") for i in range(3))
+        store.update(old, status="succeeded", finished_at=time.time() - 7200, result=b"x" * 1024)
+        store.update(recent, status="failed", finished_at=time.time())
+        store.update(running, status="running", started_at=time.time() - 7200)
+
+        assert store.prune(3600) == 1
+        assert store.get(old) is None
+        assert store.get(recent)["status"] == "failed"
+        assert store.get(running)["status"] == "running"
+
+
+class TestMetrics:
+    """Per-route stats stay JSON-serializable"""
+
+    def test_overflow_quantile_is_last_bound(self):
+        histogram = server.Histogram((1.0, 2.0))
+        histogram.observe(50.0)
+        assert histogram.quantile(0.99) == 2.0
+
+    def test_stats_with_overflow_latency(self, client, backend):
+        client.get("/api/fractal/v2.1/other")
+        server.proxy_metrics.route("/api/fractal/v2.1/other").total.observe(10_000.0)
+        response = client.get("/api/_proxy/stats")
+        assert response.status_code == 200
+        assert response.json()["data"]["routes"]["/api/fractal/v2.1/other"]["totalMs"]["p99"] == 900_000.0
+
+
+    def test_cache_metrics_follow_prometheus_conventions(self, client, backend):
+        client.get(TERMINAL)
+        client.get(TERMINAL)
+        text = client.get("/metrics").text
+        assert "# TYPE proxy_cache_hits_total counter" in text
+        assert "proxy_cache_hits_total 1" in text
+        assert "# TYPE proxy_cache_max_bytes gauge" in text
+        assert "# TYPE proxy_coalesce_coalesced_total counter" in text
+        assert "maxBytes" not in text
+
+
+class TestPrewarm:
+    """Workers only join routing after a successful prewarm"""
+
+    def prewarm(self, worker, payload, status=200):
+        async def handler(request):
+            # A streamed body, so httpx records .elapsed as a real transport would
+            return httpx.Response(status, stream=httpx.ByteStream(json.dumps(payload).encode()))
+
+        async def run():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+                await server.prewarm_worker(client, worker)
+
+        asyncio.run(run())
+
+    def test_failed_prewarm_keeps_worker_out(self, monkeypatch):
+        monkeypatch.setattr(server, "readiness", {**server.readiness, "workers": {}})
+        worker = server.BackendWorker(index=0, port=1, warming=True)
+        failed_phase = {"name": "WINDOW_INDEX", "ms": 3, "error": "POST /api/fractal/admin/rebuild-index -> 200 boom"}
+        self.prewarm(worker, {"ok": True, "data": {"ok": False, "phases": [failed_phase]}})
+        assert not worker.warm and not worker.healthy and not worker.warming
+        assert worker.next_prewarm_at > time.monotonic()
+        assert "boom" in server.readiness["workers"][0]["error"]
+
+        self.prewarm(worker, {"ok": False}, status=500)
+        assert not worker.warm
+        assert worker.prewarm_failures == 2
+
+        self.prewarm(worker, {"ok": True, "data": {"ok": True, "phases": [{"name": "SERIES_LOAD", "ms": 5}]}})
+        assert worker.warm and worker.healthy
+        assert worker.prewarm_failures == 0
+
+
+class TestSupervision:
+    """Spawned workers split the cores; external ones are checked and prewarmed, never restarted"""
+
+    def test_external_worker_is_prewarmed_and_dropped(self, monkeypatch):
+        monkeypatch.setattr(server, "TS_BACKEND_EXTERNAL", True)
+        monkeypatch.setattr(server, "readiness", {**server.readiness, "workers": {}})
+        monkeypatch.setattr(server, "background_tasks", set())
+        spawned = []
+        monkeypatch.setattr(server, "spawn_worker", spawned.append)
+        worker = server.BackendWorker(index=0, port=1)
+        up = {"value": False}
+
+        async def handler(request):
+            if not up["value"]:
+                raise httpx.ConnectError("connection refused", request=request)
+            if request.url.path == server.PREWARM_PATH:
+                payload = {"ok": True, "data": {"ok": True, "phases": []}}
+                return httpx.Response(200, stream=httpx.ByteStream(json.dumps(payload).encode()))
+            return httpx.Response(200, json={"ok": True})
+
+        async def step(client, times=1):
+            for _ in range(times):
+                await server.check_worker(client, worker)
+                await asyncio.gather(*server.background_tasks)
+
+        async def run():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+                # Not up yet, then comes up later: prewarmed into routing
+                await step(client)
+                assert not worker.healthy
+                up["value"] = True
+                await step(client)
+                assert worker.warm and worker.healthy
+
+                # Dies: out of routing, and cold when it returns
+                up["value"] = False
+                await step(client, server.WORKER_HEALTH_FAILURES)
+                assert not worker.healthy and not worker.warm
+                up["value"] = True
+                await step(client, 2)
+                assert worker.warm and worker.healthy
+
+        asyncio.run(run())
+        assert spawned == []
+
+    def test_spawned_workers_get_their_compute_share(self, monkeypatch):
+        launched = []
+
+        class FakeProcess:
+            stdout = None
+
+        def popen(args, **kwargs):
+            launched.append(kwargs["env"])
+            return FakeProcess()
+
+        monkeypatch.setattr(server.subprocess, "Popen", popen)
+        monkeypatch.setattr(server, "COMPUTE_WORKERS", 3)
+        server.spawn_worker(server.BackendWorker(index=1, port=1))
+        assert launched[0]["FRACTAL_COMPUTE_WORKERS"] == "3"
+
+
+class TestCachedCompression:
+    """Cached entries are compressed once per content-coding"""
+
+    def test_encoded_body_is_reused(self, client, backend, monkeypatch):
+        monkeypatch.setattr(server, "COMPRESS_MIN_BYTES", 0)
+        compressed = Counter()
+        compress_body = server.compress_body
+
+        def counting(encoding, data):
+            compressed[encoding] += 1
+            return compress_body(encoding, data)
+
+        monkeypatch.setattr(server, "compress_body", counting)
+        responses = [client.get(TERMINAL, headers={"accept-encoding": "gzip"}) for _ in range(3)]
+        assert [r.headers["x-proxy-cache"] for r in responses] == ["MISS", "HIT", "HIT"]
+        assert all(r.headers["content-encoding"] == "gzip" for r in responses)
+        assert all(r.json() == responses[0].json() for r in responses)
+        assert compressed == {"gzip": 1}
+
+        entry = server.response_cache.get("/api/fractal/v2.1/terminal?symbol=BTC")
+        assert server.response_cache.bytes == entry.size
+        assert responses[1].headers["etag"].endswith('-gzip"')
+
+        plain = client.get(TERMINAL, headers={"accept-encoding": "identity"})
+        assert "content-encoding" not in plain.headers
+        assert plain.json() == responses[0].json()
+        assert compressed == {"gzip": 1}
+
+    def test_upstream_vary_survives_compression(self, client, backend, monkeypatch):
+        monkeypatch.setattr(server, "COMPRESS_MIN_BYTES", 0)
+        # The proxy's own CORS middleware appends Origin too; Accept-Language only comes from upstream
+        backend.headers = {"vary": "Origin, Accept-Language"}
+        for path in (TERMINAL, TERMINAL, "/api/fractal/v2.1/other"):
+            response = client.get(path, headers={"accept-encoding": "gzip"})
+            assert response.headers["content-encoding"] == "gzip"
+            vary = [v.strip() for v in response.headers["vary"].split(",")]
+            assert vary[:3] == ["Origin", "Accept-Language", "Accept-Encoding"]
@@ -0,0 +1,20 @@
+"""
+Async Python client for the Fractal / SPX / Combined terminal API
+"""
+
+from .cache import ResponseCache
+from .client import FractalAPIError, FractalClient
+from .models import HORIZONS, Candle, Chart, Dashboard, DatasetVersion, FocusPack, Terminal
+
+__all__ = [
+    "FractalClient",
+    "FractalAPIError",
+    "ResponseCache",
+    "HORIZONS",
+    "Candle",
+    "Chart",
+    "Dashboard",
+    "DatasetVersion",
+    "FocusPack",
+    "Terminal",
+]
@@ -0,0 +1,76 @@
+"""
+Local response cache keyed on dataset version
+
+Entries are keyed on (dataset version, path + sorted query). When the
+backend's version token changes, every old entry is simply never hit
+again; in-memory entries for older versions are dropped on the spot.
+With a directory, entries also persist across processes as JSON files
+under <dir>/<version hash>/.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any, Optional
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()[:32]
+
+
+class ResponseCache:
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+        self.version: Optional[str] = None
+        self.entries: dict = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _use(self, version: str):
+        if version != self.version:
+            self.version = version
+            self.entries.clear()
+
+    def _path(self, version: str, key: str) -> str:
+        return os.path.join(self.directory, _digest(version), _digest(key) + ".json")
+
+    def get(self, version: Optional[str], key: str) -> Optional[Any]:
+        if version is None:
+            self.misses += 1
+            return None
+        self._use(version)
+        if key in self.entries:
+            self.hits += 1
+            return self.entries[key]
+        if self.directory:
+            try:
+                with open(self._path(version, key)) as f:
+                    value = json.load(f)
+                self.entries[key] = value
+                self.hits += 1
+                return value
+            except (FileNotFoundError, ValueError):
+                pass
+        self.misses += 1
+        return None
+
+    def put(self, version: Optional[str], key: str, value: Any):
+        if version is None:
+            return
+        self._use(version)
+        self.entries[key] = value
+        if self.directory:
+            path = self._path(version, key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump(value, f)
+                os.replace(tmp, path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+
+    def stats(self) -> dict:
+        return {"version": self.version, "entries": len(self.entries), "hits": self.hits, "misses": self.misses}
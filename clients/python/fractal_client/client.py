@@ -0,0 +1,250 @@
+"""
+Async client for the Fractal / SPX / Combined terminal API
+
+One pooled httpx.AsyncClient per FractalClient; every request goes
+through a semaphore so fan-out helpers (focus_packs, dashboard) never have
+more than `concurrency` requests in flight. 429/503 answers (proxy
+admission lanes, readiness gate) are retried after their Retry-After.
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Dict, Iterable, Optional
+from urllib.parse import urlencode
+
+import httpx
+
+from .cache import ResponseCache
+from .models import HORIZONS, Chart, Dashboard, DatasetVersion, FocusPack, Terminal
+
+DEFAULT_BASE_URL = os.environ.get("FRACTAL_API_URL", "http://localhost:8001")
+RETRY_STATUS = {429, 503}
+
+
+class FractalAPIError(Exception):
+    def __init__(self, status: int, path: str, body: Any = None):
+        super().__init__(f"HTTP {status} from {path}: {str(body)[:200]}")
+        self.status = status
+        self.path = path
+        self.body = body
+
+
+class FractalClient:
+    """
+    async with FractalClient("http://localhost:8001") as api:
+        packs = await api.focus_packs("SPX")
+        board = await api.dashboard()
+
+    `transport` replaces the network (e.g. httpx.MockTransport in tests).
+    """
+
+    def __init__(
+        self,
+        base_url: str = DEFAULT_BASE_URL,
+        concurrency: int = 8,
+        timeout: float = 120.0,
+        cache: bool = True,
+        cache_dir: Optional[str] = None,
+        version_ttl: float = 10.0,
+        max_retries: int = 3,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.http = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+            headers={"Accept-Encoding": "gzip"},
+            transport=transport,
+        )
+        self.sem = asyncio.Semaphore(concurrency)
+        self.cache = ResponseCache(cache_dir) if cache else None
+        self.version_ttl = version_ttl
+        self.max_retries = max_retries
+        self._version: Optional[DatasetVersion] = None
+        self._version_at = 0.0
+        self._version_lock = asyncio.Lock()
+
+    async def __aenter__(self) -> "FractalClient":
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        await self.http.aclose()
+
+    # ═══════════════════════════════════════════════════════════════
+    # TRANSPORT
+    # ═══════════════════════════════════════════════════════════════
+
+    async def _request(self, path: str, params: Optional[dict]) -> Any:
+        for attempt in range(self.max_retries + 1):
+            async with self.sem:
+                resp = await self.http.get(path, params=params)
+            if resp.status_code in RETRY_STATUS and attempt < self.max_retries:
+                try:
+                    delay = float(resp.headers.get("retry-after", ""))
+                except ValueError:
+                    delay = 0.5 * 2 ** attempt
+                await asyncio.sleep(min(delay, 30.0))
+                continue
+            try:
+                body = resp.json()
+            except ValueError:
+                body = resp.text
+            if resp.status_code >= 400:
+                raise FractalAPIError(resp.status_code, path, body)
+            return body
+
+    async def get(self, path: str, params: Optional[dict] = None, use_cache: bool = True) -> Any:
+        """GET `path`; answers are cached for the current dataset version"""
+        if not (self.cache and use_cache):
+            return await self._request(path, params)
+        key = f"{path}?{urlencode(sorted((params or {}).items()))}"
+        version = await self.version_token()
+        hit = self.cache.get(version, key)
+        if hit is not None:
+            return hit
+        started = time.monotonic()
+        body = await self._request(path, params)
+        # The dataset may have moved on while the request was in flight:
+        # only file the body under a version still current after it
+        if version is not None and await self.version_token(since=started) == version:
+            self.cache.put(version, key, body)
+        return body
+
+    def _version_fresh(self, since: Optional[float]) -> bool:
+        if self._version is None:
+            return False
+        if since is not None:
+            return self._version_at >= since
+        return time.monotonic() - self._version_at < self.version_ttl
+
+    async def dataset_version(self, refresh: bool = False, since: Optional[float] = None) -> Optional[DatasetVersion]:
+        """
+        Backend dataset version (re-read at most every `version_ttl` seconds,
+        or unless already read after monotonic time `since`)
+        """
+        if not refresh and self._version_fresh(since):
+            return self._version
+        async with self._version_lock:
+            if not refresh and self._version_fresh(since):
+                return self._version
+            try:
+                body = await self._request("/api/ops/dataset-version", None)
+                self._version = DatasetVersion.model_validate(body["data"])
+            except (FractalAPIError, httpx.HTTPError, KeyError, TypeError, ValueError):
+                # Unknown version: serve uncached rather than risk stale answers
+                self._version = None
+            self._version_at = time.monotonic()
+            return self._version
+
+    async def version_token(self, since: Optional[float] = None) -> Optional[str]:
+        v = await self.dataset_version(since=since)
+        return v.version if v else None
+
+    # ═══════════════════════════════════════════════════════════════
+    # ENDPOINTS
+    # ═══════════════════════════════════════════════════════════════
+
+    async def fractal_terminal(self, symbol: str = "BTC", focus: str = "30d", set: str = "extended") -> Terminal:
+        body = await self.get("/api/fractal/v2.1/terminal", {"symbol": symbol, "set": set, "focus": focus})
+        return Terminal.model_validate({"symbol": symbol, **body})
+
+    async def fractal_focus(self, focus: str = "30d", symbol: str = "BTC") -> FocusPack:
+        body = await self.get("/api/fractal/v2.1/focus-pack", {"symbol": symbol, "focus": focus})
+        return FocusPack.from_response(symbol, focus, body)
+
+    async def fractal_chart(self, symbol: str = "BTC", limit: int = 365) -> Chart:
+        body = await self.get("/api/fractal/v2.1/chart", {"symbol": symbol, "limit": limit})
+        return Chart.model_validate(body)
+
+    async def consensus_pulse(self, symbol: str = "BTC", days: int = 7) -> dict:
+        return await self.get("/api/fractal/v2.1/consensus-pulse", {"symbol": symbol, "days": days})
+
+    async def spx_terminal(self) -> Terminal:
+        body = await self.get("/api/spx/v2.1/core/terminal")
+        return Terminal.model_validate({"symbol": "SPX", **body})
+
+    async def spx_focus(self, focus: str = "30d") -> FocusPack:
+        body = await self.get("/api/spx/v2.1/focus-pack", {"focus": focus})
+        return FocusPack.from_response("SPX", focus, body)
+
+    async def spx_phases(self) -> dict:
+        return await self.get("/api/spx/v2.1/phases")
+
+    async def spx_horizons(self) -> dict:
+        return await self.get("/api/spx/v2.1/horizons")
+
+    async def combined_terminal(self, profile: Optional[str] = None) -> Terminal:
+        body = await self.get("/api/combined/v2.1/terminal", {"profile": profile} if profile else None)
+        return Terminal.model_validate({"symbol": "COMBINED", **body})
+
+    # ═══════════════════════════════════════════════════════════════
+    # FAN-OUT
+    # ═══════════════════════════════════════════════════════════════
+
+    async def focus(self, asset: str, focus: str) -> FocusPack:
+        if asset.upper() == "SPX":
+            return await self.spx_focus(focus)
+        return await self.fractal_focus(focus, symbol=asset.upper())
+
+    async def focus_packs(self, asset: str = "BTC", horizons: Iterable[str] = HORIZONS) -> Dict[str, FocusPack]:
+        """All horizons for one asset, fetched concurrently"""
+        horizons = list(horizons)
+        packs = await asyncio.gather(*(self.focus(asset, h) for h in horizons))
+        return dict(zip(horizons, packs))
+
+    async def dashboard(
+        self,
+        assets: Iterable[str] = ("BTC", "SPX"),
+        horizons: Iterable[str] = HORIZONS,
+        chart_limit: int = 365,
+    ) -> Dashboard:
+        """
+        Terminal, every focus pack and chart for each asset, plus consensus
+        and SPX phases, in one concurrent sweep. Failed parts are listed in
+        `errors` instead of failing the whole dashboard. If the dataset
+        version moves during the sweep, it is repeated once so all parts
+        come from one version.
+        """
+        assets = [a.upper() for a in assets]
+        horizons = list(horizons)
+        for _ in range(2):
+            t0 = time.perf_counter()
+            version = await self.version_token()
+            jobs: Dict[str, Any] = {}
+            for asset in assets:
+                jobs[f"terminal:{asset}"] = self.spx_terminal() if asset == "SPX" else self.fractal_terminal(asset)
+                for h in horizons:
+                    jobs[f"focus:{asset}:{h}"] = self.focus(asset, h)
+                if asset != "SPX":
+                    jobs[f"chart:{asset}"] = self.fractal_chart(asset, chart_limit)
+                    jobs[f"consensus:{asset}"] = self.consensus_pulse(asset)
+            if "SPX" in assets:
+                jobs["phases:SPX"] = self.spx_phases()
+                jobs["horizons:SPX"] = self.spx_horizons()
+
+            results = await asyncio.gather(*jobs.values(), return_exceptions=True)
+            if await self.dataset_version(refresh=True) is None or await self.version_token() == version:
+                break
+
+        board = Dashboard(version=version)
+        for name, result in zip(jobs, results):
+            if isinstance(result, BaseException):
+                board.errors[name] = f"{type(result).__name__}: {result}"
+                continue
+            kind, _, rest = name.partition(":")
+            if kind == "terminal":
+                board.terminals[rest] = result
+            elif kind == "focus":
+                asset, _, h = rest.partition(":")
+                board.focus.setdefault(asset, {})[h] = result
+            elif kind == "chart":
+                board.charts[rest] = result
+            else:
+                board.extras[name] = result
+        board.elapsedMs = round((time.perf_counter() - t0) * 1000, 1)
+        return board
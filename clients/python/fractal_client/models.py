@@ -0,0 +1,86 @@
+"""
+Response models
+
+Endpoints return large, evolving payloads, so models type the envelope and
+the fields callers key on, and keep everything else (extra="allow").
+"""
+
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
+HORIZONS = ("7d", "14d", "30d", "90d", "180d", "365d")
+
+
+class _Model(BaseModel):
+    model_config = ConfigDict(extra="allow", populate_by_name=True)
+
+
+class AssetVersion(_Model):
+    lastCandle: Optional[str] = None
+    lastDailyRun: Optional[str] = None
+
+
+class DatasetVersion(_Model):
+    """GET /api/ops/dataset-version"""
+
+    version: str
+    btc: AssetVersion = Field(default_factory=AssetVersion)
+    spx: AssetVersion = Field(default_factory=AssetVersion)
+
+
+class Candle(_Model):
+    t: int
+    o: float
+    h: float
+    l: float
+    c: float
+    v: float = 0.0
+
+
+class Chart(_Model):
+    """GET /api/fractal/v2.1/chart"""
+
+    symbol: str = "BTC"
+    tf: str = "1D"
+    asOf: Optional[str] = None
+    count: int = 0
+    candles: List[Candle] = Field(default_factory=list)
+
+
+class FocusPack(_Model):
+    """One horizon's focus pack; BTC and SPX envelopes normalized to `pack`"""
+
+    symbol: str
+    focus: str
+    durationMs: Optional[float] = None
+    pack: Dict[str, Any] = Field(default_factory=dict)
+
+    @classmethod
+    def from_response(cls, symbol: str, focus: str, body: dict) -> "FocusPack":
+        # BTC: {ok, durationMs, focusPack}; SPX: {ok, symbol, focus, processingTimeMs, data}
+        pack = body.get("focusPack", body.get("data"))
+        return cls(
+            symbol=symbol,
+            focus=focus,
+            durationMs=body.get("durationMs", body.get("processingTimeMs")),
+            pack=pack if isinstance(pack, dict) else {},
+        )
+
+
+class Terminal(_Model):
+    """Terminal payload (fractal, SPX core or combined); fields kept as returned"""
+
+    symbol: str
+
+
+class Dashboard(_Model):
+    """Everything the terminal UI needs for a set of assets, at one dataset version"""
+
+    version: Optional[str] = None
+    terminals: Dict[str, Terminal] = Field(default_factory=dict)
+    focus: Dict[str, Dict[str, FocusPack]] = Field(default_factory=dict)
+    charts: Dict[str, Chart] = Field(default_factory=dict)
+    extras: Dict[str, Any] = Field(default_factory=dict)
+    errors: Dict[str, str] = Field(default_factory=dict)
+    elapsedMs: float = 0.0
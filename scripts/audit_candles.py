@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Candle Dataset Quality Auditor
+
+Vectorized (NumPy) audit of a daily OHLCV series from a normalized CSV or
+a binary candle store. Every row gets a flag bitmask; the report lists
+flagged rows and per-flag counts as JSON.
+
+Checks:
+  NON_FINITE / NON_POSITIVE     NaN, inf, zero or negative prices
+  OHLC_INCONSISTENT             low <= open/close <= high violated
+  DUPLICATE_TS / OUT_OF_ORDER   timestamp ordering
+  SPLIT_LIKE                    close jumps by a split ratio (2:1, 3:1, 1:10 ...)
+  RETURN_OUTLIER                |log return| z-score over a rolling window
+  GAP_HOLIDAY / GAP_LONG        calendar gaps (equity or crypto calendar)
+  WEEKEND_BAR                   equity bar dated on a weekend
+  VOLUME_ZERO / VOLUME_SPIKE    missing volume, volume far above rolling median
+
+Error-level flags fail the audit; the rest are warnings or info.
+
+Usage: python audit_candles.py FILE [--calendar equity|crypto] [--json OUT] [--fail-on error|warn]
+"""
+
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+DAY_MS = 86_400_000
+ZSCORE_WINDOW = 63
+ZSCORE_LIMIT = 6.0
+SPLIT_MIN_MOVE = 0.3
+SPLIT_RATIOS = np.log([2.0, 3.0, 4.0, 5.0, 10.0, 1.5])
+SPLIT_TOLERANCE = 0.03
+VOLUME_WINDOW = 21
+VOLUME_SPIKE = 10.0
+LONG_GAP_DAYS = {"equity": 5, "crypto": 2}
+
+FLAGS = {
+    # name: (bit, severity)
+    "NON_FINITE": (0, "error"),
+    "NON_POSITIVE": (1, "error"),
+    "OHLC_INCONSISTENT": (2, "error"),
+    "DUPLICATE_TS": (3, "error"),
+    "OUT_OF_ORDER": (4, "error"),
+    "SPLIT_LIKE": (5, "error"),
+    "RETURN_OUTLIER": (6, "warn"),
+    "GAP_LONG": (7, "warn"),
+    "WEEKEND_BAR": (8, "warn"),
+    "VOLUME_ZERO": (9, "warn"),
+    "VOLUME_SPIKE": (10, "warn"),
+    "GAP_HOLIDAY": (11, "info"),
+}
+SEVERITY_MASK = {
+    level: sum(1 << bit for bit, sev in FLAGS.values() if sev in levels)
+    for level, levels in {"error": ("error",), "warn": ("error", "warn")}.items()
+}
+
+
+def _set(mask: np.ndarray, name: str, where: np.ndarray):
+    mask[where] |= 1 << FLAGS[name][0]
+
+
+def rolling_prior_std(x: np.ndarray, window: int) -> np.ndarray:
+    """Std of the `window` values before each element (NaN until filled)"""
+    out = np.full(len(x), np.nan)
+    if len(x) <= window:
+        return out
+    c1 = np.concatenate(([0.0], np.cumsum(x)))
+    c2 = np.concatenate(([0.0], np.cumsum(x * x)))
+    s1 = c1[window:-1] - c1[: -window - 1]
+    s2 = c2[window:-1] - c2[: -window - 1]
+    var = np.maximum(s2 / window - (s1 / window) ** 2, 0.0)
+    out[window:] = np.sqrt(var * window / (window - 1))
+    return out
+
+
+def audit(ts, open_, high, low, close, volume, calendar: str = "equity") -> dict:
+    """Flag bitmask per row plus log returns; arrays in, arrays out"""
+    ts = np.asarray(ts, dtype=np.int64)
+    o, h, l, c = (np.asarray(a, dtype=np.float64) for a in (open_, high, low, close))
+    v = np.asarray(volume, dtype=np.float64)
+    n = len(ts)
+    mask = np.zeros(n, dtype=np.int32)
+    if n == 0:
+        return {"mask": mask, "returns": np.zeros(0)}
+
+    prices = np.stack([o, h, l, c])
+    _set(mask, "NON_FINITE", ~np.isfinite(prices).all(axis=0))
+    _set(mask, "NON_POSITIVE", (prices <= 0).any(axis=0))
+    with np.errstate(invalid="ignore"):
+        bad_ohlc = (l > np.minimum(o, c)) | (h < np.maximum(o, c)) | (l > h)
+    _set(mask, "OHLC_INCONSISTENT", bad_ohlc)
+
+    dt = np.diff(ts)
+    _set(mask, "DUPLICATE_TS", np.concatenate(([False], dt == 0)))
+    _set(mask, "OUT_OF_ORDER", np.concatenate(([False], dt < 0)))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ret = np.concatenate(([0.0], np.diff(np.log(c))))
+    ret = np.where(np.isfinite(ret), ret, 0.0)
+    big = np.abs(ret) > SPLIT_MIN_MOVE
+    near_split = (np.abs(np.abs(ret)[:, None] - SPLIT_RATIOS[None, :]) < SPLIT_TOLERANCE).any(axis=1)
+    _set(mask, "SPLIT_LIKE", big & near_split)
+
+    sigma = rolling_prior_std(ret, ZSCORE_WINDOW)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = np.abs(ret) / sigma
+    _set(mask, "RETURN_OUTLIER", np.nan_to_num(z) > ZSCORE_LIMIT)
+
+    gap_days = np.concatenate(([1], dt // DAY_MS))
+    weekday = ((ts // DAY_MS) + 3) % 7  # 1970-01-01 was a Thursday; Monday = 0
+    if calendar == "crypto":
+        _set(mask, "GAP_LONG", gap_days >= LONG_GAP_DAYS["crypto"])
+    else:
+        weekend_only = (gap_days == 3) & (weekday == 0)
+        _set(mask, "GAP_HOLIDAY", (gap_days > 1) & (gap_days < LONG_GAP_DAYS["equity"]) & ~weekend_only)
+        _set(mask, "GAP_LONG", gap_days >= LONG_GAP_DAYS["equity"])
+        _set(mask, "WEEKEND_BAR", weekday >= 5)
+
+    traded = np.flatnonzero(v > 0)
+    if len(traded):
+        # Zero volume only counts as missing once the series reports volume
+        _set(mask, "VOLUME_ZERO", (v <= 0) & (np.arange(n) > traded[0]))
+    if n > VOLUME_WINDOW:
+        median = np.full(n, np.nan)
+        median[VOLUME_WINDOW:] = np.median(sliding_window_view(v, VOLUME_WINDOW)[:-1], axis=1)
+        with np.errstate(invalid="ignore"):
+            _set(mask, "VOLUME_SPIKE", (median > 0) & (v > VOLUME_SPIKE * median))
+
+    return {"mask": mask, "returns": ret, "gap_days": gap_days}
+
+
+def flag_names(bits: int) -> list:
+    return [name for name, (bit, _) in FLAGS.items() if bits & (1 << bit)]
+
+
+def build_report(ts, result: dict, min_index: int = 0) -> dict:
+    """Machine-readable summary plus one entry per flagged row"""
+    mask = result["mask"][min_index:]
+    summary = {name: int(np.count_nonzero(mask & (1 << bit))) for name, (bit, _) in FLAGS.items()}
+    flagged = np.flatnonzero(mask) + min_index
+    ts = np.asarray(ts, dtype=np.int64)
+    dates = np.datetime_as_string(ts.astype("datetime64[ms]"), unit="D")
+    rows = [
+        {
+            "i": int(i),
+            "date": str(dates[i]),
+            "flags": flag_names(int(result["mask"][i])),
+            "ret": round(float(result["returns"][i]), 6),
+        }
+        for i in flagged
+    ]
+    errors = int(np.count_nonzero(mask & SEVERITY_MASK["error"]))
+    warnings = int(np.count_nonzero(mask & SEVERITY_MASK["warn"])) - errors
+    return {
+        "rows": int(len(mask)),
+        "range": [str(dates[min_index]), str(dates[-1])] if len(mask) else None,
+        "ok": errors == 0,
+        "errors": errors,
+        "warnings": warnings,
+        "summary": summary,
+        "flagged": rows,
+    }
+
+
+def load_series(path: str) -> tuple:
+    """(ts, open, high, low, close, volume) from a CSV or .candles store"""
+    if path.endswith(".candles"):
+        from candle_store import open_store
+
+        s = open_store(path)
+        return s.ts, s.open, s.high, s.low, s.close, s.volume
+    from candle_store import read_csv_columns
+
+    cols = read_csv_columns(path)
+    return tuple(np.asarray(cols[k]) for k in ("ts", "open", "high", "low", "close", "volume"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Candle dataset quality auditor")
+    parser.add_argument("file", help="normalized CSV or .candles store")
+    parser.add_argument("--calendar", choices=["equity", "crypto"], default="equity")
+    parser.add_argument("--json", default=None, help="write the full report here")
+    parser.add_argument("--fail-on", choices=["error", "warn"], default="error")
+    args = parser.parse_args()
+
+    series = load_series(args.file)
+    t0 = time.perf_counter()
+    result = audit(*series, calendar=args.calendar)
+    report = build_report(series[0], result)
+    report["file"] = args.file
+    report["calendar"] = args.calendar
+    report["auditMs"] = round((time.perf_counter() - t0) * 1000, 2)
+
+    print("=" * 60)
+    print("Candle Quality Audit")
+    print("=" * 60)
+    print(f"File:     {args.file}")
+    print(f"Rows:     {report['rows']}   Range: {report['range']}")
+    print(f"Audit:    {report['auditMs']} ms")
+    for name, count in report["summary"].items():
+        if count:
+            print(f"  {name:<18} {count:6d}   ({FLAGS[name][1]})")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report:   {args.json}")
+
+    failing = report["errors"] if args.fail_on == "error" else report["errors"] + report["warnings"]
+    if failing:
+        print(f"❌ {failing} rows fail at --fail-on={args.fail_on}")
+        sys.exit(2)
+    print("✅ Audit passed")
+
+
+if __name__ == "__main__":
+    main()
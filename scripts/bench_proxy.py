@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+API Load & Latency Benchmark
+
+Replays a weighted mix of the public endpoints the backend test harnesses
+hit (terminal, focus, chart, consensus, phases, horizons) through the
+FastAPI proxy, either closed-loop (fixed concurrency) or open-loop (Poisson
+arrivals at a fixed rate). Reports throughput, p50/p95/p99/max and error
+rate per route, writes the result to test_reports/, and compares it with
+a stored baseline.
+
+Open-loop latency is measured from each request's scheduled arrival, so a
+stalled server shows up as queueing delay instead of a lower request rate.
+
+A route regresses when its p95 exceeds the baseline p95 by more than
+--threshold (relative) and --min-delta-ms (absolute), or its error rate
+rises by more than 1 point. Any regression exits 1.
+
+Only like-for-like runs are compared: a baseline taken with another base
+URL, load mode (rate/duration or requests/concurrency) or route mix is
+refused with exit 2, unless --allow-mismatch downgrades that to a warning.
+
+Usage:
+  python bench_proxy.py [BASE_URL] [--requests N] [--concurrency C]
+  python bench_proxy.py [BASE_URL] --rate 50 --duration 30
+  python bench_proxy.py [BASE_URL] --routes terminal,chart --save-baseline
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+REPORT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "test_reports")
+BASELINE = os.path.join(REPORT_DIR, "bench_baseline.json")
+
+# name: (path, weight)
+MIX = {
+    "terminal": ("/api/fractal/v2.1/terminal?symbol=BTC&set=extended&focus=30d", 4),
+    "spx_terminal": ("/api/spx/v2.1/core/terminal", 2),
+    "focus": ("/api/fractal/v2.1/focus-pack?symbol=BTC&focus=30d", 3),
+    "spx_focus": ("/api/spx/v2.1/focus-pack?focus=30d", 3),
+    "chart": ("/api/fractal/v2.1/chart?symbol=BTC&limit=365", 3),
+    "consensus": ("/api/fractal/v2.1/consensus-pulse?symbol=BTC&days=7", 1),
+    "phases": ("/api/spx/v2.1/phases", 1),
+    "phase_segments": ("/api/spx/v2.1/phases/segments?start=2020-01-01&end=2026-02-21", 1),
+    "horizons": ("/api/spx/v2.1/horizons", 1),
+}
+ERROR_RATE_SLACK = 0.01
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+class Recorder:
+    def __init__(self, routes):
+        self.latencies = {r: [] for r in routes}
+        self.errors = {r: 0 for r in routes}
+        self.statuses = {r: {} for r in routes}
+
+    def record(self, route, ms, status):
+        self.latencies[route].append(ms)
+        key = str(status)
+        self.statuses[route][key] = self.statuses[route].get(key, 0) + 1
+        if not isinstance(status, int) or status >= 400:
+            self.errors[route] += 1
+
+
+async def fire(client, route, path, rec, started):
+    try:
+        resp = await client.get(path)
+        status = resp.status_code
+    except httpx.HTTPError as e:
+        status = type(e).__name__
+    rec.record(route, (time.perf_counter() - started) * 1000.0, status)
+
+
+# ═══════════════════════════════════════════════════════════════
+# LOAD MODES
+# ═══════════════════════════════════════════════════════════════
+
+async def closed_loop(client, routes, rec, total, concurrency, rng):
+    """`concurrency` workers issue `total` requests back to back"""
+    names = list(routes)
+    weights = [routes[n][1] for n in names]
+    schedule = rng.choices(names, weights=weights, k=total)
+    it = iter(schedule)
+
+    async def worker():
+        for route in it:
+            await fire(client, route, routes[route][0], rec, time.perf_counter())
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+async def open_loop(client, routes, rec, rate, duration, rng):
+    """Poisson arrivals at `rate` req/s for `duration` seconds, unbounded in flight"""
+    names = list(routes)
+    weights = [routes[n][1] for n in names]
+    tasks = []
+    t0 = time.perf_counter()
+    due = t0
+    while True:
+        due += rng.expovariate(rate)
+        if due - t0 >= duration:
+            break
+        delay = due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        route = rng.choices(names, weights=weights)[0]
+        # Latency counts from the scheduled arrival, not from when we got to send it
+        tasks.append(asyncio.create_task(fire(client, route, routes[route][0], rec, due)))
+    await asyncio.gather(*tasks)
+
+
+# ═══════════════════════════════════════════════════════════════
+# REPORT
+# ═══════════════════════════════════════════════════════════════
+
+def summarize(rec, elapsed):
+    def stats(latencies, errors):
+        n = len(latencies)
+        return {
+            "requests": n,
+            "errors": errors,
+            "errorRate": round(errors / n, 4) if n else 0.0,
+            "rps": round(n / elapsed, 2) if elapsed else 0.0,
+            "p50": round(percentile(latencies, 50), 2),
+            "p95": round(percentile(latencies, 95), 2),
+            "p99": round(percentile(latencies, 99), 2),
+            "max": round(max(latencies), 2) if latencies else 0.0,
+        }
+
+    routes = {}
+    for route, latencies in rec.latencies.items():
+        if latencies:
+            routes[route] = {**stats(latencies, rec.errors[route]), "statuses": rec.statuses[route]}
+    every = [ms for latencies in rec.latencies.values() for ms in latencies]
+    return {"overall": stats(every, sum(rec.errors.values())), "routes": routes}
+
+
+def mismatches(result, baseline):
+    """Settings that make `result` and `baseline` incomparable, one line each"""
+    out = []
+    if result.get("baseUrl") != baseline.get("baseUrl"):
+        out.append(f"base URL {result.get('baseUrl')} vs baseline {baseline.get('baseUrl')}")
+    if result.get("mode") != baseline.get("mode"):
+        out.append(f"mode {json.dumps(result.get('mode'))} vs baseline {json.dumps(baseline.get('mode'))}")
+    routes = sorted(result.get("routeMix") or result.get("routes", {}))
+    base_routes = sorted(baseline.get("routeMix") or baseline.get("routes", {}))
+    if routes != base_routes:
+        out.append(f"routes {','.join(routes)} vs baseline {','.join(base_routes)}")
+    return out
+
+
+def compare(result, baseline, threshold, min_delta_ms):
+    """Regressions of `result` against `baseline`, one line each"""
+    regressions = []
+    for route, cur in result["routes"].items():
+        base = baseline.get("routes", {}).get(route)
+        if not base:
+            continue
+        limit = max(base["p95"] * (1 + threshold), base["p95"] + min_delta_ms)
+        if cur["p95"] > limit:
+            regressions.append(f"{route}: p95 {cur['p95']:.1f} ms > {limit:.1f} ms (baseline {base['p95']:.1f})")
+        if cur["errorRate"] > base["errorRate"] + ERROR_RATE_SLACK:
+            regressions.append(f"{route}: error rate {cur['errorRate']:.1%} (baseline {base['errorRate']:.1%})")
+    return regressions
+
+
+def print_table(summary):
+    print(f"{'route':<16} {'n':>6} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'err':>7}")
+    rows = list(summary["routes"].items()) + [("ALL", summary["overall"])]
+    for route, s in rows:
+        print(f"{route:<16} {s['requests']:>6} {s['rps']:>8.1f} {s['p50']:>8.1f} {s['p95']:>8.1f} "
+              f"{s['p99']:>8.1f} {s['max']:>8.1f} {s['errorRate']:>7.1%}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="API load and latency benchmark")
+    parser.add_argument("base_url", nargs="?", default="http://127.0.0.1:8001")
+    parser.add_argument("--routes", default=None, help=f"comma-separated subset of: {', '.join(MIX)}")
+    parser.add_argument("--requests", type=int, default=500, help="closed loop: total requests")
+    parser.add_argument("--concurrency", type=int, default=16, help="closed loop: workers")
+    parser.add_argument("--rate", type=float, default=None, help="open loop: arrivals per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="open loop: seconds")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed requests per route first")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="result JSON (default test_reports/bench_<time>.json)")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative p95 increase")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0, help="ignore p95 increases below this")
+    parser.add_argument("--allow-mismatch", action="store_true",
+                        help="compare even when URL, mode or routes differ from the baseline")
+    args = parser.parse_args()
+
+    routes = MIX
+    if args.routes:
+        unknown = set(args.routes.split(",")) - set(MIX)
+        if unknown:
+            parser.error(f"unknown routes: {', '.join(sorted(unknown))}")
+        routes = {r: MIX[r] for r in args.routes.split(",")}
+    mode = f"open loop {args.rate:g} req/s for {args.duration:g}s" if args.rate else \
+        f"closed loop {args.requests} requests x {args.concurrency} workers"
+
+    print("=" * 60)
+    print("API Load Benchmark")
+    print("=" * 60)
+    print(f"Base URL:  {args.base_url}")
+    print(f"Mode:      {mode}")
+    print(f"Routes:    {', '.join(f'{r}({w})' for r, (_, w) in routes.items())}")
+    print()
+
+    rng = random.Random(args.seed)
+    rec = Recorder(routes)
+    connections = max(args.concurrency, 256 if args.rate else 0)
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=120.0, limits=limits) as client:
+        # Warm the engine caches so we measure steady state
+        for path, _ in routes.values():
+            for _ in range(args.warmup):
+                try:
+                    await client.get(path)
+                except httpx.HTTPError:
+                    pass
+        t0 = time.perf_counter()
+        if args.rate:
+            await open_loop(client, routes, rec, args.rate, args.duration, rng)
+        else:
+            await closed_loop(client, routes, rec, args.requests, args.concurrency, rng)
+        elapsed = time.perf_counter() - t0
+
+    summary = summarize(rec, elapsed)
+    print_table(summary)
+    result = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "baseUrl": args.base_url,
+        "mode": {"rate": args.rate, "duration": args.duration} if args.rate else
+                {"requests": args.requests, "concurrency": args.concurrency},
+        "routeMix": sorted(routes),
+        "elapsedSec": round(elapsed, 3),
+        **summary,
+    }
+
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    out = args.out or os.path.join(REPORT_DIR, f"bench_{datetime.now():%Y%m%d_%H%M%S}.json")
+    with open(out, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"\nReport:    {out}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"✅ Baseline saved: {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"⚠️  No baseline at {args.baseline} (run with --save-baseline)")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    mismatch = mismatches(result, baseline)
+    if mismatch:
+        if not args.allow_mismatch:
+            print(f"❌ Not comparable with {args.baseline} (re-run with the same settings or --save-baseline):")
+            for line in mismatch:
+                print(f"   {line}")
+            return 2
+        print("⚠️  Comparing with a baseline taken under different settings:")
+        for line in mismatch:
+            print(f"   {line}")
+    regressions = compare(result, baseline, args.threshold, args.min_delta_ms)
+    if regressions:
+        print(f"❌ {len(regressions)} regression(s) vs {args.baseline}:")
+        for line in regressions:
+            print(f"   {line}")
+        return 1
+    print(f"✅ No regression vs baseline (p95 +{args.threshold:.0%} / +{args.min_delta_ms:g} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
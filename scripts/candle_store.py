@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Binary Candle Store
+
+Compact columnar file for daily OHLCV history, shared by the Python scripts
+and the TypeScript backend (src/common/candle.binary.ts).
+
+Layout (little-endian):
+  0    8s   magic "FRCANDLE"
+  8    u32  format version (1)
+  12   u32  column count (6)
+  16   u64  row count
+  24   16s  symbol (NUL padded)
+  40   8s   timeframe (NUL padded)
+  48   32s  sha256 of the column block
+  80   i64  created at (ms since epoch)
+  88   ...  zero padding up to 128
+  128       columns, each `rows` x 8 bytes, in order:
+            ts (int64, ms UTC), open, high, low, close, volume (float64)
+
+Columns are 8-byte aligned, so both numpy.memmap and Float64Array views
+read them without copying.
+
+Usage:
+  python candle_store.py build CSV OUT [--symbol SPX] [--timeframe 1d]
+  python candle_store.py info STORE [--verify]
+"""
+
+import argparse
+import csv
+import hashlib
+import os
+import struct
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+
+import numpy as np
+
+MAGIC = b"FRCANDLE"
+FORMAT_VERSION = 1
+HEADER_SIZE = 128
+HEADER = struct.Struct("<8sIIQ16s8s32sq")
+COLUMNS = [
+    ("ts", np.dtype("<i8")),
+    ("open", np.dtype("<f8")),
+    ("high", np.dtype("<f8")),
+    ("low", np.dtype("<f8")),
+    ("close", np.dtype("<f8")),
+    ("volume", np.dtype("<f8")),
+]
+
+
+@dataclass
+class CandleStore:
+    symbol: str
+    timeframe: str
+    rows: int
+    version: str
+    created_at: int
+    ts: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    def dates(self) -> list:
+        return [format_ts(t) for t in self.ts.tolist()]
+
+
+def format_ts(ts_ms: int) -> str:
+    return datetime.fromtimestamp(ts_ms / 1000, timezone.utc).strftime("%Y-%m-%d")
+
+
+# ═══════════════════════════════════════════════════════════════
+# WRITE
+# ═══════════════════════════════════════════════════════════════
+
+def write_store(path: str, symbol: str, timeframe: str, columns: dict) -> str:
+    """Write columns atomically; returns the version hash (hex)"""
+    arrays = [np.ascontiguousarray(columns[name], dtype=dtype) for name, dtype in COLUMNS]
+    rows = len(arrays[0])
+    if any(len(a) != rows for a in arrays):
+        raise ValueError("All columns must have the same length")
+    if rows > 1 and np.any(np.diff(arrays[0]) <= 0):
+        raise ValueError("ts must be strictly increasing")
+
+    digest = hashlib.sha256()
+    for a in arrays:
+        digest.update(a.tobytes())
+    header = HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        len(COLUMNS),
+        rows,
+        symbol.encode()[:16],
+        timeframe.encode()[:8],
+        digest.digest(),
+        int(time.time() * 1000),
+    ).ljust(HEADER_SIZE, b"\0")
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix=".candles-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(header)
+            for a in arrays:
+                f.write(a.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return digest.hexdigest()
+
+
+def read_csv_columns(csv_path: str) -> dict:
+    """Normalized CSV (date,open,high,low,close,...,volume) to column arrays"""
+    ts, o, h, l, c, v = [], [], [], [], [], []
+    epoch = date(1970, 1, 1).toordinal()
+    with open(csv_path, newline="") as f:
+        for row in csv.DictReader(f):
+            d = row.get("date", "")
+            if len(d) < 10 or not d[:4].isdigit():
+                continue
+            ts.append((date.fromisoformat(d[:10]).toordinal() - epoch) * 86_400_000)
+            o.append(float(row["open"]))
+            h.append(float(row["high"]))
+            l.append(float(row["low"]))
+            c.append(float(row["close"]))
+            v.append(float(row.get("volume") or 0))
+    return {"ts": ts, "open": o, "high": h, "low": l, "close": c, "volume": v}
+
+
+def build_from_csv(csv_path: str, out_path: str, symbol: str, timeframe: str = "1d") -> str:
+    return write_store(out_path, symbol, timeframe, read_csv_columns(csv_path))
+
+
+# ═══════════════════════════════════════════════════════════════
+# READ
+# ═══════════════════════════════════════════════════════════════
+
+def read_header(path: str) -> dict:
+    with open(path, "rb") as f:
+        raw = f.read(HEADER_SIZE)
+    if len(raw) < HEADER.size:
+        raise ValueError(f"{path}: truncated header")
+    magic, fmt, ncols, rows, symbol, timeframe, digest, created_at = HEADER.unpack_from(raw)
+    if magic != MAGIC:
+        raise ValueError(f"{path}: not a candle store")
+    if fmt != FORMAT_VERSION or ncols != len(COLUMNS):
+        raise ValueError(f"{path}: unsupported format {fmt} with {ncols} columns")
+    expected = HEADER_SIZE + rows * 8 * len(COLUMNS)
+    if os.path.getsize(path) != expected:
+        raise ValueError(f"{path}: size mismatch (expected {expected} bytes)")
+    return {
+        "symbol": symbol.rstrip(b"\0").decode(),
+        "timeframe": timeframe.rstrip(b"\0").decode(),
+        "rows": rows,
+        "version": digest.hex(),
+        "created_at": created_at,
+    }
+
+
+def open_store(path: str, mmap: bool = True, verify: bool = False) -> CandleStore:
+    """Open a store; with mmap=True columns are zero-copy read-only views"""
+    header = read_header(path)
+    rows = header["rows"]
+    arrays = {}
+    if mmap and rows:
+        for i, (name, dtype) in enumerate(COLUMNS):
+            arrays[name] = np.memmap(path, dtype=dtype, mode="r", offset=HEADER_SIZE + i * rows * 8, shape=(rows,))
+    else:
+        with open(path, "rb") as f:
+            f.seek(HEADER_SIZE)
+            data = f.read()
+        for i, (name, dtype) in enumerate(COLUMNS):
+            arrays[name] = np.frombuffer(data, dtype=dtype, count=rows, offset=i * rows * 8)
+    if verify:
+        digest = hashlib.sha256()
+        for name, _ in COLUMNS:
+            digest.update(arrays[name].tobytes())
+        if digest.hexdigest() != header["version"]:
+            raise ValueError(f"{path}: checksum mismatch")
+    return CandleStore(**header, **arrays)
+
+
+# ═══════════════════════════════════════════════════════════════
+# CLI
+# ═══════════════════════════════════════════════════════════════
+
+def main():
+    parser = argparse.ArgumentParser(description="Binary candle store tools")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    build = sub.add_parser("build", help="convert a normalized CSV")
+    build.add_argument("csv")
+    build.add_argument("out")
+    build.add_argument("--symbol", default="SPX")
+    build.add_argument("--timeframe", default="1d")
+    info = sub.add_parser("info", help="print header and range")
+    info.add_argument("store")
+    info.add_argument("--verify", action="store_true")
+    args = parser.parse_args()
+
+    try:
+        if args.cmd == "build":
+            t0 = time.perf_counter()
+            version = build_from_csv(args.csv, args.out, args.symbol, args.timeframe)
+            print(f"✅ Wrote {args.out} in {time.perf_counter() - t0:.3f}s")
+            print(f"   Version: {version[:16]}")
+            return
+        t0 = time.perf_counter()
+        store = open_store(args.store, verify=args.verify)
+        elapsed = time.perf_counter() - t0
+        first, last = (format_ts(int(store.ts[0])), format_ts(int(store.ts[-1]))) if store.rows else ("-", "-")
+        print(f"Symbol:    {store.symbol} ({store.timeframe})")
+        print(f"Rows:      {store.rows}")
+        print(f"Range:     {first} → {last}")
+        print(f"Version:   {store.version[:16]}{' (verified)' if args.verify else ''}")
+        print(f"Open time: {elapsed * 1000:.2f} ms")
+    except (OSError, ValueError) as e:
+        print(f"❌ ERROR: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
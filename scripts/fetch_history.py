@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Multi-Asset Historical Downloader
+
+Fetches daily history for every symbol in a manifest in a bounded thread
+pool, with retry and exponential backoff. Each raw provider response is
+cached on disk (keyed by provider, ticker and date range), so re-runs
+make no network calls. Output is normalized to the canonical layout
+(date,open,high,low,close,adj_close,volume) in <out-dir>/<symbol>_1d.csv.
+A payload that parses to no rows fails its symbol and is neither cached nor
+written, and an existing CSV is not replaced by one with far fewer rows.
+
+Providers:
+  yahoo     Yahoo chart API (JSON)
+  stooq     Stooq daily CSV
+  fixture   raw payloads from a directory laid out like the cache
+            (<dir>/<provider>/<ticker>.<ext>); no network, for tests
+
+Usage:
+  python fetch_history.py [--manifest PATH] [--symbols SPX,BTC] [--workers 4]
+                          [--out-dir DIR] [--cache-dir DIR] [--fixtures DIR] [--refresh]
+                          [--allow-shrink]
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timezone
+
+from update_spx import COLUMNS, format_row
+
+DATA_DIR = "/app/data"
+MANIFEST = os.path.join(os.path.dirname(os.path.abspath(__file__)), "history_manifest.json")
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+MAX_RETRIES = 4
+BACKOFF_BASE_SEC = 1.0
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+# Refuse to replace an existing CSV with fewer than this share of its rows
+MIN_ROWS_RATIO = 0.5
+
+print_lock = threading.Lock()
+
+
+def log(msg: str):
+    with print_lock:
+        print(msg, flush=True)
+
+
+class FetchError(Exception):
+    def __init__(self, msg: str, retryable: bool = True):
+        super().__init__(msg)
+        self.retryable = retryable
+
+
+# ═══════════════════════════════════════════════════════════════
+# PROVIDERS
+# ═══════════════════════════════════════════════════════════════
+
+def _epoch(d: str) -> int:
+    return int(datetime.strptime(d, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp())
+
+
+def _http_get(url: str, params: dict = None) -> bytes:
+    import requests
+
+    try:
+        resp = requests.get(url, params=params, headers={"User-Agent": USER_AGENT}, timeout=30)
+    except requests.RequestException as e:
+        raise FetchError(f"{type(e).__name__}: {e}") from None
+    if resp.status_code != 200:
+        raise FetchError(f"HTTP {resp.status_code} from {url}", retryable=resp.status_code in RETRYABLE_STATUS)
+    return resp.content
+
+
+class YahooProvider:
+    name = "yahoo"
+    ext = "json"
+
+    def fetch_raw(self, ticker: str, start: str, end: str) -> bytes:
+        return _http_get(
+            f"https://query1.finance.yahoo.com/v8/finance/chart/{ticker}",
+            {"period1": _epoch(start), "period2": _epoch(end), "interval": "1d", "events": "history", "includeAdjustedClose": "true"},
+        )
+
+    def parse(self, raw: bytes) -> list:
+        chart = json.loads(raw).get("chart", {})
+        if chart.get("error"):
+            raise FetchError(f"Yahoo error: {chart['error']}", retryable=False)
+        result = (chart.get("result") or [None])[0]
+        if not result or not result.get("timestamp"):
+            return []
+        # Bars are stamped at the exchange open; shift into exchange time for the date
+        offset = result.get("meta", {}).get("gmtoffset", 0)
+        quote = result["indicators"]["quote"][0]
+        adj = (result["indicators"].get("adjclose") or [{}])[0].get("adjclose") or quote["close"]
+        rows = []
+        for i, ts in enumerate(result["timestamp"]):
+            values = [quote["open"][i], quote["high"][i], quote["low"][i], quote["close"][i]]
+            if any(v is None for v in values):
+                continue
+            rows.append({
+                "date": datetime.fromtimestamp(ts + offset, timezone.utc).strftime("%Y-%m-%d"),
+                "open": values[0],
+                "high": values[1],
+                "low": values[2],
+                "close": values[3],
+                "adj_close": adj[i] if adj[i] is not None else values[3],
+                "volume": quote["volume"][i] or 0,
+            })
+        return rows
+
+
+class StooqProvider:
+    name = "stooq"
+    ext = "csv"
+
+    def fetch_raw(self, ticker: str, start: str, end: str) -> bytes:
+        raw = _http_get(
+            "https://stooq.com/q/d/l/",
+            {"s": ticker.lower(), "i": "d", "d1": start.replace("-", ""), "d2": end.replace("-", "")},
+        )
+        if not raw.lstrip().lower().startswith(b"date"):
+            # Stooq answers 200 with a plain-text notice when rate limited
+            raise FetchError(f"Stooq: {raw[:80]!r}")
+        return raw
+
+    def parse(self, raw: bytes) -> list:
+        rows = []
+        for r in csv.DictReader(io.StringIO(raw.decode())):
+            r = {k.strip().lower(): v for k, v in r.items()}
+            rows.append({
+                "date": r["date"],
+                "open": r["open"],
+                "high": r["high"],
+                "low": r["low"],
+                "close": r["close"],
+                "adj_close": r["close"],
+                "volume": r.get("volume") or 0,
+            })
+        return rows
+
+
+PROVIDERS = {p.name: p for p in (YahooProvider(), StooqProvider())}
+
+
+class FixtureProvider:
+    """Serves raw payloads from disk in place of a network provider"""
+
+    def __init__(self, base, fixtures_dir: str):
+        self.base = base
+        self.name = base.name
+        self.ext = base.ext
+        self.fixtures_dir = fixtures_dir
+
+    def fetch_raw(self, ticker: str, start: str, end: str) -> bytes:
+        path = os.path.join(self.fixtures_dir, self.name, f"{safe_name(ticker)}.{self.ext}")
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            raise FetchError(f"No fixture at {path}", retryable=False) from None
+
+    def parse(self, raw: bytes) -> list:
+        return self.base.parse(raw)
+
+
+# ═══════════════════════════════════════════════════════════════
+# CACHE + RETRY
+# ═══════════════════════════════════════════════════════════════
+
+def safe_name(ticker: str) -> str:
+    return "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in ticker)
+
+
+class RawCache:
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def path(self, provider, ticker: str, start: str, end: str) -> str:
+        return os.path.join(self.directory, provider.name, safe_name(ticker), f"{start}_{end}.{provider.ext}")
+
+    def get(self, *key):
+        try:
+            with open(self.path(*key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, raw: bytes, *key):
+        atomic_write(self.path(*key), raw)
+
+
+def atomic_write(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def fetch_with_retry(provider, ticker: str, start: str, end: str) -> bytes:
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            return provider.fetch_raw(ticker, start, end)
+        except FetchError as e:
+            if not e.retryable or attempt == MAX_RETRIES:
+                raise
+            delay = BACKOFF_BASE_SEC * 2 ** attempt * (0.5 + random.random())
+            log(f"   {ticker}: {e} (retry {attempt + 1}/{MAX_RETRIES} in {delay:.1f}s)")
+            time.sleep(delay)
+
+
+# ═══════════════════════════════════════════════════════════════
+# JOB
+# ═══════════════════════════════════════════════════════════════
+
+def normalize(rows: list, start: str, end: str) -> list:
+    """Canonical rows: in range, deduplicated (last wins), sorted by date"""
+    by_date = {}
+    for r in rows:
+        d = str(r["date"])[:10]
+        if start <= d < end:
+            by_date[d] = {
+                "date": d,
+                **{c: float(r[c]) for c in ("open", "high", "low", "close", "adj_close")},
+                "volume": int(float(r["volume"] or 0)),
+            }
+    return [by_date[d] for d in sorted(by_date)]
+
+
+def existing_rows(path: str) -> int:
+    """Data rows in an existing output CSV (0 when there is none)"""
+    try:
+        with open(path, "rb") as f:
+            return max(0, sum(1 for line in f if line.strip()) - 1)
+    except FileNotFoundError:
+        return 0
+
+
+def run_entry(
+    entry: dict, cache: RawCache, out_dir: str, end: str, refresh: bool, fixtures: str, allow_shrink: bool = False
+) -> dict:
+    t0 = time.perf_counter()
+    provider = PROVIDERS[entry.get("provider", "yahoo")]
+    if fixtures:
+        provider = FixtureProvider(provider, fixtures)
+    ticker = entry["ticker"]
+    start = entry.get("start", "1950-01-01")
+    key = (provider, ticker, start, end)
+
+    # Fixture runs never touch the cache, so they cannot shadow real payloads
+    use_cache = not fixtures
+    raw = cache.get(*key) if use_cache and not refresh else None
+    rows = normalize(provider.parse(raw), start, end) if raw is not None else []
+    # An empty cached payload is never trusted: fetch again
+    cached = bool(rows)
+    if not cached:
+        raw = fetch_with_retry(provider, ticker, start, end)
+        rows = normalize(provider.parse(raw), start, end)
+        if not rows:
+            raise FetchError(f"{provider.name} returned no rows for {ticker} in [{start}, {end})", retryable=False)
+
+    out_path = os.path.join(out_dir, entry.get("out") or f"{entry['symbol'].lower()}_1d.csv")
+    previous = existing_rows(out_path)
+    if not allow_shrink and len(rows) < previous * MIN_ROWS_RATIO:
+        raise FetchError(
+            f"{len(rows)} rows would replace {previous} in {out_path}; keeping it (--allow-shrink to override)",
+            retryable=False,
+        )
+    if use_cache and not cached:
+        cache.put(raw, *key)
+    atomic_write(out_path, (",".join(COLUMNS) + "\n" + "".join(format_row(r) for r in rows)).encode())
+    return {
+        "symbol": entry["symbol"],
+        "rows": len(rows),
+        "range": [rows[0]["date"], rows[-1]["date"]] if rows else None,
+        "cached": cached,
+        "out": out_path,
+        "elapsedSec": round(time.perf_counter() - t0, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel multi-asset history downloader")
+    parser.add_argument("--manifest", default=MANIFEST)
+    parser.add_argument("--symbols", default=None, help="comma-separated subset of the manifest")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--out-dir", default=DATA_DIR)
+    parser.add_argument("--cache-dir", default=os.path.join(DATA_DIR, "raw_cache"))
+    parser.add_argument("--fixtures", default=None, help="serve raw payloads from this directory (offline)")
+    parser.add_argument("--end", default=None, help="exclusive end date (default: today)")
+    parser.add_argument("--refresh", action="store_true", help="ignore cached raw responses")
+    parser.add_argument("--allow-shrink", action="store_true", help="replace a CSV even with far fewer rows")
+    args = parser.parse_args()
+
+    with open(args.manifest) as f:
+        entries = json.load(f)["symbols"]
+    if args.symbols:
+        wanted = {s.strip().upper() for s in args.symbols.split(",")}
+        entries = [e for e in entries if e["symbol"].upper() in wanted]
+    # Exclusive end of today: skips the partial bar and keeps a day's re-runs on one cache key
+    end = args.end or date.today().isoformat()
+    cache = RawCache(args.cache_dir)
+
+    print("=" * 60)
+    print("Historical Download")
+    print("=" * 60)
+    print(f"Symbols: {', '.join(e['symbol'] for e in entries)}")
+    print(f"Workers: {args.workers}   End: {end}   Source: {'fixtures' if args.fixtures else 'network'}")
+    print()
+
+    t0 = time.perf_counter()
+    failures = 0
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = {
+            pool.submit(run_entry, e, cache, args.out_dir, end, args.refresh, args.fixtures, args.allow_shrink): e
+            for e in entries
+        }
+        for future in as_completed(futures):
+            symbol = futures[future]["symbol"]
+            try:
+                r = future.result()
+            except Exception as e:
+                failures += 1
+                log(f"❌ {symbol}: {e}")
+                continue
+            source = "cache" if r["cached"] else "fetched"
+            log(f"✅ {symbol}: {r['rows']} rows {r['range']} ({source}, {r['elapsedSec']}s) → {r['out']}")
+
+    print(f"\nDone in {time.perf_counter() - t0:.2f}s, {failures} failed")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
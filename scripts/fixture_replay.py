@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Fixture Record / Replay
+
+record  Reverse proxy in front of a live backend: forwards every request,
+        and stores each response with its upstream latency in a fixture
+        file (gzip JSON; identical bodies are stored once).
+replay  Stand-in backend serving those responses with no Node or Mongo.
+        Latency can be replayed as recorded (sampled per route), fixed, or
+        off, with optional scaling and jitter, deterministically per seed.
+
+Requests are matched on method + path + sorted query (+ request body hash
+for writes). /api/health and POST /api/ops/prewarm are answered even when
+not recorded, so the FastAPI proxy can run in front of the stand-ins:
+
+  python fixture_replay.py record --upstream http://127.0.0.1:8002 --out /tmp/live.fixtures.gz
+  python bench_proxy.py http://127.0.0.1:8010                   # or any harness pointed at the recorder
+  python fixture_replay.py replay /tmp/live.fixtures.gz --port 8002 --count 2
+  TS_BACKEND_EXTERNAL=1 uvicorn server:app --port 8001          # proxy over the stand-ins
+  python bench_proxy.py http://127.0.0.1:8001
+
+Usage:
+  python fixture_replay.py record --upstream URL --out FILE [--port 8010]
+  python fixture_replay.py replay FILE [--port 8002] [--count 1] [--latency recorded|fixed|none]
+                                       [--ms 50] [--scale 1.0] [--jitter 0.1] [--seed 0] [--loose-query]
+  python fixture_replay.py info FILE
+"""
+
+import argparse
+import asyncio
+import base64
+import gzip
+import hashlib
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+
+FORMAT_VERSION = 1
+MAX_TIMINGS = 200
+HOP_HEADERS = {"host", "content-length", "connection", "accept-encoding", "transfer-encoding"}
+
+
+def request_key(method: str, path: str, query_items, body: bytes = b"") -> str:
+    key = f"{method.upper()} /{path.strip('/')}?{urlencode(sorted(query_items))}"
+    if body:
+        key += " #" + hashlib.sha256(body).hexdigest()[:16]
+    return key
+
+
+def encode_body(data: bytes) -> str:
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        return "b64:" + base64.b64encode(data).decode()
+
+
+def decode_body(text: str) -> bytes:
+    if text.startswith("b64:"):
+        return base64.b64decode(text[4:])
+    return text.encode("utf-8")
+
+
+# ═══════════════════════════════════════════════════════════════
+# FIXTURE FILE
+# ═══════════════════════════════════════════════════════════════
+
+class FixtureSet:
+    def __init__(self, upstream: str = None):
+        self.upstream = upstream
+        self.entries = {}
+        self.bodies = {}
+
+    def add(self, key: str, method: str, path: str, status: int, content_type: str, body: bytes, elapsed_ms: float):
+        digest = hashlib.sha256(body).hexdigest()
+        self.bodies.setdefault(digest, encode_body(body))
+        entry = self.entries.get(key)
+        timings = (entry["timingsMs"] if entry else [])[-(MAX_TIMINGS - 1):] + [round(elapsed_ms, 2)]
+        # Latest response wins; latency samples accumulate
+        self.entries[key] = {
+            "method": method,
+            "path": path,
+            "status": status,
+            "contentType": content_type,
+            "body": digest,
+            "timingsMs": timings,
+        }
+
+    def snapshot(self) -> dict:
+        """Document to save; add() replaces entries whole, so shallow copies are stable"""
+        entries = dict(self.entries)
+        live = {e["body"] for e in entries.values()}
+        return {
+            "format": FORMAT_VERSION,
+            "recordedAt": datetime.now(timezone.utc).isoformat(),
+            "upstream": self.upstream,
+            "entries": entries,
+            "bodies": {k: v for k, v in self.bodies.items() if k in live},
+        }
+
+    def save(self, path: str, doc: dict = None):
+        """Write `doc` (default: a snapshot taken now) to `path` atomically"""
+        if doc is None:
+            doc = self.snapshot()
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(prefix=".fixtures-", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(gzip.compress(json.dumps(doc, separators=(",", ":")).encode(), compresslevel=6))
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    @classmethod
+    def load(cls, path: str) -> "FixtureSet":
+        with open(path, "rb") as f:
+            doc = json.loads(gzip.decompress(f.read()))
+        if doc.get("format") != FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported fixture format {doc.get('format')}")
+        fixtures = cls(doc.get("upstream"))
+        fixtures.entries = doc["entries"]
+        fixtures.bodies = doc["bodies"]
+        return fixtures
+
+
+# ═══════════════════════════════════════════════════════════════
+# RECORD
+# ═══════════════════════════════════════════════════════════════
+
+def record_app(upstream: str, out: str, flush_every: int, transport=None):
+    """`transport` replaces the network to the upstream (httpx.MockTransport in tests)"""
+    import httpx
+    from contextlib import asynccontextmanager
+    from fastapi import FastAPI, Request, Response
+
+    fixtures = FixtureSet.load(out) if os.path.exists(out) else FixtureSet(upstream)
+    state = {"since_flush": 0}
+    client = httpx.AsyncClient(base_url=upstream, timeout=600.0, transport=transport)
+
+    @asynccontextmanager
+    async def lifespan(app):
+        yield
+        await client.aclose()
+        fixtures.save(out)
+        print(f"[Record] Saved {len(fixtures.entries)} routes to {out}")
+
+    app = FastAPI(title="Fixture Recorder", lifespan=lifespan)
+
+    @app.api_route("/api/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"])
+    async def forward(path: str, request: Request):
+        body = await request.body()
+        headers = {k: v for k, v in request.headers.items() if k.lower() not in HOP_HEADERS}
+        t0 = time.perf_counter()
+        resp = await client.request(request.method, f"/api/{path}", params=request.query_params.multi_items(),
+                                    content=body, headers=headers)
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        content_type = resp.headers.get("content-type", "application/json")
+        key = request_key(request.method, f"api/{path}", request.query_params.multi_items(), body)
+        fixtures.add(key, request.method, f"/api/{path}", resp.status_code, content_type, resp.content, elapsed_ms)
+        print(f"[Record] {resp.status_code} {elapsed_ms:7.1f}ms {key}")
+        state["since_flush"] += 1
+        if state["since_flush"] >= flush_every:
+            state["since_flush"] = 0
+            # Snapshot on the loop: handlers keep adding entries while the thread writes
+            await asyncio.to_thread(fixtures.save, out, fixtures.snapshot())
+        return Response(resp.content, status_code=resp.status_code, media_type=content_type)
+
+    return app
+
+
+# ═══════════════════════════════════════════════════════════════
+# REPLAY
+# ═══════════════════════════════════════════════════════════════
+
+class Latency:
+    def __init__(self, mode: str, ms: float, scale: float, jitter: float, seed: int):
+        self.mode = mode
+        self.ms = ms
+        self.scale = scale
+        self.jitter = jitter
+        self.rng = random.Random(seed)
+
+    def delay_sec(self, entry) -> float:
+        if self.mode == "none":
+            return 0.0
+        if self.mode == "fixed" or not entry or not entry["timingsMs"]:
+            base = self.ms
+        else:
+            base = self.rng.choice(entry["timingsMs"])
+        if self.jitter:
+            base *= 1 + self.rng.uniform(-self.jitter, self.jitter)
+        return max(0.0, base * self.scale / 1000.0)
+
+
+def replay_app(fixtures: FixtureSet, latency: Latency, loose_query: bool):
+    from fastapi import FastAPI, Request, Response
+
+    app = FastAPI(title="Fixture Replay")
+    by_path = {}
+    for key, entry in fixtures.entries.items():
+        by_path.setdefault(f"{entry['method']} {entry['path']}", key)
+    stats = {"hits": 0, "misses": 0, "missing": {}}
+
+    @app.get("/api/_replay/stats")
+    async def replay_stats():
+        return {"ok": True, "data": {**stats, "routes": len(fixtures.entries)}}
+
+    @app.api_route("/api/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"])
+    async def serve(path: str, request: Request):
+        body = await request.body()
+        key = request_key(request.method, f"api/{path}", request.query_params.multi_items(), body)
+        entry = fixtures.entries.get(key)
+        if entry is None and loose_query:
+            entry = fixtures.entries.get(by_path.get(f"{request.method} /api/{path}", ""))
+        if entry is None:
+            if request.method == "GET" and path == "health":
+                return {"ok": True}
+            if request.method == "POST" and path == "ops/prewarm":
+                return {"ok": True, "data": {"ok": True, "phases": []}}
+            stats["misses"] += 1
+            stats["missing"][key] = stats["missing"].get(key, 0) + 1
+            return Response(json.dumps({"ok": False, "error": "NO_FIXTURE", "key": key}),
+                            status_code=404, media_type="application/json")
+        stats["hits"] += 1
+        delay = latency.delay_sec(entry)
+        if delay:
+            await asyncio.sleep(delay)
+        return Response(decode_body(fixtures.bodies[entry["body"]]), status_code=entry["status"],
+                        media_type=entry["contentType"])
+
+    return app
+
+
+async def serve_ports(app, port: int, count: int):
+    import uvicorn
+
+    servers = [uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port + i, log_level="warning"))
+               for i in range(count)]
+    await asyncio.gather(*(s.serve() for s in servers))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and replay backend responses")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    rec = sub.add_parser("record", help="proxy a live backend and record responses")
+    rec.add_argument("--upstream", default="http://127.0.0.1:8002")
+    rec.add_argument("--out", required=True)
+    rec.add_argument("--port", type=int, default=8010)
+    rec.add_argument("--flush-every", type=int, default=50, help="save after this many responses")
+
+    rep = sub.add_parser("replay", help="serve recorded responses")
+    rep.add_argument("file")
+    rep.add_argument("--port", type=int, default=8002)
+    rep.add_argument("--count", type=int, default=1, help="stand-ins on consecutive ports (one per proxy worker)")
+    rep.add_argument("--latency", choices=["recorded", "fixed", "none"], default="recorded")
+    rep.add_argument("--ms", type=float, default=50.0, help="fixed latency, and fallback for routes without timings")
+    rep.add_argument("--scale", type=float, default=1.0, help="multiply every delay")
+    rep.add_argument("--jitter", type=float, default=0.0, help="+/- fraction of random jitter")
+    rep.add_argument("--seed", type=int, default=0)
+    rep.add_argument("--loose-query", action="store_true", help="fall back to any recording of the same path")
+
+    info = sub.add_parser("info", help="list recorded routes")
+    info.add_argument("file")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"Fixture {args.cmd.title()}")
+    print("=" * 60)
+
+    if args.cmd == "record":
+        import uvicorn
+
+        print(f"Upstream: {args.upstream}")
+        print(f"Listen:   http://127.0.0.1:{args.port}")
+        print(f"Out:      {args.out}")
+        uvicorn.run(record_app(args.upstream, args.out, args.flush_every),
+                    host="127.0.0.1", port=args.port, log_level="warning")
+        return
+
+    fixtures = FixtureSet.load(args.file)
+    if args.cmd == "info":
+        size = sum(len(b) for b in fixtures.bodies.values())
+        print(f"Upstream: {fixtures.upstream}   Routes: {len(fixtures.entries)}   "
+              f"Bodies: {len(fixtures.bodies)} ({size / 1e6:.1f} MB raw)")
+        for key, e in sorted(fixtures.entries.items()):
+            t = sorted(e["timingsMs"])
+            print(f"  {e['status']} n={len(t):<3} p50={t[len(t) // 2]:8.1f}ms  {key}")
+        return
+
+    latency = Latency(args.latency, args.ms, args.scale, args.jitter, args.seed)
+    print(f"Fixtures: {args.file} ({len(fixtures.entries)} routes)")
+    print(f"Listen:   127.0.0.1:{args.port}" + (f"-{args.port + args.count - 1}" if args.count > 1 else ""))
+    print(f"Latency:  {args.latency} x{args.scale:g}" + (f" ±{args.jitter:.0%}" if args.jitter else ""))
+    asyncio.run(serve_ports(replay_app(fixtures, latency, args.loose_query), args.port, args.count))
+
+
+if __name__ == "__main__":
+    main()
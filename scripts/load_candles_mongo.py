@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Candle Bulk Loader (Mongo)
+
+Streams a normalized candle CSV or a binary candle store into Mongo in
+batches of unordered bulk upserts, instead of going through the backend's
+per-candle CanonicalStore.upsert / SPX ingest paths.
+
+Targets:
+  spx        spx_candles (keyed on ts, same document shape as the SPX ingest)
+  canonical  fractal_canonical_ohlcv (keyed on meta.symbol, meta.timeframe, ts)
+
+Required indexes are created before the first write. Documents are written
+with $set on the data fields and $setOnInsert on timestamps, so a re-run
+over unchanged data matches every row and modifies none.
+
+Connection: MONGO_URL / DB_NAME (same as backend/.env), or --mongo-url.
+`--mongo-url mongomock://` runs against an in-memory stand-in (needs the
+`mongomock` package) for tests and dry runs.
+
+Usage: python load_candles_mongo.py FILE [--target spx|canonical|both] [--symbol SPX] [--batch 5000]
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+BATCH_SIZE = 5000
+DAY_MS = 86_400_000
+
+
+def spx_cohort(date: str) -> str:
+    """Mirror of pickSpxCohort (backend/src/modules/spx/spx.cohorts.ts)"""
+    y = int(date[:4])
+    if 1950 <= y <= 1989:
+        return "V1950"
+    if 1990 <= y <= 2007:
+        return "V1990"
+    if 2008 <= y <= 2019:
+        return "V2008"
+    if 2020 <= y <= 2025:
+        return "V2020"
+    if y >= 2026:
+        return "LIVE"
+    return "V1950"
+
+
+# ═══════════════════════════════════════════════════════════════
+# INPUT
+# ═══════════════════════════════════════════════════════════════
+
+def iter_rows(path: str):
+    """Yield (ts_ms, date, open, high, low, close, volume) in file order"""
+    if path.endswith(".candles"):
+        from candle_store import format_ts, open_store
+
+        s = open_store(path)
+        # Slice the memmap in chunks so rows are never all boxed at once
+        for start in range(0, s.rows, BATCH_SIZE):
+            end = min(s.rows, start + BATCH_SIZE)
+            cols = [a[start:end].tolist() for a in (s.ts, s.open, s.high, s.low, s.close, s.volume)]
+            for ts, o, h, l, c, v in zip(*cols):
+                yield ts, format_ts(ts), o, h, l, c, v
+        return
+
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            date = row.get("date", "")[:10]
+            if len(date) < 10 or not date[:4].isdigit():
+                continue
+            ts = int(datetime.strptime(date, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp() * 1000)
+            yield (
+                ts,
+                date,
+                float(row["open"]),
+                float(row["high"]),
+                float(row["low"]),
+                float(row["close"]),
+                float(row.get("volume") or 0),
+            )
+
+
+def batches(rows, size: int):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# ═══════════════════════════════════════════════════════════════
+# TARGETS
+# ═══════════════════════════════════════════════════════════════
+
+class SpxTarget:
+    collection = "spx_candles"
+
+    def __init__(self, db, symbol: str, timeframe: str, provenance: str):
+        self.col = db[self.collection]
+
+    def ensure_indexes(self):
+        # Same index pack as SpxCandleSchema (BLOCK B3)
+        self.col.create_index([("ts", 1)], unique=True, name="uniq_ts")
+        self.col.create_index([("ts", -1)], name="ts_desc")
+        self.col.create_index([("cohort", 1), ("ts", 1)], name="cohort_ts")
+        self.col.create_index([("date", 1)], name="date_idx")
+
+    def op(self, UpdateOne, idx: int, row, now):
+        ts, date, o, h, l, c, v = row
+        doc = {
+            "ts": ts,
+            "date": date,
+            "open": o,
+            "high": h,
+            "low": l,
+            "close": c,
+            "c": c,
+            "idx": idx,
+            "volume": v or None,
+            "symbol": "SPX",
+            "source": "STOOQ",
+            "cohort": spx_cohort(date),
+        }
+        return UpdateOne({"ts": ts}, {"$set": doc, "$setOnInsert": {"createdAt": now, "updatedAt": now}}, upsert=True)
+
+
+class CanonicalTarget:
+    collection = "fractal_canonical_ohlcv"
+
+    def __init__(self, db, symbol: str, timeframe: str, provenance: str):
+        self.col = db[self.collection]
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.provenance = provenance
+
+    def ensure_indexes(self):
+        # Same indexes as CanonicalOhlcvSchema
+        self.col.create_index([("meta.symbol", 1), ("meta.timeframe", 1), ("ts", 1)], unique=True)
+        self.col.create_index([("meta.symbol", 1), ("meta.timeframe", 1)])
+
+    def op(self, UpdateOne, idx: int, row, now):
+        ts, _, o, h, l, c, v = row
+        when = datetime.fromtimestamp(ts / 1000, timezone.utc)
+        sanity_ok = h >= max(o, c) and l <= min(o, c) and v >= 0
+        doc = {
+            "meta": {"symbol": self.symbol, "timeframe": self.timeframe},
+            "ts": when,
+            "ohlcv": {"o": o, "h": h, "l": l, "c": c, "v": v},
+            "provenance": {"chosenSource": self.provenance, "candidates": []},
+            "quality": {"qualityScore": 1, "flags": [] if sanity_ok else ["SANITY_FAIL"], "sanity_ok": sanity_ok},
+        }
+        key = {"meta.symbol": self.symbol, "meta.timeframe": self.timeframe, "ts": when}
+        return UpdateOne(key, {"$set": doc, "$setOnInsert": {"updatedAt": now}}, upsert=True)
+
+
+TARGETS = {"spx": [SpxTarget], "canonical": [CanonicalTarget], "both": [SpxTarget, CanonicalTarget]}
+
+
+# ═══════════════════════════════════════════════════════════════
+# LOAD
+# ═══════════════════════════════════════════════════════════════
+
+def connect(mongo_url: str, db_name: str):
+    if mongo_url.startswith("mongomock://"):
+        import mongomock
+
+        return mongomock.MongoClient()[db_name]
+    from pymongo import MongoClient
+
+    return MongoClient(mongo_url)[db_name]
+
+
+def load(path: str, targets: list, batch_size: int = BATCH_SIZE) -> dict:
+    """Stream `path` into every target; returns per-target counters"""
+    from pymongo import UpdateOne
+
+    for target in targets:
+        target.ensure_indexes()
+
+    stats = {t.collection: {"upserted": 0, "modified": 0, "matched": 0} for t in targets}
+    now = datetime.now(timezone.utc)
+    rows = 0
+    t0 = time.perf_counter()
+    for batch in batches(iter_rows(path), batch_size):
+        for target in targets:
+            ops = [target.op(UpdateOne, rows + i, row, now) for i, row in enumerate(batch)]
+            result = target.col.bulk_write(ops, ordered=False)
+            s = stats[target.collection]
+            s["upserted"] += result.upserted_count
+            s["modified"] += result.modified_count
+            s["matched"] += result.matched_count
+        rows += len(batch)
+        elapsed = time.perf_counter() - t0
+        print(f"  {rows:>8} rows  {rows / elapsed:>10.0f} rows/s", end="\r", flush=True)
+    elapsed = time.perf_counter() - t0
+    print()
+    return {"rows": rows, "elapsedSec": round(elapsed, 3), "rowsPerSec": round(rows / elapsed) if elapsed else 0, "collections": stats}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load candles into Mongo")
+    parser.add_argument("file", help="normalized CSV or .candles store")
+    parser.add_argument("--target", choices=sorted(TARGETS), default="both")
+    parser.add_argument("--symbol", default="SPX", help="canonical meta.symbol")
+    parser.add_argument("--timeframe", default="1d")
+    parser.add_argument("--provenance", default="YAHOO_CSV", help="canonical provenance.chosenSource")
+    parser.add_argument("--batch", type=int, default=BATCH_SIZE)
+    parser.add_argument("--mongo-url", default=os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default=os.environ.get("DB_NAME", "fractal_dev"))
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Candle Bulk Loader")
+    print("=" * 60)
+    print(f"File:    {args.file}")
+    print(f"Target:  {args.target} → {args.mongo_url}/{args.db}")
+    print(f"Batch:   {args.batch}")
+    print()
+
+    try:
+        db = connect(args.mongo_url, args.db)
+        targets = [cls(db, args.symbol, args.timeframe, args.provenance) for cls in TARGETS[args.target]]
+        result = load(args.file, targets, args.batch)
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        sys.exit(1)
+
+    for name, s in result["collections"].items():
+        print(f"{name}: upserted={s['upserted']} modified={s['modified']} unchanged={s['matched'] - s['modified']}")
+    print(f"✅ {result['rows']} rows in {result['elapsedSec']}s ({result['rowsPerSec']} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Materialized Match Table
+
+Precomputes the top-K historical analogues for every as-of day and window
+length, under the same rule as FractalEngine.match (raw_returns mode):
+
+  - window vector: log returns of closes[e-L..e], L2 normalized
+  - score: cosine similarity
+  - candidates: end index j in [L, e - max(MIN_GAP_DAYS, horizon)]
+  - as-of rows start at e = L + horizon + 5 (earlier rows are empty)
+  - ties keep the lower end index first (stable sort)
+
+Scores come from blocked matrix products: each block of as-of windows is
+multiplied against the sliding-window view of all earlier windows, then
+masked to the asOf rule and reduced with argpartition.
+
+File layout (little-endian):
+  0    8s   magic "FRMATCHT"
+  8    u32  format version (2)
+  12   u32  window count
+  16   u64  row count (one per candle)
+  24   u32  top K
+  28   u32  min gap (candles)
+  32   u32  forward horizon (candles)
+  36   u32  reserved
+  40   16s  symbol
+  56   32s  sha256 of the input ts (int64) and close (float64) columns
+  88   i64  created at (ms since epoch)
+  96   8xu32 window lengths (unused slots 0)
+  128       int64 ts column
+  ...       per window, in window order: float64 score [rows x K]
+  ...       per window, in window order: int32 end index [rows x K] (-1 = none)
+
+Scores are float64, the same width as the engine's scan scores; all float64
+blocks come before the int32 ones so every column stays 8-byte aligned.
+
+--verify N re-runs the per-window scan for N as-of rows per window length
+and compares the neighbour lists.
+
+Usage: python match_table.py INPUT OUT [--symbol BTC] [--windows 30,60,90] [--top-k 25] [--verify 20]
+"""
+
+import argparse
+import hashlib
+import math
+import os
+import struct
+import sys
+import tempfile
+import time
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+MAGIC = b"FRMATCHT"
+FORMAT_VERSION = 2
+HEADER = struct.Struct("<8sIIQIIII16s32sq8I")
+MAX_WINDOWS = 8
+EPS = 1e-12
+
+# backend/src/modules/fractal/domain/constants.ts
+WINDOW_SIZES = (30, 60, 90)
+TOP_K_MATCHES = 25
+MIN_GAP_DAYS = 60
+FORWARD_HORIZON_DAYS = 30
+BLOCK_ROWS = 256
+
+
+def log_returns(close: np.ndarray) -> np.ndarray:
+    """Same as logReturns in similarity.engine.ts (0 for invalid pairs)"""
+    a, b = close[:-1], close[1:]
+    ok = np.isfinite(a) & np.isfinite(b) & (a > 0) & (b > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(ok, np.log(np.where(ok, b / a, 1.0)), 0.0)
+
+
+def window_vectors(close: np.ndarray, window: int) -> tuple:
+    """Unit vectors for windows ending at e = window..n-1 (row e - window) and their norms"""
+    v = sliding_window_view(log_returns(close), window)
+    norm = np.sqrt(np.einsum("ij,ij->i", v, v))
+    v = v / np.where(norm > 0, norm, 1.0)[:, None]
+    # The engine divides by the norms of the normalized vectors again
+    unit = np.sqrt(np.einsum("ij,ij->i", v, v))
+    return np.ascontiguousarray(v), np.where(unit > 0, unit, 1.0)
+
+
+def first_row(window: int, horizon: int) -> int:
+    return window + horizon + 5
+
+
+def build_window(close: np.ndarray, window: int, top_k: int, min_gap: int, horizon: int,
+                 block: int = BLOCK_ROWS) -> tuple:
+    """(end index [n, K] int32, score [n, K] float64) for one window length"""
+    n = len(close)
+    idx = np.full((n, top_k), -1, dtype=np.int32)
+    score = np.full((n, top_k), np.nan, dtype=np.float64)
+    if n <= window:
+        return idx, score
+    vec, unit = window_vectors(close, window)
+    gap = max(min_gap, horizon)
+
+    # First as-of row with at least one candidate
+    start = max(first_row(window, horizon), window + gap)
+    for e0 in range(start, n, block):
+        e1 = min(n, e0 + block)
+        ends = np.arange(e0, e1)
+        last = e1 - 1 - gap  # highest candidate end index any row in the block may see
+        cands = np.arange(window, last + 1)
+        s = vec[e0 - window: e1 - window] @ vec[: last - window + 1].T
+        s /= unit[e0 - window: e1 - window, None] * unit[None, : last - window + 1] + EPS
+        s[cands[None, :] > (ends[:, None] - gap)] = -np.inf
+
+        k = min(top_k, len(cands))
+        part = np.argpartition(-s, k - 1, axis=1)[:, :k]
+        part_scores = np.take_along_axis(s, part, axis=1)
+        # Descending score, ties by ascending end index (Array.sort is stable)
+        order = np.lexsort((part, -part_scores), axis=1)
+        part = np.take_along_axis(part, order, axis=1)
+        part_scores = np.take_along_axis(part_scores, order, axis=1)
+
+        valid = np.isfinite(part_scores)
+        idx[e0:e1, :k] = np.where(valid, part + window, -1)
+        score[e0:e1, :k] = np.where(valid, part_scores, np.nan)
+    return idx, score
+
+
+# ═══════════════════════════════════════════════════════════════
+# REFERENCE (per-window scan, for --verify)
+# ═══════════════════════════════════════════════════════════════
+
+def _vector(closes: list) -> list:
+    r = []
+    for a, b in zip(closes, closes[1:]):
+        r.append(math.log(b / a) if math.isfinite(a) and math.isfinite(b) and a > 0 and b > 0 else 0.0)
+    s = math.sqrt(sum(x * x for x in r)) or 1.0
+    return [x / s for x in r]
+
+
+def reference_matches(closes: list, as_of: int, window: int, top_k: int, min_gap: int, horizon: int) -> list:
+    """Port of the FractalEngine.match candidate loop for one as-of index"""
+    closes = closes[: as_of + 1]
+    if as_of < window + horizon + 5:
+        return []
+    cur = _vector(closes[-window - 1:])
+    cur_norm = math.sqrt(sum(x * x for x in cur)) or 1.0
+    end = as_of
+    candidates = []
+    for j in range(window, min(end - min_gap, as_of - horizon) + 1):
+        if abs(end - j) < min_gap:
+            continue
+        hist = _vector(closes[j - window: j + 1])
+        hist_norm = math.sqrt(sum(x * x for x in hist)) or 1.0
+        dot = sum(a * b for a, b in zip(cur, hist))
+        candidates.append((j, dot / (cur_norm * hist_norm + EPS)))
+    candidates.sort(key=lambda m: -m[1])
+    return candidates[:top_k]
+
+
+def verify(close: np.ndarray, tables: dict, top_k: int, min_gap: int, horizon: int, samples: int) -> dict:
+    closes = close.tolist()
+    rng = np.random.default_rng(0)
+    report = {}
+    for window, (idx, score) in tables.items():
+        lo = first_row(window, horizon)
+        rows = sorted(set(rng.integers(lo, len(closes), samples).tolist()) | {len(closes) - 1})
+        same_set = same_order = 0
+        max_diff = 0.0
+        for e in rows:
+            ref = reference_matches(closes, e, window, top_k, min_gap, horizon)
+            got = [int(j) for j in idx[e] if j >= 0]
+            want = [j for j, _ in ref]
+            same_set += set(got) == set(want)
+            same_order += got == want
+            for j, s in ref:
+                if j in got:
+                    max_diff = max(max_diff, abs(float(score[e, got.index(j)]) - s))
+        report[window] = {"rows": len(rows), "sameSet": same_set, "sameOrder": same_order, "maxScoreDiff": max_diff}
+    return report
+
+
+# ═══════════════════════════════════════════════════════════════
+# STORE
+# ═══════════════════════════════════════════════════════════════
+
+def dataset_version(ts: np.ndarray, close: np.ndarray) -> bytes:
+    digest = hashlib.sha256(np.ascontiguousarray(ts, dtype="<i8").tobytes())
+    digest.update(np.ascontiguousarray(close, dtype="<f8").tobytes())
+    return digest.digest()
+
+
+def write_table(path: str, symbol: str, ts: np.ndarray, close: np.ndarray, tables: dict,
+                top_k: int, min_gap: int, horizon: int) -> str:
+    windows = list(tables)
+    if len(windows) > MAX_WINDOWS:
+        raise ValueError(f"at most {MAX_WINDOWS} window lengths")
+    version = dataset_version(ts, close)
+    header = HEADER.pack(
+        MAGIC, FORMAT_VERSION, len(windows), len(ts), top_k, min_gap, horizon, 0,
+        symbol.encode()[:16], version, int(time.time() * 1000),
+        *(windows + [0] * (MAX_WINDOWS - len(windows))),
+    )
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix=".matches-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(header)
+            f.write(np.ascontiguousarray(ts, dtype="<i8").tobytes())
+            for w in windows:
+                f.write(np.ascontiguousarray(tables[w][1], dtype="<f8").tobytes())
+            for w in windows:
+                f.write(np.ascontiguousarray(tables[w][0], dtype="<i4").tobytes())
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return version.hex()
+
+
+def open_table(path: str) -> dict:
+    """Memory-map a match table: {"ts", "windows": {L: (idx, score)}, ...}"""
+    with open(path, "rb") as f:
+        head = f.read(HEADER.size)
+    magic, fmt, count, rows, top_k, min_gap, horizon, _, symbol, version, created_at, *windows = HEADER.unpack(head)
+    if magic != MAGIC or fmt != FORMAT_VERSION:
+        raise ValueError(f"{path}: not a match table")
+    data = np.memmap(path, dtype=np.uint8, mode="r")
+    ts = np.frombuffer(data, dtype="<i8", count=rows, offset=HEADER.size)
+    offset = HEADER.size + rows * 8
+    scores = {}
+    for w in windows[:count]:
+        scores[w] = np.frombuffer(data, dtype="<f8", count=rows * top_k, offset=offset).reshape(rows, top_k)
+        offset += rows * top_k * 8
+    out = {}
+    for w in windows[:count]:
+        idx = np.frombuffer(data, dtype="<i4", count=rows * top_k, offset=offset).reshape(rows, top_k)
+        offset += rows * top_k * 4
+        out[w] = (idx, scores[w])
+    return {
+        "symbol": symbol.rstrip(b"\0").decode(), "rows": rows, "topK": top_k, "minGap": min_gap,
+        "horizon": horizon, "version": version.hex(), "createdAt": created_at, "ts": ts, "windows": out,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the materialized top-K match table")
+    parser.add_argument("input", help="normalized CSV or .candles store")
+    parser.add_argument("out", help="table path, e.g. /app/data/btc_1d.matches")
+    parser.add_argument("--symbol", default="BTC", help="symbol the engine serves this table for")
+    parser.add_argument("--windows", default=",".join(map(str, WINDOW_SIZES)))
+    parser.add_argument("--top-k", type=int, default=TOP_K_MATCHES)
+    parser.add_argument("--min-gap", type=int, default=MIN_GAP_DAYS)
+    parser.add_argument("--horizon", type=int, default=FORWARD_HORIZON_DAYS)
+    parser.add_argument("--block", type=int, default=BLOCK_ROWS, help="as-of rows per matrix product")
+    parser.add_argument("--verify", type=int, default=0, metavar="N", help="check N sampled rows per window")
+    args = parser.parse_args()
+
+    from audit_candles import load_series
+
+    ts, _, _, _, close, _ = load_series(args.input)
+    ts = np.asarray(ts, dtype=np.int64)
+    close = np.asarray(close, dtype=np.float64)
+    windows = [int(w) for w in args.windows.split(",")]
+
+    print("=" * 60)
+    print("Match Table Build")
+    print("=" * 60)
+    print(f"Input:    {args.input} ({len(close)} rows)")
+    print(f"Windows:  {windows}   topK={args.top_k}   minGap={args.min_gap}   horizon={args.horizon}")
+
+    tables = {}
+    for w in windows:
+        t0 = time.perf_counter()
+        tables[w] = build_window(close, w, args.top_k, args.min_gap, args.horizon, args.block)
+        filled = int(np.count_nonzero(tables[w][0][:, 0] >= 0))
+        print(f"  w={w:<3} {filled} as-of rows in {time.perf_counter() - t0:.2f}s")
+
+    version = write_table(args.out, args.symbol, ts, close, tables, args.top_k, args.min_gap, args.horizon)
+    size_mb = os.path.getsize(args.out) / 1e6
+    print(f"✅ Wrote {args.out} ({size_mb:.1f} MB, version {version[:16]})")
+
+    if args.verify:
+        report = verify(close, tables, args.top_k, args.min_gap, args.horizon, args.verify)
+        print("\nVerify vs per-window scan:")
+        ok = True
+        for w, r in report.items():
+            good = r["sameSet"] == r["rows"] and r["maxScoreDiff"] < 1e-9
+            ok &= good
+            print(f"  {'✅' if good else '❌'} w={w:<3} same set {r['sameSet']}/{r['rows']}  "
+                  f"same order {r['sameOrder']}/{r['rows']}  max score diff {r['maxScoreDiff']:.1e}")
+        if not ok:
+            sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
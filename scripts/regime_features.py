@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+SPX Regime Feature Store
+
+Computes every RegimeFeatures column (backend/src/modules/spx-regime/
+regime.features.ts) for the whole daily series in one pass of rolling
+NumPy window operations, and writes a versioned columnar file that
+SpxRegimeService.recomputeRegimes loads instead of recomputing features
+index by index.
+
+File layout (little-endian):
+  0    8s   magic "FRFEATUR"
+  8    u32  format version (1)
+  12   u32  column count
+  16   u64  row count (one per candle, same idx as the regime service)
+  24   16s  store name ("spx_regime")
+  40   8s   feature version (FEATURE_VERSION)
+  48   32s  sha256 of (feature version, ts, close): the dataset version
+  80   i64  created at (ms since epoch)
+  128       column names, 32 bytes each (NUL padded)
+  ...       float64 columns, `rows` x 8 bytes each
+
+Rows before MIN_IDX are NaN. Enums are stored as codes (see ENUMS) and
+booleans as 0/1.
+
+--parity runs a scalar port of calculateRegimeFeatures at every index and
+reports per-column differences (JSON with --report).
+
+Usage: python regime_features.py INPUT OUT [--parity] [--report PATH]
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import struct
+import sys
+import tempfile
+import time
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+MAGIC = b"FRFEATUR"
+FORMAT_VERSION = 1
+FEATURE_VERSION = "1.2.0"  # ENGINE_VERSION in regime.service.ts
+HEADER_SIZE = 128
+HEADER = struct.Struct("<8sIIQ16s8s32sq")
+NAME_SIZE = 32
+
+# REGIME_CONFIG / REGIME_THRESHOLDS / VOL_PERCENTILES (regime.config.ts)
+VOL_WINDOW_SHORT = 20
+VOL_WINDOW_LONG = 60
+DD_WINDOW = 60
+TREND_LOOKBACK = 30
+SMA_PERIOD = 50
+SLOPE_WINDOW = 10
+SHOCK_WINDOW = 5
+REBOUND_LOOKBACK = 20
+REBOUND_WINDOW = 10
+TRADING_DAYS = 252
+VOL_P33 = 0.12
+VOL_P66 = 0.18
+SLOPE_THRESHOLD = 0.001
+SHOCK_THRESHOLD = -0.07
+VSHAPE_REBOUND = 0.07
+RANGE_THRESHOLD = 0.55
+FAST_CRASH_SPEED = 0.008
+VSHAPE_REBOUND_TYPE = 0.05
+# computeRegimeForIdx skips indexes with less history than this
+MIN_IDX = VOL_WINDOW_LONG
+
+ENUMS = {
+    "volBucket": ["LOW", "MEDIUM", "HIGH"],
+    "volBucket5dAgo": ["LOW", "MEDIUM", "HIGH"],
+    "trendDir": ["UP", "DOWN", "FLAT"],
+    "crashSpeedBucket": ["NONE", "SLOW", "FAST"],
+    "reboundType": ["NONE", "NONV", "VSHAPE"],
+}
+BOOLEANS = {
+    "volExpanding", "volContracting", "trendFlipping", "wasRange",
+    "isRange", "rangeBreaking", "isShock", "isVShape",
+}
+COLUMNS = [
+    "ts", "vol20", "vol60", "volBucket", "volBucket5dAgo", "volExpanding",
+    "volContracting", "maxDD60", "ddSpeed", "daysToTrough", "sma50",
+    "sma50Slope", "sma50Slope5dAgo", "trendDir", "trendPersistence30",
+    "trendFlipping", "wasRange", "isRange", "rangeBreaking", "shock5",
+    "rebound10", "isShock", "isVShape", "crashSpeedBucket", "reboundType",
+]
+
+
+# ═══════════════════════════════════════════════════════════════
+# VECTORIZED
+# ═══════════════════════════════════════════════════════════════
+
+def _shift(x: np.ndarray, k: int) -> np.ndarray:
+    """x[i - k] at position i (NaN where undefined)"""
+    out = np.full(len(x), np.nan)
+    if k < len(x):
+        out[k:] = x[: len(x) - k]
+    return out
+
+
+def _windowed(x: np.ndarray, window: int, reduce, end_offset: int = 0) -> np.ndarray:
+    """reduce(x[i - end_offset - window + 1 .. i - end_offset]) at position i"""
+    out = np.full(len(x), np.nan)
+    if len(x) >= window + end_offset:
+        out[window - 1 + end_offset:] = reduce(sliding_window_view(x, window), axis=1)[: len(x) - window + 1 - end_offset]
+    return out
+
+
+def vol_bucket(vol: np.ndarray) -> np.ndarray:
+    return np.where(vol < VOL_P33, 0, np.where(vol < VOL_P66, 1, 2)).astype(float)
+
+
+def compute_features(close: np.ndarray) -> dict:
+    """All RegimeFeatures columns; row i uses closes[0..i] like calculateRegimeFeatures"""
+    c = np.asarray(close, dtype=np.float64)
+    n = len(c)
+
+    # Log returns: ret[k] = log(c[k] / c[k-1]); a window of w returns ending at i
+    ret = np.concatenate(([np.nan], np.log(c[1:] / c[:-1])))
+    vol20 = _windowed(ret, VOL_WINDOW_SHORT, np.std) * math.sqrt(TRADING_DAYS)
+    vol60 = _windowed(ret, VOL_WINDOW_LONG, np.std) * math.sqrt(TRADING_DAYS)
+    vol20_5d = _shift(vol20, 5)
+
+    # Drawdown over the last DD_WINDOW closes, peak running from the window start
+    max_dd = np.full(n, np.nan)
+    trough = np.full(n, np.nan)
+    if n >= DD_WINDOW:
+        w = sliding_window_view(c, DD_WINDOW)
+        peak = np.maximum.accumulate(w, axis=1)
+        dd = (w - peak) / peak
+        max_dd[DD_WINDOW - 1:] = dd.min(axis=1)
+        trough[DD_WINDOW - 1:] = dd.argmin(axis=1)  # first occurrence, like the strict `<` scan
+    days_to_trough = np.where(trough > 0, trough, 1.0)
+    dd_speed = np.abs(max_dd) / days_to_trough
+
+    sma50 = _windowed(c, SMA_PERIOD, np.mean)
+    slope = (sma50 - _shift(sma50, SLOPE_WINDOW)) / SLOPE_WINDOW
+    idx = np.arange(n)
+    # closes15Ago.length > 50  <=>  i > 64
+    slope_5d = np.where(idx > 64, (_shift(sma50, 5) - _shift(sma50, 15)) / SLOPE_WINDOW, 0.0)
+
+    diff = np.concatenate(([0.0], np.diff(c)))
+    ups = _windowed((diff > 0).astype(float), TREND_LOOKBACK, np.sum)
+    downs = _windowed((diff < 0).astype(float), TREND_LOOKBACK, np.sum)
+    persistence = np.maximum(ups, downs) / TREND_LOOKBACK
+    persistence = np.where(idx >= TREND_LOOKBACK, persistence, 0.5)
+    persistence_5d = np.where(idx - 4 > TREND_LOOKBACK, _shift(persistence, 5), 0.5)
+
+    shock5 = (c - _shift(c, SHOCK_WINDOW)) / _shift(c, SHOCK_WINDOW)
+    low = _windowed(c, REBOUND_LOOKBACK, np.min, end_offset=REBOUND_WINDOW)
+    high = _windowed(c, REBOUND_WINDOW, np.max)
+    rebound10 = (high - low) / low
+
+    with np.errstate(invalid="ignore"):
+        cols = {
+            "vol20": vol20,
+            "vol60": vol60,
+            "volBucket": vol_bucket(vol20),
+            "volBucket5dAgo": vol_bucket(vol20_5d),
+            "volExpanding": (vol20 > vol60) & (vol20 > vol20_5d),
+            "volContracting": (vol20 < vol60) & (vol20 < vol20_5d),
+            "maxDD60": max_dd,
+            "ddSpeed": dd_speed,
+            "daysToTrough": days_to_trough,
+            "sma50": sma50,
+            "sma50Slope": slope,
+            "sma50Slope5dAgo": slope_5d,
+            "trendDir": np.where(slope > SLOPE_THRESHOLD, 0, np.where(slope < -SLOPE_THRESHOLD, 1, 2)),
+            "trendPersistence30": persistence,
+            "trendFlipping": ((slope > 0) & (slope_5d < 0)) | ((slope < 0) & (slope_5d > 0)),
+            "wasRange": persistence_5d < RANGE_THRESHOLD,
+            "isRange": persistence < RANGE_THRESHOLD,
+            "rangeBreaking": (persistence_5d < RANGE_THRESHOLD) != (persistence < RANGE_THRESHOLD),
+            "shock5": shock5,
+            "rebound10": rebound10,
+            "isShock": shock5 <= SHOCK_THRESHOLD,
+            "isVShape": (shock5 <= SHOCK_THRESHOLD) & (rebound10 >= VSHAPE_REBOUND),
+            "crashSpeedBucket": np.where(dd_speed > FAST_CRASH_SPEED, 2, np.where(dd_speed > 0, 1, 0)),
+            "reboundType": np.where(rebound10 > VSHAPE_REBOUND_TYPE, 2, np.where(rebound10 > 0, 1, 0)),
+        }
+    out = {}
+    for name, col in cols.items():
+        col = np.asarray(col, dtype=np.float64)
+        col[:MIN_IDX] = np.nan
+        out[name] = col
+    return out
+
+
+# ═══════════════════════════════════════════════════════════════
+# SCALAR REFERENCE (port of regime.features.ts, for parity)
+# ═══════════════════════════════════════════════════════════════
+
+def _returns(closes):
+    return [math.log(closes[i] / closes[i - 1]) for i in range(1, len(closes)) if closes[i - 1] > 0]
+
+
+def _vol(returns):
+    if len(returns) < 2:
+        return 0.0
+    mean = sum(returns) / len(returns)
+    return math.sqrt(sum((r - mean) ** 2 for r in returns) / len(returns)) * math.sqrt(TRADING_DAYS)
+
+
+def _drawdown(closes):
+    if len(closes) < 2:
+        return 0.0, 0.0, 0
+    peak, max_dd, trough = closes[0], 0.0, 0
+    for i in range(1, len(closes)):
+        peak = max(peak, closes[i])
+        dd = (closes[i] - peak) / peak
+        if dd < max_dd:
+            max_dd, trough = dd, i
+    days = trough if trough > 0 else 1
+    return max_dd, abs(max_dd) / days, days
+
+
+def _sma(closes, period):
+    if len(closes) < period:
+        return closes[-1] if closes else 0.0
+    return sum(closes[-period:]) / period
+
+
+def _persistence(closes, window):
+    if len(closes) < window + 1:
+        return 0.5
+    s = closes[-(window + 1):]
+    up = sum(1 for i in range(1, len(s)) if s[i] > s[i - 1])
+    down = sum(1 for i in range(1, len(s)) if s[i] < s[i - 1])
+    return max(up, down) / window
+
+
+def _bucket(vol):
+    return 0 if vol < VOL_P33 else 1 if vol < VOL_P66 else 2
+
+
+def reference_features(closes: list) -> dict:
+    vol20 = _vol(_returns(closes)[-VOL_WINDOW_SHORT:])
+    vol60 = _vol(_returns(closes)[-VOL_WINDOW_LONG:])
+    c5 = closes[:-5]
+    vol20_5d = _vol(_returns(c5)[-VOL_WINDOW_SHORT:])
+    max_dd, speed, days = _drawdown(closes[-DD_WINDOW:])
+    sma50 = _sma(closes, SMA_PERIOD)
+    slope = (sma50 - _sma(closes[:-SLOPE_WINDOW], SMA_PERIOD)) / SLOPE_WINDOW
+    c15 = closes[:-15]
+    slope_5d = (_sma(c5, SMA_PERIOD) - _sma(c15, SMA_PERIOD)) / SLOPE_WINDOW if len(c15) > 50 else 0.0
+    persistence = _persistence(closes, TREND_LOOKBACK)
+    persistence_5d = _persistence(c5, TREND_LOOKBACK) if len(c5) > 30 else 0.5
+    shock5 = (closes[-1] - closes[-6]) / closes[-6] if len(closes) >= 6 else 0.0
+    rebound = 0.0
+    if len(closes) >= REBOUND_LOOKBACK + REBOUND_WINDOW:
+        low = min(closes[-(REBOUND_LOOKBACK + REBOUND_WINDOW):-REBOUND_WINDOW])
+        rebound = (max(closes[-REBOUND_WINDOW:]) - low) / low
+    is_shock = shock5 <= SHOCK_THRESHOLD
+    return {
+        "vol20": vol20,
+        "vol60": vol60,
+        "volBucket": _bucket(vol20),
+        "volBucket5dAgo": _bucket(vol20_5d),
+        "volExpanding": vol20 > vol60 and vol20 > vol20_5d,
+        "volContracting": vol20 < vol60 and vol20 < vol20_5d,
+        "maxDD60": max_dd,
+        "ddSpeed": speed,
+        "daysToTrough": days,
+        "sma50": sma50,
+        "sma50Slope": slope,
+        "sma50Slope5dAgo": slope_5d,
+        "trendDir": 0 if slope > SLOPE_THRESHOLD else 1 if slope < -SLOPE_THRESHOLD else 2,
+        "trendPersistence30": persistence,
+        "trendFlipping": (slope > 0 and slope_5d < 0) or (slope < 0 and slope_5d > 0),
+        "wasRange": persistence_5d < RANGE_THRESHOLD,
+        "isRange": persistence < RANGE_THRESHOLD,
+        "rangeBreaking": (persistence_5d < RANGE_THRESHOLD) != (persistence < RANGE_THRESHOLD),
+        "shock5": shock5,
+        "rebound10": rebound,
+        "isShock": is_shock,
+        "isVShape": is_shock and rebound >= VSHAPE_REBOUND,
+        "crashSpeedBucket": 2 if speed > FAST_CRASH_SPEED else 1 if speed > 0 else 0,
+        "reboundType": 2 if rebound > VSHAPE_REBOUND_TYPE else 1 if rebound > 0 else 0,
+    }
+
+
+def parity_report(close: np.ndarray, features: dict) -> dict:
+    """Compare every index against the scalar port; exact for codes/flags"""
+    closes = close.tolist()
+    # Nothing reads further back than 65 closes, so a 120-close tail is equivalent
+    tail = 120
+    diffs = {name: {"maxAbs": 0.0, "maxRel": 0.0, "mismatches": 0} for name in COLUMNS[1:]}
+    worst = {}
+    for i in range(MIN_IDX, len(closes)):
+        ref = reference_features(closes[max(0, i + 1 - tail): i + 1])
+        for name, d in diffs.items():
+            got, want = features[name][i], float(ref[name])
+            if name in ENUMS or name in BOOLEANS:
+                if got != want:
+                    d["mismatches"] += 1
+                    worst.setdefault(name, i)
+                continue
+            err = abs(got - want)
+            if err > d["maxAbs"]:
+                d["maxAbs"] = err
+                d["maxRel"] = max(d["maxRel"], err / abs(want) if want else err)
+            if err > 1e-9 * max(1.0, abs(want)):
+                d["mismatches"] += 1
+                worst.setdefault(name, i)
+    return {
+        "rows": len(closes) - MIN_IDX,
+        "ok": all(d["mismatches"] == 0 for d in diffs.values()),
+        "columns": diffs,
+        "firstMismatchIdx": worst,
+    }
+
+
+# ═══════════════════════════════════════════════════════════════
+# STORE
+# ═══════════════════════════════════════════════════════════════
+
+def dataset_version(ts: np.ndarray, close: np.ndarray) -> bytes:
+    digest = hashlib.sha256(FEATURE_VERSION.encode())
+    digest.update(np.ascontiguousarray(ts, dtype="<i8").tobytes())
+    digest.update(np.ascontiguousarray(close, dtype="<f8").tobytes())
+    return digest.digest()
+
+
+def write_feature_store(path: str, ts: np.ndarray, close: np.ndarray, features: dict, name: str = "spx_regime") -> str:
+    rows = len(ts)
+    version = dataset_version(ts, close)
+    header = HEADER.pack(
+        MAGIC, FORMAT_VERSION, len(COLUMNS), rows, name.encode()[:16],
+        FEATURE_VERSION.encode()[:8], version, int(time.time() * 1000),
+    ).ljust(HEADER_SIZE, b"\0")
+    names = b"".join(c.encode().ljust(NAME_SIZE, b"\0") for c in COLUMNS)
+    columns = {"ts": np.asarray(ts, dtype=np.float64), **features}
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix=".features-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(header)
+            f.write(names)
+            for col in COLUMNS:
+                f.write(np.ascontiguousarray(columns[col], dtype="<f8").tobytes())
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return version.hex()
+
+
+def read_feature_store(path: str) -> dict:
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, fmt, ncols, rows, name, feature_version, version, created_at = HEADER.unpack_from(data)
+    if magic != MAGIC or fmt != FORMAT_VERSION:
+        raise ValueError(f"{path}: not a feature store")
+    names = [data[HEADER_SIZE + i * NAME_SIZE: HEADER_SIZE + (i + 1) * NAME_SIZE].rstrip(b"\0").decode() for i in range(ncols)]
+    base = HEADER_SIZE + ncols * NAME_SIZE
+    cols = {n: np.frombuffer(data, dtype="<f8", count=rows, offset=base + i * rows * 8) for i, n in enumerate(names)}
+    return {"name": name.rstrip(b"\0").decode(), "featureVersion": feature_version.rstrip(b"\0").decode(),
+            "version": version.hex(), "rows": rows, "columns": cols}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the SPX regime feature store")
+    parser.add_argument("input", help="normalized CSV or .candles store")
+    parser.add_argument("out", help="feature store path, e.g. /app/data/spx_regime.features")
+    parser.add_argument("--parity", action="store_true", help="check against the per-index reference")
+    parser.add_argument("--report", default=None, help="write the parity report JSON here")
+    args = parser.parse_args()
+
+    from audit_candles import load_series
+
+    ts, _, _, _, close, _ = load_series(args.input)
+    close = np.asarray(close, dtype=np.float64)
+
+    print("=" * 60)
+    print("SPX Regime Feature Store")
+    print("=" * 60)
+    t0 = time.perf_counter()
+    features = compute_features(close)
+    elapsed = time.perf_counter() - t0
+    version = write_feature_store(args.out, np.asarray(ts), close, features)
+    print(f"Rows:     {len(close)} ({len(close) - MIN_IDX} with features)")
+    print(f"Compute:  {elapsed * 1000:.1f} ms")
+    print(f"Version:  {version[:16]} ({FEATURE_VERSION})")
+    print(f"✅ Wrote {args.out}")
+
+    if args.parity:
+        t0 = time.perf_counter()
+        report = parity_report(close, features)
+        report["referenceSec"] = round(time.perf_counter() - t0, 2)
+        report["vectorizedMs"] = round(elapsed * 1000, 1)
+        print(f"\nParity vs per-index reference ({report['rows']} rows, {report['referenceSec']}s):")
+        for name, d in report["columns"].items():
+            mark = "✅" if d["mismatches"] == 0 else "❌"
+            print(f"  {mark} {name:<20} maxAbs={d['maxAbs']:.2e}  mismatches={d['mismatches']}")
+        if args.report:
+            with open(args.report, "w") as f:
+                json.dump(report, f, indent=2)
+            print(f"Report:   {args.report}")
+        if not report["ok"]:
+            sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
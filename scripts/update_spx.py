@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+SPX Incremental Dataset Updater
+
+Brings data/spx_1950_2026.csv up to date by fetching only the rows after
+the last stored date, validating them and appending atomically. Replaces
+the download + 2026 patch + merge trio: history is never re-read, re-sorted
+or re-downloaded.
+
+Sources:
+  yahoo            yfinance ^GSPC daily bars (default)
+  file:<path>      normalized CSV (date,open,high,low,close,adj_close,volume),
+                   for offline runs and fixtures
+
+A sidecar <csv>.version.json records the dataset version (sha256 of the
+file), row count and last date. New rows must also pass the quality
+auditor (audit_candles.py) against the stored tail before anything is
+written.
+
+With --binary PATH the columnar candle store (see candle_store.py) is
+rebuilt whenever the CSV changes or the store is missing.
+
+Usage: python update_spx.py [--csv PATH] [--source yahoo|file:PATH] [--binary PATH] [--dry-run]
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import math
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+
+DEFAULT_CSV = "/app/data/spx_1950_2026.csv"
+TICKER = "^GSPC"
+FIRST_DATE = "1950-01-01"
+COLUMNS = ["date", "open", "high", "low", "close", "adj_close", "volume"]
+
+# Largest tolerated close-to-close move when splicing onto stored history
+# (1987-10-19 was -20.5%); bigger jumps usually mean a wrong source.
+MAX_SPLICE_MOVE = 0.25
+GAP_WARN_DAYS = 7
+# Stored rows fed to the auditor ahead of new ones (rolling z-score/volume windows)
+AUDIT_CONTEXT_ROWS = 128
+
+
+class ValidationError(Exception):
+    pass
+
+
+# ═══════════════════════════════════════════════════════════════
+# SOURCES
+# ═══════════════════════════════════════════════════════════════
+
+class YahooSource:
+    """Daily bars from Yahoo Finance via yfinance (imported lazily)"""
+
+    name = "yahoo"
+
+    def fetch(self, start: str, end: str) -> list:
+        import pandas as pd
+        import yfinance as yf
+
+        df = yf.download(
+            TICKER,
+            start=start,
+            end=end,  # exclusive
+            interval="1d",
+            auto_adjust=False,
+            progress=False,
+            threads=False,
+        )
+        if df is None or df.empty:
+            return []
+        # yfinance returns MultiIndex columns for single tickers too
+        if isinstance(df.columns, pd.MultiIndex):
+            df.columns = [col[0] if isinstance(col, tuple) else col for col in df.columns]
+        df = df.reset_index()
+        rows = []
+        for rec in df.to_dict("records"):
+            rows.append({
+                "date": pd.Timestamp(rec["Date"]).strftime("%Y-%m-%d"),
+                "open": rec.get("Open"),
+                "high": rec.get("High"),
+                "low": rec.get("Low"),
+                "close": rec.get("Close"),
+                "adj_close": rec.get("Adj Close", rec.get("Close")),
+                "volume": rec.get("Volume", 0),
+            })
+        return rows
+
+
+class FileSource:
+    """Rows from a normalized CSV; offline provider for tests and air-gapped runs"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.name = f"file:{path}"
+
+    def fetch(self, start: str, end: str) -> list:
+        with open(self.path, newline="") as f:
+            return [r for r in csv.DictReader(f) if start <= r.get("date", "") < end]
+
+
+def make_source(spec: str):
+    if spec == "yahoo":
+        return YahooSource()
+    if spec.startswith("file:"):
+        return FileSource(spec[len("file:"):])
+    raise SystemExit(f"Unknown source: {spec}")
+
+
+# ═══════════════════════════════════════════════════════════════
+# STORED DATASET
+# ═══════════════════════════════════════════════════════════════
+
+def read_tail_rows(path: str, n: int) -> list:
+    """Parse the last `n` data rows by reading only the tail of the file"""
+    with open(path, "rb") as f:
+        header = f.readline().decode().strip().split(",")
+        if header != COLUMNS:
+            raise ValidationError(f"Unexpected header in {path}: {header}")
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        # Stored rows are under 128 bytes; one extra line absorbs a partial read
+        f.seek(max(0, size - 128 * (n + 1)))
+        lines = [ln for ln in f.read().decode().splitlines() if ln.strip()]
+    rows = [ln.split(",") for ln in lines if ln[:4].isdigit()]
+    return [dict(zip(COLUMNS, r)) for r in rows[-n:]]
+
+
+def read_last_row(path: str) -> dict:
+    rows = read_tail_rows(path, 1)
+    return rows[0] if rows else {}
+
+
+def read_first_date(path: str):
+    with open(path) as f:
+        f.readline()
+        first = f.readline()
+    return first.split(",")[0] if first.strip() else None
+
+
+def meta_path(path: str) -> str:
+    return path + ".version.json"
+
+
+def load_meta(path: str) -> dict:
+    try:
+        with open(meta_path(path)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+# ═══════════════════════════════════════════════════════════════
+# VALIDATION
+# ═══════════════════════════════════════════════════════════════
+
+def normalize(row: dict) -> dict:
+    out = {"date": str(row["date"])[:10]}
+    datetime.strptime(out["date"], "%Y-%m-%d")
+    for col in ("open", "high", "low", "close", "adj_close"):
+        value = float(row[col])
+        if math.isnan(value) or value <= 0:
+            raise ValidationError(f"{out['date']}: bad {col}={row[col]}")
+        out[col] = value
+    volume = float(row.get("volume") or 0)
+    out["volume"] = 0 if math.isnan(volume) else int(volume)
+    return out
+
+
+def validate(rows: list, last: dict) -> tuple:
+    """Normalized rows strictly after the stored tail, plus warnings"""
+    warnings = []
+    clean = []
+    prev_date = last.get("date", "")
+    prev_close = float(last["close"]) if last else None
+    for raw in sorted(rows, key=lambda r: str(r["date"])):
+        try:
+            row = normalize(raw)
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValidationError(f"Malformed row {raw}: {e}") from None
+        if row["date"] <= prev_date:
+            # Overlap with stored history or a duplicate in the batch
+            continue
+        lo, hi = row["low"], row["high"]
+        if lo > min(row["open"], row["close"]) or hi < max(row["open"], row["close"]):
+            raise ValidationError(f"{row['date']}: OHLC out of range {row}")
+        if prev_close is not None and abs(row["close"] / prev_close - 1) > MAX_SPLICE_MOVE:
+            raise ValidationError(f"{row['date']}: close moved {row['close'] / prev_close - 1:+.1%} from {prev_close}")
+        if prev_date:
+            gap = (date.fromisoformat(row["date"]) - date.fromisoformat(prev_date)).days
+            if gap > GAP_WARN_DAYS:
+                warnings.append(f"Gap: {prev_date} → {row['date']} ({gap} days)")
+        clean.append(row)
+        prev_date, prev_close = row["date"], row["close"]
+    return clean, warnings
+
+
+def audit_append(context: list, rows: list) -> dict:
+    """Run the quality auditor over stored tail + new rows; gate on the new ones"""
+    import numpy as np
+    from audit_candles import ZSCORE_WINDOW, build_report, audit
+
+    series = context + rows
+    ts = np.array([np.datetime64(r["date"], "ms").astype(np.int64) for r in series])
+    cols = [np.array([float(r[c] or 0) for r in series]) for c in ("open", "high", "low", "close", "volume")]
+    report = build_report(ts, audit(ts, *cols), min_index=len(context))
+    if len(context) < ZSCORE_WINDOW:
+        report["note"] = "short history: return outliers not checked"
+    return report
+
+
+def format_row(row: dict) -> str:
+    # repr() keeps the full-precision floats the stored history uses
+    return ",".join([row["date"]] + [repr(row[c]) for c in COLUMNS[1:6]] + [str(row["volume"])]) + "\n"
+
+
+# ═══════════════════════════════════════════════════════════════
+# ATOMIC APPEND
+# ═══════════════════════════════════════════════════════════════
+
+def append_atomic(path: str, rows: list) -> str:
+    """Copy + append into a temp file, then rename over the original.
+
+    Hashes while copying so the version costs no extra pass. Returns the
+    sha256 of the new file.
+    """
+    digest = hashlib.sha256()
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix=".spx-", suffix=".csv", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            if os.path.exists(path):
+                with open(path, "rb") as src:
+                    ends_with_newline = True
+                    for chunk in iter(lambda: src.read(1 << 20), b""):
+                        digest.update(chunk)
+                        out.write(chunk)
+                        ends_with_newline = chunk.endswith(b"\n")
+                    if not ends_with_newline:
+                        digest.update(b"\n")
+                        out.write(b"\n")
+                shutil.copymode(path, tmp)
+            else:
+                head = (",".join(COLUMNS) + "\n").encode()
+                digest.update(head)
+                out.write(head)
+            tail = "".join(format_row(r) for r in rows).encode()
+            digest.update(tail)
+            out.write(tail)
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return digest.hexdigest()
+
+
+def write_meta(path: str, meta: dict):
+    tmp = meta_path(path) + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(meta, f, indent=2)
+        f.write("\n")
+    os.replace(tmp, meta_path(path))
+
+
+def count_rows(path: str) -> int:
+    with open(path, "rb") as f:
+        return max(0, sum(chunk.count(b"\n") for chunk in iter(lambda: f.read(1 << 20), b"")) - 1)
+
+
+# ═══════════════════════════════════════════════════════════════
+# MAIN
+# ═══════════════════════════════════════════════════════════════
+
+def update(csv_path: str, source, end: str = None, dry_run: bool = False) -> dict:
+    t0 = time.perf_counter()
+    exists = os.path.exists(csv_path)
+    last = read_last_row(csv_path) if exists else {}
+    start = (date.fromisoformat(last["date"]) + timedelta(days=1)).isoformat() if last else FIRST_DATE
+    end = end or (date.today() + timedelta(days=1)).isoformat()
+
+    print(f"Last stored: {last.get('date', '(none)')}")
+    print(f"Fetching:    {start} → {end} from {source.name}")
+    fetched = source.fetch(start, end) if start < end else []
+    rows, warnings = validate(fetched, last)
+    for w in warnings:
+        print(f"⚠️  {w}")
+    if rows:
+        report = audit_append(read_tail_rows(csv_path, AUDIT_CONTEXT_ROWS) if exists else [], rows)
+        for entry in report["flagged"]:
+            print(f"   audit {entry['date']}: {', '.join(entry['flags'])}")
+        if not report["ok"]:
+            raise ValidationError(f"Audit found {report['errors']} bad rows: {report['summary']}")
+
+    meta = load_meta(csv_path)
+    result = {"fetched": len(fetched), "appended": len(rows), "version": meta.get("version")}
+    if not rows:
+        print("✅ Already up to date")
+    elif dry_run:
+        print(f"Dry run: would append {len(rows)} rows ({rows[0]['date']} → {rows[-1]['date']})")
+    else:
+        previous_rows = meta.get("rows")
+        if previous_rows is None or meta.get("lastDate") != last.get("date"):
+            previous_rows = count_rows(csv_path) if exists else 0
+        version = append_atomic(csv_path, rows)
+        meta = {
+            "version": version,
+            "rows": previous_rows + len(rows),
+            "firstDate": meta.get("firstDate") or read_first_date(csv_path),
+            "lastDate": rows[-1]["date"],
+            "source": source.name,
+            "updatedAt": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }
+        write_meta(csv_path, meta)
+        result["version"] = version
+        print(f"✅ Appended {len(rows)} rows ({rows[0]['date']} → {rows[-1]['date']})")
+        print(f"   Rows: {meta['rows']}   Version: {version[:16]}")
+    result["elapsedSec"] = round(time.perf_counter() - t0, 3)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental SPX dataset updater")
+    parser.add_argument("--csv", default=DEFAULT_CSV)
+    parser.add_argument("--source", default="yahoo", help="yahoo or file:<path>")
+    parser.add_argument("--end", default=None, help="exclusive end date (default: tomorrow)")
+    parser.add_argument("--binary", default=None, help="candle store to rebuild, e.g. /app/data/spx_1d.candles")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("SPX Incremental Update")
+    print("=" * 60)
+    try:
+        result = update(args.csv, make_source(args.source), args.end, args.dry_run)
+        if args.binary and not args.dry_run and (result["appended"] or not os.path.exists(args.binary)):
+            from candle_store import build_from_csv
+
+            version = build_from_csv(args.csv, args.binary, "SPX", "1d")
+            print(f"✅ Rebuilt {args.binary} (version {version[:16]})")
+    except ValidationError as e:
+        print(f"\n❌ VALIDATION FAILED: {e}")
+        print("   Dataset left unchanged.")
+        sys.exit(2)
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        sys.exit(1)
+    print(f"   Elapsed: {result['elapsedSec']}s")
+
+
+if __name__ == "__main__":
+    main()
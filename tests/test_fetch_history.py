@@ -0,0 +1,195 @@
+"""
+Offline tests for scripts/fetch_history.py
+
+Raw payloads come from scripts/fixtures/history through FixtureProvider,
+so nothing here touches the network.
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+SCRIPTS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts")
+sys.path.insert(0, SCRIPTS)
+import fetch_history  # noqa: E402
+from fetch_history import FetchError, FixtureProvider, RawCache, run_entry  # noqa: E402
+
+FIXTURES = os.path.join(SCRIPTS, "fixtures", "history")
+END = "2030-01-01"
+BTC = {"symbol": "BTC", "provider": "yahoo", "ticker": "BTC-USD", "start": "2014-09-17"}
+SPX_STOOQ = {"symbol": "SPX_STOOQ", "provider": "stooq", "ticker": "^SPX", "start": "1950-01-01", "out": "spx_stooq_1d.csv"}
+
+
+class CountingProvider(FixtureProvider):
+    """Fixture payloads behind the network path (cache included), counting fetches"""
+
+    def __init__(self, base, fixtures_dir: str, failures=()):
+        super().__init__(base, fixtures_dir)
+        self.calls = 0
+        self.failures = list(failures)
+
+    def fetch_raw(self, ticker: str, start: str, end: str) -> bytes:
+        self.calls += 1
+        if self.failures:
+            raise self.failures.pop(0)
+        return super().fetch_raw(ticker, start, end)
+
+
+@pytest.fixture
+def yahoo(monkeypatch):
+    provider = CountingProvider(fetch_history.PROVIDERS["yahoo"], FIXTURES)
+    monkeypatch.setitem(fetch_history.PROVIDERS, "yahoo", provider)
+    return provider
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(fetch_history.time, "sleep", delays.append)
+    monkeypatch.setattr(fetch_history.random, "random", lambda: 0.5)
+    return delays
+
+
+def read_csv(path: str) -> list:
+    with open(path) as f:
+        return [line.rstrip("\n").split(",") for line in f]
+
+
+class TestRetry:
+    """Transient provider errors back off exponentially; permanent ones fail at once"""
+
+    def test_transient_errors_are_retried_with_backoff(self, tmp_path, yahoo, sleeps):
+        yahoo.failures = [FetchError("HTTP 503"), FetchError("HTTP 429")]
+        result = run_entry(BTC, RawCache(str(tmp_path / "cache")), str(tmp_path), END, False, None)
+        assert result["rows"] == 5
+        assert yahoo.calls == 3
+        assert sleeps == [1.0, 2.0]
+
+    def test_permanent_error_is_not_retried(self, tmp_path, yahoo, sleeps):
+        yahoo.failures = [FetchError("HTTP 404", retryable=False)]
+        with pytest.raises(FetchError, match="404"):
+            run_entry(BTC, RawCache(str(tmp_path / "cache")), str(tmp_path), END, False, None)
+        assert yahoo.calls == 1
+        assert sleeps == []
+
+    def test_gives_up_after_max_retries(self, tmp_path, yahoo, sleeps):
+        yahoo.failures = [FetchError("HTTP 503")] * (fetch_history.MAX_RETRIES + 1)
+        with pytest.raises(FetchError, match="503"):
+            run_entry(BTC, RawCache(str(tmp_path / "cache")), str(tmp_path), END, False, None)
+        assert yahoo.calls == fetch_history.MAX_RETRIES + 1
+        assert len(sleeps) == fetch_history.MAX_RETRIES
+
+
+class TestRawCache:
+    """Raw provider responses are reused on re-runs"""
+
+    def test_rerun_hits_the_cache_without_fetching(self, tmp_path, yahoo):
+        cache = RawCache(str(tmp_path / "cache"))
+        first = run_entry(BTC, cache, str(tmp_path), END, False, None)
+        second = run_entry(BTC, cache, str(tmp_path), END, False, None)
+        assert (first["cached"], second["cached"]) == (False, True)
+        assert yahoo.calls == 1
+        assert os.path.exists(cache.path(yahoo, "BTC-USD", BTC["start"], END))
+
+    def test_refresh_fetches_again(self, tmp_path, yahoo):
+        cache = RawCache(str(tmp_path / "cache"))
+        run_entry(BTC, cache, str(tmp_path), END, False, None)
+        assert run_entry(BTC, cache, str(tmp_path), END, True, None)["cached"] is False
+        assert yahoo.calls == 2
+
+    def test_fixture_runs_leave_the_cache_alone(self, tmp_path):
+        cache_dir = tmp_path / "cache"
+        run_entry(BTC, RawCache(str(cache_dir)), str(tmp_path), END, False, FIXTURES)
+        assert not cache_dir.exists()
+
+
+class TestNormalize:
+    """Every provider ends up in the canonical CSV layout"""
+
+    @pytest.mark.parametrize("entry", [BTC, SPX_STOOQ], ids=["yahoo", "stooq"])
+    def test_canonical_columns(self, tmp_path, entry):
+        result = run_entry(entry, RawCache(str(tmp_path / "cache")), str(tmp_path), END, False, FIXTURES)
+        rows = read_csv(result["out"])
+        assert rows[0] == ["date", "open", "high", "low", "close", "adj_close", "volume"]
+        assert len(rows) == 6
+        dates = [r[0] for r in rows[1:]]
+        assert dates == sorted(dates)
+        assert result["range"] == [dates[0], dates[-1]]
+        for r in rows[1:]:
+            assert len(r) == 7
+            assert all(float(v) > 0 for v in r[1:6])
+            assert int(r[6]) >= 0
+
+    def test_stooq_adj_close_is_close(self, tmp_path):
+        result = run_entry(SPX_STOOQ, RawCache(str(tmp_path / "cache")), str(tmp_path), END, False, FIXTURES)
+        assert read_csv(result["out"])[1] == ["2026-02-13", "6834.27", "6881.96", "6794.55", "6836.17", "6836.17", "5718360000"]
+
+    def test_range_dedup_and_order(self):
+        rows = [
+            {"date": "2020-01-03", "open": 3, "high": 3, "low": 3, "close": 3, "adj_close": 3, "volume": "30"},
+            {"date": "2020-01-02", "open": 1, "high": 1, "low": 1, "close": 1, "adj_close": 1, "volume": None},
+            {"date": "2020-01-02T00:00:00", "open": 2, "high": 2, "low": 2, "close": 2, "adj_close": 2, "volume": 20},
+            {"date": "2020-01-04", "open": 4, "high": 4, "low": 4, "close": 4, "adj_close": 4, "volume": 40},
+        ]
+        out = fetch_history.normalize(rows, "2020-01-01", "2020-01-04")
+        assert [r["date"] for r in out] == ["2020-01-02", "2020-01-03"]
+        assert out[0]["close"] == 2.0 and out[0]["volume"] == 20
+        assert out[1]["volume"] == 30
+
+
+class TestEmptyPayload:
+    """A payload without rows fails its symbol and is neither cached nor written"""
+
+    @pytest.fixture
+    def empty_fixtures(self, tmp_path):
+        directory = tmp_path / "fixtures" / "yahoo"
+        directory.mkdir(parents=True)
+        (directory / "BTC-USD.json").write_text(json.dumps({"chart": {"result": [{"meta": {}, "timestamp": []}], "error": None}}))
+        return str(tmp_path / "fixtures")
+
+    def test_empty_payload_is_rejected(self, tmp_path, empty_fixtures, monkeypatch):
+        provider = CountingProvider(fetch_history.PROVIDERS["yahoo"], empty_fixtures)
+        monkeypatch.setitem(fetch_history.PROVIDERS, "yahoo", provider)
+        cache = RawCache(str(tmp_path / "cache"))
+        with pytest.raises(FetchError, match="no rows"):
+            run_entry(BTC, cache, str(tmp_path / "out"), END, False, None)
+        assert provider.calls == 1
+        assert cache.get(provider, "BTC-USD", BTC["start"], END) is None
+        assert not (tmp_path / "out" / "btc_1d.csv").exists()
+
+    def test_empty_cached_payload_is_refetched(self, tmp_path, yahoo):
+        cache = RawCache(str(tmp_path / "cache"))
+        cache.put(json.dumps({"chart": {"result": [{"timestamp": []}]}}).encode(), yahoo, "BTC-USD", BTC["start"], END)
+        result = run_entry(BTC, cache, str(tmp_path), END, False, None)
+        assert result["cached"] is False and result["rows"] == 5
+        assert yahoo.calls == 1
+
+
+class TestShrinkGuard:
+    """An existing CSV is not replaced by one with far fewer rows"""
+
+    def existing(self, tmp_path, rows: int) -> str:
+        path = tmp_path / "btc_1d.csv"
+        lines = [f"2020-01-{i + 1:02d},1.0,1.0,1.0,1.0,1.0,0\n" for i in range(rows)]
+        path.write_text("date,open,high,low,close,adj_close,volume\n" + "".join(lines))
+        return str(path)
+
+    def test_shrink_is_refused(self, tmp_path, yahoo):
+        path = self.existing(tmp_path, 20)
+        cache = RawCache(str(tmp_path / "cache"))
+        with pytest.raises(FetchError, match="--allow-shrink"):
+            run_entry(BTC, cache, str(tmp_path), END, False, None)
+        assert len(read_csv(path)) == 21
+        assert cache.get(yahoo, "BTC-USD", BTC["start"], END) is None
+
+    def test_allow_shrink_replaces(self, tmp_path, yahoo):
+        path = self.existing(tmp_path, 20)
+        run_entry(BTC, RawCache(str(tmp_path / "cache")), str(tmp_path), END, False, None, allow_shrink=True)
+        assert len(read_csv(path)) == 6
+
+    def test_small_decrease_is_accepted(self, tmp_path, yahoo):
+        path = self.existing(tmp_path, 8)
+        run_entry(BTC, RawCache(str(tmp_path / "cache")), str(tmp_path), END, False, None)
+        assert len(read_csv(path)) == 6
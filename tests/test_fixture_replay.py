@@ -0,0 +1,200 @@
+"""
+Offline tests for scripts/fixture_replay.py
+
+The recorder runs in front of an httpx.MockTransport upstream and the
+replay app under TestClient, so nothing here opens a socket.
+"""
+
+import gzip
+import json
+import os
+import sys
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+SCRIPTS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts")
+sys.path.insert(0, SCRIPTS)
+from fixture_replay import FixtureSet, Latency, record_app, replay_app, request_key  # noqa: E402
+
+UPSTREAM = "http://upstream"
+
+
+class Upstream:
+    """Echoes method, path, query and body; counts calls"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        if request.url.path.endswith("/blob"):
+            return httpx.Response(200, content=bytes(range(256)), headers={"content-type": "application/octet-stream"})
+        payload = {
+            "method": request.method,
+            "path": request.url.path,
+            "query": sorted(request.url.params.multi_items()),
+            "body": request.content.decode(),
+        }
+        return httpx.Response(200, json=payload)
+
+
+@pytest.fixture
+def upstream():
+    return Upstream()
+
+
+def record(upstream: Upstream, out: str, requests, flush_every: int = 1000):
+    app = record_app(UPSTREAM, out, flush_every, transport=httpx.MockTransport(upstream.handler))
+    with TestClient(app) as client:
+        return [client.request(method, url, content=body) for method, url, body in requests]
+
+
+def replay(fixtures: FixtureSet, loose_query: bool = False) -> TestClient:
+    return TestClient(replay_app(fixtures, Latency("none", 0, 1.0, 0.0, 0), loose_query))
+
+
+class TestRequestKey:
+    """Requests match on method + path + sorted query + write body hash"""
+
+    def test_query_order_does_not_matter(self):
+        a = request_key("get", "/api/x/", [("b", "2"), ("a", "1")])
+        b = request_key("GET", "api/x", [("a", "1"), ("b", "2")])
+        assert a == b == "GET /api/x?a=1&b=2"
+
+    def test_query_values_matter(self):
+        assert request_key("GET", "api/x", [("a", "1")]) != request_key("GET", "api/x", [("a", "2")])
+
+    def test_body_hash_is_part_of_the_key(self):
+        empty = request_key("POST", "api/x", [])
+        one = request_key("POST", "api/x", [], b'{"n":1}')
+        two = request_key("POST", "api/x", [], b'{"n":2}')
+        assert empty == "POST /api/x?"
+        assert one.startswith("POST /api/x? #") and len({empty, one, two}) == 3
+        assert one == request_key("POST", "api/x", [], b'{"n":1}')
+
+
+class TestRecordReplay:
+    """Recorded responses come back byte for byte through the replay app"""
+
+    def test_round_trip(self, tmp_path, upstream):
+        out = str(tmp_path / "live.fixtures.gz")
+        recorded = record(upstream, out, [
+            ("GET", "/api/fractal/v2.1/terminal?symbol=BTC&focus=30d", b""),
+            ("POST", "/api/fractal/v2.1/admin/jobs", b'{"n":1}'),
+            ("GET", "/api/blob", b""),
+        ])
+        assert upstream.calls == 3
+
+        fixtures = FixtureSet.load(out)
+        assert fixtures.upstream == UPSTREAM
+        assert len(fixtures.entries) == 3
+        with replay(fixtures) as client:
+            # Query order differs from the recording
+            terminal = client.get("/api/fractal/v2.1/terminal?focus=30d&symbol=BTC")
+            assert terminal.status_code == 200
+            assert terminal.content == recorded[0].content
+            assert client.post("/api/fractal/v2.1/admin/jobs", content=b'{"n":1}').json()["body"] == '{"n":1}'
+            blob = client.get("/api/blob")
+            assert blob.content == bytes(range(256))
+            assert blob.headers["content-type"] == "application/octet-stream"
+
+    def test_unrecorded_body_and_query_miss(self, tmp_path, upstream):
+        out = str(tmp_path / "live.fixtures.gz")
+        record(upstream, out, [
+            ("GET", "/api/chart?limit=365", b""),
+            ("POST", "/api/jobs", b'{"n":1}'),
+        ])
+        with replay(FixtureSet.load(out)) as client:
+            assert client.post("/api/jobs", content=b'{"n":2}').status_code == 404
+            miss = client.get("/api/chart?limit=30")
+            assert miss.status_code == 404
+            assert miss.json()["key"] == "GET /api/chart?limit=30"
+            stats = client.get("/api/_replay/stats").json()["data"]
+            assert (stats["hits"], stats["misses"]) == (0, 2)
+
+    def test_loose_query_falls_back_to_the_path(self, tmp_path, upstream):
+        out = str(tmp_path / "live.fixtures.gz")
+        record(upstream, out, [("GET", "/api/chart?limit=365", b"")])
+        with replay(FixtureSet.load(out), loose_query=True) as client:
+            resp = client.get("/api/chart?limit=30")
+            assert resp.status_code == 200
+            assert resp.json()["query"] == [["limit", "365"]]
+            assert client.get("/api/other").status_code == 404
+
+    def test_health_and_prewarm_are_answered_unrecorded(self):
+        with replay(FixtureSet()) as client:
+            assert client.get("/api/health").json() == {"ok": True}
+            assert client.post("/api/ops/prewarm").json()["data"]["ok"] is True
+
+    def test_periodic_flush_and_resume(self, tmp_path, upstream):
+        out = str(tmp_path / "live.fixtures.gz")
+        record(upstream, out, [("GET", "/api/a", b""), ("GET", "/api/a", b"")], flush_every=1)
+        entry = FixtureSet.load(out).entries["GET /api/a?"]
+        assert len(entry["timingsMs"]) == 2
+
+        # A second session appends to the existing file
+        record(upstream, out, [("GET", "/api/b", b"")])
+        assert sorted(FixtureSet.load(out).entries) == ["GET /api/a?", "GET /api/b?"]
+
+
+class TestFixtureFile:
+    """Identical bodies are stored once; the format is versioned"""
+
+    def test_save_load_round_trip(self, tmp_path):
+        fixtures = FixtureSet("http://up")
+        fixtures.add("GET /api/a?", "GET", "/api/a", 200, "application/json", b'{"x":1}', 12.345)
+        fixtures.add("GET /api/b?", "GET", "/api/b", 200, "application/json", b'{"x":1}', 3.0)
+        fixtures.add("GET /api/c?", "GET", "/api/c", 200, "application/octet-stream", b"\xff\x00", 1.0)
+        path = str(tmp_path / "f.gz")
+        fixtures.save(path)
+
+        loaded = FixtureSet.load(path)
+        assert loaded.entries == fixtures.entries
+        assert len(loaded.bodies) == 2
+        assert loaded.entries["GET /api/a?"]["timingsMs"] == [12.35]
+
+    def test_replaced_bodies_are_not_saved(self, tmp_path):
+        fixtures = FixtureSet()
+        fixtures.add("GET /api/a?", "GET", "/api/a", 200, "application/json", b"old", 1.0)
+        fixtures.add("GET /api/a?", "GET", "/api/a", 200, "application/json", b"new", 2.0)
+        doc = fixtures.snapshot()
+        assert len(doc["bodies"]) == 1
+        assert doc["entries"]["GET /api/a?"]["timingsMs"] == [1.0, 2.0]
+
+    def test_unknown_format_is_rejected(self, tmp_path):
+        path = tmp_path / "f.gz"
+        path.write_bytes(gzip.compress(json.dumps({"format": 99, "entries": {}, "bodies": {}}).encode()))
+        with pytest.raises(ValueError, match="format 99"):
+            FixtureSet.load(str(path))
+
+
+class TestLatency:
+    """Delays are deterministic per seed"""
+
+    ENTRY = {"timingsMs": [10.0, 20.0, 30.0]}
+
+    def delays(self, latency: Latency, n: int = 20) -> list:
+        return [latency.delay_sec(self.ENTRY) for _ in range(n)]
+
+    def test_none_and_fixed(self):
+        assert Latency("none", 50, 1.0, 0.5, 0).delay_sec(self.ENTRY) == 0.0
+        assert Latency("fixed", 50, 2.0, 0.0, 0).delay_sec(self.ENTRY) == 0.1
+
+    def test_recorded_samples_the_route_timings(self):
+        delays = self.delays(Latency("recorded", 50, 1.0, 0.0, 7))
+        assert set(delays) <= {0.01, 0.02, 0.03}
+        assert len(set(delays)) > 1
+        # Routes without timings fall back to --ms
+        assert Latency("recorded", 50, 1.0, 0.0, 7).delay_sec({"timingsMs": []}) == 0.05
+
+    def test_same_seed_same_delays(self):
+        a = self.delays(Latency("recorded", 50, 1.5, 0.2, 42))
+        assert a == self.delays(Latency("recorded", 50, 1.5, 0.2, 42))
+        assert a != self.delays(Latency("recorded", 50, 1.5, 0.2, 43))
+
+    def test_jitter_stays_in_bounds(self):
+        delays = self.delays(Latency("fixed", 100, 1.0, 0.1, 3), 200)
+        assert all(0.09 <= d <= 0.11 for d in delays)
+        assert len(set(delays)) > 1
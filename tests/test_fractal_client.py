@@ -0,0 +1,212 @@
+"""
+Offline tests for clients/python/fractal_client
+
+A FakeBackend behind httpx.MockTransport answers every endpoint and can
+move the dataset version while requests are in flight, so nothing here
+touches the network.
+"""
+
+import asyncio
+import os
+import sys
+
+import httpx
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "clients", "python"))
+from fractal_client import FractalAPIError, FractalClient  # noqa: E402
+
+VERSION_PATH = "/api/ops/dataset-version"
+PULSE_PATH = "/api/fractal/v2.1/consensus-pulse"
+
+
+class FakeBackend:
+    """Counts requests per path; `on` hooks may bump the version or answer instead"""
+
+    def __init__(self):
+        self.version = 1
+        self.calls: dict = {}
+        self.on: dict = {}
+
+    def bump(self):
+        self.version += 1
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        self.calls[path] = self.calls.get(path, 0) + 1
+        hook = self.on.get(path)
+        if hook is not None:
+            answer = hook(self.calls[path])
+            if answer is not None:
+                return answer
+        if path == VERSION_PATH:
+            return httpx.Response(200, json={"ok": True, "data": {"version": f"v{self.version}"}})
+        if path.endswith("/focus-pack"):
+            return httpx.Response(200, json={"ok": True, "durationMs": 1, "focusPack": {"version": self.version}})
+        if path.endswith("/chart"):
+            return httpx.Response(200, json={"symbol": "BTC", "count": 0, "candles": []})
+        return httpx.Response(200, json={"ok": True, "path": path, "version": self.version})
+
+
+@pytest.fixture
+def backend():
+    return FakeBackend()
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+
+    async def sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+    return delays
+
+
+def run(backend: FakeBackend, fn, **kwargs):
+    """Run `fn(api)` against the fake backend on a fresh client"""
+
+    async def main():
+        async with FractalClient("http://test", transport=httpx.MockTransport(backend.handler), **kwargs) as api:
+            return await fn(api)
+
+    return asyncio.run(main())
+
+
+class TestVersionCache:
+    """Answers are cached per dataset version and never filed under a moved one"""
+
+    def test_hit_within_a_version(self, backend):
+        async def fn(api):
+            first = await api.consensus_pulse()
+            second = await api.consensus_pulse()
+            return first, second, api.cache.stats()
+
+        first, second, stats = run(backend, fn)
+        assert first == second
+        assert backend.calls[PULSE_PATH] == 1
+        assert (stats["hits"], stats["misses"]) == (1, 1)
+
+    def test_new_version_misses(self, backend):
+        async def fn(api):
+            await api.consensus_pulse()
+            backend.bump()
+            return await api.consensus_pulse()
+
+        body = run(backend, fn, version_ttl=0)
+        assert body["version"] == 2
+        assert backend.calls[PULSE_PATH] == 2
+
+    def test_query_is_part_of_the_key(self, backend):
+        async def fn(api):
+            await api.consensus_pulse(days=7)
+            await api.consensus_pulse(days=30)
+
+        run(backend, fn)
+        assert backend.calls[PULSE_PATH] == 2
+
+    def test_no_put_when_version_moves_mid_request(self, backend):
+        backend.on[PULSE_PATH] = lambda n: backend.bump() if n == 1 else None
+
+        async def fn(api):
+            await api.consensus_pulse()
+            entries = api.cache.stats()["entries"]
+            await api.consensus_pulse()
+            return entries
+
+        assert run(backend, fn) == 0
+        assert backend.calls[PULSE_PATH] == 2
+
+    def test_unknown_version_is_not_cached(self, backend):
+        backend.on[VERSION_PATH] = lambda n: httpx.Response(500, json={"ok": False})
+
+        async def fn(api):
+            await api.consensus_pulse()
+            await api.consensus_pulse()
+            return api.cache.stats()
+
+        assert run(backend, fn)["entries"] == 0
+        assert backend.calls[PULSE_PATH] == 2
+
+
+class TestRetry:
+    """429/503 are retried after Retry-After, with backoff when it is missing"""
+
+    def test_retry_after_is_honoured(self, backend, sleeps):
+        answers = {
+            1: httpx.Response(429, headers={"Retry-After": "2"}),
+            2: httpx.Response(503, headers={"Retry-After": "0.5"}),
+        }
+        backend.on[PULSE_PATH] = answers.get
+
+        body = run(backend, lambda api: api.get(PULSE_PATH, use_cache=False))
+        assert body["ok"] is True
+        assert backend.calls[PULSE_PATH] == 3
+        assert sleeps == [2.0, 0.5]
+
+    def test_backoff_without_retry_after_and_cap(self, backend, sleeps):
+        answers = {1: httpx.Response(503), 2: httpx.Response(429, headers={"Retry-After": "120"})}
+        backend.on[PULSE_PATH] = answers.get
+
+        run(backend, lambda api: api.get(PULSE_PATH, use_cache=False))
+        assert sleeps == [0.5, 30.0]
+
+    def test_gives_up_after_max_retries(self, backend, sleeps):
+        backend.on[PULSE_PATH] = lambda n: httpx.Response(503, headers={"Retry-After": "1"}, json={"ok": False})
+
+        with pytest.raises(FractalAPIError) as err:
+            run(backend, lambda api: api.get(PULSE_PATH, use_cache=False), max_retries=2)
+        assert err.value.status == 503
+        assert backend.calls[PULSE_PATH] == 3
+        assert sleeps == [1.0, 1.0]
+
+    def test_other_errors_are_not_retried(self, backend, sleeps):
+        backend.on[PULSE_PATH] = lambda n: httpx.Response(404, json={"ok": False})
+
+        with pytest.raises(FractalAPIError, match="404"):
+            run(backend, lambda api: api.get(PULSE_PATH, use_cache=False))
+        assert backend.calls[PULSE_PATH] == 1
+        assert sleeps == []
+
+
+class TestDashboard:
+    """One sweep per dataset version, repeated once if it moves; failures per part"""
+
+    TERMINAL_PATH = "/api/fractal/v2.1/terminal"
+
+    def dashboard(self, backend):
+        return run(backend, lambda api: api.dashboard(assets=["BTC"], horizons=["7d", "30d"]), cache=False)
+
+    def test_single_sweep_when_version_is_stable(self, backend):
+        board = self.dashboard(backend)
+        assert board.version == "v1"
+        assert backend.calls[self.TERMINAL_PATH] == 1
+        assert sorted(board.focus["BTC"]) == ["30d", "7d"]
+        assert "BTC" in board.terminals and "BTC" in board.charts
+        assert board.errors == {}
+
+    def test_repeats_once_when_version_moves(self, backend):
+        backend.on[self.TERMINAL_PATH] = lambda n: backend.bump() if n == 1 else None
+
+        board = self.dashboard(backend)
+        assert board.version == "v2"
+        assert backend.calls[self.TERMINAL_PATH] == 2
+        assert board.focus["BTC"]["7d"].pack == {"version": 2}
+
+    def test_repeats_at_most_once(self, backend):
+        backend.on[self.TERMINAL_PATH] = lambda n: backend.bump()
+
+        board = self.dashboard(backend)
+        assert board.version == "v2"
+        assert backend.calls[self.TERMINAL_PATH] == 2
+
+    def test_failed_parts_are_collected(self, backend):
+        backend.on["/api/fractal/v2.1/chart"] = lambda n: httpx.Response(500, json={"ok": False, "error": "boom"})
+
+        board = self.dashboard(backend)
+        assert list(board.errors) == ["chart:BTC"]
+        assert board.errors["chart:BTC"].startswith("FractalAPIError: HTTP 500")
+        assert "BTC" in board.terminals and "BTC" not in board.charts
+        assert "consensus:BTC" in board.extras